@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Benchmark for tuxgrade's own orchestration overhead.
+
+Runs the real Fedora and Debian update flows against fake package managers
+(see benchmarks/shims.py) and reports:
+
+- startup time of the tuxgrade command
+- end-to-end time of each update flow, the number of commands it ran, and
+  the overhead per command on top of spawning the fakes directly
+- how the runner and UI scale with the amount of command output
+- how per-command latency adds up over a whole run
+
+Usage:
+    python benchmarks/bench_orchestration.py [repeats]
+"""
+
+import sys
+import os
+import contextlib
+import statistics
+import subprocess
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.shims import ShimEnvironment
+from src.distros.debian_distro import DebianDistro
+from src.distros.fedora_distro import FedoraDistro
+from src.package_managers import dnf
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+KERNEL_UPDATE = {
+    "dnf check-upgrade": {"exit_code": 100, "stdout": "kernel.x86_64    6.17.12-300.fc43    updates\n"},
+}
+
+
+@contextlib.contextmanager
+def quiet():
+    """Send stdout (including live subprocess output) to /dev/null."""
+    sys.stdout.flush()
+    saved_fd = os.dup(1)
+    saved_stdout = sys.stdout
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+        sys.stdout = devnull
+        try:
+            yield
+        finally:
+            sys.stdout = saved_stdout
+            os.dup2(saved_fd, 1)
+            os.close(saved_fd)
+
+
+def timed(function, repeats: int) -> float:
+    """Return the median wall time of a function in seconds."""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def report(label: str, seconds: float, extra: str = "") -> None:
+    """Print one benchmark result line."""
+    print(f"  {label:<44} {seconds * 1000:10.1f} ms  {extra}")
+
+
+def bench_startup(repeats: int) -> None:
+    """Measure how long `tuxgrade --version` takes to start and exit."""
+    print("\nStartup:")
+    env = {**os.environ, "PYTHONPATH": PROJECT_ROOT}
+    command = [sys.executable, "-m", "src.main", "--version"]
+    report("tuxgrade --version", timed(
+        lambda: subprocess.run(command, env=env, cwd=PROJECT_ROOT, capture_output=True, check=True), repeats))
+    report("python -c pass (interpreter baseline)", timed(
+        lambda: subprocess.run([sys.executable, "-c", "pass"], check=True), repeats))
+
+
+def bench_flows(shims: ShimEnvironment, repeats: int) -> None:
+    """Measure the full Fedora and Debian update flows against zero-latency fakes."""
+    print("\nUpdate flows (zero-latency fakes):")
+    spawn = timed(lambda: subprocess.run(["flatpak", "--version"], capture_output=True), repeats * 5)
+    report("spawn one fake directly", spawn)
+
+    flows = [
+        ("Fedora, kernel update, --brew", lambda: FedoraDistro().update(False, True, "allow"), KERNEL_UPDATE),
+        ("Fedora, no kernel update", lambda: FedoraDistro().update(False, False, "allow"), {}),
+        ("Debian, --brew", lambda: DebianDistro().update(False, True, "allow"), {}),
+    ]
+    for label, flow, commands in flows:
+        shims.configure({"commands": commands})
+        shims.calls()
+        with quiet():
+            elapsed = timed(flow, repeats)
+        count = len(shims.calls()) // repeats
+        overhead = (elapsed - count * spawn) / max(count, 1)
+        report(label, elapsed, f"{count} commands, {overhead * 1000:.2f} ms overhead/command")
+
+
+def bench_output_scaling(shims: ShimEnvironment, repeats: int) -> None:
+    """Measure the DNF update step with growing amounts of output."""
+    print("\nOutput scaling (dnf update):")
+    for lines in (0, 1000, 10000, 100000):
+        shims.configure({"commands": {"dnf update": {"lines": lines}}})
+        for verbose in (False, True):
+            with quiet():
+                elapsed = timed(lambda: dnf.update_dnf(show_live_output=verbose), repeats)
+            report(f"{lines:>6} lines, {'live' if verbose else 'captured'}", elapsed)
+
+
+def bench_latency(shims: ShimEnvironment) -> None:
+    """Compare a Fedora run with slow fakes to the sum of their latencies."""
+    print("\nLatency (every fake takes 50 ms):")
+    shims.configure({"default": {"latency": 0.05}, "commands": KERNEL_UPDATE})
+    shims.calls()
+    with quiet():
+        elapsed = timed(lambda: FedoraDistro().update(False, True, "allow"), 1)
+    count = len(shims.calls())
+    report("Fedora, kernel update, --brew", elapsed, f"{count} commands, {count * 50} ms if run serially")
+
+
+def main():
+    """Run the orchestration benchmark."""
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print("=" * 60)
+    print(f"Orchestration Benchmark (median of {repeats} runs)")
+    print("=" * 60)
+
+    bench_startup(repeats)
+    with ShimEnvironment() as shims:
+        bench_flows(shims, repeats)
+        bench_output_scaling(shims, repeats)
+        bench_latency(shims)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
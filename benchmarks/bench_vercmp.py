@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Benchmark for RPM and Debian version sorting.
+
+Sorts tens of thousands of generated EVR strings with the key functions from
+src.core.vercmp and compares them with pairwise comparison via cmp_to_key.
+
+Usage:
+    python benchmarks/bench_vercmp.py [count]
+"""
+
+import sys
+import os
+import random
+import time
+from functools import cmp_to_key
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core import vercmp
+
+
+def generate_rpm_evrs(count: int, seed: int = 17) -> list[str]:
+    """Generate realistic RPM EVR strings."""
+    rng = random.Random(seed)
+    suffixes = ["", "~rc1", "~rc2", "^git20240101", "a", "p1"]
+    evrs = []
+    for _ in range(count):
+        epoch = f"{rng.choice([0, 0, 0, 1, 2])}:" if rng.random() < 0.1 else ""
+        version = ".".join(str(rng.randint(0, 40)) for _ in range(rng.randint(1, 4))) + rng.choice(suffixes)
+        release = f"{rng.randint(1, 400)}.fc{rng.randint(38, 43)}"
+        evrs.append(f"{epoch}{version}-{release}")
+    return evrs
+
+
+def generate_dpkg_versions(count: int, seed: int = 17) -> list[str]:
+    """Generate realistic Debian version strings."""
+    rng = random.Random(seed)
+    revisions = ["1", "2ubuntu1", "0ubuntu8.3", "1~bpo12+1", "3+deb12u1"]
+    versions = []
+    for _ in range(count):
+        epoch = f"{rng.randint(1, 3)}:" if rng.random() < 0.1 else ""
+        upstream = ".".join(str(rng.randint(0, 40)) for _ in range(rng.randint(1, 4)))
+        if rng.random() < 0.2:
+            upstream += "~rc" + str(rng.randint(1, 5))
+        versions.append(f"{epoch}{upstream}-{rng.choice(revisions)}")
+    return versions
+
+
+def measure(label: str, function) -> float:
+    """Run a function once and print the elapsed time."""
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<40} {elapsed * 1000:10.1f} ms")
+    return elapsed
+
+
+def main():
+    """Run the version sorting benchmark."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    print("=" * 60)
+    print(f"Version Sorting Benchmark ({count} versions)")
+    print("=" * 60)
+
+    rpm_evrs = generate_rpm_evrs(count)
+    dpkg_versions = generate_dpkg_versions(count)
+
+    def rpm_pairwise(a, b):
+        return vercmp.rpm_evr_compare(a, b)
+
+    print("\nRPM EVRs:")
+    keyed = measure("sorted(key=rpm_evr_key)", lambda: sorted(rpm_evrs, key=vercmp.rpm_evr_key))
+    pairwise = measure("sorted(key=cmp_to_key(rpm_evr_compare))", lambda: sorted(rpm_evrs, key=cmp_to_key(rpm_pairwise)))
+    print(f"  {'speedup':<40} {pairwise / keyed:10.1f} x")
+
+    print("\nDebian versions:")
+    keyed = measure("sorted(key=dpkg_version_key)", lambda: sorted(dpkg_versions, key=vercmp.dpkg_version_key))
+    pairwise = measure("sorted(key=cmp_to_key(dpkg_compare))", lambda: sorted(dpkg_versions, key=cmp_to_key(vercmp.dpkg_compare)))
+    print(f"  {'speedup':<40} {pairwise / keyed:10.1f} x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""Fake package manager executables for benchmarks.
+
+Installs small stand-ins for dnf, apt, flatpak, snap, brew, dracut, akmods
+(plus pass-through sudo and bash) into a temporary directory and puts it at
+the front of PATH, so tuxgrade's real orchestration code runs end to end
+without touching the system.
+
+Each fake reads a JSON configuration and behaves per command:
+
+    {
+        "default": {"latency": 0.0, "lines": 0, "exit_code": 0},
+        "commands": {
+            "dnf check-upgrade": {"exit_code": 100, "stdout": "kernel.x86_64 6.17.12-300.fc43 updates\\n"},
+            "dnf update": {"latency": 0.5, "lines": 5000}
+        }
+    }
+
+A command is matched as "<name> <subcommand>" first, then "<name>", then the
+default. `latency` is slept before any output, `lines` lines of filler
+output follow the optional fixed `stdout`. Every call is appended to a log
+file, so benchmarks can count the commands that were run.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+FAKE_COMMANDS = ["dnf", "apt", "flatpak", "snap", "brew", "dracut", "akmods"]
+
+SHIM_SCRIPT = '''\
+import json, os, sys, time
+
+name = os.path.basename(sys.argv[0])
+args = sys.argv[1:]
+with open(os.environ["TUXGRADE_SHIM_CONFIG"]) as f:
+    config = json.load(f)
+with open(os.environ["TUXGRADE_SHIM_LOG"], "a") as f:
+    f.write(" ".join([name] + args) + "\\n")
+
+subcommand = next((arg for arg in args if not arg.startswith("-")), "")
+commands = config.get("commands", {})
+behaviour = dict(config.get("default", {}))
+behaviour.update(commands.get(name, {}))
+behaviour.update(commands.get(f"{name} {subcommand}", {}))
+
+if behaviour.get("latency"):
+    time.sleep(behaviour["latency"])
+out = sys.stdout
+out.write(behaviour.get("stdout", ""))
+line = f"{name}: fake output line for benchmarking the runner and UI ........"
+for i in range(behaviour.get("lines", 0)):
+    out.write(f"{line} {i}\\n")
+out.flush()
+sys.exit(behaviour.get("exit_code", 0))
+'''
+
+SUDO_SCRIPT = '''\
+import os, sys
+args = sys.argv[1:]
+while args and args[0].startswith("-"):
+    args = args[1:]
+os.execvp(args[0], args)
+'''
+
+# `bash -lc CMD` would reset PATH in a login shell, so run CMD with sh instead
+BASH_SCRIPT = '''\
+import os, sys
+args = [arg for arg in sys.argv[1:] if arg not in ("-l", "-c", "-lc")]
+os.execvp("sh", ["sh", "-c", " ".join(args)])
+'''
+
+
+class ShimEnvironment:
+    """Context manager that puts fake package managers at the front of PATH.
+
+    Example:
+        with ShimEnvironment({"default": {"latency": 0.01}}) as shims:
+            FedoraDistro().update(False, True, "allow")
+            print(len(shims.calls()))
+    """
+
+    def __init__(self, config: dict | None = None):
+        self.config = config or {}
+        self.directory = None
+        self._saved_env = {}
+
+    def __enter__(self):
+        self.directory = tempfile.mkdtemp(prefix="tuxgrade-shims-")
+        bin_dir = os.path.join(self.directory, "bin")
+        os.makedirs(bin_dir)
+
+        scripts = {name: SHIM_SCRIPT for name in FAKE_COMMANDS}
+        scripts.update({"sudo": SUDO_SCRIPT, "bash": BASH_SCRIPT})
+        for name, script in scripts.items():
+            path = os.path.join(bin_dir, name)
+            with open(path, "w") as f:
+                # -S skips site initialisation to keep the fakes' startup cost low
+                f.write(f"#!{sys.executable} -S\n{script}")
+            os.chmod(path, 0o755)
+
+        self.log_path = os.path.join(self.directory, "calls.log")
+        self.config_path = os.path.join(self.directory, "config.json")
+        open(self.log_path, "w").close()
+        self.configure(self.config)
+
+        env = {
+            "PATH": bin_dir + os.pathsep + os.environ.get("PATH", ""),
+            "TUXGRADE_SHIM_CONFIG": self.config_path,
+            "TUXGRADE_SHIM_LOG": self.log_path,
+        }
+        for key, value in env.items():
+            self._saved_env[key] = os.environ.get(key)
+            os.environ[key] = value
+        return self
+
+    def __exit__(self, *exc_info):
+        for key, value in self._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def configure(self, config: dict) -> None:
+        """Replace the fakes' configuration (takes effect for the next call)."""
+        self.config = config
+        with open(self.config_path, "w") as f:
+            json.dump(config, f)
+
+    def calls(self) -> list[str]:
+        """Return the logged calls ("name arg ...") and clear the log."""
+        with open(self.log_path) as f:
+            calls = f.read().splitlines()
+        open(self.log_path, "w").close()
+        return calls
@@ -38,6 +38,8 @@ Alternative commands: fedora-update, fedora-upgrade, fuck
 %{_bindir}/fedora-update
 %{_bindir}/fedora-upgrade
 %{_bindir}/fuck
+%{_bindir}/tuxgrade-fleet
+%{_bindir}/tuxgraded
 
 %changelog
 * Sat Feb 07 2026 Lineax17 <lineax17@gmail.com> - 3.0.0-1
@@ -1,46 +1,133 @@
+import os
+
+from src.core import deferred, journal, pkgcache, repocache, restarts
 from src.distros.rhel_distro import RHELDistro
 from src.distros import distro_manager
 from src.distros.debian_distro import DebianDistro
 from src.distros.fedora_distro import FedoraDistro
 from src.distros.generic_distro import GenericDistro
-from src.helper import cli_print_utility, sudo_keepalive
+from src.helper import cli_print_utility, locks, policy, runner, sudo_keepalive, transcript
+from src.package_managers import apt_native, dnf_native, flatpak
+
+RESUME_HINT = "Run tuxgrade again with --resume to continue where this run stopped."
 
 
-def run(verbose: bool, brew: bool) -> int:
+def run(verbose: bool, brew: bool, kernel_policy: str = "ask", defer_rebuild: bool = False,
+        low_priority: bool = False, lock_timeout: float = 600, shared_cache: str | None = None,
+        resume: bool = False, security_only: bool = False, apps: bool = True, backend: str = "cli",
+        flatpak_prune: bool = False, detected: tuple[str, str] | None = None) -> int:
     """Main entry point for the application.
 
     Args:
         verbose: Enable verbose output
         brew: Enable Homebrew updates
+        kernel_policy: Kernel update policy ("ask", "allow" or "exclude")
+        defer_rebuild: Run initramfs/NVIDIA rebuilds as a background job
+        low_priority: Start from the reduced-priority resource policy preset
+        lock_timeout: Seconds to wait for package manager locks held by other processes
+        shared_cache: Root directory of the shared package cache, None to disable it
+        resume: Skip the steps an interrupted previous run already completed
+        security_only: Apply only security updates, skipping rebuilds without a new kernel
+        apps: Include Snap and Flatpak updates
+        backend: "native" to answer DNF/APT queries in-process through libdnf5 or python-apt,
+            "cli" to run the package manager commands
+        flatpak_prune: Remove unused Flatpak runtimes and extensions after the update
+        detected: Distribution id and name detected earlier (by the daemon), None to detect them
 
     Returns:
         int: Exit code (0 = success, non-zero = error)
     """
-    distro_id = distro_manager.detect_distro_id()
-    distro_name = distro_manager.detect_distro_name()
+    if detected is None:
+        detected = distro_manager.detect_distro_id(), distro_manager.detect_distro_name()
+    distro_id, distro_name = detected
     distro = _choose_distro(distro_id)
+    locks.timeout = lock_timeout
+    pkgcache.root = os.path.abspath(os.path.expanduser(shared_cache)) if shared_cache else None
+    dnf_native.enabled = apt_native.enabled = backend == "native"
+    flatpak.prune_unused = flatpak_prune
+
+    try:
+        policy.load(low_priority=low_priority)
+    except ValueError as e:
+        print(f"Invalid resource policy in {policy.CONFIG_PATH}: {e}")
+        return 1
 
     cli_print_utility.print_header("Detecting Linux Distribution", verbose)
     if verbose:
         print(f"Detected Linux Distribution: {distro_name}")
-    
 
-    sudo_keepalive.start()
+    deferred_message = deferred.status_message()
+    if deferred_message:
+        print(deferred_message)
+
+    journal_message = journal.begin(distro_id, resume, "security" if security_only else "full")
+    if journal_message:
+        print(journal_message)
+
+    # Nothing runs when a transcript is replayed, so sudo is not needed
+    if not transcript.replaying():
+        sudo_keepalive.start()
 
     try:
         # Perform distro-specific update process
-        distro.update(verbose, brew)
+        distro.update(verbose, brew, kernel_policy, defer_rebuild, security_only, apps)
+        journal.finish()
+        _report_restarts(verbose)
         return 0
     except KeyboardInterrupt:
+        # Commands in the background (e.g. while the kernel prompt was open) keep running otherwise
+        runner.terminate_all()
         print("Operation cancelled by user")
+        print(RESUME_HINT)
         return 130
     except Exception as e:
         print(f"Unexpected error: {e}")
+        print(RESUME_HINT)
         return 1
     finally:
         sudo_keepalive.stop()
 
 
+def check(verbose: bool) -> int:
+    """Report pending updates without updating anything.
+
+    Reads the downloaded repository metadata (see repocache.py) and only asks
+    the package manager if it cannot be read.
+
+    Args:
+        verbose: List the packages with an update
+
+    Returns:
+        int: Exit code (0 = nothing pending, 100 = updates pending, 1 = error),
+        like `dnf check-upgrade`
+    """
+    pending = repocache.check()
+    if pending is None:
+        if verbose:
+            print("Repository metadata cache not readable, asking the package manager...")
+        try:
+            pending = repocache.query_package_manager()
+        except (runner.CommandError, OSError) as e:
+            print(f"Update check failed: {e}")
+            return 1
+
+    print(repocache.summarize(pending, verbose))
+    return 100 if pending.packages else 0
+
+
+def _report_restarts(verbose: bool) -> None:
+    """Print the services to restart or the reboot needed after the update.
+
+    Args:
+        verbose: Enable verbose output
+    """
+    cli_print_utility.print_header("Check Restarts", verbose)
+    try:
+        print(restarts.summarize(restarts.check()))
+    except (runner.CommandError, OSError, ValueError, TypeError) as e:
+        print(f"Restart check failed: {e}")
+
+
 def _choose_distro(distro_id: str):
     """Factory method to create the appropriate distro instance.
 
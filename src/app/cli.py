@@ -1,6 +1,8 @@
 import argparse
 
-from src.app import app
+from src.app import app, containers
+from src.core import pkgcache
+from src.helper import log, transcript
 from src.__version__ import __version__
 
 def parse_args():
@@ -33,6 +35,120 @@ def parse_args():
         action="store_true",
         help="Update Homebrew packages (if installed)"
     )
+    parser.add_argument(
+        "--kernel",
+        choices=["ask", "allow", "exclude"],
+        default="ask",
+        help="Kernel update policy: ask for confirmation (default), allow without asking, "
+             "or exclude kernel packages from the update"
+    )
+    parser.add_argument(
+        "--defer-rebuild",
+        action="store_true",
+        help="Run the initramfs and NVIDIA module rebuilds as a low-priority background job "
+             "and return as soon as the package updates are done"
+    )
+    parser.add_argument(
+        "--low-priority",
+        action="store_true",
+        help="Run updates and rebuilds at reduced CPU and I/O priority "
+             "(per-step limits can be set in /etc/tuxgrade/policy.conf)"
+    )
+    parser.add_argument(
+        "--lock-timeout",
+        type=int,
+        default=600,
+        metavar="SECONDS",
+        help="Maximum time to wait for a package manager lock held by another process (default: 600)"
+    )
+    parser.add_argument(
+        "--security-only",
+        action="store_true",
+        help="Apply only security updates (DNF security advisories, APT security pocket) "
+             "and skip Snap and Flatpak; rebuilds only run if a new kernel is installed"
+    )
+    parser.add_argument(
+        "--with-apps",
+        action="store_true",
+        help="With --security-only, still update Snap and Flatpak packages"
+    )
+    parser.add_argument(
+        "--flatpak-prune",
+        action="store_true",
+        help="Remove Flatpak runtimes and extensions no installed application uses after the update "
+             "and report the space reclaimed"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["cli", "native"],
+        default="cli",
+        help="How package metadata is queried: run the package manager commands (default), "
+             "or load it once in-process through libdnf5 or python-apt (falls back to the commands)"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only report whether updates are pending, from the downloaded repository metadata "
+             "without running a package manager (exit code 100 if updates are pending)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run, skipping the steps it already completed "
+             "(starts over if packages changed in the meantime)"
+    )
+
+    parser.add_argument(
+        "--shared-cache",
+        nargs="?",
+        const=pkgcache.DEFAULT_ROOT,
+        metavar="DIR",
+        help="Share downloaded packages between the host and containers of the same release "
+             f"through a content-addressed cache (default DIR: {pkgcache.DEFAULT_ROOT})"
+    )
+    parser.add_argument(
+        "--containers",
+        action="store_true",
+        help="Also update toolbox and distrobox containers"
+    )
+    parser.add_argument(
+        "--container-jobs",
+        type=int,
+        default=3,
+        metavar="N",
+        help="Maximum number of containers updated at the same time (default: 3)"
+    )
+
+    # Handled by main.py before this module is imported; listed for --help
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Send the check or update to the running tuxgraded daemon instead "
+             "(see tuxgrade --daemon --help for the supported options)"
+    )
+    parser.add_argument(
+        "--journald",
+        action="store_true",
+        help="Also send log messages to the systemd journal with structured fields "
+             "(e.g. journalctl TUXGRADE_STEP=...)"
+    )
+    parser.add_argument(
+        "--record",
+        metavar="FILE",
+        help="Record every command with its timing, exit code and output to a transcript file"
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="FILE",
+        help="Replay a recorded transcript instead of running any command"
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        metavar="FACTOR",
+        help="Speed up (>1) or slow down (<1) replayed command durations, 0 to not wait (default: 1)"
+    )
 
     args = parser.parse_args()
 
@@ -40,10 +156,40 @@ def parse_args():
     verbose = args.verbose
     brew = args.brew
 
+    # Per-step log files in log.LOG_DIR, written in the background
+    log.setup(verbose, journald=args.journald)
+
+    if args.record and args.replay:
+        parser.error("--record and --replay cannot be used together")
+    try:
+        if args.record:
+            transcript.start_recording(args.record)
+        elif args.replay:
+            transcript.start_replay(args.replay, args.replay_speed)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: cannot use transcript: {e}")
+        return 1
+
+    if args.check:
+        exit_code = app.check(verbose)
+        transcript.stop()
+        return exit_code
+
     print("\n--- Tuxgrade - Linux System Updater ---\n")
 
     # Run the main update process
-    app.run(verbose, brew)
+    apps = not args.security_only or args.with_apps
+    exit_code = app.run(verbose, brew, kernel_policy=args.kernel, defer_rebuild=args.defer_rebuild,
+                        low_priority=args.low_priority, lock_timeout=args.lock_timeout,
+                        shared_cache=args.shared_cache, resume=args.resume,
+                        security_only=args.security_only, apps=apps,
+                        backend=args.backend, flatpak_prune=args.flatpak_prune)
+
+    # Update toolbox/distrobox containers unless the user cancelled
+    if args.containers and exit_code != 130:
+        containers.update_containers(verbose, max(1, args.container_jobs), args.security_only, apps, brew)
+
+    transcript.stop()
 
     print("\n--- System Upgrade finished ---\n")
 
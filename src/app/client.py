@@ -0,0 +1,163 @@
+"""Thin client of the tuxgrade daemon.
+
+`tuxgrade --daemon [options]` sends a status, check or update request to a
+running tuxgraded (see daemon.py) over its Unix socket and prints the
+progress it streams back. This module only uses the standard library and is
+imported before anything else, so the client starts without loading the
+update modules.
+
+Messages are JSON Lines: the request is one object, the daemon answers with
+any number of {"output": ...}, {"event": ...} and {"error": ...} objects and
+ends with {"exit_code": N}.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+from typing import Any
+
+# Socket of the system daemon (tuxgraded running as root)
+SYSTEM_SOCKET = "/run/tuxgraded.sock"
+
+
+def user_socket() -> str:
+    """Return the socket of a daemon running as the current user."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or f"/tmp/tuxgrade-{os.getuid()}"
+    return os.path.join(runtime_dir, "tuxgraded.sock")
+
+
+def socket_paths() -> list[str]:
+    """Return the sockets to try, in order: $TUXGRADE_SOCKET, or the user and the system daemon."""
+    if os.environ.get("TUXGRADE_SOCKET"):
+        return [os.environ["TUXGRADE_SOCKET"]]
+    if os.geteuid() == 0:
+        return [SYSTEM_SOCKET]
+    return [user_socket(), SYSTEM_SOCKET]
+
+
+def connect() -> socket.socket:
+    """Connect to the first daemon that answers.
+
+    Raises:
+        OSError: If no daemon is listening.
+    """
+    error: OSError = FileNotFoundError(f"no socket at {' or '.join(socket_paths())}")
+    for path in socket_paths():
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.connect(path)
+            return connection
+        except OSError as e:
+            connection.close()
+            if not isinstance(e, FileNotFoundError):
+                error = e
+    raise error
+
+
+def request(message: dict, on_message) -> int:
+    """Send a request to the daemon and pass each streamed message to on_message.
+
+    Args:
+        message: The request, e.g. {"command": "check"}.
+        on_message: Called with every message before the exit code.
+
+    Returns:
+        The exit code of the request.
+
+    Raises:
+        OSError: If the daemon cannot be reached or closes the connection early.
+    """
+    with connect() as connection, connection.makefile("rw", encoding="utf-8") as stream:
+        stream.write(json.dumps(message) + "\n")
+        stream.flush()
+        for line in stream:
+            reply = json.loads(line)
+            if "exit_code" in reply:
+                return int(reply["exit_code"])
+            on_message(reply)
+    raise ConnectionError("tuxgraded closed the connection")
+
+
+def print_message(message: dict, verbose: bool = False) -> None:
+    """Print a message streamed by the daemon.
+
+    Args:
+        message: One message of the response.
+        verbose: Also print the step headers, command output and progress.
+    """
+    event = message.get("event")
+    if "output" in message:
+        print(message["output"], flush=True)
+    elif "error" in message:
+        print(f"Error: {message['error']}", file=sys.stderr, flush=True)
+    elif not verbose:
+        return
+    elif event == "StepStarted":
+        print(f"\n# {message['step']}", flush=True)
+    elif event == "OutputLine":
+        print(f"  {message['line']}", flush=True)
+    elif event == "Progress":
+        print(f"  [{message['done']}/{message['total']}] {message['detail']}", flush=True)
+
+
+def main(argv: list[str]) -> int:
+    """Parse the client options and run the request through the daemon.
+
+    Args:
+        argv: Command-line arguments without "--daemon".
+
+    Returns:
+        int: Exit code of the request (1 if the daemon cannot be reached).
+    """
+    parser = argparse.ArgumentParser(
+        prog="tuxgrade --daemon",
+        description="Check for or install updates through the running tuxgraded daemon.",
+    )
+    parser.add_argument("--verbose", "-l", "--log", action="store_true",
+                        help="Show each step with its command output")
+    parser.add_argument("--status", action="store_true", help="Show the daemon's state")
+    parser.add_argument("--check", action="store_true",
+                        help="Only report whether updates are pending (exit code 100 if they are)")
+    parser.add_argument("--kernel", choices=["allow", "exclude"], default="exclude",
+                        help="Kernel update policy; the daemon cannot prompt (default: exclude)")
+    parser.add_argument("--defer-rebuild", action="store_true",
+                        help="Run initramfs and NVIDIA rebuilds as a background job")
+    parser.add_argument("--low-priority", action="store_true", help="Run updates with lowered CPU and I/O priority")
+    parser.add_argument("--lock-timeout", type=float, default=600, metavar="SECONDS",
+                        help="Seconds to wait for package manager locks (default: 600)")
+    parser.add_argument("--security-only", action="store_true", help="Apply only security updates")
+    parser.add_argument("--with-apps", action="store_true",
+                        help="With --security-only, still update Snap and Flatpak packages")
+    parser.add_argument("--flatpak-prune", action="store_true",
+                        help="Remove unused Flatpak runtimes and extensions after the update")
+    parser.add_argument("--backend", choices=["cli", "native"], default="cli",
+                        help="How package metadata is queried (default: cli)")
+    args = parser.parse_args(argv)
+
+    message: dict[str, Any]
+    if args.status:
+        message = {"command": "status"}
+    elif args.check:
+        message = {"command": "check", "verbose": args.verbose}
+    else:
+        message = {"command": "update", "verbose": args.verbose, "options": {
+            "kernel_policy": args.kernel,
+            "defer_rebuild": args.defer_rebuild,
+            "low_priority": args.low_priority,
+            "lock_timeout": args.lock_timeout,
+            "security_only": args.security_only,
+            "apps": not args.security_only or args.with_apps,
+            "backend": args.backend,
+            "flatpak_prune": args.flatpak_prune,
+        }}
+
+    try:
+        return request(message, lambda reply: print_message(reply, args.verbose))
+    except KeyboardInterrupt:
+        print("\nDisconnected; a started update continues in tuxgraded.")
+        return 130
+    except OSError as e:
+        print(f"Error: cannot reach tuxgraded ({e}). Start it or run tuxgrade without --daemon.")
+        return 1
@@ -0,0 +1,196 @@
+"""Toolbox and distrobox container updates.
+
+Discovers the toolbox and distrobox containers of the current user and runs
+the matching distro update inside each of them, several containers at a
+time. Each container gets its own container transport, so the same distro
+handlers chosen by app._choose_distro() drive the update through
+`podman exec` (or `docker exec`).
+
+Stopped containers are started for the update and stopped again afterwards.
+Only the container's own system packages are updated, unless it is confirmed
+to have its own home and Homebrew prefix: by default, both are the host's,
+so Homebrew and the Flatpak user installation are already updated there.
+"""
+
+import json
+import os
+import shutil
+from typing import NamedTuple
+
+from src.app import fleet
+from src.helper import cli_print_utility, runner, transport
+
+ENGINES = ("podman", "docker")
+LABELS = {
+    "toolbox": "com.github.containers.toolbox=true",
+    "distrobox": "manager=distrobox",
+}
+CONTAINER_MARKERS = ("/run/.containerenv", "/.dockerenv")
+# Both toolbox and distrobox mount the host's root file system here
+HOST_ROOT = "/run/host"
+# Homebrew's prefix on Linux, reached through the shared /home
+BREW_PREFIX = "/home/linuxbrew"
+
+
+class Container(NamedTuple):
+    """A toolbox or distrobox container."""
+
+    name: str
+    manager: str  # "toolbox" or "distrobox"
+    engine: str  # "podman" or "docker"
+    running: bool
+
+
+def inside_container() -> bool:
+    """Check if tuxgrade itself runs inside a container."""
+    return any(os.path.exists(marker) for marker in CONTAINER_MARKERS)
+
+
+def _parse_ps_output(output: str) -> list[dict]:
+    """Parse `ps --format json` output.
+
+    Podman prints one JSON array, docker prints one JSON object per line.
+    """
+    output = output.strip()
+    if not output:
+        return []
+    if output.startswith("["):
+        entries: list[dict] = json.loads(output)
+        return entries
+    return [json.loads(line) for line in output.splitlines() if line.strip()]
+
+
+def _container_name(entry: dict) -> str:
+    """Return the name of a container from a ps entry."""
+    names = entry.get("Names") or entry.get("Name") or ""
+    if isinstance(names, list):
+        names = names[0] if names else ""
+    return names.split(",")[0].lstrip("/")
+
+
+def _shares_home(container: Container) -> bool:
+    """Check if a container shares the user's home or the Homebrew prefix with the host.
+
+    Reads the container's mounts from `<engine> inspect`. If they cannot be
+    read, the container is assumed to share both.
+    """
+    result = runner.run([container.engine, "inspect", container.name], check=False)
+    try:
+        entries = json.loads(result.stdout) if result.returncode == 0 else []
+    except ValueError:
+        entries = []
+    if not entries:
+        return True
+
+    shared = (os.path.expanduser("~"), BREW_PREFIX)
+    for mount in entries[0].get("Mounts") or []:
+        destination = str(mount.get("Destination", "")).rstrip("/")
+        if destination and any(path == destination or path.startswith(destination + "/") for path in shared):
+            return True
+    return False
+
+
+def discover() -> list[Container]:
+    """Find the toolbox and distrobox containers of the current user.
+
+    Returns:
+        List of containers sorted by name (empty if no container engine is
+        installed or tuxgrade runs inside a container).
+    """
+    if inside_container():
+        return []
+
+    found = {}
+    for engine in ENGINES:
+        if not shutil.which(engine):
+            continue
+        for manager, label in LABELS.items():
+            result = runner.run([engine, "ps", "--all", "--filter", f"label={label}", "--format", "json"],
+                                check=False)
+            if result.returncode != 0:
+                continue
+            try:
+                entries = _parse_ps_output(result.stdout)
+            except ValueError:
+                continue
+            for entry in entries:
+                name = _container_name(entry)
+                if name and (engine, name) not in found:
+                    running = str(entry.get("State", "")).lower() == "running"
+                    found[(engine, name)] = Container(name, manager, engine, running)
+
+    return sorted(found.values(), key=lambda container: container.name)
+
+
+def update_container(container: Container, security_only: bool = False, apps: bool = True,
+                     brew: bool = False) -> fleet.HostReport:
+    """Run the distro update inside one container (a run_fleet() update callable).
+
+    Args:
+        container: The container to update.
+        security_only: If True, apply only security updates.
+        apps: If True, include Snap and Flatpak updates.
+        brew: If True, include Homebrew package updates.
+
+    Apps and Homebrew are only updated if the container has its own home and
+    Homebrew prefix; otherwise the host update already covers them.
+
+    Returns:
+        HostReport describing the outcome.
+    """
+    if (apps or brew) and _shares_home(container):
+        apps = brew = False
+
+    if not container.running:
+        try:
+            runner.run([container.engine, "start", container.name])
+        except runner.CommandError:
+            return fleet.HostReport(container.name, "failed", None, 0.0, "", "Container could not be started")
+
+    try:
+        # Kernels are never updated inside containers, so exclude them without asking
+        target = transport.ContainerTransport(container.name, engine=container.engine, host_root=HOST_ROOT)
+        return fleet.update_host(target, brew=brew, kernel_policy="exclude", security_only=security_only,
+                                 apps=apps)
+    finally:
+        if not container.running:
+            runner.run([container.engine, "stop", container.name], check=False)
+
+
+def update_containers(verbose: bool, jobs: int = 3, security_only: bool = False, apps: bool = True,
+                      brew: bool = False) -> bool:
+    """Discover and update all toolbox and distrobox containers.
+
+    Containers are updated concurrently, up to `jobs` at a time. A result line
+    is printed as each container finishes, followed by the captured output of
+    failed containers (of every container in verbose mode).
+
+    Args:
+        verbose: If True, show each container's captured output.
+        jobs: Maximum number of containers updated at the same time.
+        security_only: If True, apply only security updates in each container.
+        apps: If True, include Snap and Flatpak updates in containers with
+              their own home.
+        brew: If True, include Homebrew package updates in containers with
+              their own Homebrew prefix.
+
+    Returns:
+        True if every container was updated successfully.
+    """
+    cli_print_utility.print_header("Update Toolbox/Distrobox Containers", verbose)
+
+    containers = discover()
+    if not containers:
+        print("No toolbox or distrobox containers found.")
+        return True
+
+    print(f"Updating {len(containers)} containers: {', '.join(c.name for c in containers)}")
+    with fleet.capture_host_output():
+        reports = fleet.run_fleet(containers, lambda c: update_container(c, security_only, apps, brew), concurrency=jobs,
+                                  on_report=fleet.print_report)
+
+    succeeded = all(report.status == "succeeded" for report in reports)
+    if verbose or not succeeded:
+        print()
+        print(fleet.summarize(reports, verbose))
+    return succeeded
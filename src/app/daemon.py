@@ -0,0 +1,367 @@
+"""Long-running update daemon (tuxgraded).
+
+Every `tuxgrade` invocation starts Python, imports the update modules,
+detects the distribution and probes which package managers are installed.
+tuxgraded does that once and keeps the state warm between requests:
+
+- the detected distribution, handed to app.run
+- the results of the package manager probes (runner.probe), until the next
+  update may have installed or removed one
+- the pending updates found by a check, until the package database or the
+  downloaded metadata change (pkgdb.state_fingerprint and
+  repocache.metadata_fingerprint)
+
+Requests come over a Unix socket as JSON Lines (see client.py): "status",
+"check" and "update". An update streams its output and the events of the
+run (see events.py) back to the client while it runs; only one update runs
+at a time, and it keeps running if the client disconnects.
+
+Updates need the daemon to run as root (the system service, socket
+/run/tuxgraded.sock); they are accepted from root and from members of
+UPDATE_GROUPS, identified by the socket's peer credentials. The kernel
+policy must be "allow" or "exclude", since the daemon cannot prompt. As
+root, the daemon does not update Homebrew (which refuses to run as root) or
+the per-user Flatpak installation (which would be root's own). A daemon
+running as a user answers status and check requests only.
+"""
+
+import argparse
+import contextvars
+import grp
+import io
+import itertools
+import json
+import logging
+import os
+import pwd
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+from src.__version__ import __version__
+from src.app import app, client
+from src.core import pkgdb, repocache
+from src.distros import distro_manager
+from src.helper import events, log, runner
+from src.package_managers import flatpak
+
+# Groups whose members may start updates (they could run them with sudo anyway)
+UPDATE_GROUPS = ("wheel", "sudo", "admin")
+
+# app.run options a client may set
+UPDATE_OPTIONS = {"kernel_policy", "defer_rebuild", "low_priority", "lock_timeout", "security_only",
+                  "apps", "backend", "flatpak_prune"}
+KERNEL_POLICIES = ("allow", "exclude")
+
+_detected: tuple[str, str] | None = None
+_started = time.time()
+_update_lock = threading.Lock()
+_checked: tuple[tuple, repocache.Pending, float] | None = None
+_check_lock = threading.Lock()
+_client_output: contextvars.ContextVar = contextvars.ContextVar("client_output", default=None)
+# Id of the request a thread works for, so events are only sent to its own client
+_request_id: contextvars.ContextVar[int | None] = contextvars.ContextVar("request_id", default=None)
+_request_ids = itertools.count(1)
+
+
+class _Connection:
+    """Send JSON Lines messages to a client, from any thread."""
+
+    def __init__(self, connection: socket.socket):
+        self.socket = connection
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def send(self, message: dict) -> None:
+        """Send a message; a disconnected client is ignored, so a running update goes on."""
+        data = (json.dumps(message, default=str) + "\n").encode()
+        with self._lock:
+            if self.closed:
+                return
+            try:
+                self.socket.sendall(data)
+            except OSError:
+                self.closed = True
+
+    def finish(self, exit_code: int, error: str | None = None) -> None:
+        """End the response, with an error message if given."""
+        if error:
+            self.send({"error": error})
+        self.send({"exit_code": exit_code})
+
+
+class _OutputWriter(io.TextIOBase):
+    """Output of an update, sending each printed line to the client."""
+
+    def __init__(self, connection: _Connection):
+        self.connection = connection
+        self._buffer = ""
+
+    def write(self, text: str) -> int:
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self.connection.send({"output": line})
+        return len(text)
+
+    def flush(self) -> None:
+        if self._buffer:
+            self.connection.send({"output": self._buffer})
+            self._buffer = ""
+
+
+class _ClientStdout:
+    """Stdout replacement that sends writes to the client of the current update.
+
+    Writes from a context without a client (other requests, the daemon's own
+    messages) go to the real stdout.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def _target(self):
+        writer = _client_output.get()
+        return self._stream if writer is None else writer
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def isatty(self):
+        return _client_output.get() is None and self._stream.isatty()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def warm_up() -> None:
+    """Detect the distribution, keep probe results and load the pending updates once."""
+    global _detected
+    _detected = distro_manager.detect_distro_id(), distro_manager.detect_distro_name()
+    runner.cache_probes = True
+    try:
+        pending_updates()
+    except (runner.CommandError, OSError) as e:
+        logging.warning("Initial update check failed: %s", e)
+
+
+def pending_updates() -> repocache.Pending:
+    """Return the pending updates, cached until the package database or the metadata change.
+
+    Raises:
+        CommandError: If the package manager has to be asked and fails.
+        OSError: If the package manager has to be asked and is not installed.
+    """
+    global _checked
+    with _check_lock:
+        key = (pkgdb.state_fingerprint(), repocache.metadata_fingerprint())
+        if _checked is not None and _checked[0] == key:
+            _key, pending, checked_at = _checked
+            if pending.age is not None:
+                pending = pending._replace(age=pending.age + time.time() - checked_at)
+            return pending
+
+        cached = repocache.check()
+        pending = cached if cached is not None else repocache.query_package_manager()
+        # Asking the package manager may have refreshed the metadata
+        _checked = ((pkgdb.state_fingerprint(), repocache.metadata_fingerprint()), pending, time.time())
+        return pending
+
+
+def _peer_uid(connection: socket.socket) -> int:
+    """Return the user id of the process on the other end of the socket."""
+    credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    _pid, uid, _gid = struct.unpack("3i", credentials)
+    return int(uid)
+
+
+def may_update(uid: int) -> bool:
+    """Check if a user may start updates: root, the daemon's user or a member of UPDATE_GROUPS."""
+    if uid in (0, os.getuid()):
+        return True
+    try:
+        user = pwd.getpwuid(uid)
+    except KeyError:
+        return False
+    groups = set()
+    for gid in os.getgrouplist(user.pw_name, user.pw_gid):
+        try:
+            groups.add(grp.getgrgid(gid).gr_name)
+        except KeyError:
+            continue
+    return bool(groups & set(UPDATE_GROUPS))
+
+
+def _status(connection: _Connection) -> None:
+    """Describe the daemon and its warm state."""
+    name = _detected[1] if _detected else "unknown distribution"
+    connection.send({"output": f"tuxgraded {__version__} (pid {os.getpid()}) on {name}, "
+                               f"up {time.time() - _started:.0f}s"})
+    connection.send({"output": "Update running" if _update_lock.locked() else "Idle"})
+    if _checked is not None:
+        connection.send({"output": f"Last check: {repocache.summarize(_checked[1])}"})
+    connection.finish(0)
+
+
+def _check(connection: _Connection, verbose: bool) -> None:
+    """Report the pending updates like `tuxgrade --check`."""
+    try:
+        pending = pending_updates()
+    except (runner.CommandError, OSError) as e:
+        connection.finish(1, f"Update check failed: {e}")
+        return
+    connection.send({"output": repocache.summarize(pending, verbose)})
+    connection.finish(100 if pending.packages else 0)
+
+
+def _update(connection: _Connection, options: dict, verbose: bool, uid: int) -> None:
+    """Run an update with app.run, streaming its output and events."""
+    if os.geteuid() != 0:
+        connection.finish(1, "tuxgraded is not running as root; updates need the system service")
+        return
+    if not may_update(uid):
+        connection.finish(1, f"Updates are limited to root and members of {', '.join(UPDATE_GROUPS)}")
+        return
+    if options.pop("brew", False):
+        connection.finish(2, "Homebrew refuses to run as root; run `tuxgrade --brew` without --daemon")
+        return
+    unknown = set(options) - UPDATE_OPTIONS
+    if unknown:
+        connection.finish(2, f"Unsupported options: {', '.join(sorted(unknown))}")
+        return
+    if options.get("kernel_policy", "exclude") not in KERNEL_POLICIES:
+        connection.finish(2, "The kernel policy must be allow or exclude (the daemon cannot prompt)")
+        return
+    if not _update_lock.acquire(blocking=False):
+        connection.finish(1, "An update is already running")
+        return
+
+    # Sinks see the events of every thread; a concurrent check's are not this client's
+    request_id = _request_id.get()
+
+    def forward(event):
+        if _request_id.get() != request_id:
+            return
+        if verbose or not isinstance(event, events.OutputLine):
+            connection.send({"event": type(event).__name__, **event._asdict()})
+
+    if not isinstance(sys.stdout, _ClientStdout):
+        sys.stdout = _ClientStdout(sys.stdout)
+    # As root, "--user" would update root's installation, not the client's
+    flatpak.update_user_installation = False
+
+    output = _OutputWriter(connection)
+    token = _client_output.set(output)
+    try:
+        with events.subscribed(forward):
+            # Silent mode: command output is captured and streamed as events,
+            # never written to the daemon's terminal
+            exit_code = app.run(False, False, detected=_detected, **{"kernel_policy": "exclude", **options})
+        output.flush()
+        # The update may have installed or removed a package manager
+        runner.clear_probes()
+    finally:
+        _client_output.reset(token)
+        _update_lock.release()
+    connection.finish(exit_code)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Answer one request per connection."""
+
+    def handle(self):
+        _request_id.set(next(_request_ids))
+        connection = _Connection(self.request)
+        try:
+            request = json.loads(self.request.makefile("r", encoding="utf-8").readline())
+            command = request["command"]
+        except (ValueError, KeyError, TypeError):
+            connection.finish(2, "Malformed request")
+            return
+
+        if command == "status":
+            _status(connection)
+        elif command == "check":
+            _check(connection, bool(request.get("verbose")))
+        elif command == "update":
+            _update(connection, dict(request.get("options") or {}), bool(request.get("verbose")),
+                    _peer_uid(self.request))
+        else:
+            connection.finish(2, f"Unknown command: {command}")
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server handling each connection in its own thread."""
+
+    daemon_threads = True
+
+
+def bind(path: str) -> _Server:
+    """Create the server socket, replacing a stale socket of a stopped daemon.
+
+    Raises:
+        RuntimeError: If another daemon is listening on the socket.
+    """
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            raise RuntimeError(f"tuxgraded is already running on {path}")
+        except ConnectionRefusedError:
+            os.unlink(path)
+        finally:
+            probe.close()
+
+    server = _Server(path, _Handler)
+    # Anybody may connect to the system daemon; updates are authorized by peer credentials
+    os.chmod(path, 0o666 if os.geteuid() == 0 else 0o600)
+    return server
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Entry point of tuxgraded.
+
+    Returns:
+        int: Exit code (0 after SIGTERM/Ctrl+C, 1 if the socket is in use).
+    """
+    parser = argparse.ArgumentParser(prog="tuxgraded",
+                                     description="Keep tuxgrade's state warm and serve check/update requests.")
+    parser.add_argument("--socket", default=client.socket_paths()[0], metavar="PATH",
+                        help=f"Unix socket to listen on (default: {client.socket_paths()[0]})")
+    parser.add_argument("--journald", action="store_true", help="Also send log messages to the systemd journal")
+    args = parser.parse_args(argv)
+
+    log.setup(False, journald=args.journald)
+    try:
+        server = bind(args.socket)
+    except RuntimeError as e:
+        print(e)
+        return 1
+
+    warm_up()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"tuxgraded {__version__} listening on {args.socket}", flush=True)
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+        if _update_lock.locked():
+            print("Waiting for the running update to finish...", flush=True)
+            with _update_lock:
+                pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+"""Fleet mode - update many hosts at once.
+
+Runs the regular distro update flow for every host of an inventory, with the
+commands sent over a per-host transport (SSH, a container, or the local
+machine, see src/helper/transport.py). Hosts are updated concurrently up to a
+limit, optionally in rolling batches, and new hosts stop being started once a
+failure threshold is reached. Each host's output is captured and the results
+are aggregated into one summary.
+
+Inventory file format, one host per line (# starts a comment):
+
+    web1.example.com
+    admin@db1.example.com:2222
+    podman:fedora-test
+    local
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import contextvars
+import io
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+from src.app import app
+from src.distros import distro_manager
+from src.helper import policy, runner, sudo_keepalive, transcript, transport
+from src.__version__ import __version__
+
+
+class HostReport(NamedTuple):
+    """Result of updating one host."""
+
+    host: str
+    status: str  # "succeeded", "failed" or "skipped"
+    distro: str | None
+    seconds: float
+    output: str
+    error: str | None
+
+
+_host_output: contextvars.ContextVar = contextvars.ContextVar("host_output", default=None)
+
+
+class _HostOutput:
+    """Stdout replacement that sends writes to the current host's buffer.
+
+    Writes from a context without a host buffer go to the real stdout.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def _target(self):
+        buffer = _host_output.get()
+        return self._stream if buffer is None else buffer
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def isatty(self):
+        return _host_output.get() is None and self._stream.isatty()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+@contextlib.contextmanager
+def capture_host_output():
+    """Capture printed output per host while the fleet update runs."""
+    original = sys.stdout
+    sys.stdout = _HostOutput(original)
+    try:
+        yield
+    finally:
+        sys.stdout = original
+
+
+def read_inventory(path: str) -> list[str]:
+    """Read host entries from an inventory file.
+
+    Args:
+        path: Path to the inventory file ("-" for stdin).
+
+    Returns:
+        List of host entries in file order, without comments and blank lines.
+    """
+    stream = sys.stdin if path == "-" else open(path)
+    with stream:
+        entries = [line.split("#", 1)[0].strip() for line in stream]
+    return [entry for entry in entries if entry]
+
+
+def _describe_error(error: Exception) -> str:
+    """Format an exception raised by a host update for the summary."""
+    if isinstance(error, runner.CommandError) and error.args and isinstance(error.args[0], list):
+        return f"Command failed: {' '.join(error.args[0])}"
+    return str(error) or type(error).__name__
+
+
+def update_host(target, brew: bool = False, kernel_policy: str = "exclude", security_only: bool = False,
+                apps: bool = True) -> HostReport:
+    """Run the distro update flow on one host.
+
+    Detects the host's distribution from its /etc/os-release and runs the
+    matching distro update with all commands sent over the host's transport.
+    Printed output is captured into the report when capture_host_output()
+    is active.
+
+    Args:
+        target: Transport of the host (see transport.parse_target()).
+        brew: If True, include Homebrew package updates.
+        kernel_policy: "allow" or "exclude" (fleet updates never prompt).
+        security_only: If True, apply only security updates.
+        apps: If True, include Snap and Flatpak updates.
+
+    Returns:
+        HostReport describing the outcome.
+    """
+    output = io.StringIO()
+    token = _host_output.set(output)
+    start = time.monotonic()
+    distro_id = None
+    try:
+        with transport.use(target):
+            os_release = runner.run(["cat", "/etc/os-release"]).stdout
+            distro_id = distro_manager.distro_id_from_os_release(os_release)
+            app._choose_distro(distro_id).update(False, brew, kernel_policy, False, security_only, apps)
+        status, error = "succeeded", None
+    except Exception as e:
+        status, error = "failed", _describe_error(e)
+    finally:
+        _host_output.reset(token)
+    return HostReport(target.name, status, distro_id, time.monotonic() - start, output.getvalue(), error)
+
+
+def run_fleet(targets: list, update, concurrency: int = 10, batch_size: int | None = None,
+              max_failures: int | None = None, on_report=None) -> list[HostReport]:
+    """Update hosts concurrently in rolling batches.
+
+    Each batch is finished before the next one starts. Once `max_failures`
+    hosts have failed, hosts that have not started yet are skipped.
+
+    Args:
+        targets: Targets to update, such as host transports (anything with a
+            `name` attribute).
+        update: Callable taking a target and returning a HostReport.
+        concurrency: Maximum number of hosts updated at the same time.
+        batch_size: Number of hosts per batch (default: all hosts in one batch).
+        max_failures: Stop starting hosts after this many failures (default: never).
+        on_report: Optional callable invoked with each HostReport as it completes.
+
+    Returns:
+        List of HostReport entries in inventory order.
+    """
+    batch_size = batch_size or len(targets) or 1
+    reports: dict[int, HostReport] = {}
+    failures = 0
+    stop = threading.Event()
+    lock = threading.Lock()
+
+    def job(target):
+        nonlocal failures
+        if stop.is_set():
+            return HostReport(target.name, "skipped", None, 0.0, "", "failure threshold reached")
+        # Run in a fresh context so each host gets its own transport and output
+        report = contextvars.copy_context().run(update, target)
+        if report.status == "failed":
+            with lock:
+                failures += 1
+                if max_failures is not None and failures >= max_failures:
+                    stop.set()
+        return report
+
+    for batch_start in range(0, len(targets), batch_size):
+        batch = list(enumerate(targets[batch_start:batch_start + batch_size], start=batch_start))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(batch)))) as pool:
+            futures = {pool.submit(job, target): position for position, target in batch}
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    report = future.result()
+                    reports[futures[future]] = report
+                    if on_report is not None:
+                        on_report(report)
+            except KeyboardInterrupt:
+                # Cancel running host updates instead of waiting for them on shutdown
+                stop.set()
+                runner.terminate_all()
+                raise
+
+    return [reports[position] for position in range(len(targets))]
+
+
+def print_report(report: HostReport) -> None:
+    """Print the one-line progress result of a host."""
+    if report.status == "succeeded":
+        print(f"✅ {report.host} ({report.distro}, {report.seconds:.0f}s)", flush=True)
+    elif report.status == "failed":
+        print(f"❌ {report.host}: {report.error}", flush=True)
+    else:
+        print(f"⏭️  {report.host}: skipped ({report.error})", flush=True)
+
+
+def summarize(reports: list[HostReport], verbose: bool = False) -> str:
+    """Build the aggregated fleet summary.
+
+    Args:
+        reports: Host reports from run_fleet().
+        verbose: If True, include the captured output of every host, otherwise
+            only of failed hosts.
+
+    Returns:
+        Multi-line summary text.
+    """
+    counts = {status: sum(1 for r in reports if r.status == status)
+              for status in ("succeeded", "failed", "skipped")}
+    lines = [f"{len(reports)} hosts: {counts['succeeded']} succeeded, "
+             f"{counts['failed']} failed, {counts['skipped']} skipped"]
+
+    width = max((len(r.host) for r in reports), default=0)
+    for r in reports:
+        detail = r.error if r.error else f"{r.distro}, {r.seconds:.0f}s"
+        lines.append(f"  {r.host:<{width}}  {r.status:<9}  {detail}")
+
+    for r in reports:
+        if r.output and (verbose or r.status == "failed"):
+            lines.append("")
+            lines.append(f"--- {r.host} ---")
+            lines.append(r.output.rstrip())
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Entry point for tuxgrade-fleet.
+
+    Args:
+        argv: Command-line arguments (default: sys.argv[1:]).
+
+    Returns:
+        0 if every host succeeded, 1 if any host failed or was skipped,
+        2 for usage errors, 130 if cancelled.
+    """
+    parser = argparse.ArgumentParser(
+        prog="tuxgrade-fleet",
+        description="Update many hosts over SSH (or containers) with the Tuxgrade update flow.",
+    )
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    parser.add_argument("hosts", nargs="*", metavar="HOST",
+                        help="Hosts to update: [USER@]HOST[:PORT], podman:NAME, docker:NAME or local")
+    parser.add_argument("--inventory", "-i", metavar="FILE",
+                        help="Read hosts from FILE, one per line ('-' for stdin)")
+    parser.add_argument("--concurrency", "-j", type=int, default=10, metavar="N",
+                        help="Maximum number of hosts updated at the same time (default: 10)")
+    parser.add_argument("--batch-size", type=int, metavar="N",
+                        help="Update hosts in rolling batches of N, finishing each batch before the next")
+    parser.add_argument("--max-failures", type=int, metavar="N",
+                        help="Stop starting new hosts once N hosts have failed")
+    parser.add_argument("--kernel", choices=["allow", "exclude"], default="exclude",
+                        help="Kernel update policy (default: exclude, fleet updates never prompt)")
+    parser.add_argument("--brew", "-b", action="store_true",
+                        help="Update Homebrew packages (if installed)")
+    parser.add_argument("--security-only", action="store_true",
+                        help="Apply only security updates and skip Snap and Flatpak (for daily runs)")
+    parser.add_argument("--with-apps", action="store_true",
+                        help="With --security-only, still update Snap and Flatpak packages")
+    parser.add_argument("--low-priority", action="store_true",
+                        help="Run updates on the hosts at reduced CPU and I/O priority")
+    parser.add_argument("--verbose", "-l", "--log", action="store_true",
+                        help="Show the captured output of every host in the summary")
+    transcript_group = parser.add_mutually_exclusive_group()
+    transcript_group.add_argument("--record", metavar="FILE",
+                                  help="Record every command of every host to a transcript file")
+    transcript_group.add_argument("--replay", metavar="FILE",
+                                  help="Replay a recorded transcript instead of running any command")
+    parser.add_argument("--replay-speed", type=float, default=1.0, metavar="FACTOR",
+                        help="Speed factor for replayed command durations, 0 to not wait (default: 1)")
+    args = parser.parse_args(argv)
+
+    entries = list(args.hosts)
+    try:
+        if args.inventory:
+            entries += read_inventory(args.inventory)
+        targets = [transport.parse_target(entry) for entry in entries]
+        policy.load(low_priority=args.low_priority)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    if not targets:
+        parser.print_usage(sys.stderr)
+        print("Error: no hosts given", file=sys.stderr)
+        return 2
+    for value, option in ((args.concurrency, "--concurrency"), (args.batch_size, "--batch-size"),
+                          (args.max_failures, "--max-failures")):
+        if value is not None and value < 1:
+            print(f"Error: {option} must be at least 1", file=sys.stderr)
+            return 2
+
+    try:
+        if args.record:
+            transcript.start_recording(args.record)
+        elif args.replay:
+            transcript.start_replay(args.replay, args.replay_speed)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: cannot use transcript: {e}", file=sys.stderr)
+        return 2
+
+    if any(target.is_local for target in targets) and not transcript.replaying():
+        sudo_keepalive.start()
+    try:
+        with capture_host_output():
+            reports = run_fleet(
+                targets,
+                lambda target: update_host(target, args.brew, args.kernel, args.security_only,
+                                           not args.security_only or args.with_apps),
+                concurrency=args.concurrency,
+                batch_size=args.batch_size,
+                max_failures=args.max_failures,
+                on_report=print_report,
+            )
+    except KeyboardInterrupt:
+        print("Operation cancelled by user")
+        return 130
+    finally:
+        sudo_keepalive.stop()
+        transcript.stop()
+
+    print()
+    print(summarize(reports, args.verbose))
+    return 0 if all(r.status == "succeeded" for r in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
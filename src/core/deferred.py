@@ -0,0 +1,290 @@
+"""Deferred post-update step module.
+
+This module hands slow post-update steps (initramfs and NVIDIA module
+rebuilds) to a detached, low-priority background worker so the terminal is
+returned as soon as the package updates are done. The worker records its
+progress in a status file that the next tuxgrade run or a reboot guard can
+check.
+
+The worker is started as a transient systemd unit when systemd-run is
+available. Otherwise `sudo` starts this module with --detach, which moves the
+worker into its own session with its output in a log file, so sudo can still
+use the terminal's credentials and report a failure. The worker runs under a
+systemd-inhibit shutdown lock when possible, so a reboot cannot cut an
+initramfs rebuild short.
+
+Usage as a reboot guard:
+    python3 -m src.core.deferred --status   # exit 0 = done, 1 = failed, 2 = running
+"""
+
+import datetime
+import json
+import os
+import shutil
+import sys
+import time
+from typing import Any
+
+from src.core import init, nvidia
+from src.helper import runner, transport
+
+STATUS_DIR = "/var/lib/tuxgrade"
+STATUS_FILE = os.path.join(STATUS_DIR, "deferred.json")
+# Output of a worker started without systemd (systemd units log to the journal)
+LOG_FILE = os.path.join(STATUS_DIR, "deferred.log")
+
+# Seconds between checks whether a running worker has finished
+WAIT_INTERVAL = 2
+
+STEPS = {
+    "initramfs": lambda: init.rebuild_initramfs(True),
+    "nvidia": lambda: nvidia.rebuild_nvidia_modules(),
+}
+
+
+def _project_root() -> str:
+    """Return the directory containing the `src` package."""
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _now() -> str:
+    """Return the current local time as an ISO 8601 string."""
+    return datetime.datetime.now().astimezone().isoformat(timespec="seconds")
+
+
+def _pid_alive(pid: int) -> bool:
+    """Check if a process with the given pid exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_status() -> dict | None:
+    """Read the status of the last deferred job.
+
+    A job recorded as running whose worker process no longer exists is
+    reported as "interrupted" (e.g. the machine was rebooted mid-rebuild).
+
+    Returns:
+        The status dictionary, or None if no deferred job was ever recorded
+        (or if commands run on a remote host).
+    """
+    if not transport.current().is_local:
+        return None
+
+    try:
+        with open(STATUS_FILE) as f:
+            status: dict = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if status.get("state") == "running" and not _pid_alive(status.get("pid", 0)):
+        status["state"] = "interrupted"
+    return status
+
+
+def _write_status(status: dict) -> None:
+    """Atomically write the status file."""
+    os.makedirs(STATUS_DIR, exist_ok=True)
+    temp_path = STATUS_FILE + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(status, f, indent=2)
+    os.chmod(temp_path, 0o644)
+    os.replace(temp_path, STATUS_FILE)
+
+
+def steps_to_retry() -> list[str]:
+    """List the steps of the last deferred job that did not complete.
+
+    Returns:
+        Names of failed or interrupted steps (empty if the job succeeded, is
+        still running, or never ran).
+    """
+    status = read_status()
+    if status is None or status.get("state") not in ("failed", "interrupted"):
+        return []
+    return [name for name, state in status.get("steps", {}).items() if state != "succeeded"]
+
+
+def clear() -> None:
+    """Remove the status of a failed or interrupted job after its steps were redone.
+
+    Without this, every later run would warn about the job and redo its
+    steps again.
+    """
+    status = read_status()
+    if status is None or status.get("state") not in ("failed", "interrupted"):
+        return
+    runner.run(["sudo", "rm", "-f", STATUS_FILE])
+
+
+def _wait_for_running_job() -> None:
+    """Wait until a worker started by an earlier run has finished.
+
+    Two workers would rebuild the same initramfs images at once and
+    overwrite each other's status file.
+    """
+    status = read_status()
+    if status is None or status.get("state") != "running":
+        return
+    print(f"⏳ Waiting for the background {', '.join(status.get('steps', {}))} rebuild from "
+          f"{status.get('started')} to finish...", file=sys.stderr, flush=True)
+    while _pid_alive(status.get("pid", 0)):
+        time.sleep(WAIT_INTERVAL)
+
+
+def status_message() -> str | None:
+    """Describe the last deferred job if it needs the user's attention.
+
+    Returns:
+        A warning message if the job is still running, failed or was
+        interrupted, None otherwise.
+    """
+    status = read_status()
+    if status is None:
+        return None
+
+    steps = ", ".join(status.get("steps", {}))
+    state = status.get("state")
+    if state == "running":
+        return f"Background {steps} rebuild from {status.get('started')} is still running. Do not reboot yet."
+    if state in ("failed", "interrupted"):
+        return f"Background {steps} rebuild from {status.get('started')} {state}. It will be redone in this run."
+    return None
+
+
+def schedule(steps: list[str]) -> str:
+    """Start a detached, low-priority worker that runs the given steps.
+
+    A worker still running from an earlier run is waited for first; steps it
+    did not complete are added to the new worker, whose status replaces its.
+
+    Args:
+        steps: Step names from STEPS (e.g., ["initramfs", "nvidia"]).
+
+    Returns:
+        A status message naming the background job.
+
+    Raises:
+        CommandError: If the worker cannot be started (e.g. sudo has no
+            cached credentials without a terminal).
+    """
+    _wait_for_running_job()
+    retry = steps_to_retry()
+    steps = [name for name in STEPS if name in steps or name in retry]
+
+    if shutil.which("systemd-run"):
+        unit = f"tuxgrade-deferred-{int(time.time())}"
+        runner.run([
+            "sudo", "systemd-run", "--quiet", "--collect", "--no-block",
+            f"--unit={unit}",
+            "--property=Nice=19",
+            "--property=IOSchedulingClass=idle",
+            f"--working-directory={_project_root()}",
+            f"--setenv=PYTHONPATH={_project_root()}",
+            *_worker_command(steps),
+        ])
+        return f"Rebuilding {', '.join(steps)} in the background (systemd unit {unit})..."
+
+    # sudo runs in this session, where its cached credentials apply; the
+    # worker leaves it in _detach()
+    runner.run(["sudo", "env", f"PYTHONPATH={_project_root()}", sys.executable,
+                "-m", "src.core.deferred", "--detach", *steps])
+    return f"Rebuilding {', '.join(steps)} in the background (status in {STATUS_FILE}, output in {LOG_FILE})..."
+
+
+def _worker_command(steps: list[str]) -> list[str]:
+    """Build the worker command, under a shutdown inhibitor lock if possible."""
+    worker = [sys.executable, "-m", "src.core.deferred", *steps]
+    if shutil.which("systemd-inhibit"):
+        worker = ["systemd-inhibit", "--what=shutdown", "--mode=block", "--who=tuxgrade",
+                  f"--why=Rebuilding {', '.join(steps)} after update", *worker]
+    return worker
+
+
+def _detach(steps: list[str]) -> int:
+    """Start a low-priority worker in its own session and return without waiting.
+
+    The worker's output goes to LOG_FILE. Runs as root, started by schedule().
+
+    Args:
+        steps: Step names from STEPS.
+
+    Returns:
+        0 once the worker is started.
+    """
+    os.makedirs(STATUS_DIR, exist_ok=True)
+    log = os.open(LOG_FILE, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    if os.fork() != 0:
+        return 0
+
+    try:
+        os.setsid()
+        os.dup2(os.open(os.devnull, os.O_RDONLY), 0)
+        os.dup2(log, 1)
+        os.dup2(log, 2)
+        os.execvp("nice", ["nice", "-n", "19", "ionice", "-c", "3", *_worker_command(steps)])
+    finally:
+        # Only reached if the exec failed; its error is in the log
+        os._exit(127)
+
+
+def run_worker(steps: list[str]) -> int:
+    """Run deferred steps in order and record their progress.
+
+    Args:
+        steps: Step names from STEPS.
+
+    Returns:
+        0 if all steps succeeded, 1 otherwise.
+    """
+    status: dict[str, Any] = {
+        "state": "running",
+        "pid": os.getpid(),
+        "started": _now(),
+        "finished": None,
+        "steps": {name: "pending" for name in steps},
+        "messages": {},
+    }
+    _write_status(status)
+
+    for name in steps:
+        status["steps"][name] = "running"
+        _write_status(status)
+        try:
+            status["messages"][name] = STEPS[name]()
+            status["steps"][name] = "succeeded"
+        except Exception as e:
+            status["messages"][name] = str(e)
+            status["steps"][name] = "failed"
+
+    failed = any(state == "failed" for state in status["steps"].values())
+    status["state"] = "failed" if failed else "succeeded"
+    status["finished"] = _now()
+    _write_status(status)
+    return 1 if failed else 0
+
+
+def main(argv: list[str]) -> int:
+    """Entry point for the background worker and the --status query."""
+    if argv == ["--status"]:
+        status = read_status()
+        print(json.dumps(status, indent=2) if status else "No deferred job recorded.")
+        state = str(status.get("state")) if status else "succeeded"
+        return {"succeeded": 0, "running": 2}.get(state, 1)
+
+    detach = argv[:1] == ["--detach"]
+    steps = argv[1:] if detach else argv
+    unknown = [name for name in steps if name not in STEPS]
+    if unknown or not steps:
+        print(f"Usage: python3 -m src.core.deferred --status | [--detach] {' '.join(STEPS)}", file=sys.stderr)
+        return 2
+    return _detach(steps) if detach else run_worker(steps)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
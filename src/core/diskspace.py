@@ -0,0 +1,254 @@
+"""Disk space preflight module.
+
+Before DNF or APT downloads anything, the pending transaction is resolved
+with a dry run (`--assumeno`) and the download and install sizes it reports
+are compared with the free space of the file systems they land on:
+
+- the package cache (downloads)
+- the root file system (installed files)
+- /boot (only if a kernel is part of the transaction)
+
+Requirements of file systems that are the same device are added up. If the
+package cache is short of space, the package manager's cache is cleaned and
+the check repeated; if space is still missing, DiskSpaceError is raised so
+the run fails before the download instead of deep into the transaction.
+
+Sizes are parsed from the English dry run output of dnf4, dnf5 and apt. If
+no size can be found (nothing to update, unknown format), the check passes.
+dnf5 and apt report the net growth of the installed files. dnf4's "Installed
+size" is the gross size of the incoming packages, without the old versions
+they replace, so a root file system short of that size is only a warning.
+In-process backends that resolve the transaction themselves pass its sizes
+to check_estimate() instead.
+"""
+
+import glob
+import logging
+import os
+import re
+from typing import NamedTuple
+
+from src.core import kernel, pkgcache
+from src.helper import runner, transport
+
+MiB = 1024 * 1024
+
+# Free space kept on every file system on top of the transaction's needs
+RESERVE = 100 * MiB
+
+# /boot space of a kernel if it cannot be measured from the running one
+BOOT_KERNEL_SIZE = 150 * MiB
+
+CACHE_DIRS = {"dnf": "/var/cache", "apt": "/var/cache/apt/archives"}
+CLEAN_COMMANDS = {
+    "dnf": ["sudo", "dnf", "clean", "packages"],
+    "apt": ["sudo", "apt", "clean"],
+}
+
+UNITS = {
+    "": 1, "B": 1,
+    "k": 1024, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4,
+    "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3, "TiB": 1024 ** 4,
+    "kB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3, "TB": 1000 ** 4,
+}
+
+_SIZE = r"([\d.,]+)\s*([kKMGT]?i?B?)"
+_DOWNLOAD_PATTERNS = [
+    re.compile(r"Total download size:\s*" + _SIZE),   # dnf4
+    re.compile(r"Need to download\s+" + _SIZE),       # dnf5
+    re.compile(r"Need to get\s+" + _SIZE),            # apt (first number is what is not cached yet)
+]
+_GROSS_INSTALL_PATTERN = re.compile(r"Installed size:\s*" + _SIZE)  # dnf4
+_INSTALL_PATTERNS = [
+    re.compile(r"After this operation,\s+" + _SIZE + r"\s+extra will be used"),  # dnf5
+    re.compile(r"After this operation,\s+" + _SIZE + r"\s+of additional disk space will be used"),  # apt
+]
+_KERNEL_PATTERN = re.compile(r"^\s*(kernel|kernel-core|linux-image-\S+)\s", re.MULTILINE)
+
+
+class DiskSpaceError(RuntimeError):
+    """Exception raised when a file system is too full for the pending transaction."""
+    pass
+
+
+class Estimate(NamedTuple):
+    """Space a pending transaction needs, as reported by its dry run."""
+
+    download: int
+    install: int
+    kernel: bool
+    net: bool = True  # False if install does not subtract the replaced packages
+
+
+class Shortfall(NamedTuple):
+    """A file system without enough free space."""
+
+    path: str
+    needed: int
+    free: int
+
+
+def _parse_size(number: str, unit: str) -> int:
+    """Convert a size such as ("1,024", "kB") or ("1.5", "G") to bytes."""
+    return int(float(number.replace(",", "")) * UNITS.get(unit, 1))
+
+
+def _first_size(patterns: list[re.Pattern], text: str) -> int | None:
+    """Return the size matched by the first matching pattern, if any."""
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return _parse_size(*match.groups())
+    return None
+
+
+def parse_estimate(output: str) -> Estimate | None:
+    """Parse the download and install sizes from a dry run's output.
+
+    Args:
+        output: Output of `dnf update --assumeno` or `apt upgrade --assume-no`.
+
+    Returns:
+        The estimate, or None if the output reports no sizes.
+    """
+    download = _first_size(_DOWNLOAD_PATTERNS, output)
+    install = _first_size(_INSTALL_PATTERNS, output)
+    gross = _first_size([_GROSS_INSTALL_PATTERN], output) if install is None else None
+    if download is None and install is None and gross is None:
+        return None
+    kernel = bool(_KERNEL_PATTERN.search(output))
+    if gross is not None:
+        return Estimate(download or 0, gross, kernel, net=False)
+    return Estimate(download or 0, install or 0, kernel)
+
+
+def _kernel_boot_size() -> int:
+    """Estimate the /boot space of a new kernel from the files of the running one."""
+    if not transport.current().is_local:
+        return BOOT_KERNEL_SIZE
+    files = glob.glob(f"/boot/*{kernel.running_kernel()}*")
+    size = sum(os.path.getsize(path) for path in files if os.path.isfile(path))
+    return size or BOOT_KERNEL_SIZE
+
+
+def _cache_dir(manager: str) -> str:
+    """Return the directory downloads of a package manager go to.
+
+    With the shared cache, local downloads still go to the usual cache and
+    are hard-linked into the store (see pkgcache.py).
+    """
+    return CACHE_DIRS[manager]
+
+
+def _filesystem(path: str) -> tuple[str, int] | None:
+    """Return (device id, free bytes) of the file system holding a path.
+
+    Uses statvfs locally and `df` through the runner on other transports.
+    Missing paths are looked up through their closest existing parent.
+    """
+    if transport.current().is_local:
+        while not os.path.exists(path):
+            path = os.path.dirname(path)
+        stats = os.statvfs(path)
+        return str(os.stat(path).st_dev), stats.f_bavail * stats.f_frsize
+
+    result = runner.run(["df", "-P", "-k", path], check=False)
+    lines = result.stdout.splitlines() if result.returncode == 0 else []
+    if len(lines) < 2:
+        return None
+    fields = lines[-1].split()
+    return f"{fields[0]}:{fields[-1]}", int(fields[3]) * 1024
+
+
+def shortfalls(manager: str, estimate: Estimate) -> list[Shortfall]:
+    """Compare an estimate with the free space of the file systems it needs.
+
+    Args:
+        manager: "dnf" or "apt".
+        estimate: Sizes reported by the dry run.
+
+    Returns:
+        The file systems without enough free space (empty if all fit).
+    """
+    requirements = [(_cache_dir(manager), estimate.download), ("/", estimate.install)]
+    if estimate.kernel:
+        requirements.append(("/boot", _kernel_boot_size()))
+
+    # Add up requirements of paths on the same file system
+    devices: dict[str, list] = {}
+    for path, needed in requirements:
+        filesystem = _filesystem(path) or _filesystem("/")
+        if filesystem is None:
+            continue
+        device, free = filesystem
+        entry = devices.setdefault(device, [path, 0, free])
+        entry[1] += needed
+
+    return [Shortfall(path, needed + RESERVE, free)
+            for path, needed, free in devices.values() if needed + RESERVE > free]
+
+
+def _format_size(size: int) -> str:
+    """Format a byte count in MiB for messages."""
+    return f"{size / MiB:.0f} MiB"
+
+
+def _describe(missing: list[Shortfall]) -> str:
+    """Describe the needed and free space of short file systems for messages."""
+    return "; ".join(f"{shortfall.path} needs {_format_size(shortfall.needed)}, "
+                     f"{_format_size(shortfall.free)} free" for shortfall in missing)
+
+
+def check(manager: str, dry_run: list[str]) -> None:
+    """Fail before the download if the pending transaction does not fit on disk.
+
+    Args:
+        manager: "dnf" or "apt".
+        dry_run: Command resolving the transaction without applying it.
+
+    Raises:
+        DiskSpaceError: If a file system is still too full after cleaning the
+            package cache.
+    """
+    result = runner.run(dry_run, check=False)
+    estimate = parse_estimate(result.stdout or "")
+    if estimate is None:
+        logging.debug("No transaction size in the %s dry run, skipping the disk space check", manager)
+        return
+    check_estimate(manager, estimate)
+
+
+def check_estimate(manager: str, estimate: Estimate | None) -> None:
+    """Fail before the download if a transaction of known size does not fit on disk.
+
+    A gross install size (estimate.net is False) overstates what the root file
+    system needs, so it is checked separately and only logs a warning.
+
+    Args:
+        manager: "dnf" or "apt".
+        estimate: Space the transaction needs (None skips the check).
+
+    Raises:
+        DiskSpaceError: If a file system is still too full after cleaning the
+            package cache.
+    """
+    if estimate is None:
+        return
+    logging.debug("%s transaction: download %d bytes, install %d bytes, kernel: %s",
+                  manager, estimate.download, estimate.install, estimate.kernel)
+
+    required = estimate if estimate.net else estimate._replace(install=0)
+    missing = shortfalls(manager, required)
+    cache_dir = _cache_dir(manager)
+    if any(shortfall.path == cache_dir for shortfall in missing) and pkgcache.root is None:
+        print(f"Not enough space for the downloads in {cache_dir}. Cleaning the {manager.upper()} package cache...")
+        runner.run(CLEAN_COMMANDS[manager], check=False)
+        missing = shortfalls(manager, required)
+
+    if missing:
+        raise DiskSpaceError(f"Not enough disk space for the update ({_describe(missing)})")
+    if not estimate.net:
+        tight = shortfalls(manager, estimate)
+        if tight:
+            logging.warning("The update may not fit on disk (%s, counting the replaced packages twice)",
+                            _describe(tight))
@@ -0,0 +1,151 @@
+"""Run journal module.
+
+Records which update steps of the current run completed, so that an
+interrupted run (network drop, Ctrl+C, a failed akmods build) can be resumed
+with --resume instead of starting over at the kernel check.
+
+The journal stores the completed steps, values later steps depend on (such
+as whether a new kernel was installed), and a fingerprint of the package
+database taken after the last completed step. A journal is only resumed if
+it belongs to the same distribution and the package database is unchanged
+since then; otherwise the run starts over.
+
+The journal only covers the local machine; steps run inside containers or
+on fleet hosts are never skipped.
+"""
+
+import datetime
+import json
+import logging
+import os
+
+from src.core import pkgdb
+from src.helper import transport
+
+JOURNAL_FILE = os.path.join(
+    os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"), "tuxgrade", "journal.json"
+)
+
+_journal: dict | None = None
+_resumed: set[str] = set()
+
+
+def _now() -> str:
+    """Return the current local time as an ISO 8601 string."""
+    return datetime.datetime.now().astimezone().isoformat(timespec="seconds")
+
+
+def _read() -> dict | None:
+    """Read the journal file, None if missing or unreadable."""
+    try:
+        with open(JOURNAL_FILE) as f:
+            journal: dict = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return journal if isinstance(journal, dict) else None
+
+
+def _save() -> None:
+    """Atomically write the journal file."""
+    try:
+        os.makedirs(os.path.dirname(JOURNAL_FILE), exist_ok=True)
+        temp_path = JOURNAL_FILE + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(_journal, f, indent=2)
+        os.replace(temp_path, JOURNAL_FILE)
+    except OSError as e:
+        logging.debug("Writing run journal failed: %s", e)
+
+
+def begin(distro_id: str, resume: bool = False, mode: str = "full") -> str | None:
+    """Start journaling a run, resuming the previous one if requested and safe.
+
+    Args:
+        distro_id: Id of the detected distribution.
+        resume: If True, continue an interrupted run of the same distribution
+            and mode whose package state is unchanged.
+        mode: Kind of run ("full" or "security"); runs of another mode are not resumed.
+
+    Returns:
+        A message describing the resume decision, or None without --resume.
+    """
+    global _journal
+    previous = _read() if resume else None
+    message = None
+    _resumed.clear()
+
+    if resume:
+        if previous is None or previous.get("finished"):
+            message = "No interrupted run to resume. Starting a full run."
+        elif previous.get("distro") != distro_id:
+            message = "The interrupted run was for another distribution. Starting over."
+        elif previous.get("mode", "full") != mode:
+            message = f"The interrupted run was not a {mode} update. Starting over."
+        elif previous.get("fingerprint") != pkgdb.state_fingerprint():
+            message = "Packages changed since the interrupted run. Starting over."
+        else:
+            _resumed.update(previous.get("completed", []))
+            _journal = previous
+            _journal["resumed"] = _now()
+            _save()
+            return (f"Resuming the run from {previous.get('started')}: "
+                    f"skipping {len(_resumed)} completed steps.")
+
+    _journal = {
+        "distro": distro_id,
+        "mode": mode,
+        "started": _now(),
+        "finished": False,
+        "completed": [],
+        "values": {},
+        "fingerprint": pkgdb.state_fingerprint(),
+    }
+    _save()
+    return message
+
+
+def is_done(step: str) -> bool:
+    """Check if a step completed in the resumed run.
+
+    Args:
+        step: Step name (the step's progress description).
+
+    Returns:
+        True if the step can be skipped.
+    """
+    return transport.current().is_local and step in _resumed
+
+
+def complete(step: str, **values) -> None:
+    """Record a completed step and values that later steps depend on.
+
+    Args:
+        step: Step name (the step's progress description).
+        **values: JSON-serializable values to restore with value() on resume.
+    """
+    if _journal is None or not transport.current().is_local:
+        return
+    if step not in _journal["completed"]:
+        _journal["completed"].append(step)
+    _journal["values"].update(values)
+    _journal["fingerprint"] = pkgdb.state_fingerprint()
+    _save()
+
+
+def value(name: str, default=None):
+    """Return a value recorded with complete() in this or the resumed run."""
+    if _journal is None:
+        return default
+    return _journal["values"].get(name, default)
+
+
+def finish() -> None:
+    """Mark the run as finished, so it is never resumed."""
+    global _journal
+    if _journal is None:
+        return
+    _journal["finished"] = True
+    _journal["fingerprint"] = pkgdb.state_fingerprint()
+    _save()
+    _journal = None
+    _resumed.clear()
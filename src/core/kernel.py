@@ -4,14 +4,26 @@ This module provides functions to check for kernel updates, extract version
 information, and prompt users for confirmation before kernel upgrades.
 """
 
-from src.helper import runner
+import os
 
+from src.core import pkgdb, vercmp
+from src.helper import runner, transport
+from src.package_managers import dnf_native
 
-def new_kernel_version() -> bool:
+KERNEL_PACKAGES = ("kernel-core", "kernel")
+KERNEL_EXCLUDES = ["kernel*"]
+KERNEL_POLICIES = ("ask", "allow", "exclude")
+
+
+def new_kernel_version(security_only: bool = False) -> bool:
     """Check if a new kernel version is available via DNF.
 
     Queries DNF for kernel package updates using 'dnf check-upgrade -q kernel*'.
-    Exit code 0 means no updates, 100 means updates available.
+    Exit code 0 means no updates, 100 means updates available. With the native
+    backend, the loaded libdnf5 metadata is queried instead.
+
+    Args:
+        security_only: If True, only consider kernel updates from security advisories.
 
     Returns:
         True if a kernel update is available, False otherwise.
@@ -19,8 +31,14 @@ def new_kernel_version() -> bool:
     Raises:
         CommandError: If dnf fails with an unexpected exit code.
     """
+    if dnf_native.active():
+        return dnf_native.kernel_update(security_only) is not None
+
     new_kernel_version_available: bool
-    result = runner.run(["dnf", "check-upgrade", "-q", "kernel*"], check=False)
+    cmd = ["dnf", "check-upgrade", "-q", "kernel*"]
+    if security_only:
+        cmd.insert(3, "--security")
+    result = runner.run(cmd, check=False)
     if result.returncode == 0:
         new_kernel_version_available = False
     elif result.returncode == 100:
@@ -30,11 +48,15 @@ def new_kernel_version() -> bool:
 
     return new_kernel_version_available
 
-def get_new_kernel_version() -> str:
+def get_new_kernel_version(security_only: bool = False) -> str:
     """Extract the kernel version string from DNF check-upgrade output.
 
     Queries DNF for kernel package updates and extracts the version number
     from kernel.x86_64 package (e.g., "6.17.12" from "6.17.12-300.fc43").
+    With the native backend, the loaded libdnf5 metadata is queried instead.
+
+    Args:
+        security_only: If True, only consider kernel updates from security advisories.
 
     Returns:
         Kernel version string (e.g., "6.17.12").
@@ -42,7 +64,16 @@ def get_new_kernel_version() -> str:
     Raises:
         CommandError: If kernel version cannot be found in the output.
     """
-    result = runner.run(['dnf', 'check-upgrade', 'kernel'], check=False)
+    if dnf_native.active():
+        version = dnf_native.kernel_update(security_only)
+        if version is None:
+            raise runner.CommandError("No kernel update found in the DNF metadata")
+        return version
+
+    cmd = ['dnf', 'check-upgrade', 'kernel']
+    if security_only:
+        cmd.insert(2, '--security')
+    result = runner.run(cmd, check=False)
     
     # Exit code 100 means updates available, 0 means no updates
     if result.returncode not in [0, 100]:
@@ -88,3 +119,119 @@ def confirm_kernel_update(new_version: str) -> bool:
         raise SystemExit(1)
 
 
+def ask_kernel_update(new_version: str) -> bool:
+    """Ask the user whether to include a kernel upgrade in this run.
+
+    Unlike confirm_kernel_update(), declining does not abort the run: the
+    caller can update everything else with the kernel packages excluded.
+    A closed stdin (non-interactive run) counts as declining.
+
+    Args:
+        new_version: The version string of the new kernel (e.g., "6.12.5").
+
+    Returns:
+        True if the user answers 'y' or 'Y', False otherwise.
+
+    Raises:
+        KeyboardInterrupt: If the user presses Ctrl+C.
+    """
+    try:
+        response = input(f"Kernel update available: {new_version}. Include it? [y/N]: ").strip()
+    except EOFError:
+        response = ""
+
+    if response in ['y', 'Y']:
+        return True
+    print("Kernel update not confirmed. Updating everything else with kernel packages excluded.")
+    return False
+
+
+def installed_kernels(index: dict[str, list[pkgdb.Package]] | None = None) -> list[str]:
+    """List the installed kernel releases from the package database.
+
+    Reads the rpmdb directly instead of spawning rpm. Each release is returned
+    in the same format as `uname -r` (e.g. "6.12.5-300.fc41.x86_64").
+
+    Args:
+        index: Installed package index to use. Read from the rpmdb if omitted.
+
+    Returns:
+        List of installed kernel releases (empty if no kernel package is found).
+    """
+    if index is None:
+        index = pkgdb.read_installed_rpm()
+
+    for name in KERNEL_PACKAGES:
+        if name in index:
+            return [f"{p.version}-{p.release}.{p.arch}" for p in index[name]]
+    return []
+
+
+def running_kernel() -> str:
+    """Return the release of the running kernel (like `uname -r`)."""
+    if not transport.current().is_local:
+        return str(runner.run(["uname", "-r"]).stdout).strip()
+    return os.uname().release
+
+
+def _strip_arch(release: str) -> str:
+    """Remove the trailing ".<arch>" from a kernel release string."""
+    suffix = "." + os.uname().machine
+    return release[:-len(suffix)] if release.endswith(suffix) else release
+
+
+def newest_kernel(releases: list[str]) -> str | None:
+    """Return the newest kernel release using RPM version ordering.
+
+    Args:
+        releases: Kernel releases such as "6.12.5-300.fc41.x86_64".
+
+    Returns:
+        The newest release, or None if the list is empty.
+    """
+    if not releases:
+        return None
+    return max(releases, key=lambda release: vercmp.rpm_evr_key(_strip_arch(release)))
+
+
+def is_newer_than_running(version: str) -> bool:
+    """Check if a kernel version-release is newer than the running kernel.
+
+    Args:
+        version: Kernel version-release, with or without arch suffix
+            (e.g., "6.13.0-300.fc41").
+
+    Returns:
+        True if the version sorts after the running kernel.
+    """
+    running = _strip_arch(running_kernel())
+    return vercmp.rpm_evr_compare(_strip_arch(version), running) > 0
+
+
+def reboot_required(index: dict[str, list[pkgdb.Package]] | None = None) -> bool:
+    """Check if a newer kernel than the running one is installed.
+
+    Args:
+        index: Installed package index to use. Read from the rpmdb if omitted.
+
+    Returns:
+        True if the newest installed kernel is newer than the running kernel.
+    """
+    newest = newest_kernel(installed_kernels(index))
+    return newest is not None and is_newer_than_running(newest)
+
+
+def kernel_installed(changes: dict[str, tuple[list[str], list[str]]]) -> bool:
+    """Check if a package diff installed a kernel newer than the running one.
+
+    Args:
+        changes: Result of pkgdb.diff() for the update transaction.
+
+    Returns:
+        True if any newly installed kernel package is newer than the running kernel.
+    """
+    for name in KERNEL_PACKAGES:
+        _removed, added = changes.get(name, ([], []))
+        if any(is_newer_than_running(version) for version in added):
+            return True
+    return False
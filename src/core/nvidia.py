@@ -4,30 +4,60 @@ This module provides functions to rebuild NVIDIA kernel modules using akmods
 after kernel updates to ensure NVIDIA drivers remain functional.
 """
 
+from src.core import pkgdb
 from src.helper import runner
 
-def _check_akmods_installed() -> bool:
+NVIDIA_PACKAGE_PREFIXES = ("akmod-nvidia", "kmod-nvidia", "xorg-x11-drv-nvidia", "nvidia-driver")
+
+
+def installed_nvidia_packages(index: dict[str, list[pkgdb.Package]]) -> list[str]:
+    """List installed NVIDIA driver packages.
+
+    Args:
+        index: Installed package index from pkgdb.
+
+    Returns:
+        Sorted names of installed NVIDIA driver and kmod packages.
+    """
+    return sorted(name for name in index if name.startswith(NVIDIA_PACKAGE_PREFIXES))
+
+
+def _check_akmods_installed(index: dict[str, list[pkgdb.Package]] | None = None) -> bool:
     """Check if akmods is installed on the system.
 
+    Uses the package database index when available, otherwise runs
+    `akmods --version`.
+
+    Args:
+        index: Installed package index from pkgdb, or None if unavailable.
+
     Returns:
         True if akmods is available, False otherwise.
     """
+    if index is not None:
+        return "akmods" in index
+
     try:
         result = runner.run(["akmods", "--version"], check=False)
         return result.returncode == 0
     except FileNotFoundError:
         return False
 
+
 def rebuild_nvidia_modules(show_live_output: bool = False) -> str:
     """Rebuild NVIDIA kernel modules using akmods.
 
-    If akmods is not installed, returns a message and skips rebuild.
+    If akmods is not installed, or the package database shows no NVIDIA
+    driver packages, returns a message and skips rebuild.
 
     Returns:
         A status message indicating whether NVIDIA modules were rebuilt or skipped.
     """
-    if not _check_akmods_installed():
+    index = pkgdb.read_installed()
+    if not _check_akmods_installed(index):
         return "akmods is not installed on this system. Skipping NVIDIA module rebuild..."
+    elif index is not None and not installed_nvidia_packages(index):
+        return "No NVIDIA driver packages installed. Skipping NVIDIA module rebuild..."
     else:
         runner.run(["sudo", "akmods", "--force"], show_live_output=show_live_output)
-        return "NVIDIA kernel modules check successful..."
\ No newline at end of file
+        return "NVIDIA kernel modules check successful..."
@@ -0,0 +1,250 @@
+"""Shared package download cache module.
+
+When several systems of the same release are updated (the host and its
+toolbox/distrobox containers), each one would download the same RPMs and
+debs again. With the shared cache enabled, downloaded packages are collected
+into a content-addressed store below a root-owned cache root:
+
+    <root>/objects/<sha256[:2]>/<sha256>    - one copy of each package payload
+    <root>/names/<manager>/<path>           - known file names of each payload
+    <root>/targets/<target>/<manager>/      - download directory of a container
+
+On the local machine, DNF and APT keep downloading to their usual cache
+(SYSTEM_DOWNLOAD_DIRS) and are only told to keep the packages. Containers are
+pointed at their own download directory under the root (for DNF, which has no
+separate download directory option, that is its cachedir).
+
+Before an update, the target's download directory is seeded with hard links
+to every known package, so DNF/APT find them already downloaded (they still
+verify checksums). After the update, new downloads are hashed into the store
+and replaced by hard links, so identical packages take the disk space of one.
+Files are copied instead where hard links are not possible. The downloads
+belong to root, so seeding and collecting run as root too (through sudo,
+as `python3 -m src.core.pkgcache`).
+
+All cache operations are best effort: a failure never fails the update.
+"""
+
+import errno
+import hashlib
+import logging
+import os
+import shutil
+import sys
+
+from src.helper import runner, transport
+
+DEFAULT_ROOT = "/var/cache/tuxgrade/packages"
+PACKAGE_SUFFIXES = {"dnf": ".rpm", "apt": ".deb"}
+SYSTEM_DOWNLOAD_DIRS = {"dnf": "/var/cache/dnf", "dnf5": "/var/cache/libdnf5", "apt": "/var/cache/apt/archives"}
+KEEP_OPTIONS = {"dnf": ["--setopt=keepcache=True"], "apt": ["-o", "APT::Keep-Downloaded-Packages=true"]}
+
+# Cache root in use, or None if the shared cache is disabled
+root: str | None = None
+
+
+def _project_root() -> str:
+    """Return the directory containing the `src` package."""
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _cache_root() -> str:
+    """Return the cache root in use.
+
+    Raises:
+        RuntimeError: If the shared cache is not enabled.
+    """
+    if root is None:
+        raise RuntimeError("The shared package cache is not enabled")
+    return root
+
+
+def _target_dir(manager: str) -> str | None:
+    """Return the local download directory of the current target, if it can use the cache."""
+    if root is None or transport.current().host_path(root) is None:
+        return None
+    if transport.current().is_local:
+        return SYSTEM_DOWNLOAD_DIRS["dnf5" if manager == "dnf" and _is_dnf5() else manager]
+    name = transport.current().name.replace("/", "_")
+    return os.path.join(root, "targets", name, manager)
+
+
+def _is_dnf5() -> bool:
+    """Check if the target's dnf is dnf5 (which uses system_cachedir when run as root)."""
+    result = runner.run(["dnf", "--version"], check=False)
+    return result.returncode == 0 and "dnf5" in result.stdout
+
+
+def options(manager: str) -> list[str]:
+    """Return the package manager options pointing downloads at the shared cache.
+
+    Args:
+        manager: "dnf" or "apt".
+
+    Returns:
+        Options to append to the update command (empty if the shared cache is
+        disabled or not reachable from the current target).
+    """
+    local_dir = _target_dir(manager)
+    if local_dir is None:
+        return []
+    if transport.current().is_local:
+        return list(KEEP_OPTIONS[manager])
+    path = transport.current().host_path(local_dir)
+
+    if manager == "dnf":
+        cachedir = "system_cachedir" if _is_dnf5() else "cachedir"
+        return [f"--setopt={cachedir}={path}", *KEEP_OPTIONS[manager]]
+    return ["-o", f"Dir::Cache::Archives={path}/", *KEEP_OPTIONS[manager]]
+
+
+def _file_digest(path: str) -> str:
+    """Return the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _link_or_copy(source: str, destination: str) -> None:
+    """Atomically place a hard link to (or a copy of) source at destination."""
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    temp_path = f"{destination}.tuxgrade-tmp-{os.getpid()}"
+    try:
+        os.link(source, temp_path)
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EACCES, errno.EMLINK):
+            raise
+        shutil.copy2(source, temp_path)
+    os.replace(temp_path, destination)
+
+
+def _same_file(first: str, second: str) -> bool:
+    """Check if two paths are hard links to the same file."""
+    try:
+        return os.path.samefile(first, second)
+    except OSError:
+        return False
+
+
+def _package_files(directory: str, suffix: str):
+    """Yield paths relative to directory of all package files below it."""
+    for dirpath, _dirnames, filenames in os.walk(directory):
+        for filename in filenames:
+            if filename.endswith(suffix):
+                yield os.path.relpath(os.path.join(dirpath, filename), directory)
+
+
+def _as_root(action: str, manager: str) -> int:
+    """Run seed or collect for the current target as root, like the package manager.
+
+    Returns:
+        The number of packages linked in or added, 0 if it failed.
+    """
+    local_dir = _target_dir(manager)
+    if local_dir is None:
+        return 0
+    if os.geteuid() == 0:
+        return ACTIONS[action](manager, local_dir)
+
+    # The helper works on local paths, whichever target is being updated
+    try:
+        with transport.use(transport.LOCAL):
+            result = runner.run(["sudo", "env", f"PYTHONPATH={_project_root()}", sys.executable, "-m",
+                                 "src.core.pkgcache", action, manager, _cache_root(), local_dir], check=False)
+        return int(result.stdout.split()[-1])
+    except (OSError, ValueError, IndexError) as e:
+        logging.debug("Package cache %s for %s failed: %s", action, manager, e)
+        return 0
+
+
+def seed(manager: str) -> int:
+    """Link all known packages into the current target's download directory.
+
+    Args:
+        manager: "dnf" or "apt".
+
+    Returns:
+        Number of packages linked in.
+    """
+    return _as_root("seed", manager)
+
+
+def collect(manager: str) -> int:
+    """Move new downloads of the current target into the content-addressed store.
+
+    Each package is stored once by its SHA-256, recorded under its file name,
+    and the downloaded file is replaced by a hard link to the stored copy.
+
+    Args:
+        manager: "dnf" or "apt".
+
+    Returns:
+        Number of packages added to the store.
+    """
+    return _as_root("collect", manager)
+
+
+def _seed(manager: str, local_dir: str) -> int:
+    """Link all known packages into a download directory."""
+    linked = 0
+    try:
+        os.makedirs(os.path.join(local_dir, "partial") if manager == "apt" else local_dir, exist_ok=True)
+        names_dir = os.path.join(_cache_root(), "names", manager)
+        for relative in _package_files(names_dir, PACKAGE_SUFFIXES[manager]):
+            destination = os.path.join(local_dir, relative)
+            if not os.path.exists(destination):
+                _link_or_copy(os.path.join(names_dir, relative), destination)
+                linked += 1
+    except OSError as e:
+        logging.debug("Seeding %s cache for %s failed: %s", manager, transport.current().name, e)
+    return linked
+
+
+def _collect(manager: str, local_dir: str) -> int:
+    """Move new downloads of a download directory into the content-addressed store."""
+    if not os.path.isdir(local_dir):
+        return 0
+
+    added = 0
+    cache_root = _cache_root()
+    names_dir = os.path.join(cache_root, "names", manager)
+    for relative in _package_files(local_dir, PACKAGE_SUFFIXES[manager]):
+        if relative.startswith("partial" + os.sep):
+            continue
+        path = os.path.join(local_dir, relative)
+        name_path = os.path.join(names_dir, relative)
+        if _same_file(path, name_path):
+            continue
+        try:
+            digest = _file_digest(path)
+            object_path = os.path.join(cache_root, "objects", digest[:2], digest)
+            if not os.path.exists(object_path):
+                _link_or_copy(path, object_path)
+                added += 1
+            _link_or_copy(object_path, name_path)
+            if not _same_file(path, object_path):
+                _link_or_copy(object_path, path)
+        except OSError as e:
+            logging.debug("Adding %s to the package cache failed: %s", path, e)
+    return added
+
+
+ACTIONS = {"seed": _seed, "collect": _collect}
+
+
+def main(argv: list[str]) -> int:
+    """Entry point of the root helper: `seed|collect MANAGER ROOT DIRECTORY`, prints the count."""
+    global root
+    if len(argv) != 4 or argv[0] not in ACTIONS or argv[1] not in PACKAGE_SUFFIXES:
+        print(f"Usage: python3 -m src.core.pkgcache {{{'|'.join(ACTIONS)}}} MANAGER ROOT DIRECTORY",
+              file=sys.stderr)
+        return 2
+    action, manager, root, local_dir = argv
+    print(ACTIONS[action](manager, local_dir))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,286 @@
+"""Installed package database reader module.
+
+This module provides read-only access to the local package databases (the
+rpmdb SQLite database and the dpkg status file) without spawning rpm, dnf or
+dpkg. Records are streamed and collected into an in-memory name -> versions
+index that can be diffed before and after an update run.
+"""
+
+import logging
+import os
+import sqlite3
+import struct
+from typing import Iterator, NamedTuple
+
+from src.helper import runner, transport
+
+RPMDB_PATHS = [
+    "/usr/lib/sysimage/rpm/rpmdb.sqlite",
+    "/var/lib/rpm/rpmdb.sqlite",
+]
+DPKG_STATUS_PATH = "/var/lib/dpkg/status"
+
+# RPM header tags and data types needed to build the index
+_RPMTAG_NAME = 1000
+_RPMTAG_VERSION = 1001
+_RPMTAG_RELEASE = 1002
+_RPMTAG_EPOCH = 1003
+_RPMTAG_ARCH = 1022
+_WANTED_TAGS = {_RPMTAG_NAME, _RPMTAG_VERSION, _RPMTAG_RELEASE, _RPMTAG_EPOCH, _RPMTAG_ARCH}
+_RPM_INT32_TYPE = 4
+_RPM_STRING_TYPE = 6
+
+_HEADER_INTRO = struct.Struct(">II")
+_HEADER_ENTRY = struct.Struct(">iIiI")
+
+
+class Package(NamedTuple):
+    """A single installed package."""
+
+    name: str
+    epoch: int
+    version: str
+    release: str
+    arch: str
+
+    @property
+    def evr(self) -> str:
+        """Return the package version as an [epoch:]version[-release] string."""
+        evr = f"{self.epoch}:{self.version}" if self.epoch else self.version
+        return f"{evr}-{self.release}" if self.release else evr
+
+
+def _parse_rpm_header(blob: bytes) -> Package | None:
+    """Extract name, epoch, version, release and arch from an RPM header blob.
+
+    The rpmdb stores headers without the lead magic: two big-endian counters
+    (index entries, data length), the index entries and the data store.
+
+    Args:
+        blob: Raw header blob from the rpmdb Packages table.
+
+    Returns:
+        The parsed Package, or None if the header has no name or version.
+    """
+    index_count, data_length = _HEADER_INTRO.unpack_from(blob, 0)
+    data_start = _HEADER_INTRO.size + index_count * _HEADER_ENTRY.size
+    values: dict[int, str | int] = {}
+
+    for i in range(index_count):
+        tag, data_type, offset, _count = _HEADER_ENTRY.unpack_from(blob, _HEADER_INTRO.size + i * _HEADER_ENTRY.size)
+        if tag not in _WANTED_TAGS or not 0 <= offset < data_length:
+            continue
+        position = data_start + offset
+        if data_type == _RPM_STRING_TYPE:
+            end = blob.index(b"\0", position)
+            values[tag] = blob[position:end].decode("utf-8", "replace")
+        elif data_type == _RPM_INT32_TYPE:
+            values[tag] = struct.unpack_from(">i", blob, position)[0]
+
+    if _RPMTAG_NAME not in values or _RPMTAG_VERSION not in values:
+        return None
+
+    return Package(
+        name=str(values[_RPMTAG_NAME]),
+        epoch=int(values.get(_RPMTAG_EPOCH, 0)),
+        version=str(values[_RPMTAG_VERSION]),
+        release=str(values.get(_RPMTAG_RELEASE, "")),
+        arch=str(values.get(_RPMTAG_ARCH, "")),
+    )
+
+
+def iter_rpmdb(path: str) -> Iterator[Package]:
+    """Stream installed packages from an rpmdb SQLite database.
+
+    The database is opened read-only, so this works without root privileges
+    and never takes the rpm transaction lock.
+
+    Args:
+        path: Path to rpmdb.sqlite.
+
+    Yields:
+        One Package per installed header.
+    """
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        for (blob,) in connection.execute("SELECT blob FROM Packages"):
+            package = _parse_rpm_header(blob)
+            if package is not None:
+                yield package
+    finally:
+        connection.close()
+
+
+def iter_dpkg_status(path: str = DPKG_STATUS_PATH) -> Iterator[Package]:
+    """Stream installed packages from the dpkg status file.
+
+    Only stanzas whose Status ends in "installed" are reported, whatever the
+    wanted state ("install", "hold", "deinstall", ...) is. The Debian version
+    is split into epoch, upstream version and revision.
+
+    Args:
+        path: Path to the dpkg status file (default: /var/lib/dpkg/status).
+
+    Yields:
+        One Package per installed stanza.
+    """
+    fields: dict[str, str] = {}
+
+    def finish() -> Package | None:
+        if fields.get("Status", "").split()[-1:] != ["installed"] or "Package" not in fields:
+            return None
+        full_version = fields.get("Version", "")
+        epoch, _, rest = full_version.partition(":") if ":" in full_version else ("", "", full_version)
+        version, _, revision = rest.rpartition("-") if "-" in rest else (rest, "", "")
+        return Package(
+            name=fields["Package"],
+            epoch=int(epoch) if epoch.isdigit() else 0,
+            version=version,
+            release=revision,
+            arch=fields.get("Architecture", ""),
+        )
+
+    with open(path, encoding="utf-8", errors="replace") as status_file:
+        for line in status_file:
+            if line == "\n":
+                package = finish()
+                if package is not None:
+                    yield package
+                fields = {}
+            elif not line[0].isspace():
+                key, _, value = line.partition(":")
+                if key in ("Package", "Status", "Version", "Architecture"):
+                    fields[key] = value.strip()
+
+    package = finish()
+    if package is not None:
+        yield package
+
+
+def build_index(packages) -> dict[str, list[Package]]:
+    """Group packages into a name -> installed packages index.
+
+    Args:
+        packages: Iterable of Package records.
+
+    Returns:
+        Dictionary mapping each package name to all of its installed instances
+        (installonly packages such as kernels have several).
+    """
+    index: dict[str, list[Package]] = {}
+    for package in packages:
+        index.setdefault(package.name, []).append(package)
+    return index
+
+
+def _find_rpmdb() -> str | None:
+    """Return the path of the first existing rpmdb.sqlite, if any."""
+    for path in RPMDB_PATHS:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def read_installed() -> dict[str, list[Package]] | None:
+    """Read the installed package index from the local package database.
+
+    Tries the rpmdb SQLite database first, then the dpkg status file.
+
+    Returns:
+        The name -> packages index, or None if no supported database is
+        present or readable (e.g. legacy Berkeley DB rpmdb), or if commands
+        run on a remote host.
+    """
+    if not transport.current().is_local:
+        return None
+
+    rpmdb = _find_rpmdb()
+    try:
+        if rpmdb is not None:
+            return build_index(iter_rpmdb(rpmdb))
+        if os.path.exists(DPKG_STATUS_PATH):
+            return build_index(iter_dpkg_status())
+    except (OSError, sqlite3.Error, struct.error, ValueError) as e:
+        logging.debug("Reading package database failed: %s", e)
+    return None
+
+
+def state_fingerprint() -> str | None:
+    """Fingerprint the local package database files without reading them.
+
+    Combines path, size and modification time of the rpmdb (including its
+    write-ahead log) and the dpkg status file. Any package transaction
+    changes the fingerprint.
+
+    Returns:
+        The fingerprint, or None if no package database is present or commands
+        run on a remote host.
+    """
+    if not transport.current().is_local:
+        return None
+
+    parts = []
+    for path in [*RPMDB_PATHS, *(p + "-wal" for p in RPMDB_PATHS), DPKG_STATUS_PATH]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        parts.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+    return ";".join(parts) or None
+
+
+def read_installed_rpm() -> dict[str, list[Package]]:
+    """Read the installed RPM index, falling back to an rpm query.
+
+    Returns:
+        The name -> packages index.
+
+    Raises:
+        CommandError: If the database cannot be read and rpm fails.
+    """
+    index = read_installed() if _find_rpmdb() is not None else None
+    if index is not None:
+        return index
+
+    result = runner.run(["rpm", "-qa", "--qf", "%{NAME}\\t%{EPOCHNUM}\\t%{VERSION}\\t%{RELEASE}\\t%{ARCH}\\n"])
+    packages = []
+    for line in result.stdout.splitlines():
+        parts = line.split("\t")
+        if len(parts) == 5:
+            packages.append(Package(parts[0], int(parts[1] or 0), parts[2], parts[3], parts[4]))
+    return build_index(packages)
+
+
+def diff(before: dict[str, list[Package]], after: dict[str, list[Package]]) -> dict[str, tuple[list[str], list[str]]]:
+    """Compare two package indexes.
+
+    Args:
+        before: Index taken before the update.
+        after: Index taken after the update.
+
+    Returns:
+        Dictionary mapping each changed package name to a tuple of
+        (versions only in before, versions only in after).
+    """
+    changes = {}
+    for name in before.keys() | after.keys():
+        old = {p.evr for p in before.get(name, [])}
+        new = {p.evr for p in after.get(name, [])}
+        if old != new:
+            changes[name] = (sorted(old - new), sorted(new - old))
+    return changes
+
+
+def summarize(changes: dict[str, tuple[list[str], list[str]]]) -> str:
+    """Build a one-line summary of a package diff.
+
+    Args:
+        changes: Result of diff().
+
+    Returns:
+        Summary string such as "12 packages changed (1 installed, 0 removed, 11 upgraded)".
+    """
+    installed = sum(1 for old, new in changes.values() if new and not old)
+    removed = sum(1 for old, new in changes.values() if old and not new)
+    upgraded = len(changes) - installed - removed
+    return f"{len(changes)} packages changed ({installed} installed, {removed} removed, {upgraded} upgraded)"
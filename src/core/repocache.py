@@ -0,0 +1,465 @@
+"""Read-only update check from the downloaded repository metadata.
+
+Answering "is anything pending?" with `dnf check-upgrade` or `apt list
+--upgradable` starts a package manager that loads every repository again.
+This module reads the metadata the package managers already downloaded and
+compares it with the installed packages (see pkgdb.py) instead:
+
+- DNF: the primary metadata of each enabled repository in the dnf4
+  (/var/cache/dnf) or dnf5 (/var/cache/libdnf5) cache, located through the
+  cached repomd.xml
+- APT: the Packages files in /var/lib/apt/lists, memory-mapped and scanned
+  for their Package, Version and Architecture fields
+
+Each metadata file is reduced to a name -> newest version index once and
+kept in ~/.cache/tuxgrade/repocache until the file changes, so a check with
+a warm cache only loads the indexes and compares versions.
+
+The answer is only as fresh as the downloaded metadata, and ignores APT pins
+and DNF excludes. Primary metadata compressed with zstd needs the zstandard
+module (or Python 3.14); without it, or without any cached metadata, check()
+returns None and the package manager has to be asked instead.
+"""
+
+import bz2
+import configparser
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import lzma
+import mmap
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from typing import Any, Callable, NamedTuple
+
+from src.core import pkgdb, vercmp
+from src.helper import runner
+
+INDEX_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "tuxgrade", "repocache"
+)
+# Bump when the index format changes
+INDEX_VERSION = 1
+
+DNF_CACHE_DIRS = ["/var/cache/libdnf5", "/var/cache/dnf"]
+DNF_REPO_DIRS = ["/etc/yum.repos.d"]
+APT_LISTS_DIR = "/var/lib/apt/lists"
+
+KERNEL_NAMES = ("kernel", "kernel-core")
+DEB_KERNEL_PREFIX = "linux-image-"
+
+_PRIMARY_LOCATION = re.compile(rb'<data type="primary">.*?<location href="([^"]+)"', re.DOTALL)
+_DEB_FIELD = re.compile(rb"^(Package|Version|Architecture): *([^\n]+)", re.MULTILINE)
+_RPM_NS = "{http://linux.duke.edu/metadata/common}"
+
+
+class Pending(NamedTuple):
+    """Updates found in the downloaded metadata."""
+
+    manager: str
+    packages: list[str]
+    kernel: str | None
+    age: float | None
+
+
+def _index_path(path: str) -> str:
+    """Return the index file of a metadata file."""
+    return os.path.join(INDEX_DIR, hashlib.sha1(path.encode()).hexdigest() + ".json")
+
+
+def _cached_index(path: str, build: Callable[[str], dict[str, str] | None]) -> dict[str, str] | None:
+    """Load the index of a metadata file, building and saving it if the file changed.
+
+    Args:
+        path: Path of the metadata file.
+        build: Function reading the metadata file into a key -> version index.
+
+    Returns:
+        The index, or None if the metadata file cannot be read.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    stamp = [INDEX_VERSION, stat.st_size, stat.st_mtime_ns]
+
+    index_path = _index_path(path)
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        cached: dict[str, str] = saved["index"]
+        if saved.get("stamp") == stamp and isinstance(cached, dict):
+            return cached
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    index = build(path)
+    if index is None:
+        return None
+    try:
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        temp_path = index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"path": path, "stamp": stamp, "index": index}, f)
+        os.replace(temp_path, index_path)
+    except OSError as e:
+        logging.debug("Cannot save the metadata index of %s: %s", path, e)
+    return index
+
+
+def _keep_newest(index: dict[str, str], key: str, version: str, version_key) -> None:
+    """Store a version in an index unless a newer one is already there."""
+    current = index.get(key)
+    if current is None or (current != version and version_key(version) > version_key(current)):
+        index[key] = version
+
+
+def _not_automatic(lists_dir: str, packages_file: str) -> bool:
+    """Check if the suite of a Packages file is only used on request (e.g. backports).
+
+    Reads "NotAutomatic: yes" without "ButAutomaticUpgrades: yes" from the
+    suite's (In)Release file, like APT's default priority of 1 or 100.
+    """
+    name = os.path.basename(packages_file)
+    dists = name.find("_dists_")
+    if dists < 0:
+        return False
+    suite_end = name.find("_", dists + len("_dists_"))
+    prefix = name[:suite_end] if suite_end >= 0 else name
+    for release in (prefix + "_InRelease", prefix + "_Release"):
+        try:
+            with open(os.path.join(lists_dir, release), "rb") as f:
+                header = f.read(4096)
+        except OSError:
+            continue
+        return b"\nNotAutomatic: yes" in header and b"\nButAutomaticUpgrades: yes" not in header
+    return False
+
+
+def _read_deb_packages(path: str) -> dict[str, str] | None:
+    """Reduce a Packages file to a "name:arch" -> newest version index."""
+    index: dict[str, str] = {}
+    try:
+        with open(path, "rb") as f:
+            if path.endswith(".gz"):
+                _scan_deb_fields(gzip.decompress(f.read()), index)
+            elif os.fstat(f.fileno()).st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    _scan_deb_fields(data, index)
+    except (OSError, EOFError, ValueError) as e:
+        logging.debug("Cannot read %s: %s", path, e)
+        return None
+    return index
+
+
+def _scan_deb_fields(data, index: dict[str, str]) -> None:
+    """Add the stanzas of Packages file contents (bytes or mmap) to an index."""
+    fields: dict[bytes, bytes] = {}
+    for match in _DEB_FIELD.finditer(data):
+        field, value = match.groups()
+        if field == b"Package" and fields:
+            _add_deb_stanza(index, fields)
+            fields = {}
+        fields[field] = value
+    if fields:
+        _add_deb_stanza(index, fields)
+
+
+def _add_deb_stanza(index: dict[str, str], fields: dict[bytes, bytes]) -> None:
+    """Add one Packages stanza to an index."""
+    if b"Package" in fields and b"Version" in fields:
+        key = f"{fields[b'Package'].decode()}:{fields.get(b'Architecture', b'all').decode()}"
+        _keep_newest(index, key, fields[b"Version"].decode(), vercmp.dpkg_version_key)
+
+
+def _apt_indexes(lists_dir: str = APT_LISTS_DIR) -> list[tuple[str, dict[str, str]]]:
+    """Load the indexes of all automatically used APT Packages files."""
+    indexes = []
+    for path in sorted(glob.glob(os.path.join(lists_dir, "*_Packages")) +
+                       glob.glob(os.path.join(lists_dir, "*_Packages.gz"))):
+        if _not_automatic(lists_dir, path):
+            continue
+        index = _cached_index(path, _read_deb_packages)
+        if index is not None:
+            indexes.append((path, index))
+    return indexes
+
+
+def _open_compressed(path: str):
+    """Open a possibly compressed metadata file for binary reading.
+
+    Raises:
+        OSError: If the file cannot be read or zstd support is missing.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".xz"):
+        return lzma.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".zst"):
+        try:
+            from compression import zstd
+            return zstd.open(path, "rb")
+        except ImportError:
+            pass
+        try:
+            import zstandard
+        except ImportError:
+            raise OSError(f"zstd support missing for {path} (install python3-zstandard)")
+        return zstandard.open(path, "rb")
+    return open(path, "rb")
+
+
+def _read_rpm_primary(path: str) -> dict[str, str] | None:
+    """Reduce a primary metadata file to a "name.arch" -> newest EVR index."""
+    index: dict[str, str] = {}
+    try:
+        with _open_compressed(path) as f:
+            for _event, element in ET.iterparse(f):
+                if element.tag != _RPM_NS + "package":
+                    continue
+                name = element.findtext(_RPM_NS + "name")
+                arch = element.findtext(_RPM_NS + "arch")
+                version = element.find(_RPM_NS + "version")
+                if name and arch not in (None, "src") and version is not None:
+                    epoch = version.get("epoch", "0")
+                    evr = f"{version.get('ver')}-{version.get('rel')}"
+                    if epoch not in ("", "0"):
+                        evr = f"{epoch}:{evr}"
+                    _keep_newest(index, f"{name}.{arch}", evr, vercmp.rpm_evr_key)
+                element.clear()
+    except (OSError, EOFError, ET.ParseError, lzma.LZMAError) as e:
+        logging.debug("Cannot read %s: %s", path, e)
+        return None
+    return index
+
+
+def _enabled_repos(repo_dirs: list[str]) -> set[str]:
+    """Read the IDs of the enabled repositories from the .repo files."""
+    repos = set()
+    for repo_dir in repo_dirs:
+        for path in glob.glob(os.path.join(repo_dir, "*.repo")):
+            parser = configparser.ConfigParser(interpolation=None, strict=False)
+            try:
+                parser.read(path)
+            except configparser.Error as e:
+                logging.debug("Cannot parse %s: %s", path, e)
+                continue
+            for section in parser.sections():
+                if parser[section].get("enabled", "1").strip().lower() in ("1", "true", "yes"):
+                    repos.add(section)
+    return repos
+
+
+def _primary_files(cache_dirs: list[str], repo_dirs: list[str]) -> list[str] | None:
+    """Find the cached primary metadata of every enabled repository.
+
+    Returns:
+        The primary files, or None if an enabled repository has no cached
+        metadata (the answer would be incomplete).
+    """
+    enabled = _enabled_repos(repo_dirs)
+    newest: dict[str, tuple[float, str]] = {}
+    for cache_dir in cache_dirs:
+        for repomd in glob.glob(os.path.join(cache_dir, "*", "repodata", "repomd.xml")):
+            repo_dir = os.path.dirname(os.path.dirname(repomd))
+            repo_id = os.path.basename(repo_dir).rsplit("-", 1)[0]
+            if repo_id in enabled:
+                mtime = os.path.getmtime(repomd)
+                if repo_id not in newest or mtime > newest[repo_id][0]:
+                    newest[repo_id] = (mtime, repomd)
+
+    if not enabled or set(newest) != enabled:
+        logging.debug("No cached metadata for %s", ", ".join(sorted(enabled - set(newest))) or "any repository")
+        return None
+
+    primaries = []
+    for _mtime, repomd in newest.values():
+        with open(repomd, "rb") as f:
+            match = _PRIMARY_LOCATION.search(f.read())
+        if match is None:
+            return None
+        primaries.append(os.path.join(os.path.dirname(os.path.dirname(repomd)), match.group(1).decode()))
+    return primaries
+
+
+def _dnf_indexes(cache_dirs: list[str] = DNF_CACHE_DIRS,
+                 repo_dirs: list[str] = DNF_REPO_DIRS) -> list[tuple[str, dict[str, str]]] | None:
+    """Load the indexes of the primary metadata of all enabled DNF repositories."""
+    primaries = _primary_files(cache_dirs, repo_dirs)
+    if primaries is None:
+        return None
+    indexes = []
+    for path in primaries:
+        index = _cached_index(path, _read_rpm_primary)
+        if index is None:
+            return None
+        indexes.append((path, index))
+    return indexes
+
+
+def compare(installed: dict[str, list[pkgdb.Package]], indexes: list[dict[str, str]],
+            manager: str) -> tuple[list[str], str | None]:
+    """Find installed packages with a newer version in the metadata indexes.
+
+    Args:
+        installed: Installed package index from pkgdb.
+        indexes: Metadata indexes ("name.arch" for RPM, "name:arch" for deb).
+        manager: "dnf" or "apt".
+
+    Returns:
+        The names of the packages with an update, and the newest pending
+        kernel version (None if no kernel update is pending).
+    """
+    version_key: Callable[[str], tuple[Any, ...]]
+    if manager == "dnf":
+        version_key, separator = vercmp.rpm_evr_key, "."
+    else:
+        version_key, separator = vercmp.dpkg_version_key, ":"
+
+    pending = []
+    kernel = None
+    for name, packages in installed.items():
+        keys = {f"{name}{separator}{package.arch}" for package in packages}
+        available = [index[key] for key in keys for index in indexes if key in index]
+        if not available:
+            continue
+        # Only installonly packages (kernels) have several installed versions
+        if len(packages) == 1:
+            newest_installed = packages[0].evr
+        else:
+            newest_installed = max((package.evr for package in packages), key=version_key)
+        # Most packages are up to date, so skip the version keys when nothing differs
+        candidates = [version for version in available if version != newest_installed]
+        if not candidates:
+            continue
+        newest = max(candidates, key=version_key)
+        if version_key(newest) > version_key(newest_installed):
+            pending.append(name)
+            if name in KERNEL_NAMES or name.startswith(DEB_KERNEL_PREFIX):
+                kernel = newest if kernel is None else max(kernel, newest, key=version_key)
+    return sorted(pending), kernel
+
+
+def _manager() -> str:
+    """Return the package manager of the local system, by its package database."""
+    return "dnf" if any(os.path.exists(path) for path in pkgdb.RPMDB_PATHS) else "apt"
+
+
+def metadata_fingerprint() -> str:
+    """Fingerprint the downloaded metadata and the repository configuration without reading them.
+
+    Combines path, size and modification time of the APT lists directory,
+    the cached repomd.xml files and the DNF .repo files. Refreshing the
+    metadata or enabling a repository changes the fingerprint.
+    """
+    paths = [APT_LISTS_DIR]
+    for cache_dir in DNF_CACHE_DIRS:
+        paths += glob.glob(os.path.join(cache_dir, "*", "repodata", "repomd.xml"))
+    for repo_dir in DNF_REPO_DIRS:
+        paths += glob.glob(os.path.join(repo_dir, "*.repo"))
+
+    parts = []
+    for path in sorted(paths):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        parts.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+    return ";".join(parts)
+
+
+def check() -> Pending | None:
+    """Check for pending updates without running a package manager.
+
+    Returns:
+        The pending updates, or None if the installed packages or the cached
+        metadata of an enabled repository cannot be read.
+    """
+    installed = pkgdb.read_installed()
+    if installed is None:
+        return None
+
+    if _manager() == "dnf":
+        manager, indexes = "dnf", _dnf_indexes()
+    else:
+        manager, indexes = "apt", _apt_indexes()
+    if not indexes:
+        return None
+
+    packages, kernel = compare(installed, [index for _path, index in indexes], manager)
+    age = time.time() - max(os.path.getmtime(path) for path, _index in indexes)
+    return Pending(manager, packages, kernel, age)
+
+
+def query_package_manager() -> Pending:
+    """Ask DNF or APT for pending updates (when the metadata cannot be read).
+
+    Returns:
+        The pending updates, with an age of None (freshly checked).
+
+    Raises:
+        CommandError: If the package manager query fails.
+        OSError: If the package manager is not installed.
+    """
+    versions: dict[str, str] = {}
+    manager = _manager()
+    if manager == "dnf":
+        result = runner.run(["dnf", "check-upgrade", "-q"], check=False)
+        if result.returncode not in (0, 100):
+            raise runner.CommandError(f"dnf check-upgrade failed with exit code {result.returncode}")
+        # "kernel-core.x86_64   6.17.12-300.fc43   updates" (obsoleted packages are indented)
+        for line in result.stdout.splitlines():
+            fields = line.split()
+            if len(fields) >= 3 and not line[0].isspace():
+                versions[fields[0].rsplit(".", 1)[0]] = fields[1]
+    else:
+        # "linux-image-amd64/stable-security 6.1.129-1 amd64 [upgradable from: 6.1.128-1]"
+        for line in runner.run(["apt", "list", "--upgradable"]).stdout.splitlines():
+            name, separator, rest = line.partition("/")
+            fields = rest.split()
+            if separator and len(fields) >= 2:
+                versions[name] = fields[1]
+
+    version_key = vercmp.rpm_evr_key if manager == "dnf" else vercmp.dpkg_version_key
+    kernels = [version for name, version in versions.items()
+               if name in KERNEL_NAMES or name.startswith(DEB_KERNEL_PREFIX)]
+    return Pending(manager, sorted(versions), max(kernels, key=version_key) if kernels else None, None)
+
+
+def summarize(pending: Pending, verbose: bool = False) -> str:
+    """Describe pending updates for the user.
+
+    Args:
+        pending: Result of check() or query_package_manager().
+        verbose: If True, list the names of the packages with an update.
+
+    Returns:
+        One line naming the number of updates, the kernel update and the age
+        of the metadata, followed by the package names if verbose.
+    """
+    if pending.packages:
+        message = f"{len(pending.packages)} {pending.manager.upper()} updates pending"
+        if pending.kernel:
+            message += f", including kernel {pending.kernel}"
+    else:
+        message = f"No {pending.manager.upper()} updates pending"
+    if pending.age is not None:
+        message += f" (metadata downloaded {_format_age(pending.age)} ago)"
+    if verbose and pending.packages:
+        message += "\n" + "\n".join(f"  {name}" for name in pending.packages)
+    return message
+
+
+def _format_age(seconds: float) -> str:
+    """Format a metadata age in minutes, hours or days."""
+    if seconds < 3600:
+        return f"{max(seconds, 0) / 60:.0f} minutes"
+    if seconds < 2 * 86400:
+        return f"{seconds / 3600:.0f} hours"
+    return f"{seconds / 86400:.0f} days"
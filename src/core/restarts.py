@@ -0,0 +1,229 @@
+"""Restart and reboot detection module.
+
+After an update, processes keep running the old versions of the libraries
+and executables they mapped. This module finds them by scanning
+/proc/<pid>/maps for deleted (replaced) shared objects and executables, maps
+the affected processes to their systemd units through /proc/<pid>/cgroup,
+and compares the running kernel with the newest one in /boot. The result is
+the minimal restart set: a reboot only if a newer kernel is installed,
+otherwise the system and user services to restart and the processes that
+run outside any service.
+
+Reading other users' memory maps needs root, so when not running as root
+the scan is run through sudo (`python3 -m src.core.restarts --json`).
+
+The scan reads each maps file once and only parses files that mention a
+deleted mapping, so it takes well under a second with thousands of processes.
+"""
+
+import glob
+import json
+import os
+import sys
+from typing import NamedTuple
+
+from src.core import kernel
+from src.helper import runner, transport
+
+PROC = "/proc"
+
+# Only mappings below these directories count (not /dev/shm, memfd or /tmp files)
+SYSTEM_PREFIXES = (b"/usr/", b"/lib/", b"/lib64/", b"/bin/", b"/sbin/", b"/opt/")
+_DELETED = b" (deleted)"
+
+# Number of processes outside services listed by summarize()
+MAX_LISTED_PROCESSES = 10
+
+
+class RestartPlan(NamedTuple):
+    """Minimal set of restarts needed to run only updated code."""
+
+    reboot: str | None = None
+    reexec: bool = False
+    services: list[str] = []
+    user_services: list[str] = []
+    processes: list[str] = []
+
+
+def _project_root() -> str:
+    """Return the directory containing the `src` package."""
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _uses_deleted_files(maps: bytes) -> bool:
+    """Check if a memory map lists a deleted library or executable below a system directory."""
+    if _DELETED not in maps:
+        return False
+    for line in maps.splitlines():
+        if not line.endswith(_DELETED):
+            continue
+        fields = line.split(None, 5)
+        if len(fields) < 6:
+            continue
+        perms, path = fields[1], fields[5]
+        if path.startswith(SYSTEM_PREFIXES) and (b"x" in perms or b".so" in path):
+            return True
+    return False
+
+
+def scan(proc: str = PROC) -> list[int]:
+    """Find processes that still use deleted (replaced) libraries or executables.
+
+    Args:
+        proc: Mount point of procfs.
+
+    Returns:
+        Sorted list of the affected PIDs (processes whose maps cannot be read
+        are skipped).
+    """
+    pids = []
+    for entry in os.listdir(proc):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(os.path.join(proc, entry, "maps"), "rb") as f:
+                maps = f.read()
+        except OSError:
+            continue
+        if _uses_deleted_files(maps):
+            pids.append(int(entry))
+    return sorted(pids)
+
+
+def _read_text(path: str) -> str:
+    """Read a small procfs file, empty if the process is gone."""
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def classify(pid: int, proc: str = PROC) -> tuple[str, str]:
+    """Determine what has to be restarted for a process.
+
+    Args:
+        pid: Process ID.
+        proc: Mount point of procfs.
+
+    Returns:
+        ("systemd", "") for PID 1, ("service", unit) for system services,
+        ("user", "unit (user UID)") for user services, or
+        ("process", "name[pid]") for processes outside any service.
+    """
+    if pid == 1:
+        return "systemd", ""
+
+    cgroup = ""
+    for line in _read_text(os.path.join(proc, str(pid), "cgroup")).splitlines():
+        hierarchy, _, path = line.partition(":")[2].partition(":")
+        if hierarchy in ("", "name=systemd"):
+            cgroup = path
+            break
+
+    components = cgroup.strip().split("/")
+    services = [name for name in components if name.endswith(".service")]
+    manager = next((name for name in components if name.startswith("user@") and name.endswith(".service")), None)
+    if manager is not None and services[-1] != manager:
+        uid = manager[len("user@"):-len(".service")]
+        return "user", f"{services[-1]} (user {uid})"
+    if services:
+        return "service", services[-1]
+
+    name = _read_text(os.path.join(proc, str(pid), "comm")).strip() or "?"
+    return "process", f"{name}[{pid}]"
+
+
+def _pending_kernel() -> str | None:
+    """Return the newest kernel in /boot if it is newer than the running one."""
+    releases = [os.path.basename(path)[len("vmlinuz-"):] for path in glob.glob("/boot/vmlinuz-*")]
+    newest = kernel.newest_kernel([release for release in releases if "rescue" not in release])
+    if newest is not None and kernel.is_newer_than_running(newest):
+        return newest
+    return None
+
+
+def plan(proc: str = PROC) -> RestartPlan:
+    """Work out the minimal restart set for the local machine.
+
+    Args:
+        proc: Mount point of procfs.
+
+    Returns:
+        The restart plan. With a newer kernel installed, only the reboot is
+        reported, since it restarts everything else as well.
+    """
+    pending = _pending_kernel()
+    if pending is not None:
+        return RestartPlan(reboot=pending)
+
+    found: dict[str, set[str]] = {"systemd": set(), "service": set(), "user": set(), "process": set()}
+    for pid in scan(proc):
+        kind, name = classify(pid, proc)
+        found[kind].add(name)
+    return RestartPlan(
+        reexec=bool(found["systemd"]),
+        services=sorted(found["service"]),
+        user_services=sorted(found["user"]),
+        processes=sorted(found["process"]),
+    )
+
+
+def check() -> RestartPlan | None:
+    """Work out the restart plan, scanning through sudo when not running as root.
+
+    Returns:
+        The restart plan, or None on other transports (fleet hosts, containers).
+
+    Raises:
+        CommandError: If the scan through sudo fails.
+    """
+    if not transport.current().is_local:
+        return None
+    if os.geteuid() == 0:
+        return plan()
+
+    result = runner.run(["sudo", "env", f"PYTHONPATH={_project_root()}",
+                         sys.executable, "-m", "src.core.restarts", "--json"])
+    return RestartPlan(**json.loads(result.stdout))
+
+
+def summarize(restart_plan: RestartPlan | None) -> str:
+    """Describe a restart plan for the user.
+
+    Args:
+        restart_plan: Result of check().
+
+    Returns:
+        Multi-line message naming the reboot or the restarts needed.
+    """
+    if restart_plan is None:
+        return "Restart check is only available on the local machine."
+    if restart_plan.reboot:
+        return f"Reboot required: kernel {restart_plan.reboot} is installed, {kernel.running_kernel()} is running."
+
+    lines = []
+    if restart_plan.reexec:
+        lines.append("systemd uses replaced libraries: sudo systemctl daemon-reexec")
+    if restart_plan.services:
+        lines.append(f"Restart {len(restart_plan.services)} services: "
+                     f"sudo systemctl restart {' '.join(restart_plan.services)}")
+    if restart_plan.user_services:
+        lines.append(f"Restart user services: {', '.join(restart_plan.user_services)}")
+    if restart_plan.processes:
+        listed = restart_plan.processes[:MAX_LISTED_PROCESSES]
+        more = len(restart_plan.processes) - len(listed)
+        lines.append("Restart these programs (or log out): " + ", ".join(listed)
+                     + (f" and {more} more" if more > 0 else ""))
+    return "\n".join(lines) or "No restart or reboot needed."
+
+
+def main(argv: list[str]) -> int:
+    """Print the restart plan of this machine (as JSON with --json)."""
+    restart_plan = plan()
+    print(json.dumps(restart_plan._asdict()) if argv == ["--json"] else summarize(restart_plan))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
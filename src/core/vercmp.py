@@ -0,0 +1,166 @@
+"""Package version comparison module.
+
+This module implements RPM (rpmvercmp) and Debian (dpkg) version ordering in
+pure Python. Every comparison is expressed as a sort key, so large lists of
+versions can be sorted with a single key function call per item instead of
+pairwise comparisons:
+
+    sorted(evrs, key=vercmp.rpm_evr_key)
+    max(versions, key=vercmp.dpkg_version_key)
+"""
+
+import re
+
+# rpmvercmp segment ranks: "~" sorts before the end of the string, "^" after
+# it, and alphabetic segments sort before numeric ones.
+_RPM_TILDE = 0
+_RPM_END = 1
+_RPM_CARET = 2
+_RPM_ALPHA = 3
+_RPM_NUMERIC = 4
+
+_RPM_SEGMENT = re.compile(r"[0-9]+|[a-zA-Z]+|~|\^")
+_DPKG_PART = re.compile(r"([^0-9]*)([0-9]*)")
+# A (non-digit run, number) element equal to the end of a version
+_DPKG_TERMINATOR = ((0,), 0)
+
+# dpkg part key ranks: elements sorting before the end of the version (those
+# starting with "~"), the end itself, and elements sorting after it.
+_DPKG_BEFORE_END = -1
+_DPKG_END = 0
+_DPKG_AFTER_END = 1
+
+
+def rpm_version_key(version: str) -> tuple:
+    """Build a sort key that orders version strings like rpmvercmp.
+
+    Separators (anything but ASCII letters, digits, "~" and "^") are ignored,
+    numeric segments compare as integers and beat alphabetic ones.
+
+    Args:
+        version: A version or release string (e.g., "6.12.5" or "300.fc41").
+
+    Returns:
+        A tuple usable as a sort key.
+    """
+    key = []
+    for segment in _RPM_SEGMENT.findall(version):
+        if segment == "~":
+            key.append((_RPM_TILDE, 0, ""))
+        elif segment == "^":
+            key.append((_RPM_CARET, 0, ""))
+        elif segment.isdigit():
+            key.append((_RPM_NUMERIC, int(segment), ""))
+        else:
+            key.append((_RPM_ALPHA, 0, segment))
+    key.append((_RPM_END, 0, ""))
+    return tuple(key)
+
+
+def split_evr(evr: str) -> tuple[int, str, str]:
+    """Split an "[epoch:]version[-release]" string.
+
+    Args:
+        evr: The EVR string (e.g., "1:6.12.5-300.fc41").
+
+    Returns:
+        Tuple of (epoch, version, release); missing parts are 0 or "".
+    """
+    epoch, _, rest = evr.rpartition(":")
+    version, _, release = rest.partition("-")
+    return int(epoch) if epoch.isdigit() else 0, version, release
+
+
+def rpm_evr_key(evr: str) -> tuple:
+    """Build a sort key for an RPM "[epoch:]version[-release]" string.
+
+    Args:
+        evr: The EVR string (e.g., "6.13.0-300.fc41").
+
+    Returns:
+        A tuple usable as a sort key.
+    """
+    epoch, version, release = split_evr(evr)
+    return epoch, rpm_version_key(version), rpm_version_key(release)
+
+
+def rpmvercmp(a: str, b: str) -> int:
+    """Compare two version strings like rpm's rpmvercmp().
+
+    Returns:
+        -1 if a is older than b, 0 if they are equal, 1 if a is newer.
+    """
+    key_a, key_b = rpm_version_key(a), rpm_version_key(b)
+    return (key_a > key_b) - (key_a < key_b)
+
+
+def rpm_evr_compare(a: str, b: str) -> int:
+    """Compare two RPM EVR strings.
+
+    Returns:
+        -1 if a is older than b, 0 if they are equal, 1 if a is newer.
+    """
+    key_a, key_b = rpm_evr_key(a), rpm_evr_key(b)
+    return (key_a > key_b) - (key_a < key_b)
+
+
+def _dpkg_order(char: str) -> int:
+    """Return the dpkg sort weight of a non-digit character."""
+    if char == "~":
+        return -1
+    if char.isalpha() and char.isascii():
+        return ord(char)
+    return ord(char) + 256
+
+
+def _dpkg_part_key(part: str) -> tuple:
+    """Build a sort key for an upstream version or revision like dpkg's verrevcmp().
+
+    dpkg compares alternating non-digit and digit runs, and a version that
+    runs out compares as if padded with empty runs and zeros, so "0" equals
+    "" but sorts after "0~rc1". Elements equal to that padding are counted
+    instead of stored, and each other element is ranked by whether it sorts
+    before or after the padding, so plain tuple comparison gives the same
+    order without padding either key.
+    """
+    key: list[tuple] = []
+    padding = 0
+    for text, digits in _DPKG_PART.findall(part):
+        if not text and not digits:
+            continue
+        element = (tuple(_dpkg_order(c) for c in text) + (0,), int(digits or 0))
+        if element == _DPKG_TERMINATOR:
+            padding += 1
+            continue
+        if element > _DPKG_TERMINATOR:
+            # The fewer padding-like elements before it, the earlier it wins
+            key.append((_DPKG_AFTER_END, -padding, element))
+        else:
+            key.append((_DPKG_BEFORE_END, padding, element))
+        padding = 0
+    key.append((_DPKG_END,))
+    return tuple(key)
+
+
+def dpkg_version_key(version: str) -> tuple:
+    """Build a sort key for a Debian "[epoch:]upstream[-revision]" version.
+
+    Args:
+        version: The Debian version (e.g., "1:2.39-0ubuntu8.3").
+
+    Returns:
+        A tuple usable as a sort key.
+    """
+    epoch, _, rest = version.partition(":") if ":" in version else ("0", "", version)
+    upstream, _, revision = rest.rpartition("-") if "-" in rest else (rest, "", "")
+    return int(epoch or 0), _dpkg_part_key(upstream), _dpkg_part_key(revision)
+
+
+def dpkg_compare(a: str, b: str) -> int:
+    """Compare two Debian versions like `dpkg --compare-versions`.
+
+    Returns:
+        -1 if a is older than b, 0 if they are equal, 1 if a is newer.
+    """
+    key_a, key_b = dpkg_version_key(a), dpkg_version_key(b)
+    return (key_a > key_b) - (key_a < key_b)
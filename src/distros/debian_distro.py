@@ -1,5 +1,5 @@
+from src.core import pkgdb
 from src.package_managers import apt
-from src.helper import cli_print_utility
 from src.distros.generic_distro import GenericDistro
 
 
@@ -11,7 +11,7 @@ class DebianDistro(GenericDistro):
     (Snap, Flatpak, Homebrew).
     """
 
-    def update(self, verbose, brew):
+    def update(self, verbose, brew, kernel_policy="ask", defer_rebuild=False, security_only=False, apps=True):
         """Perform system updates for Debian/Ubuntu distributions.
 
         Currently delegates to the parent GenericDistro class to update
@@ -20,9 +20,18 @@ class DebianDistro(GenericDistro):
         Args:
             verbose: If True, show detailed output; if False, show minimal output with spinners.
             brew: If True, include Homebrew package updates.
+            kernel_policy: Kernel update policy; APT kernels are updated like any other package.
+            defer_rebuild: Background rebuilds; unused, APT rebuilds initramfs itself.
+            security_only: If True, only upgrade packages from the security pocket.
+            apps: If True, include Snap and Flatpak updates.
         """
 
-        cli_print_utility.print_header("Update APT Packages", verbose)
-        cli_print_utility.print_output(apt.update_apt, verbose, "Updating APT packages")
+        extras_done = self._update_extras_if_locked("apt", verbose, brew, apps)
 
-        super().update(verbose, brew)
+        installed_before = pkgdb.read_installed()
+        if self._run_step("Update APT Packages", "Updating APT packages",
+                          lambda v: apt.update_apt(show_live_output=v, security_only=security_only), verbose):
+            self._report_package_changes(installed_before, verbose)
+
+        if not extras_done:
+            super().update(verbose, brew, kernel_policy, defer_rebuild, security_only, apps)
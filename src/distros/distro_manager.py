@@ -27,4 +27,40 @@ def detect_distro_name() -> str:
     if distro_id in supported_distros:
         return distro_name
     else:
-        return "Generic Linux"
\ No newline at end of file
+        return "Generic Linux"
+
+def parse_os_release(text: str) -> dict[str, str]:
+    """Parse the contents of an os-release file.
+
+    Used for systems that are not the local machine (fleet hosts, containers),
+    where the distro package cannot be used.
+
+    Args:
+        text: Contents of /etc/os-release.
+
+    Returns:
+        Dictionary of the os-release fields with quotes removed.
+    """
+    fields = {}
+    for line in text.splitlines():
+        key, sep, value = line.strip().partition("=")
+        if sep and not key.startswith("#"):
+            fields[key] = value.strip().strip("\"'")
+    return fields
+
+
+def distro_id_from_os_release(text: str) -> str:
+    """Detect the distribution id from the contents of an os-release file.
+
+    Args:
+        text: Contents of /etc/os-release.
+
+    Returns:
+        str: The id of the distribution, or 'generic' if not recognized.
+    """
+    distro_id = parse_os_release(text).get("ID", "").lower()
+
+    if distro_id in supported_distros:
+        return distro_id
+    else:
+        return "generic"
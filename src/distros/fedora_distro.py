@@ -1,7 +1,9 @@
 from src.distros.generic_distro import GenericDistro
 from src.helper import cli_print_utility
 from src.package_managers import dnf
-from src.core import kernel, init, nvidia
+from src.core import deferred, journal, kernel, init, nvidia, pkgdb
+
+KERNEL_CHECK_STEP = "Checking for Kernel Update"
 
 
 class FedoraDistro(GenericDistro):
@@ -12,7 +14,7 @@ class FedoraDistro(GenericDistro):
     regeneration, and NVIDIA driver rebuilds using akmods.
     """
 
-    def update(self, verbose, brew):
+    def update(self, verbose, brew, kernel_policy="ask", defer_rebuild=False, security_only=False, apps=True):
         """Perform comprehensive system updates for Fedora Linux.
 
         Executes Fedora-specific updates including kernel version checking,
@@ -22,6 +24,14 @@ class FedoraDistro(GenericDistro):
         Args:
             verbose: If True, show detailed output; if False, show minimal output with spinners.
             brew: If True, include Homebrew package updates.
+            kernel_policy: "ask" to prompt for a kernel update while Snap, Flatpak and
+                Homebrew update in the background, "allow" to install it without asking,
+                or "exclude" to leave kernel packages out of the DNF update.
+            defer_rebuild: If True, hand the initramfs and NVIDIA rebuilds to a detached
+                low-priority background job instead of waiting for them.
+            security_only: If True, apply only security advisories and skip the
+                rebuilds unless a new kernel is among them.
+            apps: If True, include Snap and Flatpak updates.
         """
 
         # System component updates
@@ -29,33 +39,85 @@ class FedoraDistro(GenericDistro):
         ## Dnf and Kernel updates
         cli_print_utility.print_header("Check Kernel Update", verbose)
 
-        new_kernel = kernel.new_kernel_version()
+        exclude = None
+        extras_done = False
 
-        if new_kernel:
-            version = kernel.get_new_kernel_version()
-            kernel.confirm_kernel_update(version)
+        if journal.is_done(KERNEL_CHECK_STEP):
+            new_kernel = journal.value("new_kernel", False)
+            exclude = journal.value("exclude")
+            print(f"⏭️  {KERNEL_CHECK_STEP} (done in the interrupted run)")
         else:
-            if verbose:
-                print("No new kernel version detected.")
+            new_kernel = kernel.new_kernel_version(security_only)
+
+            if new_kernel:
+                version = kernel.get_new_kernel_version(security_only)
+                if kernel_policy == "allow":
+                    print(f"Kernel update available: {version}. Installing (--kernel=allow).")
+                elif kernel_policy == "exclude":
+                    print(f"Kernel update available: {version}. Excluded (--kernel=exclude).")
+                    exclude = kernel.KERNEL_EXCLUDES
+                else:
+                    # Don't let a pending prompt hold up updates that don't depend on the answer
+                    background = self._start_extras_in_background(brew, apps)
+                    if not kernel.ask_kernel_update(version):
+                        exclude = kernel.KERNEL_EXCLUDES
+                    self._finish_background_extras(background, verbose)
+                    extras_done = True
+
+                if exclude:
+                    new_kernel = False
             else:
-                print("✅ Checking for Kernel Update")
+                if verbose:
+                    print("No new kernel version detected.")
+                else:
+                    print(f"✅ {KERNEL_CHECK_STEP}")
+
+            journal.complete(KERNEL_CHECK_STEP, new_kernel=new_kernel, exclude=exclude)
+
+        if not extras_done:
+            extras_done = self._update_extras_if_locked("dnf", verbose, brew, apps)
+
+        installed_before = pkgdb.read_installed()
+        if self._run_step("Update DNF Packages", "Updating DNF packages",
+                          lambda v: dnf.update_dnf(show_live_output=v, exclude=exclude,
+                                                   security_only=security_only), verbose):
+            changes = self._report_package_changes(installed_before, verbose)
+            if changes is not None:
+                # Decide from what was actually installed rather than the pre-update check
+                new_kernel = kernel.kernel_installed(changes)
+            journal.complete("Updating DNF packages", new_kernel=new_kernel)
+        else:
+            new_kernel = journal.value("new_kernel", new_kernel)
 
-        cli_print_utility.print_header("Update DNF Packages", verbose)
-        cli_print_utility.print_output(dnf.update_dnf, verbose, "Updating DNF packages")
+        self._run_step("Clean DNF Cache", "Cleaning DNF Cache", dnf.clean_dnf_cache, verbose)
 
-        cli_print_utility.print_header("Clean DNF Cache", verbose)
-        cli_print_utility.print_output(dnf.clean_dnf_cache, verbose, "Cleaning DNF Cache")
+        # Redo rebuilds that a previous background job did not finish
+        retry = deferred.steps_to_retry()
+        if "initramfs" in retry:
+            new_kernel = True
 
-        ## Initramfs rebuild if kernel was updated
+        if security_only and not new_kernel and not retry:
+            # No kernel among the security updates, so there is nothing to rebuild
+            if verbose:
+                print("No new kernel in the security updates. Skipping initramfs and NVIDIA rebuilds.")
+        elif defer_rebuild:
+            steps = (["initramfs"] if new_kernel else []) + ["nvidia"]
+            self._run_step("Schedule Background Rebuilds", "Scheduling background rebuilds",
+                           lambda v: deferred.schedule(steps), verbose)
+        else:
+            ## Initramfs rebuild if kernel was updated
+            self._run_step("Rebuild initramfs", "Rebuilding initramfs",
+                           lambda v: init.rebuild_initramfs(new_kernel), verbose)
 
-        cli_print_utility.print_header("Rebuild initramfs", verbose)
-        cli_print_utility.print_output(lambda v: init.rebuild_initramfs(new_kernel), verbose, "Rebuilding initramfs")
+            ## Nvidia driver rebuild
+            self._run_step("Rebuild Nvidia Drivers", "Rebuilding NVIDIA drivers",
+                           lambda v: nvidia.rebuild_nvidia_modules(show_live_output=v), verbose)
 
-        ## Nvidia driver rebuild
-        cli_print_utility.print_header("Rebuild Nvidia Drivers", verbose)
-        cli_print_utility.print_output(lambda v: nvidia.rebuild_nvidia_modules(show_live_output=v), verbose,
-                         "Rebuilding NVIDIA drivers")
+            # Both rebuilds succeeded (a failure raises), so the old job is done
+            if retry:
+                deferred.clear()
 
         # Super call to perform generic updates (Snap, Flatpak, Brew)
-        super().update(verbose, brew)
+        if not extras_done:
+            super().update(verbose, brew, kernel_policy, defer_rebuild, security_only, apps)
 
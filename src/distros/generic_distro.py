@@ -1,4 +1,8 @@
-from src.helper import cli_print_utility
+import contextvars
+import threading
+
+from src.core import journal, pkgdb
+from src.helper import cli_print_utility, events, locks, transport
 from src.package_managers import snap, flatpak, brew as homebrew
 
 
@@ -10,7 +14,7 @@ class GenericDistro:
     directly for unsupported distributions or as a base class for distro-specific implementations.
     """
 
-    def update(self, verbose, brew):
+    def update(self, verbose, brew, kernel_policy="ask", defer_rebuild=False, security_only=False, apps=True):
         """Perform system updates for generic Linux distributions.
 
         Updates common package managers including Snap, Flatpak, and optionally Homebrew.
@@ -18,17 +22,160 @@ class GenericDistro:
         Args:
             verbose: If True, show detailed output; if False, show minimal output with spinners.
             brew: If True, include Homebrew package updates.
+            kernel_policy: Kernel update policy ("ask", "allow" or "exclude"); unused here.
+            defer_rebuild: Hand post-update rebuilds to a background job; unused here.
+            security_only: Apply only security updates; unused here.
+            apps: If True, include Snap and Flatpak updates.
+        """
+        for header, description, function in self._extra_steps(brew, apps):
+            self._run_step(header, description, function, verbose)
+
+    def _run_step(self, header, description, function, verbose) -> bool:
+        """Run one update step and record it in the run journal.
+
+        A step that completed in the interrupted run being resumed is skipped.
+
+        Args:
+            header: Header printed in verbose mode.
+            description: Progress description, also the step's journal name.
+            function: Callable accepting the verbose flag, as for cli_print_utility.print_output.
+            verbose: If True, show detailed output; if False, show minimal output with spinners.
+
+        Returns:
+            True if the step ran, False if it was skipped.
         """
-        ## Snap package updates
-        cli_print_utility.print_header("Update Snap Packages", verbose)
-        cli_print_utility.print_output(lambda v: snap.update_snap(show_live_output=v), verbose, "Updating Snap packages")
+        cli_print_utility.print_header(header, verbose)
+        if journal.is_done(description):
+            print(f"⏭️  {description} (done in the interrupted run)")
+            return False
+        with events.step(description):
+            cli_print_utility.print_output(function, verbose, description)
+        journal.complete(description)
+        return True
 
-        ## Flatpak package updates
-        cli_print_utility.print_header("Update Flatpak Packages", verbose)
-        cli_print_utility.print_output(lambda v: flatpak.update_flatpak(show_live_output=v), verbose, "Updating Flatpak packages")
+    def _extra_steps(self, brew, apps=True):
+        """List the Snap, Flatpak and Homebrew update steps.
+
+        Args:
+            brew: If True, include the Homebrew update step.
+            apps: If True, include the Snap and Flatpak update steps.
 
-        ## Homebrew package updates
+        Returns:
+            List of (header, description, function) tuples, where function
+            accepts the verbose flag like cli_print_utility.print_output expects.
+        """
+        steps = []
+        if apps:
+            steps += [
+                ("Update Snap Packages", "Updating Snap packages",
+                 lambda v: snap.update_snap(show_live_output=v)),
+                ("Update Flatpak Packages", "Updating Flatpak packages",
+                 lambda v: flatpak.update_flatpak(show_live_output=v)),
+            ]
         if brew:
-            cli_print_utility.print_header("Update Homebrew Packages", verbose)
-            cli_print_utility.print_output(lambda v: homebrew.update_brew(show_live_output=v), verbose,
-                                           "Updating Homebrew packages")
\ No newline at end of file
+            steps.append(("Update Homebrew Packages", "Updating Homebrew packages",
+                          lambda v: homebrew.update_brew(show_live_output=v)))
+        return steps
+
+    def _start_extras_in_background(self, brew, apps=True):
+        """Start the Snap, Flatpak and Homebrew updates in a background thread.
+
+        Output is captured instead of shown, so the terminal stays free for an
+        interactive prompt. Use _finish_background_extras() to wait and report.
+
+        Args:
+            brew: If True, include Homebrew package updates.
+            apps: If True, include Snap and Flatpak updates.
+
+        Returns:
+            Tuple of (thread, results) to pass to _finish_background_extras().
+        """
+        results = []
+
+        def run_steps():
+            for _header, description, function in self._extra_steps(brew, apps):
+                if journal.is_done(description):
+                    continue
+                try:
+                    with events.step(description):
+                        results.append((description, function(False), None))
+                except Exception as e:
+                    results.append((description, None, e))
+
+        # Copy the context so the updates use the same transport as the caller
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(run_steps,), daemon=True)
+        thread.start()
+        return thread, results
+
+    def _finish_background_extras(self, background, verbose):
+        """Wait for the background extra updates and print their results.
+
+        Args:
+            background: The (thread, results) tuple from _start_extras_in_background().
+            verbose: If True, also print status messages returned by the steps.
+        """
+        thread, results = background
+        if thread.is_alive():
+            print("Waiting for Snap, Flatpak and Homebrew updates to finish...")
+        thread.join()
+
+        for description, message, error in results:
+            if error is not None:
+                print(f"❌ {description} (failed: {error})")
+            else:
+                print(f"✅ {description}")
+                journal.complete(description)
+                if verbose and isinstance(message, str):
+                    print(message)
+
+    def _report_package_changes(self, before, verbose):
+        """Print the packages changed since the `before` index was read.
+
+        Args:
+            before: Installed package index read before the update, or None.
+            verbose: If True, list every changed package; otherwise print a summary line.
+
+        Returns:
+            The pkgdb.diff() result, or None if the package database is unavailable.
+        """
+        if before is None:
+            return None
+        after = pkgdb.read_installed()
+        if after is None:
+            return None
+
+        changes = pkgdb.diff(before, after)
+        if verbose:
+            for name in sorted(changes):
+                old, new = changes[name]
+                print(f"  {name}: {', '.join(old) or '-'} -> {', '.join(new) or '-'}")
+        print(pkgdb.summarize(changes))
+        return changes
+
+    def _update_extras_if_locked(self, manager, verbose, brew, apps=True) -> bool:
+        """Run the Snap, Flatpak and Homebrew updates first if the system package manager is busy.
+
+        These updates do not need the system package lock, so they can use the
+        time another process (PackageKit, dnf-automatic, unattended-upgrades)
+        holds it. The system update then waits for the lock afterwards. Only
+        local locks are seen, so on a remote host the order stays unchanged.
+
+        Args:
+            manager: Lock name of the system package manager ("dnf" or "apt").
+            verbose: If True, show detailed output; if False, show minimal output with spinners.
+            brew: If True, include Homebrew package updates.
+            apps: If True, include Snap and Flatpak updates.
+
+        Returns:
+            True if the generic updates were already run, False otherwise.
+        """
+        if not transport.current().is_local or not self._extra_steps(brew, apps):
+            return False
+        lock_holders = locks.holders(manager)
+        if not lock_holders:
+            return False
+
+        print(f"{manager.upper()} is locked by {locks.describe(lock_holders)}. "
+              f"Updating Snap, Flatpak and Homebrew while waiting...")
+        GenericDistro.update(self, verbose, brew, apps=apps)
+        return True
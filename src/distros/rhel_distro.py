@@ -1,5 +1,5 @@
 from src.distros.generic_distro import GenericDistro
-from src.helper import cli_print_utility
+from src.core import kernel, pkgdb
 from src.package_managers import dnf
 
 
@@ -11,7 +11,7 @@ class RHELDistro(GenericDistro):
     Uses DNF package manager for system updates.
     """
 
-    def update(self, verbose, brew):
+    def update(self, verbose, brew, kernel_policy="ask", defer_rebuild=False, security_only=False, apps=True):
         """
         Perform system update for RHEL-based distributions.
 
@@ -21,11 +21,22 @@ class RHELDistro(GenericDistro):
         Args:
             verbose (bool): Enable verbose output
             brew (bool): Enable Homebrew updates (passed to parent class)
+            kernel_policy (str): "exclude" leaves kernel packages out of the DNF update;
+                "ask" and "allow" update them like any other package
+            defer_rebuild (bool): Background rebuilds; unused, RHEL has no rebuild steps
+            security_only (bool): Apply only security advisories
+            apps (bool): Include Snap and Flatpak updates
         """
-        cli_print_utility.print_header("Update DNF Packages", verbose)
-        cli_print_utility.print_output(dnf.update_dnf, verbose, "Updating DNF packages")
+        extras_done = self._update_extras_if_locked("dnf", verbose, brew, apps)
 
-        cli_print_utility.print_header("Clean DNF Cache", verbose)
-        cli_print_utility.print_output(dnf.clean_dnf_cache, verbose, "Cleaning DNF Cache")
+        installed_before = pkgdb.read_installed()
+        exclude = kernel.KERNEL_EXCLUDES if kernel_policy == "exclude" else None
+        if self._run_step("Update DNF Packages", "Updating DNF packages",
+                          lambda v: dnf.update_dnf(show_live_output=v, exclude=exclude,
+                                                   security_only=security_only), verbose):
+            self._report_package_changes(installed_before, verbose)
 
-        super().update(verbose, brew)
\ No newline at end of file
+        self._run_step("Clean DNF Cache", "Cleaning DNF Cache", dnf.clean_dnf_cache, verbose)
+
+        if not extras_done:
+            super().update(verbose, brew, kernel_policy, defer_rebuild, security_only, apps)
\ No newline at end of file
@@ -32,7 +32,9 @@ def run_with_spinner(function, description: str):
     """Execute a function while displaying an animated spinner.
 
     Shows a rotating spinner animation during function execution and displays
-    a success (✅) or failure (❌) indicator upon completion.
+    a success (✅) or failure (❌) indicator upon completion. When stdout is
+    not a terminal (e.g. captured per host in fleet mode), only the result
+    line is written.
 
     Args:
         function: Callable to execute (should not accept parameters).
@@ -41,6 +43,15 @@ def run_with_spinner(function, description: str):
     Raises:
         Exception: Re-raises any exception from the function after showing failure status.
     """
+    if not sys.stdout.isatty():
+        try:
+            function()
+        except Exception:
+            print(f"❌ {description} (failed)")
+            raise
+        print(f"✅ {description}")
+        return
+
     spinner_chars = ['-', '\\', '|', '/']
     spinner_index = 0
     is_running = True
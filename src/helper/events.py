@@ -0,0 +1,144 @@
+"""In-process event stream module.
+
+The runner and the update steps emit events describing what a run is doing,
+and any number of sinks (a progress UI, a trace exporter, metrics) can
+subscribe to them without hooks in the distro classes:
+
+- StepStarted / StepFinished around each update step (see step())
+- CommandStarted / ProcessExited around each command run by runner.run
+- OutputLine for each line a command writes, while its output is captured
+- Progress for steps that know how far along they are (e.g. Homebrew fetches)
+
+Sinks are called synchronously in the thread that emits the event, so they
+should return quickly. Emitters check active() first, so without subscribers
+an event costs one check and no event object is built; commands then also
+keep collecting their output in one piece instead of line by line.
+"""
+
+import contextlib
+import logging
+import threading
+import time
+from typing import Callable, NamedTuple
+
+from src.helper import log
+
+
+class StepStarted(NamedTuple):
+    """An update step started."""
+
+    step: str
+
+
+class StepFinished(NamedTuple):
+    """An update step finished, successfully if error is None."""
+
+    step: str
+    duration: float
+    error: str | None
+
+
+class CommandStarted(NamedTuple):
+    """runner.run started a command."""
+
+    step: str | None
+    command: list[str]
+
+
+class OutputLine(NamedTuple):
+    """A command wrote a line ("stdout" or "stderr"), without the line break."""
+
+    step: str | None
+    command: list[str]
+    stream: str
+    line: str
+
+
+class ProcessExited(NamedTuple):
+    """A command exited; returncode is None if it was cancelled or could not start."""
+
+    step: str | None
+    command: list[str]
+    returncode: int | None
+    duration: float
+
+
+class Progress(NamedTuple):
+    """A step completed `done` of `total` units of work."""
+
+    step: str | None
+    done: int
+    total: int
+    detail: str
+
+
+# Replaced, never modified, so emit() can iterate without the lock
+_sinks: tuple[Callable, ...] = ()
+_sinks_lock = threading.Lock()
+
+
+def active() -> bool:
+    """Check if any sink is subscribed, i.e. if events should be emitted."""
+    return bool(_sinks)
+
+
+def subscribe(sink: Callable) -> None:
+    """Call sink(event) for every event emitted from now on."""
+    global _sinks
+    with _sinks_lock:
+        _sinks = (*_sinks, sink)
+
+
+def unsubscribe(sink: Callable) -> None:
+    """Stop sending events to a sink (no error if it is not subscribed)."""
+    global _sinks
+    with _sinks_lock:
+        _sinks = tuple(subscribed for subscribed in _sinks if subscribed is not sink)
+
+
+@contextlib.contextmanager
+def subscribed(sink: Callable):
+    """Subscribe a sink for the duration of a block."""
+    subscribe(sink)
+    try:
+        yield sink
+    finally:
+        unsubscribe(sink)
+
+
+def emit(event) -> None:
+    """Send an event to all sinks. A failing sink does not affect the others or the run."""
+    for sink in _sinks:
+        try:
+            sink(event)
+        except Exception as e:
+            logging.warning("Event sink %r failed on %s: %s", sink, type(event).__name__, e)
+
+
+def progress(done: int, total: int, detail: str = "") -> None:
+    """Emit a Progress event for the current step, if anybody is subscribed."""
+    if _sinks:
+        emit(Progress(log.current_step(), done, total, detail))
+
+
+@contextlib.contextmanager
+def step(name: str):
+    """Run a block as an update step: emit StepStarted/StepFinished around it.
+
+    Records logged inside the block go to the step's log file (see log.step).
+
+    Args:
+        name: The step description, e.g. "Updating DNF packages".
+    """
+    with log.step(name):
+        if _sinks:
+            emit(StepStarted(name))
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            if _sinks:
+                emit(StepFinished(name, time.monotonic() - started, str(e) or type(e).__name__))
+            raise
+        if _sinks:
+            emit(StepFinished(name, time.monotonic() - started, None))
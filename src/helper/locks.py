@@ -0,0 +1,235 @@
+"""Package manager lock detection module.
+
+This module detects when another process (PackageKit, dnf-automatic,
+unattended-upgrades, snapd auto-refresh, ...) holds a package manager lock,
+and waits for it to be released instead of letting the command fail.
+
+Lock holders are found by matching the device and inode of the known lock
+files against /proc/locks. This needs no privileges and does not open or take the
+locks itself. Releasing an fcntl/flock lock does not generate an inotify
+event, so waiting polls /proc/locks with a short backoff.
+"""
+
+import glob
+import logging
+import os
+import sys
+import time
+from typing import NamedTuple
+
+from src.helper import snapd_api
+
+LOCK_FILES = {
+    "dnf": [
+        "/usr/lib/sysimage/rpm/.rpm.lock",
+        "/var/lib/rpm/.rpm.lock",
+        "/var/cache/dnf/*_lock.pid",
+        "/var/lib/dnf/rpmdb_lock.pid",
+        "/run/dnf/*.lock",
+    ],
+    "apt": [
+        "/var/lib/dpkg/lock-frontend",
+        "/var/lib/dpkg/lock",
+        "/var/lib/apt/lists/lock",
+        "/var/cache/apt/archives/lock",
+    ],
+}
+
+# Subcommands that modify the system and therefore need the package lock
+_LOCKING_COMMANDS = {
+    "dnf": {"update", "upgrade", "install", "reinstall", "remove", "erase", "downgrade",
+            "distro-sync", "autoremove", "clean", "makecache", "system-upgrade"},
+    "apt": {"update", "upgrade", "full-upgrade", "dist-upgrade", "install", "reinstall",
+            "remove", "purge", "autoremove", "clean"},
+    "snap": {"refresh", "install", "remove", "revert"},
+}
+_EXECUTABLES = {
+    "dnf": "dnf", "dnf5": "dnf", "dnf-3": "dnf", "yum": "dnf",
+    "apt": "apt", "apt-get": "apt",
+    "snap": "snap",
+}
+
+PROC_LOCKS = "/proc/locks"
+PROC_MOUNTINFO = "/proc/self/mountinfo"
+timeout: float = 600.0
+
+
+class LockTimeoutError(RuntimeError):
+    """Exception raised when a package lock is not released in time."""
+    pass
+
+
+class LockHolder(NamedTuple):
+    """A process (or snapd change) holding a package manager lock."""
+
+    path: str
+    pid: int
+    command: str
+
+
+def lock_for(cmd: list[str]) -> str | None:
+    """Determine which package manager lock a command needs.
+
+    Args:
+        cmd: The command as passed to runner.run (optionally prefixed with sudo).
+
+    Returns:
+        "dnf", "apt" or "snap" if the command modifies that package manager's
+        state, None for read-only or unrelated commands.
+    """
+    args = cmd[1:] if cmd and cmd[0] == "sudo" else cmd
+    if not args:
+        return None
+
+    manager = _EXECUTABLES.get(os.path.basename(args[0]))
+    if manager is None:
+        return None
+
+    subcommand = next((arg for arg in args[1:] if not arg.startswith("-")), None)
+    return manager if subcommand in _LOCKING_COMMANDS[manager] else None
+
+
+def _read_proc_locks() -> dict[tuple[int, int, int], int]:
+    """Map locked (major, minor, inode) triples to the pid holding the lock."""
+    locked = {}
+    try:
+        with open(PROC_LOCKS) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 6 or "->" in fields:
+                    continue
+                major, minor, inode = fields[5].split(":")
+                locked[(int(major, 16), int(minor, 16), int(inode))] = int(fields[4])
+    except (OSError, ValueError) as e:
+        logging.debug("Reading %s failed: %s", PROC_LOCKS, e)
+    return locked
+
+
+def _mount_device(path: str) -> tuple[int, int] | None:
+    """Return the superblock device of the mount containing path, from mountinfo.
+
+    /proc/locks reports this device, which differs from stat() on btrfs
+    subvolumes (they have their own anonymous device).
+    """
+    path = os.path.realpath(path)
+    best, device = "", None
+    try:
+        with open(PROC_MOUNTINFO) as f:
+            for line in f:
+                fields = line.split()
+                mount_point = fields[4].replace("\\040", " ")
+                prefix = mount_point.rstrip("/") + "/"
+                # Later entries are mounted over earlier ones
+                if (path == mount_point or path.startswith(prefix)) and len(mount_point) >= len(best):
+                    major, minor = fields[2].split(":")
+                    best, device = mount_point, (int(major), int(minor))
+    except (OSError, ValueError, IndexError) as e:
+        logging.debug("Reading %s failed: %s", PROC_MOUNTINFO, e)
+    return device
+
+
+def _process_name(pid: int) -> str:
+    """Return the command name of a process, or "unknown"."""
+    try:
+        with open(f"/proc/{pid}/comm") as f:
+            return f.read().strip()
+    except OSError:
+        return "unknown"
+
+
+def holders(manager: str) -> list[LockHolder]:
+    """List the current holders of a package manager's locks.
+
+    Args:
+        manager: "dnf", "apt" or "snap".
+
+    Returns:
+        List of LockHolder entries, empty if the lock is free.
+    """
+    if manager == "snap":
+        return [LockHolder(f"snapd change {change.get('id')}", 0, change.get("kind", "unknown"))
+                for change in snapd_api.in_progress_changes()]
+
+    paths = [path for pattern in LOCK_FILES.get(manager, []) for path in glob.glob(pattern)]
+    if not paths:
+        return []
+
+    locked = _read_proc_locks()
+    found = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        devices = [(os.major(stat.st_dev), os.minor(stat.st_dev)), _mount_device(path)]
+        pid = next((locked[device + (stat.st_ino,)] for device in devices
+                    if device and device + (stat.st_ino,) in locked), None)
+        if pid is not None and pid != os.getpid():
+            found.append(LockHolder(path, pid, _process_name(pid) if pid > 0 else "unknown"))
+    return found
+
+
+def is_locked(manager: str) -> bool:
+    """Check if another process holds a package manager's lock.
+
+    Args:
+        manager: "dnf", "apt" or "snap".
+
+    Returns:
+        True if the lock is held, False otherwise.
+    """
+    return bool(holders(manager))
+
+
+def describe(lock_holders: list[LockHolder]) -> str:
+    """Format lock holders for display (e.g., "packagekitd (pid 812)")."""
+    names = []
+    for holder in lock_holders:
+        name = f"{holder.command} (pid {holder.pid})" if holder.pid > 0 else f"{holder.command} ({holder.path})"
+        if name not in names:
+            names.append(name)
+    return ", ".join(names)
+
+
+def wait_until_free(manager: str, wait_timeout: float | None = None) -> float:
+    """Block until a package manager's lock is released.
+
+    Prints a progress line to stderr when waiting starts and every 30 seconds.
+
+    Args:
+        manager: "dnf", "apt" or "snap".
+        wait_timeout: Maximum seconds to wait (default: the module-level timeout).
+
+    Returns:
+        Seconds spent waiting (0.0 if the lock was free).
+
+    Raises:
+        LockTimeoutError: If the lock is still held after the timeout.
+    """
+    if wait_timeout is None:
+        wait_timeout = timeout
+
+    current = holders(manager)
+    if not current:
+        return 0.0
+
+    start = time.monotonic()
+    next_report = start
+    delay = 0.1
+    while current:
+        elapsed = time.monotonic() - start
+        if elapsed >= wait_timeout:
+            raise LockTimeoutError(
+                f"{manager} lock still held by {describe(current)} after {int(elapsed)}s"
+            )
+        if time.monotonic() >= next_report:
+            print(f"⏳ Waiting for {manager} lock held by {describe(current)}... ({int(elapsed)}s)",
+                  file=sys.stderr, flush=True)
+            next_report += 30
+        time.sleep(min(delay, wait_timeout - elapsed))
+        delay = min(delay * 2, 2.0)
+        current = holders(manager)
+
+    waited = time.monotonic() - start
+    logging.debug("%s lock released after %.1fs", manager, waited)
+    return waited
@@ -0,0 +1,234 @@
+"""Logging setup module.
+
+Configures the root logger used by all modules (`logging.debug(...)` etc.)
+for a run:
+
+- Warnings and errors (and info messages in verbose mode) are written to
+  stderr directly, so they appear in order with the other terminal output.
+- All records, including the debug diagnostics and the captured output of
+  every command, are written to one log file per step (e.g.
+  `updating-dnf-packages.log`) in LOG_DIR. Files are rotated when they reach
+  MAX_BYTES, keeping BACKUP_COUNT gzip-compressed older files.
+- Optionally (`--journald`), info and higher records are also sent to the
+  systemd journal with structured fields such as TUXGRADE_STEP and
+  TUXGRADE_COMMAND, queryable with e.g. `journalctl TUXGRADE_STEP=...`.
+
+The log files and the journal are written by a background thread: logging
+calls only put the record on a queue, so writing, rotating and compressing
+never slows down a step, however much output it produces.
+"""
+
+import atexit
+import contextlib
+import contextvars
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import shutil
+import socket
+import struct
+
+LOG_DIR = os.path.join(
+    os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"), "tuxgrade", "logs"
+)
+
+# Size at which a step's log file is rotated, and the compressed files kept
+MAX_BYTES = 1024 * 1024
+BACKUP_COUNT = 5
+
+# Log file for records outside of any step
+GENERAL_LOG = "tuxgrade"
+
+FILE_FORMAT = "%(asctime)s %(levelname)s %(message)s"
+
+JOURNAL_SOCKET = "/run/systemd/journal/socket"
+# Journal messages are cut to this size, so each record fits into one datagram
+JOURNAL_MAX_MESSAGE = 64 * 1024
+
+# syslog priorities of the logging levels
+_PRIORITIES = {logging.CRITICAL: 2, logging.ERROR: 3, logging.WARNING: 4, logging.INFO: 6, logging.DEBUG: 7}
+
+_step: contextvars.ContextVar[str | None] = contextvars.ContextVar("step", default=None)
+
+_listener: logging.handlers.QueueListener | None = None
+_handlers: list[logging.Handler] = []
+
+
+def slug(name: str) -> str:
+    """Turn a step description into a file name, e.g. "Updating DNF packages" -> "updating-dnf-packages"."""
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or GENERAL_LOG
+
+
+def current_step() -> str | None:
+    """Return the step the records logged in this context are attributed to."""
+    return _step.get()
+
+
+@contextlib.contextmanager
+def step(name: str):
+    """Attribute the records logged in this block (in this context) to a step.
+
+    Args:
+        name: The step description, e.g. "Updating DNF packages".
+    """
+    token = _step.set(name)
+    try:
+        yield
+    finally:
+        _step.reset(token)
+
+
+class _StepFilter(logging.Filter):
+    """Attach the current step to each record, in the thread that logs it."""
+
+    def filter(self, record):
+        record.step = _step.get()
+        return True
+
+
+def _compress(source: str, dest: str) -> None:
+    """Rotator writing the rotated log file gzip-compressed."""
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+class StepFileHandler(logging.Handler):
+    """Write each record to the rotating log file of its step."""
+
+    def __init__(self, log_dir: str = LOG_DIR):
+        super().__init__()
+        self.log_dir = log_dir
+        self._files: dict[str, logging.handlers.RotatingFileHandler] = {}
+
+    def _file(self, name: str) -> logging.handlers.RotatingFileHandler:
+        handler = self._files.get(name)
+        if handler is None:
+            os.makedirs(self.log_dir, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                os.path.join(self.log_dir, f"{name}.log"), maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT,
+                encoding="utf-8")
+            handler.namer = lambda path: path + ".gz"
+            handler.rotator = _compress
+            handler.setFormatter(self.formatter)
+            self._files[name] = handler
+        return handler
+
+    def emit(self, record):
+        step_name = getattr(record, "step", None)
+        try:
+            handler = self._file(slug(step_name) if step_name else GENERAL_LOG)
+        except OSError:
+            self.handleError(record)
+            return
+        handler.emit(record)
+
+    def close(self):
+        for handler in self._files.values():
+            handler.close()
+        self._files.clear()
+        super().close()
+
+
+def _journal_field(name: str, value) -> bytes:
+    """Encode one field of the journal native protocol."""
+    data = str(value).encode("utf-8", "replace")
+    if b"\n" in data:
+        return name.encode() + b"\n" + struct.pack("<Q", len(data)) + data + b"\n"
+    return name.encode() + b"=" + data + b"\n"
+
+
+class JournaldHandler(logging.Handler):
+    """Send records to the systemd journal through its native protocol socket."""
+
+    def __init__(self, socket_path: str = JOURNAL_SOCKET):
+        super().__init__()
+        self.socket_path = socket_path
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    def fields(self, record) -> dict:
+        """Build the journal fields of a record."""
+        fields = {
+            "MESSAGE": record.getMessage()[:JOURNAL_MAX_MESSAGE],
+            "PRIORITY": _PRIORITIES.get(record.levelno, 6),
+            "SYSLOG_IDENTIFIER": "tuxgrade",
+            "CODE_FILE": record.pathname,
+            "CODE_LINE": record.lineno,
+            "CODE_FUNC": record.funcName,
+        }
+        if getattr(record, "step", None):
+            fields["TUXGRADE_STEP"] = record.step
+        if getattr(record, "command", None):
+            fields["TUXGRADE_COMMAND"] = " ".join(record.command)
+        if getattr(record, "exit_status", None) is not None:
+            fields["TUXGRADE_EXIT_STATUS"] = record.exit_status
+        return fields
+
+    def emit(self, record):
+        try:
+            payload = b"".join(_journal_field(name, value) for name, value in self.fields(record).items())
+            self._socket.sendto(payload, self.socket_path)
+        except OSError:
+            # No journal (e.g. in a container): drop the record quietly
+            pass
+
+    def close(self):
+        self._socket.close()
+        super().close()
+
+
+def setup(verbose: bool = False, journald: bool = False, log_dir: str = LOG_DIR) -> None:
+    """Configure the root logger for a run.
+
+    Args:
+        verbose: Also show info messages on the terminal.
+        journald: Also send info and higher records to the systemd journal.
+        log_dir: Directory of the per-step log files.
+    """
+    shutdown()
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG)
+
+    console = logging.StreamHandler()
+    console.setLevel(logging.INFO if verbose else logging.WARNING)
+    console.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+
+    files = StepFileHandler(log_dir)
+    files.setFormatter(logging.Formatter(FILE_FORMAT))
+    background: list[logging.Handler] = [files]
+    if journald:
+        journal_handler = JournaldHandler(JOURNAL_SOCKET)
+        journal_handler.setLevel(logging.INFO)
+        background.append(journal_handler)
+
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    queued = logging.handlers.QueueHandler(records)
+    queued.addFilter(_StepFilter())
+
+    global _listener
+    _listener = logging.handlers.QueueListener(records, *background, respect_handler_level=True)
+    _listener.start()
+    _handlers[:] = [console, queued, *background]
+    root.addHandler(console)
+    root.addHandler(queued)
+
+
+def shutdown() -> None:
+    """Write the queued records and restore the unconfigured root logger."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+    root = logging.getLogger()
+    for handler in _handlers:
+        root.removeHandler(handler)
+        handler.close()
+    _handlers.clear()
+    root.setLevel(logging.WARNING)
+
+
+atexit.register(shutdown)
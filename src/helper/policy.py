@@ -0,0 +1,231 @@
+"""Per-step resource policy module.
+
+This module lets updates run at reduced priority on hosts that keep serving
+traffic. Every command run through the runner is classified into a step type,
+and the policy configured for that type is applied by prefixing the command
+with nice/ionice and, for CPU or memory caps, a transient systemd scope.
+
+Each step type also has a timeout after which the runner cancels its
+commands, so a hung Flatpak or Snap update cannot stall the whole run.
+Build and app steps default to one hour, system updates have no limit;
+`timeout = 0` disables the limit.
+
+Policies are read from /etc/tuxgrade/policy.conf (INI format):
+
+    [system]            # dnf, apt, dpkg, rpm
+    nice = 10
+    io_class = best-effort
+    io_priority = 7
+
+    [build]             # akmods, dracut, kernel-install
+    nice = 19
+    io_class = idle
+    cpu_quota = 50%
+    memory_max = 2G
+
+    [apps]              # flatpak, snap, brew
+    nice = 10
+    timeout = 1800      # seconds
+"""
+
+import configparser
+import os
+import shutil
+from typing import NamedTuple
+
+from src.helper import transport
+
+CONFIG_PATH = "/etc/tuxgrade/policy.conf"
+
+STEP_TYPES = {
+    "system": {"dnf", "dnf5", "dnf-3", "yum", "rpm", "apt", "apt-get", "dpkg"},
+    "build": {"akmods", "dracut", "kernel-install", "update-initramfs"},
+    "apps": {"flatpak", "snap", "brew"},
+}
+IO_CLASSES = {"realtime": "1", "best-effort": "2", "idle": "3"}
+
+# Seconds after which commands of a step type are cancelled, unless configured
+DEFAULT_TIMEOUTS = {"build": 3600, "apps": 3600}
+
+
+class StepPolicy(NamedTuple):
+    """Resource limits applied to the commands of one step type."""
+
+    nice: int | None = None
+    io_class: str | None = None
+    io_priority: int | None = None
+    cpu_quota: str | None = None
+    memory_max: str | None = None
+    timeout: float | None = None
+
+
+# Preset used by --low-priority
+LOW_PRIORITY = {
+    "system": StepPolicy(nice=10, io_class="best-effort", io_priority=7),
+    "build": StepPolicy(nice=19, io_class="idle"),
+    "apps": StepPolicy(nice=10, io_class="best-effort", io_priority=7),
+}
+
+policies: dict[str, StepPolicy] = {}
+
+# Whether a tool is installed on a remote target, by (target name, tool)
+_remote_tools: dict[tuple[str, str], bool] = {}
+
+
+def step_type(cmd: list[str]) -> str | None:
+    """Classify a command into a step type.
+
+    Looks through a leading sudo, `bash -lc "<command>"` wrappers and
+    environment assignments (e.g. "HOMEBREW_NO_AUTO_UPDATE=1 brew upgrade").
+
+    Args:
+        cmd: The command as passed to runner.run.
+
+    Returns:
+        "system", "build", "apps", or None for unclassified commands.
+    """
+    args = cmd[1:] if cmd and cmd[0] == "sudo" else cmd
+    if len(args) >= 3 and args[0] == "bash" and args[1] == "-lc":
+        args = args[2].split()
+    while args and "=" in args[0] and not args[0].startswith(("=", "/")):
+        args = args[1:]
+    if not args:
+        return None
+
+    executable = os.path.basename(args[0])
+    for name, executables in STEP_TYPES.items():
+        if executable in executables:
+            return name
+    return None
+
+
+def _available(tool: str) -> bool:
+    """Check if a tool is installed where the current target runs commands.
+
+    Remote targets (SSH, containers) are asked once per tool.
+    """
+    target = transport.current()
+    if target.is_local:
+        return shutil.which(tool) is not None
+    key = (target.name, tool)
+    if key not in _remote_tools:
+        # The runner applies the policy, so it can only be imported here
+        from src.helper import runner
+        _remote_tools[key] = runner.probe(["sh", "-c", f"command -v {tool}"])
+    return _remote_tools[key]
+
+
+def wrap(cmd: list[str]) -> list[str]:
+    """Apply the resource policy of a command's step type.
+
+    Args:
+        cmd: The command as passed to runner.run.
+
+    Returns:
+        The command prefixed with systemd-run/nice/ionice as configured and
+        installed on the target, or unchanged if no policy applies.
+    """
+    policy = policies.get(step_type(cmd) or "")
+    if policy is None or policy == StepPolicy():
+        return cmd
+
+    use_sudo = cmd[0] == "sudo"
+    body = cmd[1:] if use_sudo else cmd
+    prefix = []
+
+    if (policy.cpu_quota or policy.memory_max) and _available("systemd-run"):
+        prefix += ["systemd-run", "--scope", "--quiet", "--collect"]
+        if not use_sudo and os.geteuid() != 0:
+            prefix.append("--user")
+        if policy.cpu_quota:
+            prefix.append(f"--property=CPUQuota={policy.cpu_quota}")
+        if policy.memory_max:
+            prefix.append(f"--property=MemoryMax={policy.memory_max}")
+        prefix.append("--")
+
+    if policy.nice is not None and _available("nice"):
+        prefix += ["nice", "-n", str(policy.nice)]
+
+    if policy.io_class and _available("ionice"):
+        prefix += ["ionice", "-c", IO_CLASSES[policy.io_class]]
+        if policy.io_priority is not None and policy.io_class != "idle":
+            prefix += ["-n", str(policy.io_priority)]
+
+    return (["sudo"] if use_sudo else []) + prefix + body
+
+
+def timeout(cmd: list[str]) -> float | None:
+    """Return the timeout for a command's step type.
+
+    Args:
+        cmd: The command as passed to runner.run.
+
+    Returns:
+        Seconds after which the command is cancelled, or None for no limit.
+    """
+    name = step_type(cmd)
+    configured = policies.get(name or "", StepPolicy()).timeout
+    if configured is None:
+        return DEFAULT_TIMEOUTS.get(name or "")
+    return configured or None
+
+
+def parse(text: str) -> dict[str, StepPolicy]:
+    """Parse policy configuration in INI format.
+
+    Args:
+        text: Configuration file contents.
+
+    Returns:
+        Dictionary mapping step types to their policies.
+
+    Raises:
+        ValueError: If a section or value is invalid.
+    """
+    parser = configparser.ConfigParser(interpolation=None, inline_comment_prefixes=("#", ";"))
+    try:
+        parser.read_string(text)
+    except configparser.Error as e:
+        raise ValueError(str(e)) from e
+
+    parsed = {}
+    for section in parser.sections():
+        if section not in STEP_TYPES:
+            raise ValueError(f"Unknown step type [{section}], expected one of: {', '.join(STEP_TYPES)}")
+        values = parser[section]
+        io_class = values.get("io_class")
+        if io_class is not None and io_class not in IO_CLASSES:
+            raise ValueError(f"Invalid io_class '{io_class}' in [{section}], expected one of: {', '.join(IO_CLASSES)}")
+        step_timeout = values.getfloat("timeout")
+        if step_timeout is not None and step_timeout < 0:
+            raise ValueError(f"Invalid timeout '{step_timeout:g}' in [{section}], expected seconds or 0 for no limit")
+        parsed[section] = StepPolicy(
+            nice=values.getint("nice"),
+            io_class=io_class,
+            io_priority=values.getint("io_priority"),
+            cpu_quota=values.get("cpu_quota"),
+            memory_max=values.get("memory_max"),
+            timeout=step_timeout,
+        )
+    return parsed
+
+
+def load(path: str = CONFIG_PATH, low_priority: bool = False) -> None:
+    """Load the active policies.
+
+    Starts from the --low-priority preset if requested, then applies the
+    configuration file on top (a section replaces the preset for its type).
+
+    Args:
+        path: Path to the policy configuration file (missing file is fine).
+        low_priority: If True, start from the LOW_PRIORITY preset.
+
+    Raises:
+        ValueError: If the configuration file is invalid.
+    """
+    policies.clear()
+    if low_priority:
+        policies.update(LOW_PRIORITY)
+    if os.path.exists(path):
+        with open(path) as f:
+            policies.update(parse(f.read()))
@@ -2,10 +2,28 @@
 
 This module provides utilities for running shell commands with configurable
 error handling and output modes.
+
+Every command runs as the leader of its own process group, so cancelling it
+(after its step timeout, or when the run is interrupted) reaches everything
+it started, including the package manager below sudo: the group is sent
+SIGTERM, then SIGKILL after a grace period.
+
+Commands run without a terminal on stdin, except system steps showing their
+output on a terminal: those get the terminal as their foreground process
+group, so dpkg conffile questions and sudo password prompts can be answered.
 """
 
+import contextvars
+import errno
 import logging
+import os
+import signal
 import subprocess
+import sys
+import threading
+import time
+
+from src.helper import events, locks, log, policy, transcript, transport
 
 
 class CommandError(RuntimeError):
@@ -13,6 +31,26 @@ class CommandError(RuntimeError):
     pass
 
 
+class CommandTimeoutError(CommandError):
+    """Exception raised when a command is cancelled after exceeding its step timeout."""
+    pass
+
+
+# Seconds between SIGTERM and SIGKILL when cancelling commands
+TERMINATE_GRACE = 10
+
+_NEW_PROCESS_GROUP = {"process_group": 0} if sys.version_info >= (3, 11) else {"preexec_fn": os.setpgrp}
+
+# Replaced, never modified, so terminate_all() can read it from a signal
+# handler without taking the lock
+_processes: frozenset[subprocess.Popen] = frozenset()
+_processes_lock = threading.Lock()
+
+# Set by the daemon (see daemon.py): probe results are kept until clear_probes()
+cache_probes: bool = False
+_probes: dict[tuple, bool] = {}
+
+
 def run(cmd: list[str], show_live_output: bool = False, check: bool = True):
     """Run a shell command with configurable output and error handling.
 
@@ -23,31 +61,331 @@ def run(cmd: list[str], show_live_output: bool = False, check: bool = True):
         check: If True, raises CommandError on non-zero exit codes (default).
               If False, returns CompletedProcess with any exit code.
 
+    The resource policy for the command's step type (see policy.py) is
+    applied before it is started, and the command runs through the active
+    transport (see transport.py), which is the local machine by default.
+
+    Commands are cancelled when they exceed the timeout configured for their
+    step type (see policy.timeout). They run without a terminal on stdin, so
+    they cannot stall waiting for input, and sudo is run with -n; system steps
+    with show_live_output on a terminal are the exception (see interactive()).
+
+    Commands that modify a package manager's state (e.g. `dnf update`,
+    `apt upgrade`, `snap refresh`) first wait for any other process holding
+    that package manager's lock to finish (local transport only).
+
+    Every command is recorded when a transcript is being recorded; when one
+    is replayed, nothing is run and the recorded result is returned instead
+    (see transcript.py).
+
+    While event sinks are subscribed (see events.py), CommandStarted,
+    OutputLine (for captured output) and ProcessExited events are emitted.
+
     Returns:
         CompletedProcess instance with returncode, stdout, and stderr attributes.
 
     Raises:
         CommandError: If the command fails (non-zero exit code) and check=True.
+        CommandTimeoutError: If the command exceeds its step timeout.
+        LockTimeoutError: If the package lock is not released within locks.timeout.
+        TranscriptError: If replaying and the command is not in the transcript.
     """
-    logging.debug("Executing: %s", " ".join(cmd))
+    if transcript.replaying():
+        return _replay(cmd, show_live_output, check)
+
+    active = transport.current()
+    manager = locks.lock_for(cmd)
+    if manager is not None and active.is_local:
+        locks.wait_until_free(manager)
 
+    # Apply the nice/ionice/cgroup policy configured for this kind of step,
+    # then hand the command to the active transport (local, SSH, container)
+    terminal = interactive(cmd, show_live_output)
+    full_cmd = policy.wrap(cmd)
+    if full_cmd[0] == "sudo" and active.is_local and not terminal:
+        # Fail instead of waiting for a password nobody can type
+        full_cmd = ["sudo", "-n", *full_cmd[1:]]
+    full_cmd = active.wrap(full_cmd)
+    logging.debug("Executing: %s", " ".join(full_cmd))
+
+    timeout = policy.timeout(cmd)
+    on_line = None
+    if events.active():
+        step = log.current_step()
+        events.emit(events.CommandStarted(step, cmd))
+        on_line = lambda stream, line: events.emit(events.OutputLine(step, cmd, stream, line))
+    started = time.monotonic()
     try:
-        if show_live_output:
-            result = subprocess.run(
-                cmd,
-                check=check,
-                text=True
-            )
+        result = _execute(full_cmd, show_live_output, timeout, on_line=on_line, terminal=terminal)
+    except subprocess.TimeoutExpired as e:
+        transcript.record(cmd, started, None, _text(e.stdout), _text(e.stderr), error=CommandTimeoutError.__name__)
+        _emit_exited(cmd, None, started)
+        logging.error("Command timed out after %ss: %s", timeout, " ".join(cmd))
+        raise CommandTimeoutError(cmd) from e
+    except OSError as e:
+        transcript.record(cmd, started, None, None, None, error=type(e).__name__)
+        _emit_exited(cmd, None, started)
+        raise
+
+    transcript.record(cmd, started, result.returncode, result.stdout, result.stderr)
+    _emit_exited(cmd, result.returncode, started)
+    # The captured output goes to the step's log file (see log.py)
+    logging.debug("Exit status %s: %s\n%s%s", result.returncode, " ".join(cmd), result.stdout or "",
+                  result.stderr or "", extra={"command": cmd, "exit_status": result.returncode})
+    if check and result.returncode != 0:
+        logging.error("Command failed: %s", " ".join(cmd))
+        if result.stderr:
+            logging.debug(result.stderr.strip())
+        raise CommandError(cmd) from subprocess.CalledProcessError(
+            result.returncode, full_cmd, result.stdout, result.stderr)
+    return result
+
+
+def interactive(cmd: list[str], show_live_output: bool) -> bool:
+    """Check if a command gets the terminal on stdin.
+
+    System steps (dnf, apt, dpkg) showing their output on a terminal run in
+    the foreground, so they can ask questions (e.g. about changed conffiles)
+    and sudo can prompt for a password. All other commands must not expect
+    input.
+
+    Args:
+        cmd: The command as passed to run.
+        show_live_output: Whether the command writes to the terminal.
+
+    Returns:
+        True if the command runs in the foreground with the terminal on stdin.
+    """
+    return (show_live_output and policy.step_type(cmd) == "system" and transport.current().is_local
+            and not transcript.replaying() and sys.stdin is not None and sys.stdin.isatty())
+
+
+def probe(cmd: list[str]) -> bool:
+    """Check if a command runs successfully, e.g. whether a tool is installed.
+
+    With cache_probes set, the result is kept per transport target, so a
+    long-running process only probes each tool once.
+
+    Args:
+        cmd: The probe command, e.g. ["flatpak", "--version"].
+
+    Returns:
+        True if the command exited with 0, False if it failed or does not exist.
+    """
+    key = (transport.current().name, *cmd)
+    if cache_probes and key in _probes:
+        return _probes[key]
+    try:
+        available = bool(run(cmd, check=False).returncode == 0)
+    except FileNotFoundError:
+        available = False
+    if cache_probes:
+        _probes[key] = available
+    return available
+
+
+def clear_probes() -> None:
+    """Forget the cached probe results, e.g. after packages were installed or removed."""
+    _probes.clear()
+
+
+def _text(output: str | bytes | None) -> str | None:
+    """Return captured output as text (TimeoutExpired declares it as bytes)."""
+    if isinstance(output, bytes):
+        return output.decode(errors="replace")
+    return output
+
+
+def _emit_exited(cmd: list[str], returncode: int | None, started: float) -> None:
+    """Emit a ProcessExited event if anybody is subscribed."""
+    if events.active():
+        events.emit(events.ProcessExited(log.current_step(), cmd, returncode, time.monotonic() - started))
+
+
+def _start_readers(process: subprocess.Popen, on_line):
+    """Read a command's captured output line by line in two threads, passing each line to on_line."""
+    output: dict[str, list[str]] = {"stdout": [], "stderr": []}
+
+    def read(stream_name):
+        for line in getattr(process, stream_name):
+            output[stream_name].append(line)
+            on_line(stream_name, line.rstrip("\n"))
+
+    # In the caller's context, so sinks can tell whose command the lines belong to
+    threads = [threading.Thread(target=contextvars.copy_context().run, args=(read, name), daemon=True)
+               for name in output]
+    for thread in threads:
+        thread.start()
+    return threads, output
+
+
+def _join_readers(process: subprocess.Popen, readers) -> tuple[str, str]:
+    """Wait for the output readers to reach the end of the output and return it."""
+    threads, output = readers
+    for thread in threads:
+        thread.join()
+    for stream in (process.stdout, process.stderr):
+        if stream is not None:
+            stream.close()
+    return "".join(output["stdout"]), "".join(output["stderr"])
+
+
+def _take_terminal(tty: int) -> None:
+    """Make the calling process's group the terminal's foreground group.
+
+    SIGTTOU is blocked meanwhile, since a background group asking for the
+    terminal would otherwise be stopped.
+    """
+    blocked = signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTTOU})
+    try:
+        os.tcsetpgrp(tty, os.getpgrp())
+    finally:
+        signal.pthread_sigmask(signal.SIG_SETMASK, blocked)
+
+
+def _foreground_child(tty: int) -> None:
+    """Start a command as the leader of a new foreground process group (runs in the child)."""
+    os.setpgid(0, 0)
+    _take_terminal(tty)
+
+
+def _execute(full_cmd: list[str], show_live_output: bool, timeout: float | None, on_line=None,
+             terminal: bool = False):
+    """Run a command in its own process group, cancelling the group on timeout or interrupt.
+
+    Args:
+        full_cmd: The command line to start.
+        show_live_output: If True, the command writes to the terminal; otherwise
+            its output is captured.
+        timeout: Seconds after which the command is cancelled, None for no limit.
+        on_line: Called with the stream name and each captured output line as
+            it is written, None to collect the output in one piece.
+        terminal: If True, the command reads from the terminal as its
+            foreground process group (see interactive()).
+
+    Returns:
+        CompletedProcess instance with returncode, stdout, and stderr attributes.
+
+    Raises:
+        subprocess.TimeoutExpired: If the command was cancelled after the timeout
+            (with the output captured until then).
+        KeyboardInterrupt: If a foreground command was stopped with Ctrl+C.
+    """
+    global _processes
+    pipe = None if show_live_output else subprocess.PIPE
+    if terminal:
+        tty = sys.stdin.fileno()
+        process = subprocess.Popen(full_cmd, text=True, stdout=pipe, stderr=pipe,
+                                   preexec_fn=lambda: _foreground_child(tty))
+    else:
+        process = subprocess.Popen(full_cmd, text=True, stdin=subprocess.DEVNULL, stdout=pipe, stderr=pipe,
+                                   **_NEW_PROCESS_GROUP)
+    with _processes_lock:
+        _processes = _processes | {process}
+    readers = _start_readers(process, on_line) if on_line is not None and not show_live_output else None
+    try:
+        if readers is None:
+            stdout, stderr = process.communicate(timeout=timeout)
         else:
-            result = subprocess.run(
-                cmd,
-                check=check,
-                text=True,
-                capture_output=True
-            )
-        return result
-    except subprocess.CalledProcessError as e:
+            process.wait(timeout=timeout)
+            stdout, stderr = _join_readers(process, readers)
+    except subprocess.TimeoutExpired as e:
+        _terminate([process])
+        stdout, stderr = process.communicate() if readers is None else _join_readers(process, readers)
+        raise subprocess.TimeoutExpired(full_cmd, e.timeout, stdout, stderr)
+    except BaseException:
+        # Ctrl+C or another error while waiting: don't leave the command running
+        _terminate([process])
+        raise
+    finally:
+        with _processes_lock:
+            _processes = _processes - {process}
+        if terminal:
+            try:
+                _take_terminal(tty)
+            except OSError:
+                pass
+    if terminal and process.returncode == -signal.SIGINT:
+        # Ctrl+C reached only the foreground command, not tuxgrade
+        raise KeyboardInterrupt
+    return subprocess.CompletedProcess(full_cmd, process.returncode, stdout, stderr)
+
+
+def _signal_group(process: subprocess.Popen, signum: int) -> None:
+    """Send a signal to a command's process group, ignoring groups that are gone."""
+    try:
+        os.killpg(process.pid, signum)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _terminate(processes: list[subprocess.Popen]) -> None:
+    """Cancel commands: SIGTERM their process groups, SIGKILL them after the grace period."""
+    for process in processes:
+        _signal_group(process, signal.SIGTERM)
+
+    deadline = time.monotonic() + TERMINATE_GRACE
+    for process in processes:
+        try:
+            process.wait(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            pass
+
+    # Also reaches helpers that outlived the group leader. The wait is bounded:
+    # from a signal handler, the interrupted thread may hold the process's
+    # wait lock until the handler returns.
+    for process in processes:
+        _signal_group(process, signal.SIGKILL)
+        try:
+            process.wait(timeout=TERMINATE_GRACE)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+def terminate_all() -> None:
+    """Cancel all running commands and everything they started.
+
+    Called when the run is interrupted, so no package manager keeps running
+    in the background after tuxgrade exits. Safe to call from a signal
+    handler: it does not take the lock of the running commands.
+    """
+    processes = list(_processes)
+    if processes:
+        logging.debug("Cancelling %d running commands", len(processes))
+        _terminate(processes)
+
+
+def _replay(cmd: list[str], show_live_output: bool, check: bool):
+    """Return the recorded result of a command like run() would.
+
+    Raises:
+        CommandError: If the recorded exit code is non-zero and check=True.
+        CommandTimeoutError: If the command timed out when recorded.
+        FileNotFoundError: If the command was not found when recorded.
+        TranscriptError: If the command is not in the transcript.
+    """
+    step = log.current_step()
+    if events.active():
+        events.emit(events.CommandStarted(step, cmd))
+    entry = transcript.replay(cmd)
+    if events.active():
+        if not show_live_output:
+            for stream in ("stdout", "stderr"):
+                for line in (entry[stream] or "").splitlines():
+                    events.emit(events.OutputLine(step, cmd, stream, line))
+        events.emit(events.ProcessExited(step, cmd, entry["returncode"], entry["duration"]))
+
+    if entry["error"] == CommandTimeoutError.__name__:
+        logging.error("Command timed out: %s", " ".join(cmd))
+        raise CommandTimeoutError(cmd)
+    if entry["error"] == "FileNotFoundError":
+        raise FileNotFoundError(errno.ENOENT, "No such file or directory (replayed)", cmd[0])
+    if entry["error"]:
+        raise OSError(f"{entry['error']} (replayed)")
+
+    if show_live_output and entry["stdout"]:
+        print(entry["stdout"], end="")
+    if check and entry["returncode"] != 0:
         logging.error("Command failed: %s", " ".join(cmd))
-        if e.stderr:
-            logging.debug(e.stderr.strip())
-        raise CommandError(cmd) from e
\ No newline at end of file
+        raise CommandError(cmd)
+    return subprocess.CompletedProcess(cmd, entry["returncode"], entry["stdout"], entry["stderr"])
\ No newline at end of file
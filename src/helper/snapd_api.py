@@ -0,0 +1,147 @@
+"""snapd REST API client module.
+
+This module provides a minimal read-only client for the snapd REST API on its
+local Unix socket, so snap state can be queried without spawning the snap
+command-line tool.
+"""
+
+import http.client
+import json
+import logging
+import os
+import socket
+import time
+
+SNAPD_SOCKET = "/run/snapd.socket"
+
+# Change kinds that refresh snaps (snapd's own auto-refresh and `snap refresh`)
+REFRESH_KINDS = ("auto-refresh", "refresh-snap")
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix domain socket."""
+
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self._socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._socket_path)
+
+
+def available() -> bool:
+    """Check if the snapd socket exists.
+
+    Returns:
+        True if /run/snapd.socket is present, False otherwise.
+    """
+    return os.path.exists(SNAPD_SOCKET)
+
+
+def get(path: str, timeout: float = 10.0):
+    """Send a GET request to snapd and return the decoded result.
+
+    Args:
+        path: API path including the query string (e.g., "/v2/changes?select=in-progress").
+        timeout: Socket timeout in seconds (default: 10).
+
+    Returns:
+        The "result" member of the snapd response, or None if snapd is not
+        reachable or the request failed.
+    """
+    status, result = _request(path, timeout)
+    if status != 200:
+        if status is not None:
+            logging.debug("snapd request %s failed with status %s", path, status)
+        return None
+    return result
+
+
+def _request(path: str, timeout: float) -> tuple[int | None, object]:
+    """Send a GET request to snapd.
+
+    Returns:
+        The HTTP status and the "result" member of the response, or
+        (None, None) if snapd is not reachable.
+    """
+    if not available():
+        return None, None
+
+    connection = _UnixHTTPConnection(SNAPD_SOCKET, timeout)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        body = json.loads(response.read() or b"{}")
+        return response.status, body.get("result")
+    except (OSError, http.client.HTTPException, ValueError) as e:
+        logging.debug("snapd request %s failed: %s", path, e)
+        return None, None
+    finally:
+        connection.close()
+
+
+def in_progress_changes() -> list[dict]:
+    """List snapd changes that are still in progress.
+
+    Returns:
+        List of change objects (with "id", "kind", "summary", "status"), empty
+        if none are running or snapd is unreachable.
+    """
+    return get("/v2/changes?select=in-progress") or []
+
+
+def refresh_changes() -> list[dict]:
+    """List in-progress changes that refresh snaps (e.g. snapd's auto-refresh).
+
+    Returns:
+        List of change objects, empty if none are running or snapd is unreachable.
+    """
+    return [change for change in in_progress_changes() if change.get("kind") in REFRESH_KINDS]
+
+
+def pending_refreshes(timeout: float = 30.0) -> list[str] | None:
+    """List the snaps with a pending refresh, like `snap refresh --list`.
+
+    snapd asks the store for the revisions of the installed snaps, without
+    downloading or changing anything.
+
+    Args:
+        timeout: Socket timeout in seconds (the store query can take a while).
+
+    Returns:
+        Names of the snaps with an update, or None if snapd or the store
+        could not be asked.
+    """
+    status, result = _request("/v2/find?select=refresh", timeout)
+    if status == 404:
+        # Older snapd versions answer "snap not found" when nothing is pending
+        return []
+    if status != 200 or not isinstance(result, list):
+        return None
+    return sorted(snap.get("name", "") for snap in result)
+
+
+def wait_for_change(change_id: str, timeout: float) -> dict | None:
+    """Block until a snapd change is ready.
+
+    Args:
+        change_id: ID of the change.
+        timeout: Maximum seconds to wait.
+
+    Returns:
+        The finished change (its "status" is "Done", "Error", ...), or None if
+        it is still running after the timeout or snapd stopped answering.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.1
+    while True:
+        change: dict | None = get(f"/v2/changes/{change_id}")
+        if change is None or change.get("ready"):
+            return change
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 2.0)
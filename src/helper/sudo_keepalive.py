@@ -23,6 +23,8 @@ import atexit
 import signal
 import logging
 
+from src.helper import runner
+
 
 class SudoKeepalive:
     """Manages sudo privilege persistence via background refresh thread."""
@@ -149,8 +151,11 @@ class SudoKeepalive:
     def _signal_handler(self, signum, frame):
         """Handle signals for cleanup.
 
-        Stops the keepalive thread when receiving termination signals
-        (SIGINT, SIGTERM) and re-raises the signal for normal handling.
+        Stops the keepalive thread and cancels running commands (their process
+        groups are not reached by the terminal's SIGINT) when receiving
+        termination signals. SIGINT then raises KeyboardInterrupt so the run
+        can report the cancellation; other signals are re-raised for normal
+        handling.
 
         Args:
             signum: Signal number.
@@ -158,6 +163,10 @@ class SudoKeepalive:
         """
         logging.debug(f"Received signal {signum}, stopping keepalive")
         self.stop()
+        runner.terminate_all()
+        if signum == signal.SIGINT:
+            signal.signal(signum, signal.default_int_handler)
+            raise KeyboardInterrupt
         # Re-raise the signal to allow normal handling
         signal.signal(signum, signal.SIG_DFL)
         os.kill(os.getpid(), signum)
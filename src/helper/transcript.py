@@ -0,0 +1,149 @@
+"""Command transcript recording and replay module.
+
+In record mode, every command run through the runner is appended to a
+transcript file (JSON Lines) with its arguments, host, start time, duration,
+exit code and output. In replay mode, the runner answers commands from such
+a transcript instead of running them, sleeping for the recorded duration
+(scaled by a speed factor), so a production run can be reproduced and
+profiled on another machine.
+
+Example transcript line:
+
+    {"host": "localhost", "cmd": ["sudo", "dnf", "update", "-y"], "start": 1.92,
+     "duration": 84.3, "returncode": 0, "stdout": "...", "stderr": "", "error": null}
+
+Output of commands run with live output goes straight to the terminal and is
+recorded as null. Replayed commands are matched by host and arguments in
+recorded order, so concurrent hosts replay deterministically.
+"""
+
+import json
+import threading
+import time
+
+from src.helper import transport
+
+
+class TranscriptError(RuntimeError):
+    """Exception raised when a replayed command is not in the transcript."""
+    pass
+
+
+_lock = threading.Lock()
+_record_file = None
+_record_start = 0.0
+_replay_entries: dict[tuple, list[dict]] = {}
+_replaying = False
+speed: float = 1.0
+
+
+def start_recording(path: str) -> None:
+    """Record every following command to a transcript file (overwritten).
+
+    Args:
+        path: Path of the transcript file.
+    """
+    global _record_file, _record_start
+    stop()
+    _record_file = open(path, "w", encoding="utf-8")
+    _record_start = time.monotonic()
+
+
+def start_replay(path: str, replay_speed: float = 1.0) -> None:
+    """Answer every following command from a transcript file.
+
+    Args:
+        path: Path of the transcript file.
+        replay_speed: Divisor for recorded durations (2.0 replays twice as
+            fast, 0 does not wait at all).
+
+    Raises:
+        OSError: If the transcript cannot be read.
+        ValueError: If a line is not valid JSON.
+    """
+    global _replaying, speed
+    stop()
+    entries: dict[tuple, list[dict]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entries.setdefault((entry["host"], tuple(entry["cmd"])), []).append(entry)
+    _replay_entries.update(entries)
+    _replaying = True
+    speed = replay_speed
+
+
+def stop() -> None:
+    """Stop recording or replaying."""
+    global _record_file, _replaying
+    with _lock:
+        if _record_file is not None:
+            _record_file.close()
+            _record_file = None
+        _replay_entries.clear()
+        _replaying = False
+
+
+def replaying() -> bool:
+    """Check if commands are answered from a transcript."""
+    return _replaying
+
+
+def recording() -> bool:
+    """Check if commands are recorded to a transcript."""
+    return _record_file is not None
+
+
+def record(cmd: list[str], started: float, returncode: int | None, stdout: str | None,
+           stderr: str | None, error: str | None = None) -> None:
+    """Append a finished command to the transcript, if recording.
+
+    Args:
+        cmd: The command as passed to runner.run.
+        started: time.monotonic() value when the command was started.
+        returncode: Exit code (None if the command could not be started).
+        stdout: Captured standard output (None for live output).
+        stderr: Captured standard error (None for live output).
+        error: Name of the exception raised when starting the command, if any.
+    """
+    if _record_file is None:
+        return
+    entry = {
+        "host": transport.current().name,
+        "cmd": cmd,
+        "start": round(started - _record_start, 3),
+        "duration": round(time.monotonic() - started, 3),
+        "returncode": returncode,
+        "stdout": stdout,
+        "stderr": stderr,
+        "error": error,
+    }
+    with _lock:
+        if _record_file is not None:
+            _record_file.write(json.dumps(entry) + "\n")
+            _record_file.flush()
+
+
+def replay(cmd: list[str]) -> dict:
+    """Take the next recorded result of a command, waiting for its recorded duration.
+
+    Args:
+        cmd: The command as passed to runner.run.
+
+    Returns:
+        The transcript entry.
+
+    Raises:
+        TranscriptError: If the transcript has no (more) entries for the command.
+    """
+    host = transport.current().name
+    with _lock:
+        queue = _replay_entries.get((host, tuple(cmd)))
+        entry = queue.pop(0) if queue else None
+    if entry is None:
+        raise TranscriptError(f"Command not in transcript for {host}: {' '.join(cmd)}")
+
+    if speed > 0:
+        time.sleep(entry["duration"] / speed)
+    return entry
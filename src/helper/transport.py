@@ -0,0 +1,179 @@
+"""Command transport module.
+
+This module decides where the commands started by the runner are executed.
+By default they run on the local machine. Fleet mode selects another
+transport per host (SSH or a container) for the duration of that host's
+update, so the unchanged distro update flow drives a remote system.
+
+The active transport is kept in a context variable, so concurrent host
+updates in different threads each see their own transport.
+
+Modules that read local files as a fast path (package database, lock files,
+running kernel) check `current().is_local` and fall back to running a
+command through the runner otherwise.
+"""
+
+import contextlib
+import contextvars
+import shlex
+
+
+class LocalTransport:
+    """Run commands on the local machine."""
+
+    is_local = True
+
+    def __init__(self, name: str = "localhost"):
+        self.name = name
+
+    def wrap(self, cmd: list[str]) -> list[str]:
+        """Return the command unchanged."""
+        return cmd
+
+    def host_path(self, path: str) -> str | None:
+        """Return a local path as seen by the commands (unchanged)."""
+        return path
+
+
+class SSHTransport:
+    """Run commands on a remote host over SSH.
+
+    Uses BatchMode, so authentication must not prompt: key-based SSH login and
+    passwordless sudo (or logging in as root) are required.
+    """
+
+    is_local = False
+
+    def __init__(self, host: str, user: str | None = None, port: int | None = None,
+                 options: list[str] | None = None):
+        self.host = host
+        self.user = user
+        self.port = port
+        self.options = options or []
+        self.name = host
+
+    def wrap(self, cmd: list[str]) -> list[str]:
+        """Wrap a command into an ssh invocation.
+
+        Args:
+            cmd: The command to run on the remote host.
+
+        Returns:
+            The ssh command line running `cmd` on the host.
+        """
+        ssh = ["ssh", "-n", "-o", "BatchMode=yes", "-o", "ConnectTimeout=15", *self.options]
+        if self.port is not None:
+            ssh += ["-p", str(self.port)]
+        target = f"{self.user}@{self.host}" if self.user else self.host
+        return ssh + [target, "--", shlex.join(cmd)]
+
+    def host_path(self, path: str) -> str | None:
+        """Local paths are not visible on a remote host."""
+        return None
+
+
+class ContainerTransport:
+    """Run commands inside a running container with podman or docker exec.
+
+    A leading sudo is replaced by executing as root in the container, since
+    many container images do not ship sudo.
+
+    `host_root` is where the host's root file system is mounted inside the
+    container ("/run/host" for toolbox and distrobox), if it is.
+    """
+
+    is_local = False
+
+    def __init__(self, container: str, engine: str = "podman", user: str | None = None,
+                 host_root: str | None = None):
+        self.container = container
+        self.engine = engine
+        self.user = user
+        self.host_root = host_root
+        self.name = container
+
+    def wrap(self, cmd: list[str]) -> list[str]:
+        """Wrap a command into a container exec invocation.
+
+        Args:
+            cmd: The command to run in the container.
+
+        Returns:
+            The exec command line running `cmd` in the container.
+        """
+        exec_cmd = [self.engine, "exec"]
+        if cmd and cmd[0] == "sudo":
+            exec_cmd += ["--user", "root"]
+            cmd = cmd[1:]
+        elif self.user is not None:
+            exec_cmd += ["--user", self.user]
+        return exec_cmd + [self.container, *cmd]
+
+    def host_path(self, path: str) -> str | None:
+        """Return a local path as seen inside the container, or None if not mounted."""
+        if self.host_root is None:
+            return None
+        return self.host_root.rstrip("/") + path
+
+
+LOCAL = LocalTransport()
+
+_current: contextvars.ContextVar = contextvars.ContextVar("transport", default=LOCAL)
+
+
+def current():
+    """Return the transport active in the current context."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def use(transport):
+    """Make a transport active for the current context.
+
+    Args:
+        transport: A LocalTransport, SSHTransport or ContainerTransport.
+    """
+    token = _current.set(transport)
+    try:
+        yield transport
+    finally:
+        _current.reset(token)
+
+
+def parse_target(target: str):
+    """Create a transport from an inventory entry.
+
+    Supported forms:
+        local                   - the local machine
+        podman:NAME, docker:NAME - a running container
+        [ssh:][USER@]HOST[:PORT] - a host reached over SSH
+
+    Args:
+        target: The inventory entry.
+
+    Returns:
+        The matching transport.
+
+    Raises:
+        ValueError: If the entry is empty or the port is not a number.
+    """
+    target = target.strip()
+    if not target:
+        raise ValueError("Empty host entry")
+    if target in ("local", "localhost"):
+        return LocalTransport(target)
+
+    scheme, sep, rest = target.partition(":")
+    if sep and scheme in ("podman", "docker"):
+        return ContainerTransport(rest, engine=scheme)
+    if sep and scheme == "ssh":
+        target = rest
+
+    user, _, host = target.rpartition("@")
+    port = None
+    if ":" in host:
+        host, port_text = host.rsplit(":", 1)
+        if not port_text.isdigit():
+            raise ValueError(f"Invalid port in host entry '{target}'")
+        port = int(port_text)
+    return SSHTransport(host, user=user or None, port=port)
@@ -7,13 +7,21 @@ Homebrew, and NVIDIA akmods.
 The script provides both silent mode (with progress indicators) and verbose mode
 (detailed output) for system updates.
 """
-from src.app import cli
+import sys
+
 
 def main():
     """Entry point for the Tuxgrade application.
 
     Delegates to the CLI argument parser and exits with the appropriate status code.
+    With --daemon, only the thin client is loaded and the request is sent to
+    tuxgraded (see app/client.py).
     """
+    if "--daemon" in sys.argv[1:]:
+        from src.app import client
+        exit(client.main([arg for arg in sys.argv[1:] if arg != "--daemon"]))
+
+    from src.app import cli
     exit(cli.parse_args())
 
 if __name__ == "__main__":
@@ -1,4 +1,10 @@
+from src.core import diskspace, pkgcache
 from src.helper import runner
+from src.package_managers import apt_native
+
+# Without a terminal, dpkg cannot ask about changed conffiles: keep the local
+# version, or take the new one where it was never modified
+NONINTERACTIVE_OPTIONS = ["-o", "Dpkg::Options::=--force-confdef", "-o", "Dpkg::Options::=--force-confold"]
 
 def _check_apt_installed() -> bool:
     """Check if APT is installed on the system.
@@ -6,24 +12,99 @@ def _check_apt_installed() -> bool:
     Returns:
         True if APT is available, False otherwise.
     """
-    try:
-        runner.run(["apt", "--version"])
-        return True
-    except runner.CommandError:
-        return False
+    return runner.probe(["apt", "--version"])
     
 
-def update_apt(show_live_output: bool = False):
+def security_upgrades() -> list[str]:
+    """List upgradable packages whose candidate version comes from a security pocket.
+
+    Parses `apt list --upgradable`, where each line names the suites providing
+    the candidate (e.g. "openssl/bookworm-security 3.0.15-1~deb12u1 amd64 ...").
+    Packages `apt-get -s upgrade` keeps back are left out, so the list matches
+    the upgrade set of the opened APT cache the native backend uses.
+
+    Returns:
+        Names of the packages with an update in a "-security" suite.
+    """
+    if apt_native.active():
+        return apt_native.upgrades(security_only=True).packages
+
+    result = runner.run(["apt", "list", "--upgradable"])
+    packages = []
+    for line in result.stdout.splitlines():
+        name, separator, rest = line.partition("/")
+        if not separator or " " in name:
+            continue
+        suites = rest.split(" ", 1)[0].split(",")
+        if any(suite.endswith("-security") for suite in suites):
+            packages.append(name)
+    if not packages:
+        return packages
+
+    upgrading = _upgrade_marks()
+    return [name for name in packages if name in upgrading]
+
+
+def _upgrade_marks() -> set[str]:
+    """List the packages a plain `apt upgrade` would upgrade.
+
+    Simulates the upgrade with `apt-get -s upgrade`, whose "Inst" lines name the
+    upgraded packages (e.g. "Inst openssl [3.0.14-1~deb12u2] (3.0.15-1~deb12u1 ...)").
+    Packages held back because they need new dependencies or removals are not listed.
+
+    Returns:
+        Names of the packages the upgrade would install.
+    """
+    result = runner.run(["apt-get", "-s", "upgrade"])
+    return {line.split()[1] for line in result.stdout.splitlines() if line.startswith("Inst ")}
+
+
+def update_apt(show_live_output: bool = False, security_only: bool = False):
     """Update all APT packages on the system.
 
     Args:
         show_live_output: If True, display live update output to terminal.
                           If False, suppress output (default).
+        security_only: If True, only upgrade packages with an update in the
+                       Debian/Ubuntu security pocket.
+
+    Without a terminal (see runner.interactive), dpkg keeps locally modified
+    conffiles instead of asking. Downloads go through the shared package
+    cache when it is enabled. After
+    the package lists are refreshed, a dry run checks that the upgrade fits
+    on disk (see diskspace.py); with the native backend, the upgrade set is
+    computed in-process instead.
+
+    Returns:
+        A status message if security_only is set and there is nothing to upgrade.
 
     Raises:
         RuntimeError: If APT is not installed on the system.
+        DiskSpaceError: If the cache, root or /boot file system is too full.
     """
     if not _check_apt_installed():
         raise RuntimeError("APT is not installed on this system.")
     runner.run(["sudo", "apt", "update"], show_live_output=show_live_output)
-    runner.run(["sudo", "apt", "upgrade", "-y"], show_live_output=show_live_output)
\ No newline at end of file
+    # Upgrade sets computed before the refresh are outdated
+    apt_native.reset()
+
+    options = [*pkgcache.options("apt")]
+    if not runner.interactive(["sudo", "apt", "upgrade"], show_live_output):
+        options += NONINTERACTIVE_OPTIONS
+    cmd = ["sudo", "apt", "upgrade", "-y", *options]
+    if security_only:
+        packages = security_upgrades()
+        if not packages:
+            return "No security updates available."
+        cmd = ["sudo", "apt", "install", "--only-upgrade", "-y", *options, *packages]
+
+    if apt_native.active():
+        diskspace.check_estimate("apt", apt_native.upgrades(security_only).estimate)
+    else:
+        diskspace.check("apt", ["--assume-no" if arg == "-y" else arg for arg in cmd])
+    pkgcache.seed("apt")
+    try:
+        runner.run(cmd, show_live_output=show_live_output)
+    finally:
+        pkgcache.collect("apt")
+        apt_native.reset()
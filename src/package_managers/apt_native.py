@@ -0,0 +1,138 @@
+"""In-process APT backend using the python-apt bindings.
+
+`apt list --upgradable` and the `apt upgrade --assume-no` dry run each read
+the package lists and the dpkg status again. With the native backend
+(`--backend native`), the APT cache is opened once after the package lists
+are refreshed, and the upgrade set is computed in-process and kept until
+the next refresh or upgrade:
+
+- the packages to upgrade, and those with a candidate from a security pocket
+- the download and install sizes for the disk space preflight
+
+`apt update` and the upgrade itself still run through `sudo apt`, since they
+need root while tuxgrade runs as the user. The CLI stays in use when the
+bindings are not installed, for fleet hosts and containers, and while a
+transcript is recorded or replayed. A cache that fails to open switches the
+run back to the CLI.
+"""
+
+import logging
+from typing import NamedTuple
+
+from src.core import diskspace
+from src.helper import transcript, transport
+
+# Set by --backend native
+enabled: bool = False
+
+KERNEL_PREFIX = "linux-image-"
+
+_cache = None
+_upgrade_sets: dict[bool, "UpgradeSet"] = {}
+
+
+class UpgradeSet(NamedTuple):
+    """Packages an upgrade would change, computed from the APT cache."""
+
+    packages: list[str]
+    security: list[str]
+    estimate: diskspace.Estimate | None
+
+
+def _bindings():
+    """Import the python-apt bindings, None if they are not installed."""
+    try:
+        import apt
+    except ImportError:
+        return None
+    return apt
+
+
+def available() -> bool:
+    """Check if the python-apt bindings are installed."""
+    return _bindings() is not None
+
+
+def _open_cache():
+    """Return the APT cache, opening it on first use."""
+    global _cache
+    if _cache is None:
+        _cache = _bindings().Cache()
+    return _cache
+
+
+def active() -> bool:
+    """Check if APT queries of the current target are answered in-process.
+
+    Opens the APT cache on first use. If opening fails, the backend is
+    disabled for the rest of the run and the CLI is used instead.
+    """
+    global enabled
+    if not enabled or not transport.current().is_local:
+        return False
+    if transcript.replaying() or transcript.recording():
+        return False
+    if not available():
+        logging.warning("python-apt is not installed, using the apt command")
+        enabled = False
+        return False
+    try:
+        _open_cache()
+    except (SystemError, OSError) as e:
+        logging.warning("Cannot open the APT cache, using the apt command: %s", e)
+        enabled = False
+        return False
+    return True
+
+
+def reset() -> None:
+    """Drop the opened cache, e.g. after the package lists or installed packages changed."""
+    global _cache
+    _cache = None
+    _upgrade_sets.clear()
+
+
+def _from_security_pocket(package) -> bool:
+    """Check if the candidate version of a package comes from a "-security" suite."""
+    return any(origin.archive.endswith("-security") for origin in package.candidate.origins)
+
+
+def _measure(cache, names: list[str]) -> diskspace.Estimate | None:
+    """Return the space needed by the changes currently marked in the cache."""
+    if not names:
+        return None
+    kernel = any(name.startswith(KERNEL_PREFIX) for name in names)
+    return diskspace.Estimate(int(cache.required_download), max(int(cache.required_space), 0), kernel)
+
+
+def upgrades(security_only: bool = False) -> UpgradeSet:
+    """Compute the upgrade set from the opened cache (once per mode and cache).
+
+    Args:
+        security_only: If True, only mark the packages with an update in the
+            security pocket, like `apt install --only-upgrade` of them would.
+
+    Returns:
+        The packages to upgrade, the security updates among them, and the
+        space the upgrade needs.
+    """
+    if security_only in _upgrade_sets:
+        return _upgrade_sets[security_only]
+
+    cache = _open_cache()
+    cache.clear()
+    cache.upgrade(dist_upgrade=False)
+    upgradable = sorted(package.name for package in cache.get_changes() if package.marked_upgrade)
+    security = [name for name in upgradable if _from_security_pocket(cache[name])]
+
+    if security_only:
+        cache.clear()
+        for name in security:
+            cache[name].mark_upgrade()
+        upgrade_set = UpgradeSet(security, security, _measure(cache, security))
+    else:
+        upgrade_set = UpgradeSet(upgradable, security, _measure(cache, upgradable))
+    cache.clear()
+
+    _upgrade_sets[security_only] = upgrade_set
+    return upgrade_set
@@ -2,8 +2,29 @@
 
 This module provides functions to check Homebrew availability and update
 installed Homebrew packages and casks.
+
+After `brew update`, the outdated formulae and casks are listed and their
+bottles and cask downloads are fetched in parallel by a bounded number of
+`brew fetch` processes. `brew upgrade` then only pours the local downloads.
+Auto-update is suppressed for these commands, so that Homebrew does not run
+`brew update` a second time before each of them.
 """
-from src.helper import runner
+
+import concurrent.futures
+import contextvars
+import json
+import logging
+import shlex
+
+from src.helper import events, runner
+
+# Concurrent `brew fetch` processes
+FETCH_WORKERS = 4
+
+NO_AUTO_UPDATE = "HOMEBREW_NO_AUTO_UPDATE=1"
+
+# `brew fetch` option per section of `brew outdated --json=v2`
+_KINDS = {"formulae": "--formula", "casks": "--cask"}
 
 
 def _check_brew_installed() -> bool:
@@ -13,12 +34,57 @@ def _check_brew_installed() -> bool:
         True if Homebrew is available, False otherwise.
     """
     # Test if brew is actually executable via login shell
-    result = runner.run(
-        ["bash", "-lc", "command -v brew"],
-        check=False,
-        show_live_output=False
-    )
-    return result.returncode == 0
+    return runner.probe(["bash", "-lc", "command -v brew"])
+
+
+def _brew(arguments: str) -> list[str]:
+    """Build a brew command run through a login shell, without auto-update."""
+    return ["bash", "-lc", f"{NO_AUTO_UPDATE} brew {arguments}"]
+
+
+def outdated() -> list[tuple[str, str]] | None:
+    """List the outdated formulae and casks.
+
+    Returns:
+        (fetch option, name) pairs, e.g. ("--formula", "git"), or None if
+        the list cannot be read.
+    """
+    result = runner.run(_brew("outdated --json=v2"), check=False)
+    try:
+        sections = json.loads(result.stdout)
+    except json.JSONDecodeError:
+        logging.warning("Cannot read the outdated Homebrew packages: %s", result.stderr.strip())
+        return None
+    return [(option, package["name"]) for section, option in _KINDS.items()
+            for package in sections.get(section, [])]
+
+
+def _fetch(option: str, name: str) -> bool:
+    """Download the bottle or cask of one package, True on success."""
+    return bool(runner.run(_brew(f"fetch {option} {shlex.quote(name)}"), check=False).returncode == 0)
+
+
+def prefetch(packages: list[tuple[str, str]]) -> list[str]:
+    """Fetch the downloads of several packages concurrently.
+
+    Args:
+        packages: (fetch option, name) pairs as returned by outdated().
+
+    Returns:
+        Names of the packages whose download failed; `brew upgrade` retries them.
+    """
+    if not packages:
+        return []
+    failed = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(packages))) as pool:
+        # Copy the context so the fetches use the caller's transport
+        futures = {pool.submit(contextvars.copy_context().run, _fetch, option, name): name
+                   for option, name in packages}
+        for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            if not future.result():
+                failed.append(futures[future])
+            events.progress(done, len(packages), f"Fetched {futures[future]}")
+    return failed
 
 
 def update_brew(show_live_output: bool = False) -> str | None:
@@ -29,14 +95,21 @@ def update_brew(show_live_output: bool = False) -> str | None:
                          If False, suppress output (default).
 
     Returns:
-        Status message if Homebrew is not installed, None otherwise.
+        Status message if Homebrew is not installed or nothing is outdated,
+        None otherwise.
     """
     if not _check_brew_installed():
         return "Homebrew is not installed on this system."
 
     # Always use login shell to load brew environment
     runner.run(["bash", "-lc", "brew update"], show_live_output=show_live_output)
-    runner.run(["bash", "-lc", "brew upgrade"], show_live_output=show_live_output)
-    return None
 
+    packages = outdated()
+    if packages == []:
+        return "All Homebrew packages up to date."
+    failed = prefetch(packages or [])
+    if failed:
+        logging.warning("Could not prefetch %s, brew upgrade downloads them", ", ".join(failed))
 
+    runner.run(_brew("upgrade"), show_live_output=show_live_output)
+    return None
@@ -4,7 +4,9 @@ This module provides functions to check DNF availability and perform
 system package updates using DNF.
 """
 
+from src.core import diskspace, pkgcache
 from src.helper import runner
+from src.package_managers import dnf_native
 
 
 def _check_dnf_installed() -> bool:
@@ -13,26 +15,46 @@ def _check_dnf_installed() -> bool:
     Returns:
         True if DNF is available, False otherwise.
     """
-    try:
-        runner.run(["dnf", "--version"])
-        return True
-    except runner.CommandError:
-        return False
+    return runner.probe(["dnf", "--version"])
 
 
-def update_dnf(show_live_output: bool = False):
+def update_dnf(show_live_output: bool = False, exclude: list[str] | None = None, security_only: bool = False):
     """Update all DNF packages on the system.
 
     Args:
         show_live_output: If True, display live update output to terminal.
                           If False, suppress output (default).
+        exclude: Package name globs to leave out of the update (e.g., ["kernel*"]).
+        security_only: If True, only apply updates from security advisories
+                       (DNF's --security advisory filter).
+
+    Downloads go through the shared package cache when it is enabled. A dry
+    run first checks that the transaction fits on disk (see diskspace.py);
+    with the native backend, the transaction is resolved in-process instead.
 
     Raises:
         RuntimeError: If DNF is not installed on the system.
+        DiskSpaceError: If the cache, root or /boot file system is too full.
     """
     if not _check_dnf_installed():
         raise RuntimeError("DNF is not installed on this system.")
-    runner.run(["sudo", "dnf", "update", "-y"], show_live_output=show_live_output)
+    cmd = ["sudo", "dnf", "update", "-y"]
+    if security_only:
+        cmd.append("--security")
+    for pattern in exclude or []:
+        cmd.append(f"--exclude={pattern}")
+    cmd += pkgcache.options("dnf")
+    if dnf_native.active():
+        diskspace.check_estimate("dnf", dnf_native.estimate(exclude, security_only))
+    else:
+        diskspace.check("dnf", ["--assumeno" if arg == "-y" else arg for arg in cmd])
+    pkgcache.seed("dnf")
+    try:
+        runner.run(cmd, show_live_output=show_live_output)
+    finally:
+        pkgcache.collect("dnf")
+        # The loaded package state is outdated after the transaction
+        dnf_native.reset()
 
 def clean_dnf_cache(show_live_output: bool = False):
     """Clean DNF package cache and old metadata.
@@ -50,8 +72,9 @@ def clean_dnf_cache(show_live_output: bool = False):
     if not _check_dnf_installed():
         raise RuntimeError("DNF is not installed on this system.")
     
-    # Clean cached packages
-    runner.run(["sudo", "dnf", "clean", "packages"], show_live_output=show_live_output)
+    # Clean cached packages (the shared package cache keeps its own copies)
+    cache_options = pkgcache.options("dnf")
+    runner.run(["sudo", "dnf", "clean", "packages", *cache_options], show_live_output=show_live_output)
     
     # Clean old metadata
-    runner.run(["sudo", "dnf", "clean", "metadata"], show_live_output=show_live_output)
+    runner.run(["sudo", "dnf", "clean", "metadata", *cache_options], show_live_output=show_live_output)
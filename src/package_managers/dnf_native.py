@@ -0,0 +1,183 @@
+"""In-process DNF backend using the libdnf5 Python bindings.
+
+Every `dnf` command loads the repository configuration, the metadata and the
+installed packages again. With the native backend (`--backend native`), they
+are loaded once into a libdnf5 Base and the read-only DNF work of a run is
+answered from it:
+
+- the kernel update check (kernel.new_kernel_version/get_new_kernel_version)
+- resolving the update transaction for the disk space preflight
+
+The transaction itself and the cache cleanup still run through `sudo dnf`,
+since they need root while tuxgrade runs as the user. The CLI stays in use
+when the bindings are not installed, for fleet hosts and containers, and while
+a transcript is recorded or replayed (in-process work has no commands to
+record). A Base that fails to load switches the run back to the CLI.
+"""
+
+import logging
+
+from src.core import diskspace
+from src.helper import transcript, transport
+
+# Set by --backend native
+enabled: bool = False
+
+KERNEL_PACKAGE = "kernel"
+KERNEL_NAMES = ("kernel", "kernel-core")
+
+_base = None
+
+
+def _bindings():
+    """Import the libdnf5 bindings, None if they are not installed."""
+    try:
+        import libdnf5
+    except ImportError:
+        return None
+    return libdnf5
+
+
+def available() -> bool:
+    """Check if the libdnf5 Python bindings are installed."""
+    return _bindings() is not None
+
+
+def _load_base():
+    """Load the system configuration, repositories and installed packages once."""
+    libdnf5 = _bindings()
+    base = libdnf5.base.Base()
+    # libdnf5 5.0/5.1 spell these differently than 5.2
+    if hasattr(base, "load_config"):
+        base.load_config()
+    else:
+        base.load_config_from_file()
+    base.setup()
+
+    repo_sack = base.get_repo_sack()
+    repo_sack.create_repos_from_system_configuration()
+    if hasattr(repo_sack, "load_repos"):
+        repo_sack.load_repos()
+    else:
+        repo_sack.update_and_load_enabled_repos(True)
+    return base
+
+
+def _loaded_base():
+    """Return the Base, loading it on first use."""
+    global _base
+    if _base is None:
+        _base = _load_base()
+    return _base
+
+
+def active() -> bool:
+    """Check if DNF queries of the current target are answered in-process.
+
+    Loads the Base on first use. If loading fails, the backend is disabled
+    for the rest of the run and the CLI is used instead.
+    """
+    global enabled
+    if not enabled or not transport.current().is_local:
+        return False
+    if transcript.replaying() or transcript.recording():
+        return False
+    if not available():
+        logging.warning("libdnf5 Python bindings are not installed, using the dnf command")
+        enabled = False
+        return False
+    try:
+        _loaded_base()
+    except RuntimeError as e:
+        logging.warning("Cannot load libdnf5, using the dnf command: %s", e)
+        enabled = False
+        return False
+    return True
+
+
+def reset() -> None:
+    """Drop the loaded Base, e.g. after a transaction changed the installed packages."""
+    global _base
+    _base = None
+
+
+def _security_advisories(base):
+    """Return a query for the security advisories of the loaded repositories."""
+    libdnf5 = _bindings()
+    advisories = libdnf5.advisory.AdvisoryQuery(base)
+    advisories.filter_type("security")
+    return advisories
+
+
+def kernel_update(security_only: bool = False) -> str | None:
+    """Look up the newest kernel update in the loaded metadata.
+
+    Args:
+        security_only: If True, only consider kernel updates from security advisories.
+
+    Returns:
+        Version of the kernel update (e.g. "6.17.12"), or None if there is none.
+    """
+    libdnf5 = _bindings()
+    base = _loaded_base()
+    query = libdnf5.rpm.PackageQuery(base)
+    query.filter_name([KERNEL_PACKAGE])
+    query.filter_upgrades()
+    if security_only:
+        query.filter_advisories(_security_advisories(base), libdnf5.common.QueryCmp_GTE)
+    query.filter_latest_evr()
+
+    for package in query:
+        return str(package.get_version())
+    return None
+
+
+def estimate(exclude: list[str] | None = None, security_only: bool = False) -> "diskspace.Estimate | None":
+    """Resolve the update transaction in-process and measure it.
+
+    Args:
+        exclude: Package name globs to leave out of the update (e.g., ["kernel*"]).
+        security_only: If True, only include updates from security advisories.
+
+    Returns:
+        Space the transaction needs, or None if there is nothing to update or
+        it cannot be resolved (the update itself then reports the problem).
+    """
+    libdnf5 = _bindings()
+    base = _loaded_base()
+    package_sack = base.get_rpm_package_sack()
+    if exclude:
+        excluded = libdnf5.rpm.PackageQuery(base)
+        excluded.filter_name(exclude, libdnf5.common.QueryCmp_GLOB)
+        package_sack.add_user_excludes(excluded)
+
+    try:
+        goal = libdnf5.base.Goal(base)
+        settings = libdnf5.base.GoalJobSettings()
+        if security_only:
+            settings.set_advisory_filter(_security_advisories(base))
+        goal.add_rpm_upgrade(settings)
+        transaction = goal.resolve()
+    finally:
+        if exclude:
+            package_sack.clear_user_excludes()
+
+    if transaction.get_problems() != libdnf5.base.GoalProblem_NO_PROBLEM:
+        logging.debug("libdnf5 could not resolve the update: %s", transaction.get_resolve_logs_as_strings())
+        return None
+
+    download = install = 0
+    kernel = False
+    for item in transaction.get_transaction_packages():
+        if not libdnf5.transaction.transaction_item_action_is_inbound(item.get_action()):
+            continue
+        package = item.get_package()
+        if not package.is_available_locally():
+            download += package.get_download_size()
+        install += package.get_install_size()
+        install -= sum(replaced.get_install_size() for replaced in item.get_replaces())
+        kernel = kernel or package.get_name() in KERNEL_NAMES
+
+    if download == 0 and install == 0 and not kernel:
+        return None
+    return diskspace.Estimate(download, max(install, 0), kernel)
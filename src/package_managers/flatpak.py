@@ -2,9 +2,31 @@
 
 This module provides functions to check Flatpak availability and update
 installed Flatpak applications.
+
+The system and the per-user installation are updated as two parallel tasks,
+since they use separate repositories and locks. With pruning enabled
+(`--flatpak-prune`), runtimes and extensions that no installed application
+uses any more are removed afterwards, and the installed size of the removed
+refs is reported.
 """
 
-from src.helper import runner
+import concurrent.futures
+import contextvars
+import re
+
+from src.helper import events, runner
+
+INSTALLATIONS = {"--system": "System", "--user": "User"}
+
+# Set by --flatpak-prune
+prune_unused: bool = False
+
+# Cleared by the daemon (see daemon.py): as root, --user is root's installation
+update_user_installation: bool = True
+
+# GLib formats sizes with SI units and a (no-break) space, e.g. "385.6 MB"
+_SIZE = re.compile(r"([\d.,]+)\s*(bytes|kB|MB|GB|TB)")
+_SIZE_UNITS = {"bytes": 1, "kB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3, "TB": 1000 ** 4}
 
 
 def _check_flatpak_installed() -> bool:
@@ -13,24 +35,101 @@ def _check_flatpak_installed() -> bool:
     Returns:
         True if Flatpak is available, False otherwise.
     """
-    try:
-        result = runner.run(["flatpak", "--version"], check=False)
-        return result.returncode == 0
-    except FileNotFoundError:
-        return False
+    return runner.probe(["flatpak", "--version"])
+
+
+def _parse_size(text: str) -> int:
+    """Convert a size like "385.6 MB" to bytes (0 if there is none)."""
+    match = _SIZE.search(text)
+    if match is None:
+        return 0
+    return int(float(match.group(1).replace(",", ".")) * _SIZE_UNITS[match.group(2)])
+
+
+def _format_size(size: int) -> str:
+    """Format a byte count like GLib does, in MB or GB."""
+    if size >= 1000 ** 3:
+        return f"{size / 1000 ** 3:.1f} GB"
+    return f"{size / 1000 ** 2:.1f} MB"
+
+
+def installed_sizes(installation: str) -> dict[str, int]:
+    """List the installed refs of an installation with their installed size.
+
+    Args:
+        installation: "--system" or "--user".
+
+    Returns:
+        Mapping of ref (e.g. "runtime/org.gnome.Platform/x86_64/46") to bytes.
+    """
+    result = runner.run(["flatpak", "list", installation, "--columns=ref,size"], check=False)
+    sizes = {}
+    for line in result.stdout.splitlines():
+        ref, _, size = line.partition("\t")
+        if ref.count("/") >= 2:
+            sizes[ref.strip()] = _parse_size(size)
+    return sizes
+
+
+def prune(installation: str) -> tuple[int, int]:
+    """Remove the runtimes and extensions no installed application uses.
+
+    Args:
+        installation: "--system" or "--user".
+
+    Returns:
+        Number of removed refs and their installed size in bytes.
+    """
+    before = installed_sizes(installation)
+    runner.run(["flatpak", "uninstall", installation, "--unused", "-y"])
+    after = installed_sizes(installation)
+    removed = [ref for ref in before if ref not in after]
+    return len(removed), sum(before[ref] for ref in removed)
+
+
+def _update_installation(installation: str) -> str:
+    """Update (and optionally prune) one installation.
+
+    Returns:
+        The update output, followed by the pruning result if enabled.
+    """
+    result = runner.run(["flatpak", "update", installation, "-y"])
+    output: str = result.stdout.strip()
+    if prune_unused:
+        count, size = prune(installation)
+        output += f"\nRemoved {count} unused runtimes and extensions ({_format_size(size)} reclaimed)."
+    return output
 
 
 def update_flatpak(show_live_output: bool = False) -> str | None:
     """Update all installed Flatpak applications.
 
+    The system and user installations are updated in parallel with captured
+    output; with show_live_output, their output is returned for printing.
+    The user installation is left alone if update_user_installation is cleared.
+
     Returns:
-        Status message if Flatpak is not installed, None otherwise.
+        Status message if Flatpak is not installed, the output of both
+        installations if show_live_output is set, None otherwise.
+
+    Raises:
+        CommandError: If updating an installation fails (after both finished).
     """
     if not _check_flatpak_installed():
         return "Flatpak is not installed on this system."
-    else:
-        runner.run(["flatpak", "update", "-y"], show_live_output=show_live_output)
-        return None
-
 
+    selected = [installation for installation in INSTALLATIONS
+                if installation != "--user" or update_user_installation]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(selected)) as pool:
+        # Copy the context so both tasks use the caller's transport
+        futures = {installation: pool.submit(contextvars.copy_context().run, _update_installation, installation)
+                   for installation in selected}
+        installations = {future: installation for installation, future in futures.items()}
+        for done, future in enumerate(concurrent.futures.as_completed(installations), 1):
+            events.progress(done, len(selected), f"{INSTALLATIONS[installations[future]]} installation finished")
+    outputs = {installation: future.result() for installation, future in futures.items()}
 
+    if not show_live_output:
+        return None
+    return "\n".join(f"{INSTALLATIONS[installation]} installation:\n{output}"
+                     for installation, output in outputs.items())
@@ -2,9 +2,16 @@
 
 This module provides functions to check Snap availability and update
 installed Snap packages.
+
+Before refreshing, snapd is asked through its REST API (see snapd_api.py)
+whether a refresh is already running and which snaps have updates. A running
+auto-refresh is waited for instead of queueing a second refresh behind it,
+and `snap refresh` is skipped when nothing is pending.
 """
 
-from src.helper import runner
+import sys
+
+from src.helper import locks, runner, snapd_api, transport
 
 def _check_snap_installed() -> bool:
     """Check if Snap is installed on the system.
@@ -12,21 +19,43 @@ def _check_snap_installed() -> bool:
     Returns:
         True if Snap is available, False otherwise.
     """
-    try:
-        result = runner.run(["snap", "--version"], check=False)
-        return result.returncode == 0
-    except FileNotFoundError:
-        return False
+    return runner.probe(["snap", "--version"])
+
+def _wait_for_refreshes() -> list[str]:
+    """Wait for refreshes snapd is already running (e.g. its auto-refresh).
+
+    Returns:
+        Descriptions of the changes that were waited for.
+    """
+    waited = []
+    for change in snapd_api.refresh_changes():
+        description = f"{change.get('kind')} (change {change.get('id')})"
+        print(f"⏳ Waiting for snapd {description} to finish...", file=sys.stderr, flush=True)
+        result = snapd_api.wait_for_change(str(change.get("id")), locks.timeout)
+        status = result.get("status") if result else "still running"
+        waited.append(f"{description}: {status}")
+    return waited
 
 def update_snap(show_live_output: bool = False) -> str | None:
     """Update all installed Snap applications.
 
+    On the local machine, waits for a refresh snapd is already running and
+    skips `snap refresh` if no snap has a pending update afterwards.
+
     Returns:
-        Status message if Snap is not installed, None otherwise.
+        Status message if Snap is not installed, if nothing was pending, or
+        naming the snapd refreshes that were waited for; None otherwise.
     """
     if not _check_snap_installed():
         return "Snap is not installed on this system."
+
+    if transport.current().is_local and snapd_api.available():
+        waited = _wait_for_refreshes()
+        prefix = "".join(f"Waited for snapd {description}\n" for description in waited)
+        if snapd_api.pending_refreshes() == []:
+            return prefix + "All snaps up to date."
     else:
-        runner.run(["sudo", "snap", "refresh"], show_live_output=show_live_output)
-        return None
+        prefix = ""
 
+    runner.run(["sudo", "snap", "refresh"], show_live_output=show_live_output)
+    return prefix.rstrip("\n") or None
@@ -0,0 +1,4 @@
+"""In-process package manager backend tests.
+
+Tests for answering package manager queries through native bindings.
+"""
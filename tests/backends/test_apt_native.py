@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Tests for the python-apt in-process APT backend.
+
+Tests that the security package list and the disk space preflight share one
+upgrade set computed from an opened APT cache, and that the apt command is
+used when the bindings are missing.
+"""
+
+import sys
+import os
+import subprocess
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.core import diskspace
+from src.package_managers import apt, apt_native
+
+MiB = diskspace.MiB
+
+# name: (suite of the candidate, download size, install size change)
+UPGRADABLE = {
+    "openssl": ("bookworm-security", 2 * MiB, 1 * MiB),
+    "linux-image-amd64": ("bookworm-security", 70 * MiB, 300 * MiB),
+    "firefox-esr": ("bookworm-updates", 80 * MiB, 10 * MiB),
+}
+
+
+def fake_python_apt(events):
+    """Build a fake python-apt module whose Cache records opens and upgrades in events."""
+
+    class Package:
+        def __init__(self, cache, name):
+            suite = UPGRADABLE[name][0]
+            self.cache, self.name = cache, name
+            self.candidate = SimpleNamespace(origins=[SimpleNamespace(archive=suite)])
+
+        @property
+        def marked_upgrade(self):
+            return self.name in self.cache.marked
+
+        def mark_upgrade(self):
+            self.cache.marked.add(self.name)
+
+    class Cache:
+        def __init__(self):
+            events.append("open")
+            self.marked = set()
+
+        def __getitem__(self, name):
+            return Package(self, name)
+
+        def clear(self):
+            self.marked = set()
+
+        def upgrade(self, dist_upgrade=False):
+            events.append("upgrade")
+            self.marked = set(UPGRADABLE)
+
+        def get_changes(self):
+            return [Package(self, name) for name in self.marked]
+
+        @property
+        def required_download(self):
+            return sum(UPGRADABLE[name][1] for name in self.marked)
+
+        @property
+        def required_space(self):
+            return sum(UPGRADABLE[name][2] for name in self.marked)
+
+    return SimpleNamespace(Cache=Cache)
+
+
+def command_recorder(calls, stdout=""):
+    """Fake runner.run that records commands and succeeds."""
+    def fake_run(cmd, show_live_output=False, check=True):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout=stdout, stderr="")
+    return fake_run
+
+
+def test_security_update():
+    """Test: A security-only update uses one upgrade set for the package list and the size check."""
+    print("Testing: Native Security Upgrade Set...")
+
+    events, calls, estimates = [], [], []
+    with patch.dict(sys.modules, {"apt": fake_python_apt(events)}), \
+         patch('src.helper.runner.run', side_effect=command_recorder(calls)), \
+         patch('src.core.diskspace.check_estimate', side_effect=lambda manager, e: estimates.append(e)), \
+         patch('src.core.pkgcache.options', return_value=[]), \
+         patch.object(apt_native, 'enabled', True):
+        apt_native.reset()
+        apt.update_apt(security_only=True)
+        cache_after = apt_native._cache
+
+    if ["sudo", "apt", "install", "--only-upgrade", "-y", *apt.NONINTERACTIVE_OPTIONS, "linux-image-amd64",
+        "openssl"] not in calls:
+        print(f"   ❌ FAILED: Security packages not upgraded: {calls}")
+        return False
+    if any(cmd[:2] == ["apt", "list"] or "--assume-no" in cmd for cmd in calls):
+        print(f"   ❌ FAILED: apt queries were run: {calls}")
+        return False
+    if estimates != [diskspace.Estimate(72 * MiB, 301 * MiB, True)]:
+        print(f"   ❌ FAILED: Unexpected estimate {estimates}")
+        return False
+    if events.count("open") != 1 or events.count("upgrade") != 1 or cache_after is not None:
+        print(f"   ❌ FAILED: Expected one cache open and upgrade, got {events}")
+        return False
+
+    print("   ✅ PASSED: One cache, firefox-esr left out, 72 MiB download")
+    return True
+
+
+def test_full_upgrade_set():
+    """Test: The full upgrade set lists all upgrades and the security ones among them."""
+    print("Testing: Native Full Upgrade Set...")
+
+    events = []
+    with patch.dict(sys.modules, {"apt": fake_python_apt(events)}), \
+         patch.object(apt_native, 'enabled', True):
+        apt_native.reset()
+        active = apt_native.active()
+        upgrade_set = apt_native.upgrades()
+        again = apt_native.upgrades()
+        apt_native.reset()
+
+    expected = apt_native.UpgradeSet(
+        ["firefox-esr", "linux-image-amd64", "openssl"],
+        ["linux-image-amd64", "openssl"],
+        diskspace.Estimate(152 * MiB, 311 * MiB, True),
+    )
+    if not active or upgrade_set != expected or again is not upgrade_set:
+        print(f"   ❌ FAILED: Expected {expected} but got {upgrade_set}")
+        return False
+
+    print("   ✅ PASSED: 3 upgrades, 2 from the security pocket, computed once")
+    return True
+
+
+def test_cli_fallback():
+    """Test: Without python-apt, security updates are listed with apt."""
+    print("Testing: CLI Fallback...")
+
+    calls = []
+    listing = ("Listing...\nopenssl/bookworm-security 3.0.15-1~deb12u1 amd64 [upgradable from: 3.0.14-1~deb12u2]\n"
+               "Inst openssl [3.0.14-1~deb12u2] (3.0.15-1~deb12u1 Debian-Security:12/stable-security [amd64])\n")
+    with patch.dict(sys.modules, {"apt": None}), \
+         patch('src.helper.runner.run', side_effect=command_recorder(calls, listing)), \
+         patch.object(apt_native, 'enabled', True):
+        apt_native.reset()
+        packages = apt.security_upgrades()
+        still_enabled = apt_native.enabled
+
+    if packages != ["openssl"] or calls != [["apt", "list", "--upgradable"], ["apt-get", "-s", "upgrade"]] or still_enabled:
+        print(f"   ❌ FAILED: Missing bindings did not fall back to apt ({packages}, {calls})")
+        return False
+
+    print("   ✅ PASSED: apt list --upgradable and apt-get -s upgrade used")
+    return True
+
+
+def main():
+    """Run all python-apt backend tests."""
+    print("=" * 60)
+    print("python-apt Backend Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Native Security Upgrade Set", test_security_update()))
+    print()
+    results.append(("Native Full Upgrade Set", test_full_upgrade_set()))
+    print()
+    results.append(("CLI Fallback", test_cli_fallback()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Tests for the libdnf5 in-process DNF backend.
+
+Tests that the kernel check and the disk space preflight share one loaded
+libdnf5 Base without running dnf, and that the dnf command is used when the
+bindings are missing or a transcript is recorded.
+"""
+
+import sys
+import os
+import subprocess
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.core import diskspace, kernel
+from src.helper import transcript
+from src.package_managers import dnf, dnf_native
+
+MiB = diskspace.MiB
+
+
+class FakePackage:
+    """Package with the accessors the backend uses."""
+
+    def __init__(self, name, version, download=0, install=0, cached=False):
+        self.name, self.version = name, version
+        self.download, self.install, self.cached = download, install, cached
+
+    def get_name(self):
+        return self.name
+
+    def get_version(self):
+        return self.version
+
+    def get_download_size(self):
+        return self.download
+
+    def get_install_size(self):
+        return self.install
+
+    def is_available_locally(self):
+        return self.cached
+
+
+class FakeItem:
+    """Transaction item upgrading one package."""
+
+    def __init__(self, package, replaces, action="upgrade"):
+        self.package, self.replaces, self.action = package, replaces, action
+
+    def get_package(self):
+        return self.package
+
+    def get_replaces(self):
+        return self.replaces
+
+    def get_action(self):
+        return self.action
+
+
+def fake_libdnf5(upgrades, items, events):
+    """Build a fake libdnf5 module recording Base loads and user excludes in events."""
+
+    class Base:
+        def __init__(self):
+            events.append("base")
+            self.excludes = []
+
+        def load_config(self):
+            pass
+
+        def setup(self):
+            pass
+
+        def get_repo_sack(self):
+            return SimpleNamespace(create_repos_from_system_configuration=lambda: None,
+                                   load_repos=lambda: events.append("load_repos"))
+
+        def get_rpm_package_sack(self):
+            return SimpleNamespace(add_user_excludes=lambda query: events.append(("exclude", query.names)),
+                                   clear_user_excludes=lambda: events.append("clear_excludes"))
+
+    class PackageQuery:
+        def __init__(self, base):
+            self.names = []
+            self.security = False
+
+        def filter_name(self, names, cmp=None):
+            self.names = names
+
+        def filter_upgrades(self):
+            pass
+
+        def filter_advisories(self, advisories, cmp):
+            self.security = True
+
+        def filter_latest_evr(self):
+            pass
+
+        def __iter__(self):
+            return iter(package for package, security in upgrades
+                        if package.get_name() in self.names and (security or not self.security))
+
+    class Goal:
+        def __init__(self, base):
+            pass
+
+        def add_rpm_upgrade(self, settings):
+            events.append(("upgrade", settings.security))
+
+        def resolve(self):
+            return SimpleNamespace(get_problems=lambda: 0, get_transaction_packages=lambda: items)
+
+    class GoalJobSettings:
+        security = False
+
+        def set_advisory_filter(self, advisories):
+            self.security = True
+
+    return SimpleNamespace(
+        base=SimpleNamespace(Base=Base, Goal=Goal, GoalJobSettings=GoalJobSettings, GoalProblem_NO_PROBLEM=0),
+        rpm=SimpleNamespace(PackageQuery=PackageQuery),
+        advisory=SimpleNamespace(AdvisoryQuery=lambda base: SimpleNamespace(filter_type=lambda kind: None)),
+        common=SimpleNamespace(QueryCmp_GTE=1, QueryCmp_GLOB=2),
+        transaction=SimpleNamespace(transaction_item_action_is_inbound=lambda action: action != "remove"),
+    )
+
+
+def command_recorder(calls):
+    """Fake runner.run that records commands and succeeds."""
+    def fake_run(cmd, show_live_output=False, check=True):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout="", stderr="")
+    return fake_run
+
+
+def test_kernel_check():
+    """Test: The kernel check queries one loaded Base instead of running dnf."""
+    print("Testing: Native Kernel Check...")
+
+    events, calls = [], []
+    upgrades = [(FakePackage("kernel", "6.17.12"), False), (FakePackage("vim-enhanced", "9.1.1"), True)]
+    libdnf5 = fake_libdnf5(upgrades, [], events)
+
+    with patch.dict(sys.modules, {"libdnf5": libdnf5}), \
+         patch('src.helper.runner.run', side_effect=command_recorder(calls)), \
+         patch.object(dnf_native, 'enabled', True), patch.object(dnf_native, '_base', None):
+        available = kernel.new_kernel_version()
+        version = kernel.get_new_kernel_version()
+        security = kernel.new_kernel_version(security_only=True)
+
+    if (available, version, security) != (True, "6.17.12", False):
+        print(f"   ❌ FAILED: Unexpected results {(available, version, security)}")
+        return False
+    if calls:
+        print(f"   ❌ FAILED: Commands were run: {calls}")
+        return False
+    if events.count("base") != 1:
+        print(f"   ❌ FAILED: Expected one Base load, got {events}")
+        return False
+
+    print("   ✅ PASSED: Three kernel queries from one Base, no dnf command")
+    return True
+
+
+def test_update_estimate():
+    """Test: The update is sized in-process and the Base is dropped after the transaction."""
+    print("Testing: Native Transaction Estimate...")
+
+    events, calls, estimates = [], [], []
+    items = [
+        FakeItem(FakePackage("kernel-core", "6.17.12", download=60 * MiB, install=80 * MiB),
+                 [FakePackage("kernel-core", "6.17.9", install=79 * MiB)], action="install"),
+        FakeItem(FakePackage("firefox", "133.0", download=70 * MiB, install=250 * MiB, cached=True),
+                 [FakePackage("firefox", "132.0", install=245 * MiB)]),
+        FakeItem(FakePackage("kernel-core", "6.16.1", install=79 * MiB), [], action="remove"),
+    ]
+    libdnf5 = fake_libdnf5([], items, events)
+
+    with patch.dict(sys.modules, {"libdnf5": libdnf5}), \
+         patch('src.helper.runner.run', side_effect=command_recorder(calls)), \
+         patch('src.core.diskspace.check_estimate', side_effect=lambda manager, e: estimates.append(e)), \
+         patch('src.core.pkgcache.options', return_value=[]), \
+         patch.object(dnf_native, 'enabled', True), patch.object(dnf_native, '_base', None):
+        dnf.update_dnf(exclude=["nvidia*"], security_only=True)
+        base_after = dnf_native._base
+
+    expected = diskspace.Estimate(60 * MiB, 6 * MiB, True)
+    if estimates != [expected]:
+        print(f"   ❌ FAILED: Expected {expected} but got {estimates}")
+        return False
+    if ("exclude", ["nvidia*"]) not in events or "clear_excludes" not in events or ("upgrade", True) not in events:
+        print(f"   ❌ FAILED: Excludes or security filter not applied: {events}")
+        return False
+    if any("--assumeno" in cmd for cmd in calls):
+        print(f"   ❌ FAILED: The dnf dry run was run: {calls}")
+        return False
+    if ["sudo", "dnf", "update", "-y", "--security", "--exclude=nvidia*"] not in calls or base_after is not None:
+        print(f"   ❌ FAILED: Update not run through dnf or Base kept: {calls}")
+        return False
+
+    print("   ✅ PASSED: Cached downloads and replaced packages accounted for, no dry run")
+    return True
+
+
+def test_cli_fallback():
+    """Test: The dnf command is used without bindings and while recording a transcript."""
+    print("Testing: CLI Fallback...")
+
+    def check_upgrade(cmd, show_live_output=False, check=True):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 100, stdout="kernel.x86_64  6.17.12-300.fc43  updates\n", stderr="")
+
+    events = []
+    libdnf5 = fake_libdnf5([], [], events)
+
+    calls = []
+    with patch.dict(sys.modules, {"libdnf5": None}), \
+         patch('src.helper.runner.run', side_effect=check_upgrade), \
+         patch.object(dnf_native, 'enabled', True), patch.object(dnf_native, '_base', None):
+        version = kernel.get_new_kernel_version()
+        still_enabled = dnf_native.enabled
+    if version != "6.17.12" or not calls or still_enabled:
+        print(f"   ❌ FAILED: Missing bindings did not fall back to dnf ({version}, {calls})")
+        return False
+
+    calls = []
+    with patch.dict(sys.modules, {"libdnf5": libdnf5}), \
+         patch('src.helper.runner.run', side_effect=check_upgrade), \
+         patch.object(transcript, 'recording', return_value=True), \
+         patch.object(dnf_native, 'enabled', True), patch.object(dnf_native, '_base', None):
+        available = kernel.new_kernel_version()
+    if not available or not calls or events:
+        print(f"   ❌ FAILED: Recording a transcript should use dnf ({calls}, {events})")
+        return False
+
+    print("   ✅ PASSED: dnf check-upgrade used in both cases")
+    return True
+
+
+def main():
+    """Run all libdnf5 backend tests."""
+    print("=" * 60)
+    print("libdnf5 Backend Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Native Kernel Check", test_kernel_check()))
+    print()
+    results.append(("Native Transaction Estimate", test_update_estimate()))
+    print()
+    results.append(("CLI Fallback", test_cli_fallback()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""Homebrew update tests.
+
+Tests for prefetching Homebrew downloads before the upgrade.
+"""
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Tests for the Homebrew bottle prefetch.
+
+Tests listing outdated formulae and casks, fetching their downloads with a
+bounded number of concurrent `brew fetch` processes before `brew upgrade`,
+and suppressing Homebrew's auto-update.
+"""
+
+import sys
+import os
+import json
+import subprocess
+import threading
+import time
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.helper import policy
+from src.package_managers import brew
+
+OUTDATED = {
+    "formulae": [{"name": name, "installed_versions": ["1.0"], "current_version": "1.1"}
+                 for name in ("git", "node", "python@3.13", "openssl@3", "sqlite", "xz")],
+    "casks": [{"name": "firefox", "installed_versions": ["130.0"], "current_version": "131.0"}],
+}
+
+
+class FakeBrew:
+    """Answer the brew commands run through runner.run and track fetch concurrency."""
+
+    def __init__(self, outdated, fail=(), delay=0.2):
+        self.outdated = outdated
+        self.fail = set(fail)
+        self.delay = delay
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def run(self, cmd, show_live_output=False, check=True):
+        with self.lock:
+            self.calls.append(cmd)
+        command = cmd[-1]
+        returncode, stdout = 0, ""
+        if " fetch " in command:
+            with self.lock:
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            time.sleep(self.delay)
+            with self.lock:
+                self.running -= 1
+            returncode = 1 if command.split()[-1] in self.fail else 0
+        elif command.endswith("outdated --json=v2"):
+            stdout = json.dumps(self.outdated) if self.outdated is not None else ""
+        return subprocess.CompletedProcess(cmd, returncode, stdout=stdout, stderr="")
+
+    def commands(self, word):
+        return [cmd[-1] for cmd in self.calls if f" {word}" in cmd[-1]]
+
+
+def test_parallel_prefetch():
+    """Test: Downloads are fetched concurrently, bounded by FETCH_WORKERS, before the upgrade."""
+    print("Testing: Parallel Prefetch...")
+
+    fake = FakeBrew(OUTDATED)
+    with patch('src.helper.runner.run', side_effect=fake.run):
+        start = time.perf_counter()
+        message = brew.update_brew()
+        elapsed = time.perf_counter() - start
+
+    fetches = fake.commands("fetch")
+    if len(fetches) != 7 or f"{brew.NO_AUTO_UPDATE} brew fetch --cask firefox" not in fetches:
+        print(f"   ❌ FAILED: Unexpected fetches {fetches}")
+        return False
+    if fake.max_running != brew.FETCH_WORKERS:
+        print(f"   ❌ FAILED: {fake.max_running} concurrent fetches instead of {brew.FETCH_WORKERS}")
+        return False
+    if elapsed > 0.7:
+        print(f"   ❌ FAILED: Fetches ran one after the other ({elapsed:.2f}s)")
+        return False
+    upgrade = fake.calls.index(["bash", "-lc", f"{brew.NO_AUTO_UPDATE} brew upgrade"])
+    if any(" fetch " in cmd[-1] for cmd in fake.calls[upgrade:]) or message is not None:
+        print(f"   ❌ FAILED: Upgrade did not run after all fetches: {message!r}")
+        return False
+
+    print(f"   ✅ PASSED: 7 downloads fetched {fake.max_running} at a time in {elapsed:.2f}s, then upgraded")
+    return True
+
+
+def test_no_auto_update():
+    """Test: Only the explicit `brew update` updates Homebrew, and steps stay in the apps policy."""
+    print("Testing: Auto-Update Suppressed...")
+
+    fake = FakeBrew(OUTDATED, delay=0)
+    with patch('src.helper.runner.run', side_effect=fake.run):
+        brew.update_brew()
+
+    brew_commands = [cmd for cmd in fake.calls if cmd[-1] != "command -v brew"]
+    unsuppressed = [cmd[-1] for cmd in brew_commands if not cmd[-1].startswith(brew.NO_AUTO_UPDATE)]
+    if unsuppressed != ["brew update"]:
+        print(f"   ❌ FAILED: Auto-update not suppressed for {unsuppressed}")
+        return False
+    if any(policy.step_type(cmd) != "apps" for cmd in brew_commands):
+        print("   ❌ FAILED: brew commands not classified as apps steps")
+        return False
+
+    print("   ✅ PASSED: HOMEBREW_NO_AUTO_UPDATE set for outdated, fetch and upgrade")
+    return True
+
+
+def test_nothing_outdated():
+    """Test: Nothing is fetched or upgraded when no package is outdated."""
+    print("Testing: Nothing Outdated...")
+
+    fake = FakeBrew({"formulae": [], "casks": []})
+    with patch('src.helper.runner.run', side_effect=fake.run):
+        message = brew.update_brew()
+
+    if fake.commands("fetch") or fake.commands("upgrade") or message != "All Homebrew packages up to date.":
+        print(f"   ❌ FAILED: Unexpected commands {fake.calls} or message {message!r}")
+        return False
+
+    print("   ✅ PASSED: Upgrade skipped")
+    return True
+
+
+def test_fallbacks():
+    """Test: Failed fetches and an unreadable outdated list still upgrade."""
+    print("Testing: Fallbacks...")
+
+    fake = FakeBrew(OUTDATED, fail={"node"}, delay=0)
+    with patch('src.helper.runner.run', side_effect=fake.run):
+        brew.update_brew()
+    if len(fake.commands("upgrade")) != 1:
+        print("   ❌ FAILED: No upgrade after a failed fetch")
+        return False
+
+    fake = FakeBrew(None, delay=0)
+    with patch('src.helper.runner.run', side_effect=fake.run):
+        message = brew.update_brew()
+    if fake.commands("fetch") or len(fake.commands("upgrade")) != 1 or message is not None:
+        print(f"   ❌ FAILED: Unreadable outdated list not upgraded: {fake.calls}")
+        return False
+
+    print("   ✅ PASSED: brew upgrade downloads what could not be prefetched")
+    return True
+
+
+def main():
+    """Run all Homebrew prefetch tests."""
+    print("=" * 60)
+    print("Homebrew Bottle Prefetch Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Parallel Prefetch", test_parallel_prefetch()))
+    print()
+    results.append(("Auto-Update Suppressed", test_no_auto_update()))
+    print()
+    results.append(("Nothing Outdated", test_nothing_outdated()))
+    print()
+    results.append(("Fallbacks", test_fallbacks()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""Container update tests.
+
+Tests for discovering and updating toolbox and distrobox containers.
+"""
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Tests for toolbox and distrobox container updates.
+
+Tests container discovery from podman and docker output, and updating
+several containers concurrently, including stopped ones, and leaving apps
+and Homebrew to the host where the container shares its home.
+"""
+
+import sys
+import os
+import json
+import subprocess
+import threading
+import time
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.app import containers
+from src.package_managers import apt
+
+OS_RELEASE = {
+    "fedora-toolbox-41": "ID=fedora\nVERSION_ID=41\n",
+    "ubuntu-box": 'ID=ubuntu\nID_LIKE=debian\nVERSION_ID="24.04"\n',
+}
+
+PODMAN_TOOLBOX = json.dumps([{"Names": ["fedora-toolbox-41"], "State": "running"}])
+PODMAN_DISTROBOX = json.dumps([{"Names": ["ubuntu-box"], "State": "exited"}])
+
+
+def fake_engine(executed, active, peak, lock):
+    """Create a fake command execution for podman commands."""
+
+    def run(cmd, show_live_output=False, timeout=None, on_line=None, terminal=False):
+        executed.append(cmd)
+        stdout = ""
+        if cmd[:2] == ["podman", "ps"]:
+            stdout = PODMAN_TOOLBOX if "toolbox" in cmd[4] else PODMAN_DISTROBOX
+        elif cmd[:2] == ["podman", "exec"]:
+            name = next(arg for arg in cmd[2:] if arg in OS_RELEASE)
+            if cmd[-1] == "/etc/os-release":
+                stdout = OS_RELEASE[name]
+                with lock:
+                    active.add(name)
+                    peak.append(len(active))
+                time.sleep(0.2)
+                with lock:
+                    active.discard(name)
+        return subprocess.CompletedProcess(cmd, 0, stdout=stdout, stderr="")
+
+    return run
+
+
+def test_discover():
+    """Test: Toolbox and distrobox containers are found from podman and docker output."""
+    print("Testing: Container Discovery...")
+
+    def fake_run(cmd, show_live_output=False, check=True):
+        if cmd[0] == "docker":
+            stdout = '{"Names":"/dev-box","State":"running"}\n' if "manager=distrobox" in cmd[4] else ""
+        else:
+            stdout = PODMAN_TOOLBOX if "toolbox" in cmd[4] else PODMAN_DISTROBOX
+        return subprocess.CompletedProcess(cmd, 0, stdout=stdout, stderr="")
+
+    with patch('src.app.containers.shutil.which', return_value="/usr/bin/engine"), \
+         patch('src.app.containers.inside_container', return_value=False), \
+         patch('src.app.containers.runner.run', side_effect=fake_run):
+        found = containers.discover()
+
+    expected = [
+        containers.Container("dev-box", "distrobox", "docker", True),
+        containers.Container("fedora-toolbox-41", "toolbox", "podman", True),
+        containers.Container("ubuntu-box", "distrobox", "podman", False),
+    ]
+    if found != expected:
+        print(f"   ❌ FAILED: Expected {expected} but got {found}")
+        return False
+
+    with patch('src.app.containers.inside_container', return_value=True):
+        if containers.discover():
+            print("   ❌ FAILED: No discovery expected inside a container")
+            return False
+
+    print("   ✅ PASSED: Found 3 containers")
+    return True
+
+
+def test_update_containers():
+    """Test: Containers are updated concurrently with their own distro handler."""
+    print("Testing: Concurrent Container Updates...")
+
+    executed, active, peak, lock = [], set(), [], threading.Lock()
+    with patch('src.app.containers.shutil.which', side_effect=lambda name: "/usr/bin/podman" if name == "podman" else None), \
+         patch('src.app.containers.inside_container', return_value=False), \
+         patch('src.helper.runner._execute', side_effect=fake_engine(executed, active, peak, lock)):
+        succeeded = containers.update_containers(False, jobs=2)
+
+    dnf_update = ["podman", "exec", "--user", "root", "fedora-toolbox-41", "dnf", "update", "-y"]
+    apt_upgrade = ["podman", "exec", "--user", "root", "ubuntu-box", "apt", "upgrade", "-y", *apt.NONINTERACTIVE_OPTIONS]
+    if not succeeded or dnf_update not in executed or apt_upgrade not in executed:
+        print(f"   ❌ FAILED: Expected DNF and APT updates in the containers, got {executed}")
+        return False
+    if max(peak) != 2:
+        print(f"   ❌ FAILED: Containers were not updated concurrently (peak {max(peak)})")
+        return False
+
+    start = executed.index(["podman", "start", "ubuntu-box"])
+    stop = executed.index(["podman", "stop", "ubuntu-box"])
+    if not start < executed.index(apt_upgrade) < stop:
+        print("   ❌ FAILED: Stopped container not started before and stopped after the update")
+        return False
+    if ["podman", "stop", "fedora-toolbox-41"] in executed:
+        print("   ❌ FAILED: Running container should be left running")
+        return False
+
+    print("   ✅ PASSED: Fedora and Ubuntu containers updated in parallel")
+    return True
+
+
+def test_shared_home():
+    """Test: Apps and Homebrew are only updated in containers with their own home."""
+    print("Testing: Shared Home...")
+
+    home = os.path.expanduser("~")
+    inspect = {
+        "fedora-toolbox-41": json.dumps([{"Mounts": [{"Source": home, "Destination": home},
+                                                     {"Source": "/", "Destination": "/run/host"}]}]),
+        "ubuntu-box": json.dumps([{"Mounts": [{"Source": "/", "Destination": "/run/host"}]}]),
+        "broken-box": "",
+    }
+
+    def fake_run(cmd, show_live_output=False, check=True):
+        stdout = inspect[cmd[2]]
+        return subprocess.CompletedProcess(cmd, 0 if stdout else 125, stdout=stdout, stderr="")
+
+    calls = []
+    with patch('src.app.containers.runner.run', side_effect=fake_run), \
+         patch('src.app.containers.fleet.update_host', side_effect=lambda *a, **kw: calls.append(kw)):
+        for name in inspect:
+            container = containers.Container(name, "distrobox", "podman", True)
+            containers.update_container(container, security_only=True, apps=True, brew=True)
+
+    if [(kw["apps"], kw["brew"]) for kw in calls] != [(False, False), (True, True), (False, False)]:
+        print(f"   ❌ FAILED: Expected apps and brew only in the container with its own home, got {calls}")
+        return False
+
+    print("   ✅ PASSED: Shared and unknown homes left to the host update")
+    return True
+
+
+def main():
+    """Run all container update tests."""
+    print("=" * 60)
+    print("Container Update Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Container Discovery", test_discover()))
+    print()
+    results.append(("Concurrent Container Updates", test_update_containers()))
+    print()
+    results.append(("Shared Home", test_shared_home()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""Daemon tests.
+
+Tests for the tuxgraded socket API and the thin client.
+"""
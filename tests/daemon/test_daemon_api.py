@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""Tests for the tuxgraded daemon.
+
+Tests the check cache keyed by the package database and metadata
+fingerprints, streaming an update's output and events to the client (and
+only the update's, not those of concurrent requests), rejecting updates the
+daemon cannot or may not run, cached probes, and the thin client starting
+without the update modules.
+"""
+
+import sys
+import os
+import subprocess
+import tempfile
+import threading
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.app import client, daemon
+from src.core import repocache
+from src.helper import events, runner
+from src.package_managers import flatpak
+
+PROJECT_ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+DETECTED = ("fedora", "Fedora Linux 42 (Workstation Edition)")
+
+
+class RunningDaemon:
+    """Serve the daemon API on a temporary socket in a background thread."""
+
+    def __enter__(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "tuxgraded.sock")
+        self.server = daemon.bind(self.path)
+        daemon._detected = DETECTED
+        daemon._checked = None
+        self.environment = patch.dict(os.environ, {"TUXGRADE_SOCKET": self.path})
+        self.environment.start()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def request(self, message):
+        """Send a request, returning the exit code and the streamed messages."""
+        messages = []
+        return client.request(message, messages.append), messages
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self.environment.stop()
+        self.tmpdir.cleanup()
+
+
+def test_check_cache():
+    """Test: Checks are answered from the cache until a fingerprint changes."""
+    print("Testing: Cached Checks...")
+
+    fingerprint = ["rpmdb:1"]
+    pending = repocache.Pending("dnf", ["bash", "kernel-core"], "6.17.12-300.fc43", 600.0)
+    with RunningDaemon() as running, \
+         patch('src.core.repocache.check', return_value=pending) as mock_check, \
+         patch('src.core.pkgdb.state_fingerprint', side_effect=lambda: fingerprint[0]), \
+         patch('src.core.repocache.metadata_fingerprint', return_value="repomd:1"):
+        first = running.request({"command": "check", "verbose": True})
+        second = running.request({"command": "check"})
+        fingerprint[0] = "rpmdb:2"
+        third = running.request({"command": "check"})
+
+    if mock_check.call_count != 2:
+        print(f"   ❌ FAILED: Metadata read {mock_check.call_count} times instead of 2")
+        return False
+    if first[0] != 100 or "  kernel-core" not in first[1][0]["output"]:
+        print(f"   ❌ FAILED: Unexpected first answer {first}")
+        return False
+    for exit_code, messages in (second, third):
+        if exit_code != 100 or not messages[0]["output"].startswith("2 DNF updates pending, including kernel"):
+            print(f"   ❌ FAILED: Unexpected summary {messages}")
+            return False
+
+    print("   ✅ PASSED: Repeated check cached, new package database checked again")
+    return True
+
+
+def fake_run(calls):
+    """Create an app.run stand-in running one step with a real command."""
+
+    def run(verbose, brew, **options):
+        calls.append((verbose, brew, options))
+        with events.step("Updating DNF packages"):
+            runner.run([sys.executable, "-c", "print('Upgraded: bash-5.2.37-1.fc42')"])
+            events.progress(1, 1, "Transaction complete")
+        print("✅ Updating DNF packages")
+        # Printed by another request's thread, not part of the update
+        other = threading.Thread(target=print, args=("Status of another request",))
+        other.start()
+        other.join()
+        return 0
+    return run
+
+
+def test_update_stream():
+    """Test: An update streams its events and output, skipping root-only steps, then drops the cached probes."""
+    print("Testing: Update Stream...")
+
+    calls = []
+    options = {"kernel_policy": "allow", "security_only": False, "apps": True}
+    with RunningDaemon() as running, \
+         patch('src.app.app.run', side_effect=fake_run(calls)), \
+         patch('os.geteuid', return_value=0), \
+         patch.object(sys, 'stdout', sys.stdout), \
+         patch.object(flatpak, 'update_user_installation', True):
+        runner._probes[("localhost", "flatpak", "--version")] = True
+        verbose = running.request({"command": "update", "verbose": True, "options": options})
+        quiet = running.request({"command": "update", "options": options})
+        user_installation = flatpak.update_user_installation
+
+    exit_code, messages = verbose
+    kinds = [message.get("event") or "output" for message in messages]
+    expected = ["StepStarted", "CommandStarted", "OutputLine", "ProcessExited", "Progress", "StepFinished", "output"]
+    if exit_code != 0 or kinds != expected:
+        print(f"   ❌ FAILED: Unexpected stream {exit_code} {kinds}")
+        return False
+    if messages[2]["line"] != "Upgraded: bash-5.2.37-1.fc42" or messages[-1]["output"] != "✅ Updating DNF packages":
+        print(f"   ❌ FAILED: Unexpected messages {messages}")
+        return False
+    if "OutputLine" in [message.get("event") for message in quiet[1]]:
+        print("   ❌ FAILED: Output lines sent without verbose")
+        return False
+    if user_installation:
+        print("   ❌ FAILED: The root daemon would update root's Flatpak user installation")
+        return False
+    if calls[0] != (False, False, {"kernel_policy": "allow", "security_only": False, "apps": True,
+                                  "detected": DETECTED}):
+        print(f"   ❌ FAILED: Unexpected app.run call {calls[0]}")
+        return False
+    if runner._probes:
+        print("   ❌ FAILED: Probe results kept after the update")
+        return False
+
+    print(f"   ✅ PASSED: {len(messages)} messages streamed, warm distribution passed to app.run")
+    return True
+
+
+def test_concurrent_check_events():
+    """Test: Events of a check running during an update are not streamed to the update's client."""
+    print("Testing: Concurrent Check Events...")
+
+    pending = repocache.Pending("dnf", ["bash"], None, None)
+
+    def check():
+        with events.step("Checking for updates"):
+            runner.run([sys.executable, "-c", "print('Last metadata expiration check')"])
+        return pending
+
+    def run(verbose, brew, **options):
+        with events.step("Updating DNF packages"):
+            checked.append(running.request({"command": "check"}))
+        return 0
+
+    checked = []
+    with RunningDaemon() as running, \
+         patch('src.app.app.run', side_effect=run), \
+         patch('src.core.repocache.check', side_effect=check), \
+         patch('os.geteuid', return_value=0), \
+         patch.object(sys, 'stdout', sys.stdout), \
+         patch.object(flatpak, 'update_user_installation', True):
+        exit_code, messages = running.request({"command": "update", "verbose": True, "options": {}})
+
+    steps = {message.get("step") for message in messages if "event" in message}
+    if exit_code != 0 or steps != {"Updating DNF packages"}:
+        print(f"   ❌ FAILED: Events of other requests streamed: {messages}")
+        return False
+    if checked[0][0] != 100 or any("event" in message for message in checked[0][1]):
+        print(f"   ❌ FAILED: Unexpected check answer {checked}")
+        return False
+
+    print("   ✅ PASSED: Only the update's own events streamed")
+    return True
+
+
+def test_rejected_updates():
+    """Test: Updates the daemon cannot or may not run are rejected."""
+    print("Testing: Rejected Updates...")
+
+    calls = []
+    with RunningDaemon() as running, patch('src.app.app.run', side_effect=fake_run(calls)):
+        with patch('os.geteuid', return_value=0):
+            prompt = running.request({"command": "update", "options": {"kernel_policy": "ask"}})
+            unknown = running.request({"command": "update", "options": {"record": "/tmp/run.jsonl"}})
+            brew = running.request({"command": "update", "options": {"brew": True}})
+            with patch('src.app.daemon._peer_uid', return_value=54321), \
+                 patch('pwd.getpwuid', side_effect=KeyError(54321)):
+                stranger = running.request({"command": "update", "options": {}})
+            with daemon._update_lock:
+                busy = running.request({"command": "update", "options": {}})
+        with patch('os.geteuid', return_value=1000):
+            user_daemon = running.request({"command": "update", "options": {}})
+        malformed = running.request({"verb": "update"})
+
+    results = {"prompt": prompt, "unknown": unknown, "brew": brew, "stranger": stranger, "busy": busy,
+               "user_daemon": user_daemon, "malformed": malformed}
+    expected_codes = {"prompt": 2, "unknown": 2, "brew": 2, "stranger": 1, "busy": 1, "user_daemon": 1, "malformed": 2}
+    for name, (exit_code, messages) in results.items():
+        if exit_code != expected_codes[name] or not messages or "error" not in messages[0]:
+            print(f"   ❌ FAILED: {name}: {exit_code} {messages}")
+            return False
+    if calls:
+        print(f"   ❌ FAILED: app.run called for a rejected update: {calls}")
+        return False
+
+    print("   ✅ PASSED: Prompting policy, unknown options, Homebrew, strangers, busy and user daemon rejected")
+    return True
+
+
+def test_probe_cache():
+    """Test: With cache_probes set, each probe runs once until cleared."""
+    print("Testing: Probe Cache...")
+
+    executed = []
+
+    def fake_probe_run(cmd, show_live_output=False, check=True):
+        executed.append(cmd)
+        if cmd[0] == "snap":
+            raise FileNotFoundError(cmd[0])
+        return subprocess.CompletedProcess(cmd, 0, "", "")
+
+    with patch('src.helper.runner.run', side_effect=fake_probe_run), patch.object(runner, 'cache_probes', True):
+        results = [runner.probe(["flatpak", "--version"]), runner.probe(["snap", "--version"]),
+                   runner.probe(["flatpak", "--version"]), runner.probe(["snap", "--version"])]
+        runner.clear_probes()
+        runner.probe(["flatpak", "--version"])
+        runner.clear_probes()
+
+    if results != [True, False, True, False] or len(executed) != 3:
+        print(f"   ❌ FAILED: Unexpected results {results} or probes {executed}")
+        return False
+
+    print("   ✅ PASSED: 2 tools probed once each, again after clearing")
+    return True
+
+
+def test_thin_client():
+    """Test: `tuxgrade --daemon` answers without importing the update modules."""
+    print("Testing: Thin Client...")
+
+    code = ("import sys\n"
+            "sys.argv = ['tuxgrade', '--daemon', '--status']\n"
+            "from src import main\n"
+            "try:\n"
+            "    main.main()\n"
+            "except SystemExit as e:\n"
+            "    print('exit', e.code, 'src.app.app' in sys.modules, 'src.helper.runner' in sys.modules)\n")
+    with RunningDaemon() as running:
+        result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True,
+                                env={**os.environ, "TUXGRADE_SOCKET": running.path}, timeout=30)
+
+    lines = result.stdout.splitlines()
+    if not lines or not lines[0].startswith("tuxgraded ") or "on Fedora Linux 42" not in lines[0]:
+        print(f"   ❌ FAILED: Unexpected output {result.stdout!r} {result.stderr!r}")
+        return False
+    if lines[-1] != "exit 0 False False":
+        print(f"   ❌ FAILED: Client loaded the update modules or failed: {lines[-1]}")
+        return False
+
+    print("   ✅ PASSED: Status shown by the client without loading app or runner")
+    return True
+
+
+def main():
+    """Run all daemon tests."""
+    print("=" * 60)
+    print("Daemon API Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Cached Checks", test_check_cache()))
+    print()
+    results.append(("Update Stream", test_update_stream()))
+    print()
+    results.append(("Concurrent Check Events", test_concurrent_check_events()))
+    print()
+    results.append(("Rejected Updates", test_rejected_updates()))
+    print()
+    results.append(("Probe Cache", test_probe_cache()))
+    print()
+    results.append(("Thin Client", test_thin_client()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
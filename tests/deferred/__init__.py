@@ -0,0 +1,4 @@
+"""Deferred rebuild tests.
+
+Tests for handing post-update rebuilds to a background job and recording its status.
+"""
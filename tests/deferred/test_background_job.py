@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Tests for deferred background rebuilds.
+
+Tests the worker status file, retry detection for failed or interrupted jobs,
+clearing them once redone, and how the background job is launched and
+detached.
+"""
+
+import sys
+import os
+import json
+import subprocess
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.core import deferred
+
+
+def status_paths(tmp):
+    """Patch the status location into a temporary directory."""
+    return patch.multiple(deferred, STATUS_DIR=tmp, STATUS_FILE=os.path.join(tmp, "deferred.json"))
+
+
+def test_worker_records_success():
+    """Test: A successful worker run is recorded with all steps succeeded."""
+    print("Testing: Worker Status on Success...")
+
+    steps = {"initramfs": lambda: "rebuilt", "nvidia": lambda: "checked"}
+    with tempfile.TemporaryDirectory() as tmp, status_paths(tmp), patch.dict(deferred.STEPS, steps):
+        exit_code = deferred.run_worker(["initramfs", "nvidia"])
+        status = deferred.read_status()
+        retry = deferred.steps_to_retry()
+        message = deferred.status_message()
+
+    if exit_code != 0 or status["state"] != "succeeded":
+        print(f"   ❌ FAILED: Unexpected exit code {exit_code} or status {status}")
+        return False
+    if retry or message is not None:
+        print(f"   ❌ FAILED: Nothing should need attention, got {retry} / {message}")
+        return False
+
+    print("   ✅ PASSED: Success recorded, nothing to retry")
+    return True
+
+
+def test_worker_records_failure():
+    """Test: A failing step is recorded and reported for retry."""
+    print("Testing: Worker Status on Failure...")
+
+    def failing():
+        raise RuntimeError("dracut failed")
+
+    steps = {"initramfs": failing, "nvidia": lambda: "checked"}
+    with tempfile.TemporaryDirectory() as tmp, status_paths(tmp), patch.dict(deferred.STEPS, steps):
+        exit_code = deferred.run_worker(["initramfs", "nvidia"])
+        retry = deferred.steps_to_retry()
+        message = deferred.status_message()
+
+    if exit_code != 1 or retry != ["initramfs"]:
+        print(f"   ❌ FAILED: Expected exit 1 and retry ['initramfs'], got {exit_code} / {retry}")
+        return False
+    if not message or "failed" not in message:
+        print(f"   ❌ FAILED: Expected a failure message, got {message}")
+        return False
+
+    print("   ✅ PASSED: Failed step reported for retry")
+    return True
+
+
+def test_interrupted_job():
+    """Test: A running job whose worker is gone is reported as interrupted."""
+    print("Testing: Interrupted Job Detection...")
+
+    with tempfile.TemporaryDirectory() as tmp, status_paths(tmp):
+        with open(deferred.STATUS_FILE, "w") as f:
+            json.dump({"state": "running", "pid": 2 ** 22 + 1, "started": "now",
+                       "steps": {"initramfs": "running", "nvidia": "pending"}}, f)
+        status = deferred.read_status()
+        retry = deferred.steps_to_retry()
+
+    if status["state"] != "interrupted" or retry != ["initramfs", "nvidia"]:
+        print(f"   ❌ FAILED: Unexpected status {status['state']} / retry {retry}")
+        return False
+
+    print("   ✅ PASSED: Interrupted job detected")
+    return True
+
+
+def test_schedule_without_systemd():
+    """Test: Without systemd-run, sudo starts a detached worker and its failure is reported."""
+    print("Testing: Detached Worker Launch...")
+
+    with patch('src.core.deferred.shutil.which', return_value=None), \
+         patch('src.core.deferred.runner.run') as mock_run:
+        message = deferred.schedule(["initramfs", "nvidia"])
+
+    cmd = mock_run.call_args[0][0]
+    if cmd[:2] != ["sudo", "env"] or cmd[-3:] != ["--detach", "initramfs", "nvidia"]:
+        print(f"   ❌ FAILED: Unexpected worker command {cmd}")
+        return False
+    if deferred.LOG_FILE not in message:
+        print(f"   ❌ FAILED: Log file not named in '{message}'")
+        return False
+
+    with patch('src.core.deferred.shutil.which', return_value=None), \
+         patch('src.core.deferred.runner.run', side_effect=deferred.runner.CommandError("sudo: a password is required")):
+        try:
+            deferred.schedule(["nvidia"])
+            print("   ❌ FAILED: A worker sudo could not start was reported as scheduled")
+            return False
+        except deferred.runner.CommandError:
+            pass
+
+    print(f"   ✅ PASSED: {message}")
+    return True
+
+
+def test_detach():
+    """Test: --detach returns at once, with the worker in its own session and its output logged."""
+    print("Testing: Detached Worker Session...")
+
+    script = (
+        "import sys\n"
+        "from src.core import deferred\n"
+        "deferred.STATUS_DIR = sys.argv[1]\n"
+        "deferred.LOG_FILE = sys.argv[1] + '/deferred.log'\n"
+        "deferred._worker_command = lambda steps: ['sh', '-c', 'echo $$ $(ps -o sid= -p $$) >&2']\n"
+        "sys.exit(deferred.main(['--detach', 'nvidia']))\n"
+    )
+    root = os.path.join(os.path.dirname(__file__), '..', '..')
+    with tempfile.TemporaryDirectory() as tmp:
+        result = subprocess.run([sys.executable, "-c", script, tmp], cwd=root, capture_output=True,
+                                text=True, timeout=10, env={**os.environ, "PYTHONPATH": root})
+        log = os.path.join(tmp, "deferred.log")
+        for _ in range(100):
+            if os.path.exists(log) and os.path.getsize(log):
+                break
+            time.sleep(0.05)
+        with open(log) as f:
+            fields = f.read().split()
+
+    if result.returncode != 0 or result.stdout or result.stderr:
+        print(f"   ❌ FAILED: --detach did not return cleanly: {result}")
+        return False
+    if len(fields) != 2 or fields[0] != fields[1]:
+        print(f"   ❌ FAILED: Worker not in its own session, logged {fields}")
+        return False
+
+    print("   ✅ PASSED: Worker is a session leader, stderr in the log file")
+    return True
+
+
+def test_clear_after_redo():
+    """Test: The status of a failed job is removed once redone, a successful one is kept."""
+    print("Testing: Clear Redone Job...")
+
+    with tempfile.TemporaryDirectory() as tmp, status_paths(tmp), \
+         patch('src.core.deferred.runner.run') as mock_run:
+        with open(deferred.STATUS_FILE, "w") as f:
+            json.dump({"state": "succeeded", "steps": {"initramfs": "succeeded"}}, f)
+        deferred.clear()
+        if mock_run.called:
+            print("   ❌ FAILED: Status of a successful job was removed")
+            return False
+
+        with open(deferred.STATUS_FILE, "w") as f:
+            json.dump({"state": "failed", "steps": {"initramfs": "failed"}}, f)
+        deferred.clear()
+        status_file = deferred.STATUS_FILE
+
+    if mock_run.call_args != ((["sudo", "rm", "-f", status_file],), {}):
+        print(f"   ❌ FAILED: Expected the status file to be removed, got {mock_run.call_args}")
+        return False
+
+    print("   ✅ PASSED: Failed job cleared after the redo")
+    return True
+
+
+def test_schedule_waits_for_running_job():
+    """Test: A new worker waits for a running one and takes over its unfinished steps."""
+    print("Testing: Wait For Running Job...")
+
+    previous = subprocess.Popen(["sleep", "0.5"])
+    # Reap the previous worker once it exits, so its pid disappears
+    threading.Thread(target=previous.wait, daemon=True).start()
+    with tempfile.TemporaryDirectory() as tmp, status_paths(tmp), \
+         patch.object(deferred, 'WAIT_INTERVAL', 0.05), \
+         patch('src.core.deferred.shutil.which', return_value=None), \
+         patch('src.core.deferred.runner.run') as mock_run:
+        with open(deferred.STATUS_FILE, "w") as f:
+            json.dump({"state": "running", "pid": previous.pid, "started": "now",
+                       "steps": {"initramfs": "running", "nvidia": "pending"}}, f)
+        deferred.schedule(["nvidia"])
+
+    if previous.poll() is None:
+        print("   ❌ FAILED: New worker started while the previous one was running")
+        return False
+    cmd = mock_run.call_args[0][0]
+    if cmd[-2:] != ["initramfs", "nvidia"]:
+        print(f"   ❌ FAILED: Unfinished initramfs step not taken over: {cmd}")
+        return False
+
+    print("   ✅ PASSED: Started after the previous worker, including its unfinished step")
+    return True
+
+
+def main():
+    """Run all deferred rebuild tests."""
+    print("=" * 60)
+    print("Deferred Background Rebuild Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Worker Status on Success", test_worker_records_success()))
+    print()
+    results.append(("Worker Status on Failure", test_worker_records_failure()))
+    print()
+    results.append(("Interrupted Job Detection", test_interrupted_job()))
+    print()
+    results.append(("Detached Worker Launch", test_schedule_without_systemd()))
+    print()
+    results.append(("Detached Worker Session", test_detach()))
+    print()
+    results.append(("Clear Redone Job", test_clear_after_redo()))
+    print()
+    results.append(("Wait For Running Job", test_schedule_waits_for_running_job()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
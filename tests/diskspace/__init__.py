@@ -0,0 +1,4 @@
+"""Disk space preflight tests.
+
+Tests for checking transaction sizes against free disk space.
+"""
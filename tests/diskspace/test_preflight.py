@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Tests for the disk space preflight.
+
+Tests parsing dnf4/dnf5/apt dry run sizes, adding up requirements per file
+system, cleaning the package cache before failing, and only warning about
+dnf4's gross install size.
+"""
+
+import sys
+import os
+import subprocess
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.core import diskspace
+
+MiB = diskspace.MiB
+
+DNF4_OUTPUT = """Transaction Summary
+================================================================================
+Install   1 Package
+Upgrade  12 Packages
+
+Total download size: 290 M
+Installed size: 1.2 G
+Operation aborted.
+"""
+
+DNF5_OUTPUT = """Upgrading:
+ kernel-core      x86_64 6.13.0-300.fc41 updates 66.3 MiB
+Transaction Summary:
+ Upgrading:         12 packages
+
+Total size of inbound packages is 290 MiB. Need to download 120 MiB.
+After this operation, 12 MiB extra will be used (install 500 MiB, remove 488 MiB).
+Operation aborted by the user.
+"""
+
+APT_OUTPUT = """The following packages will be upgraded:
+  libssl3 openssl
+2 upgraded, 0 newly installed, 0 to remove and 0 not upgraded.
+Need to get 0 B/4,352 kB of archives.
+After this operation, 1,024 kB of additional disk space will be used.
+Abort.
+"""
+
+
+def test_parse_estimate():
+    """Test: Download and install sizes are parsed from dnf4, dnf5 and apt output."""
+    print("Testing: Dry Run Size Parsing...")
+
+    cases = [
+        (DNF4_OUTPUT, diskspace.Estimate(290 * MiB, int(1.2 * 1024 * MiB), False, net=False)),
+        (DNF5_OUTPUT, diskspace.Estimate(120 * MiB, 12 * MiB, True)),
+        (APT_OUTPUT, diskspace.Estimate(0, 1024 * 1000, False)),
+        ("Dependencies resolved.\nNothing to do.\nComplete!\n", None),
+    ]
+    for output, expected in cases:
+        result = diskspace.parse_estimate(output)
+        if result != expected:
+            print(f"   ❌ FAILED: Expected {expected} but got {result}")
+            return False
+
+    print("   ✅ PASSED: Sizes parsed for all formats")
+    return True
+
+
+def fake_filesystems(free):
+    """Create a fake _filesystem() with /var/cache and / on one device and a separate /boot."""
+    def filesystem(path):
+        device = "boot" if path == "/boot" else "root"
+        return device, free[device]
+    return filesystem
+
+
+def test_shortfalls_per_filesystem():
+    """Test: Requirements on the same file system add up, /boot only counts for kernels."""
+    print("Testing: Shortfalls per File System...")
+
+    free = {"root": 500 * MiB, "boot": 100 * MiB}
+    with patch('src.core.diskspace._filesystem', side_effect=fake_filesystems(free)), \
+         patch('src.core.diskspace._kernel_boot_size', return_value=80 * MiB):
+        # 300 + 150 MiB fit on their own, but not together with the reserve
+        combined = diskspace.shortfalls("dnf", diskspace.Estimate(300 * MiB, 150 * MiB, False))
+        kernel = diskspace.shortfalls("dnf", diskspace.Estimate(10 * MiB, 10 * MiB, True))
+        fits = diskspace.shortfalls("dnf", diskspace.Estimate(100 * MiB, 100 * MiB, False))
+
+    if [(s.path, s.needed) for s in combined] != [("/var/cache", 550 * MiB)]:
+        print(f"   ❌ FAILED: Expected /var/cache and / to add up, got {combined}")
+        return False
+    if [(s.path, s.needed) for s in kernel] != [("/boot", 180 * MiB)]:
+        print(f"   ❌ FAILED: Expected /boot to be short for the kernel, got {kernel}")
+        return False
+    if fits:
+        print(f"   ❌ FAILED: Expected the transaction to fit, got {fits}")
+        return False
+
+    print("   ✅ PASSED: Requirements checked per device")
+    return True
+
+
+def test_check_cleans_cache_first():
+    """Test: A full cache file system is cleaned before the check fails."""
+    print("Testing: Cache Cleaning Before Failing...")
+
+    free = {"root": 200 * MiB, "boot": 1024 * MiB}
+    executed = []
+
+    def fake_run(cmd, show_live_output=False, check=True):
+        executed.append(cmd)
+        if cmd == diskspace.CLEAN_COMMANDS["dnf"]:
+            free["root"] += cleaned
+        return subprocess.CompletedProcess(cmd, 1, stdout=DNF4_OUTPUT.replace("1.2 G", "10 M"), stderr="")
+
+    dry_run = ["sudo", "dnf", "update", "--assumeno"]
+    results = []
+    for cleaned in (400 * MiB, 0):
+        free["root"] = 200 * MiB
+        executed.clear()
+        with patch('src.core.diskspace.runner.run', side_effect=fake_run), \
+             patch('src.core.diskspace._filesystem', side_effect=fake_filesystems(free)):
+            try:
+                diskspace.check("dnf", dry_run)
+                results.append("passed")
+            except diskspace.DiskSpaceError as e:
+                results.append(str(e))
+        if executed != [dry_run, diskspace.CLEAN_COMMANDS["dnf"]]:
+            print(f"   ❌ FAILED: Unexpected commands {executed}")
+            return False
+
+    if results[0] != "passed" or "/var/cache needs 390 MiB, 200 MiB free" not in results[1]:
+        print(f"   ❌ FAILED: Unexpected results {results}")
+        return False
+
+    print("   ✅ PASSED: Cache cleaned, failure reported with sizes")
+    return True
+
+
+def test_gross_install_size():
+    """Test: dnf4's gross install size only warns, net sizes still fail the check."""
+    print("Testing: Gross dnf4 Install Size...")
+
+    free = {"root": 500 * MiB, "boot": 1024 * MiB}
+    gross = diskspace.Estimate(100 * MiB, 1024 * MiB, False, net=False)
+    with patch('src.core.diskspace._filesystem', side_effect=fake_filesystems(free)), \
+         patch('src.core.diskspace.runner.run') as mock_run, \
+         patch('src.core.diskspace.logging.warning') as warning:
+        try:
+            diskspace.check_estimate("dnf", gross)
+            diskspace.check_estimate("dnf", gross._replace(download=450 * MiB))
+            print("   ❌ FAILED: Downloads that do not fit passed the check")
+            return False
+        except diskspace.DiskSpaceError as e:
+            if "/var/cache needs 550 MiB, 500 MiB free" not in str(e):
+                print(f"   ❌ FAILED: Unexpected error {e}")
+                return False
+        try:
+            diskspace.check_estimate("apt", gross._replace(net=True))
+            print("   ❌ FAILED: A net install size that does not fit passed the check")
+            return False
+        except diskspace.DiskSpaceError:
+            pass
+
+    if warning.call_count != 1 or "1224 MiB" not in warning.call_args.args[1]:
+        print(f"   ❌ FAILED: Expected one warning about the gross size, got {warning.call_args_list}")
+        return False
+    cleaned = [call.args[0] for call in mock_run.call_args_list]
+    if cleaned != [diskspace.CLEAN_COMMANDS["dnf"], diskspace.CLEAN_COMMANDS["apt"]]:
+        print(f"   ❌ FAILED: Expected the cache cleaned only before failing, got {mock_run.call_args_list}")
+        return False
+
+    print("   ✅ PASSED: Gross install size warned about, downloads and net sizes enforced")
+    return True
+
+
+def main():
+    """Run all disk space preflight tests."""
+    print("=" * 60)
+    print("Disk Space Preflight Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Dry Run Size Parsing", test_parse_estimate()))
+    print()
+    results.append(("Shortfalls per File System", test_shortfalls_per_filesystem()))
+    print()
+    results.append(("Cache Cleaning Before Failing", test_check_cleans_cache_first()))
+    print()
+    results.append(("Gross dnf4 Install Size", test_gross_install_size()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""Event stream tests.
+
+Tests for the events emitted from the runner and the update steps.
+"""
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""Tests for the in-process event stream.
+
+Tests the step, command, output line, exit and progress events emitted by
+the runner and the steps, streaming output lines while a command runs,
+isolating failing sinks, and the cost of emitting without subscribers.
+"""
+
+import sys
+import os
+import subprocess
+import threading
+import time
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.helper import events, runner
+from src.package_managers import brew
+
+STEP = "Updating DNF packages"
+
+
+class Collector:
+    """Sink recording each event with the time it arrived."""
+
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+
+    def __call__(self, event):
+        with self.lock:
+            self.events.append((time.monotonic(), event))
+
+    def of(self, event_type):
+        return [event for _, event in self.events if isinstance(event, event_type)]
+
+
+def python(code):
+    """Build a command running a Python snippet."""
+    return [sys.executable, "-c", code]
+
+
+def test_command_events():
+    """Test: A step running a command emits the events in order."""
+    print("Testing: Step and Command Events...")
+
+    collector = Collector()
+    cmd = python("import sys; print('Upgraded: bash'); print('warning: mirror slow', file=sys.stderr); print('Complete!')")
+    with events.subscribed(collector), events.step(STEP):
+        result = runner.run(cmd)
+
+    kinds = [type(event).__name__ for _, event in collector.events]
+    if kinds[:2] != ["StepStarted", "CommandStarted"] or kinds[-2:] != ["ProcessExited", "StepFinished"]:
+        print(f"   ❌ FAILED: Unexpected event order {kinds}")
+        return False
+    lines = [(event.stream, event.line) for event in collector.of(events.OutputLine)]
+    expected = [("stdout", "Upgraded: bash"), ("stderr", "warning: mirror slow"), ("stdout", "Complete!")]
+    if sorted(lines) != sorted(expected) or any(event.step != STEP or event.command != cmd
+                                                 for event in collector.of(events.OutputLine)):
+        print(f"   ❌ FAILED: Unexpected output lines {lines}")
+        return False
+    exited = collector.of(events.ProcessExited)[0]
+    finished = collector.of(events.StepFinished)[0]
+    if exited.returncode != 0 or finished.error is not None or finished.step != STEP:
+        print(f"   ❌ FAILED: Unexpected exit {exited} or finish {finished}")
+        return False
+    if result.stdout != "Upgraded: bash\nComplete!\n" or result.stderr != "warning: mirror slow\n":
+        print(f"   ❌ FAILED: Captured output changed: {result.stdout!r} {result.stderr!r}")
+        return False
+
+    print(f"   ✅ PASSED: {len(kinds)} events, captured output unchanged")
+    return True
+
+
+def test_streamed_lines():
+    """Test: Output lines arrive while the command is still running."""
+    print("Testing: Streamed Output Lines...")
+
+    collector = Collector()
+    cmd = python("import time; print('Downloading', flush=True); time.sleep(0.5); print('Installing')")
+    with events.subscribed(collector):
+        runner.run(cmd)
+
+    arrived = {event.line: at for at, event in collector.events if isinstance(event, events.OutputLine)}
+    exited = next(at for at, event in collector.events if isinstance(event, events.ProcessExited))
+    if exited - arrived.get("Downloading", exited) < 0.3:
+        print("   ❌ FAILED: First line not emitted before the command finished")
+        return False
+
+    print(f"   ✅ PASSED: First line emitted {exited - arrived['Downloading']:.2f}s before the exit")
+    return True
+
+
+def test_failures():
+    """Test: Timeouts and failing steps are reported, failing sinks are isolated."""
+    print("Testing: Timeouts and Failing Sinks...")
+
+    def broken_sink(event):
+        raise ValueError("sink bug")
+
+    collector = Collector()
+    cmd = python("import time; print('Resolving', flush=True); time.sleep(10)")
+    with events.subscribed(broken_sink), events.subscribed(collector), \
+         patch('src.helper.policy.timeout', return_value=0.3), \
+         patch.object(runner, "TERMINATE_GRACE", 0.5), \
+         patch('logging.warning'):
+        try:
+            with events.step(STEP):
+                runner.run(cmd)
+            print("   ❌ FAILED: Command did not time out")
+            return False
+        except runner.CommandTimeoutError:
+            pass
+
+    exited = collector.of(events.ProcessExited)
+    finished = collector.of(events.StepFinished)
+    if [event.line for event in collector.of(events.OutputLine)] != ["Resolving"]:
+        print(f"   ❌ FAILED: Output before the timeout missing: {collector.events}")
+        return False
+    if len(exited) != 1 or exited[0].returncode is not None or not finished or finished[0].error is None:
+        print(f"   ❌ FAILED: Unexpected exit {exited} or finish {finished}")
+        return False
+    if events.active():
+        print("   ❌ FAILED: Sinks still subscribed")
+        return False
+
+    print("   ✅ PASSED: Cancelled command and failed step reported despite a failing sink")
+    return True
+
+
+def test_progress():
+    """Test: Homebrew fetches report progress for the current step."""
+    print("Testing: Progress Events...")
+
+    def fake_run(cmd, show_live_output=False, check=True):
+        return subprocess.CompletedProcess(cmd, 0, stdout="", stderr="")
+
+    collector = Collector()
+    packages = [("--formula", "git"), ("--formula", "node"), ("--cask", "firefox")]
+    with events.subscribed(collector), events.step("Updating Homebrew packages"), \
+         patch('src.helper.runner.run', side_effect=fake_run):
+        brew.prefetch(packages)
+
+    progress = collector.of(events.Progress)
+    if [(event.done, event.total) for event in progress] != [(1, 3), (2, 3), (3, 3)]:
+        print(f"   ❌ FAILED: Unexpected progress {progress}")
+        return False
+    if any(event.step != "Updating Homebrew packages" for event in progress):
+        print("   ❌ FAILED: Progress not attributed to the step")
+        return False
+
+    print("   ✅ PASSED: 3 progress events for 3 fetches")
+    return True
+
+
+def test_no_subscribers():
+    """Test: Without subscribers, nothing is built and output is not read line by line."""
+    print("Testing: No Subscribers...")
+
+    if events.active():
+        print("   ❌ FAILED: Sinks subscribed at start")
+        return False
+
+    with patch.object(runner, "_start_readers", side_effect=AssertionError("read line by line")):
+        result = runner.run(python("print('Nothing to do.')"))
+    if result.stdout != "Nothing to do.\n":
+        print(f"   ❌ FAILED: Unexpected output {result.stdout!r}")
+        return False
+
+    count = 100000
+    start = time.perf_counter()
+    for i in range(count):
+        events.progress(i, count)
+    elapsed = time.perf_counter() - start
+    if elapsed > 0.2:
+        print(f"   ❌ FAILED: {count} unsubscribed emits took {elapsed:.3f}s")
+        return False
+
+    print(f"   ✅ PASSED: {count} unsubscribed emits in {elapsed * 1000:.1f} ms")
+    return True
+
+
+def main():
+    """Run all event stream tests."""
+    print("=" * 60)
+    print("Event Stream Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Step and Command Events", test_command_events()))
+    print()
+    results.append(("Streamed Output Lines", test_streamed_lines()))
+    print()
+    results.append(("Timeouts and Failing Sinks", test_failures()))
+    print()
+    results.append(("Progress Events", test_progress()))
+    print()
+    results.append(("No Subscribers", test_no_subscribers()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
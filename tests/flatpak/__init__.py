@@ -0,0 +1,4 @@
+"""Flatpak update tests.
+
+Tests for updating and pruning the system and user installations.
+"""
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Tests for Flatpak installation updates.
+
+Tests updating the system and user installations in parallel, pruning
+unused runtimes with the reclaimed size, failures of one installation, and
+leaving the user installation alone when the daemon asks for it.
+"""
+
+import sys
+import os
+import subprocess
+import threading
+import time
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.helper import runner
+from src.package_managers import flatpak
+
+# flatpak list output per installation before and after `uninstall --unused`
+LISTS = {
+    "--system": (
+        "app/org.mozilla.firefox/x86_64/stable\t385.6 MB\n"
+        "runtime/org.freedesktop.Platform/x86_64/23.08\t612.0 MB\n"
+        "runtime/org.freedesktop.Platform/x86_64/24.08\t640.2 MB\n"
+        "runtime/org.freedesktop.Platform.GL.default/x86_64/23.08\t1.1 GB\n",
+        "app/org.mozilla.firefox/x86_64/stable\t385.6 MB\n"
+        "runtime/org.freedesktop.Platform/x86_64/24.08\t640.2 MB\n",
+    ),
+    "--user": (
+        "runtime/org.gnome.Platform/x86_64/46\t850.0 MB\n",
+        "runtime/org.gnome.Platform/x86_64/46\t850.0 MB\n",
+    ),
+}
+
+
+def fake_flatpak(calls, pruned, fail=None, delay=0.0):
+    """Create a fake runner.run answering flatpak commands per installation."""
+    lock = threading.Lock()
+
+    def fake_run(cmd, show_live_output=False, check=True):
+        with lock:
+            calls.append(cmd)
+        installation = next((arg for arg in cmd if arg in flatpak.INSTALLATIONS), None)
+        stdout = ""
+        if cmd[1] == "update":
+            time.sleep(delay)
+            if installation == fail:
+                raise runner.CommandError(f"Command failed: {' '.join(cmd)}")
+            stdout = "Nothing to do.\n"
+        elif cmd[1] == "uninstall":
+            pruned.add(installation)
+        elif cmd[1] == "list":
+            stdout = LISTS[installation][installation in pruned]
+        return subprocess.CompletedProcess(cmd, 0, stdout=stdout, stderr="")
+    return fake_run
+
+
+def test_parallel_installations():
+    """Test: The system and user installations update at the same time."""
+    print("Testing: Parallel Installation Updates...")
+
+    calls = []
+    with patch('src.helper.runner.run', side_effect=fake_flatpak(calls, set(), delay=0.3)):
+        start = time.perf_counter()
+        message = flatpak.update_flatpak(show_live_output=True)
+        elapsed = time.perf_counter() - start
+
+    updates = sorted(cmd for cmd in calls if cmd[1] == "update")
+    if updates != [["flatpak", "update", "--system", "-y"], ["flatpak", "update", "--user", "-y"]]:
+        print(f"   ❌ FAILED: Unexpected update commands {updates}")
+        return False
+    if elapsed > 0.5:
+        print(f"   ❌ FAILED: Updates ran one after the other ({elapsed:.2f}s)")
+        return False
+    if any(cmd[1] == "uninstall" for cmd in calls):
+        print("   ❌ FAILED: Pruned without --flatpak-prune")
+        return False
+    if "System installation:\nNothing to do." not in message or "User installation:" not in message:
+        print(f"   ❌ FAILED: Unexpected output {message!r}")
+        return False
+
+    print(f"   ✅ PASSED: Both installations updated in {elapsed:.2f}s")
+    return True
+
+
+def test_prune():
+    """Test: Pruning removes unused refs and reports their installed size."""
+    print("Testing: Unused Runtime Pruning...")
+
+    calls = []
+    with patch('src.helper.runner.run', side_effect=fake_flatpak(calls, set())), \
+         patch.object(flatpak, 'prune_unused', True):
+        message = flatpak.update_flatpak(show_live_output=True)
+
+    if ["flatpak", "uninstall", "--system", "--unused", "-y"] not in calls:
+        print(f"   ❌ FAILED: Unused refs not removed: {calls}")
+        return False
+    if "Removed 2 unused runtimes and extensions (1.7 GB reclaimed)." not in message:
+        print(f"   ❌ FAILED: Unexpected system pruning report in {message!r}")
+        return False
+    if "Removed 0 unused runtimes and extensions (0.0 MB reclaimed)." not in message:
+        print(f"   ❌ FAILED: Unexpected user pruning report in {message!r}")
+        return False
+
+    print("   ✅ PASSED: 2 system runtimes removed, 1.7 GB reclaimed")
+    return True
+
+
+def test_one_installation_fails():
+    """Test: A failing installation does not stop the other one and fails the step."""
+    print("Testing: Failure in One Installation...")
+
+    calls = []
+    try:
+        with patch('src.helper.runner.run', side_effect=fake_flatpak(calls, set(), fail="--system", delay=0.1)):
+            flatpak.update_flatpak()
+        print("   ❌ FAILED: The failure was not reported")
+        return False
+    except runner.CommandError:
+        pass
+
+    if ["flatpak", "update", "--user", "-y"] not in calls:
+        print(f"   ❌ FAILED: User installation not updated: {calls}")
+        return False
+
+    print("   ✅ PASSED: User installation updated, CommandError raised")
+    return True
+
+
+def test_skip_user_installation():
+    """Test: Without update_user_installation, only the system installation is updated."""
+    print("Testing: Skip User Installation...")
+
+    calls = []
+    with patch('src.helper.runner.run', side_effect=fake_flatpak(calls, set())), \
+         patch.object(flatpak, 'update_user_installation', False):
+        message = flatpak.update_flatpak(show_live_output=True)
+
+    if [cmd for cmd in calls if cmd[1] == "update"] != [["flatpak", "update", "--system", "-y"]]:
+        print(f"   ❌ FAILED: Unexpected commands {calls}")
+        return False
+    if "User installation:" in message:
+        print(f"   ❌ FAILED: Unexpected output {message!r}")
+        return False
+
+    print("   ✅ PASSED: Only the system installation updated")
+    return True
+
+
+def main():
+    """Run all Flatpak installation tests."""
+    print("=" * 60)
+    print("Flatpak Installation Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Parallel Installation Updates", test_parallel_installations()))
+    print()
+    results.append(("Unused Runtime Pruning", test_prune()))
+    print()
+    results.append(("Failure in One Installation", test_one_installation_fails()))
+    print()
+    results.append(("Skip User Installation", test_skip_user_installation()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
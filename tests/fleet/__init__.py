@@ -0,0 +1,4 @@
+"""Fleet mode tests.
+
+Tests for command transports and concurrent multi-host updates.
+"""
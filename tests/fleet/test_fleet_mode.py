@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""Tests for fleet mode.
+
+Tests parsing host entries into transports, running commands through a
+transport, the per-host update flow with captured output, and the rolling
+batch scheduler with its concurrency limit and failure threshold.
+"""
+
+import sys
+import os
+import subprocess
+import threading
+import time
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.app import fleet
+from src.helper import runner, transport
+
+FEDORA_OS_RELEASE = 'NAME="Fedora Linux"\nVERSION_ID=41\nID=fedora\n'
+
+
+def test_parse_target():
+    """Test: Inventory entries map to the right transport and command line."""
+    print("Testing: Host Entry Parsing...")
+
+    ssh = transport.parse_target("admin@web1:2222")
+    container = transport.parse_target("docker:test-box")
+    local = transport.parse_target("local")
+
+    expected_ssh = ["ssh", "-n", "-o", "BatchMode=yes", "-o", "ConnectTimeout=15",
+                    "-p", "2222", "admin@web1", "--", "sudo dnf update -y '--exclude=kernel*'"]
+    checks = [
+        (ssh.wrap(["sudo", "dnf", "update", "-y", "--exclude=kernel*"]), expected_ssh),
+        (container.wrap(["sudo", "dnf", "update", "-y"]),
+         ["docker", "exec", "--user", "root", "test-box", "dnf", "update", "-y"]),
+        (local.wrap(["uname", "-r"]), ["uname", "-r"]),
+        ((ssh.is_local, container.is_local, local.is_local), (False, False, True)),
+    ]
+    for result, expected in checks:
+        if result != expected:
+            print(f"   ❌ FAILED: Expected {expected} but got {result}")
+            return False
+
+    try:
+        transport.parse_target("web1:ssh")
+        print("   ❌ FAILED: Expected ValueError for a non-numeric port")
+        return False
+    except ValueError:
+        pass
+
+    print("   ✅ PASSED: Host entries parsed correctly")
+    return True
+
+
+def test_runner_uses_transport():
+    """Test: runner.run() sends commands over the active transport without local lock checks."""
+    print("Testing: Runner Transport Selection...")
+
+    with patch('src.helper.runner._execute', return_value=subprocess.CompletedProcess([], 0, "", "")) as mock_run, \
+         patch('src.helper.locks.wait_until_free', side_effect=AssertionError("local lock checked")):
+        with transport.use(transport.SSHTransport("web1")):
+            runner.run(["sudo", "dnf", "update", "-y"])
+        remote_cmd = mock_run.call_args[0][0]
+
+    if remote_cmd[0] != "ssh" or remote_cmd[-1] != "sudo dnf update -y":
+        print(f"   ❌ FAILED: Unexpected command {remote_cmd}")
+        return False
+    if transport.current() is not transport.LOCAL:
+        print("   ❌ FAILED: Transport not restored after use()")
+        return False
+
+    print("   ✅ PASSED: Command sent over SSH")
+    return True
+
+
+def test_update_host():
+    """Test: A host update detects the remote distro, captures its output and ignores local locks."""
+    print("Testing: Single Host Update...")
+
+    executed = []
+
+    def fake_run(cmd, show_live_output=False, timeout=None, on_line=None, terminal=False):
+        executed.append(cmd)
+        stdout = FEDORA_OS_RELEASE if cmd[-1] == "/etc/os-release" else ""
+        return subprocess.CompletedProcess(cmd, 0, stdout=stdout, stderr="")
+
+    with patch('src.helper.runner._execute', side_effect=fake_run), \
+         patch('src.helper.locks.holders', side_effect=AssertionError("local lock checked")), \
+         fleet.capture_host_output():
+        report = fleet.update_host(transport.ContainerTransport("fedora-test"), kernel_policy="exclude")
+
+    if report.status != "succeeded" or report.distro != "fedora":
+        print(f"   ❌ FAILED: Unexpected report {report}")
+        return False
+    if not all(cmd[:2] == ["podman", "exec"] for cmd in executed):
+        print(f"   ❌ FAILED: Command ran outside the container: {executed}")
+        return False
+    if ["podman", "exec", "--user", "root", "fedora-test", "dnf", "update", "-y"] not in executed:
+        print(f"   ❌ FAILED: DNF update not run in the container: {executed}")
+        return False
+    if "✅ Updating DNF packages" not in report.output:
+        print(f"   ❌ FAILED: Host output not captured: {report.output!r}")
+        return False
+
+    print(f"   ✅ PASSED: Fedora container updated with {len(executed)} commands")
+    return True
+
+
+def make_update(failing=(), duration=0.05):
+    """Create a fake host update that records concurrency and start order."""
+    state = {"running": 0, "max_running": 0, "started": [], "finished": []}
+    lock = threading.Lock()
+
+    def update(target):
+        with lock:
+            state["running"] += 1
+            state["max_running"] = max(state["max_running"], state["running"])
+            state["started"].append(target.name)
+        time.sleep(duration)
+        with lock:
+            state["running"] -= 1
+            state["finished"].append(target.name)
+        status = "failed" if target.name in failing else "succeeded"
+        return fleet.HostReport(target.name, status, "fedora", duration, "", None)
+
+    return update, state
+
+
+def test_concurrency_limit():
+    """Test: No more hosts than the concurrency limit run at once."""
+    print("Testing: Concurrency Limit...")
+
+    targets = [transport.LocalTransport(f"host{i}") for i in range(6)]
+    update, state = make_update()
+    reports = fleet.run_fleet(targets, update, concurrency=2)
+
+    if state["max_running"] != 2:
+        print(f"   ❌ FAILED: Expected 2 concurrent hosts, got {state['max_running']}")
+        return False
+    if [r.host for r in reports] != [t.name for t in targets]:
+        print(f"   ❌ FAILED: Reports not in inventory order: {[r.host for r in reports]}")
+        return False
+
+    print("   ✅ PASSED: Concurrency limited to 2")
+    return True
+
+
+def test_rolling_batches():
+    """Test: A batch finishes before the next batch starts."""
+    print("Testing: Rolling Batches...")
+
+    targets = [transport.LocalTransport(f"host{i}") for i in range(4)]
+    update, state = make_update()
+    fleet.run_fleet(targets, update, concurrency=10, batch_size=2)
+
+    first_batch = {"host0", "host1"}
+    if set(state["started"][:2]) != first_batch or set(state["finished"][:2]) != first_batch:
+        print(f"   ❌ FAILED: Batches overlapped: started {state['started']}, finished {state['finished']}")
+        return False
+
+    print("   ✅ PASSED: Batches ran one after another")
+    return True
+
+
+def test_failure_threshold():
+    """Test: Hosts are skipped once the failure threshold is reached."""
+    print("Testing: Failure Threshold...")
+
+    targets = [transport.LocalTransport(f"host{i}") for i in range(4)]
+    update, _state = make_update(failing={"host0"})
+    reports = fleet.run_fleet(targets, update, concurrency=1, max_failures=1)
+    statuses = [r.status for r in reports]
+
+    if statuses != ["failed", "skipped", "skipped", "skipped"]:
+        print(f"   ❌ FAILED: Unexpected statuses {statuses}")
+        return False
+
+    summary = fleet.summarize(reports)
+    if not summary.startswith("4 hosts: 0 succeeded, 1 failed, 3 skipped"):
+        print(f"   ❌ FAILED: Unexpected summary {summary!r}")
+        return False
+
+    print("   ✅ PASSED: Remaining hosts skipped after the first failure")
+    return True
+
+
+def main():
+    """Run all fleet mode tests."""
+    print("=" * 60)
+    print("Fleet Mode Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Host Entry Parsing", test_parse_target()))
+    print()
+    results.append(("Runner Transport Selection", test_runner_uses_transport()))
+    print()
+    results.append(("Single Host Update", test_update_host()))
+    print()
+    results.append(("Concurrency Limit", test_concurrency_limit()))
+    print()
+    results.append(("Rolling Batches", test_rolling_batches()))
+    print()
+    results.append(("Failure Threshold", test_failure_threshold()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""Run journal tests.
+
+Tests for resuming interrupted runs from the step journal.
+"""
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Tests for the run journal.
+
+Tests recording completed steps, resuming an interrupted run, starting over
+when the package state or distribution changed, and skipping completed steps
+in the Fedora update flow.
+"""
+
+import sys
+import os
+import subprocess
+import tempfile
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.core import journal
+from src.distros.fedora_distro import FedoraDistro
+from src.helper import transport
+
+
+def test_resume_after_interruption():
+    """Test: Completed steps and values are restored when resuming."""
+    print("Testing: Resume After Interruption...")
+
+    with tempfile.TemporaryDirectory() as directory, \
+         patch.object(journal, "JOURNAL_FILE", os.path.join(directory, "journal.json")), \
+         patch('src.core.pkgdb.state_fingerprint', return_value="rpmdb:1:1"):
+        first = journal.begin("fedora")
+        journal.complete("Updating DNF packages", new_kernel=True)
+
+        message = journal.begin("fedora", resume=True)
+        done = journal.is_done("Updating DNF packages")
+        pending = journal.is_done("Rebuilding initramfs")
+        new_kernel = journal.value("new_kernel")
+        with transport.use(transport.SSHTransport("web1")):
+            done_remote = journal.is_done("Updating DNF packages")
+
+        journal.finish()
+        after_finish = journal.begin("fedora", resume=True)
+        journal.finish()
+
+    if first is not None:
+        print(f"   ❌ FAILED: A run without --resume should not print a message, got '{first}'")
+        return False
+    if not (message and message.startswith("Resuming")) or not done or pending or new_kernel is not True:
+        print(f"   ❌ FAILED: Expected the DNF step and new_kernel to be restored, got '{message}'")
+        return False
+    if done_remote:
+        print("   ❌ FAILED: Steps on other hosts must never be skipped")
+        return False
+    if not after_finish.startswith("No interrupted run"):
+        print(f"   ❌ FAILED: A finished run should not be resumed, got '{after_finish}'")
+        return False
+
+    print("   ✅ PASSED: Completed steps skipped, finished runs not resumed")
+    return True
+
+
+def test_start_over_when_state_changed():
+    """Test: A changed package database or distribution starts a full run."""
+    print("Testing: Start Over on Changed State...")
+
+    with tempfile.TemporaryDirectory() as directory, \
+         patch.object(journal, "JOURNAL_FILE", os.path.join(directory, "journal.json")):
+        with patch('src.core.pkgdb.state_fingerprint', return_value="rpmdb:1:1"):
+            journal.begin("fedora")
+            journal.complete("Updating DNF packages")
+        with patch('src.core.pkgdb.state_fingerprint', return_value="rpmdb:2:2"):
+            changed = journal.begin("fedora", resume=True)
+            changed_done = journal.is_done("Updating DNF packages")
+            journal.complete("Updating DNF packages")
+            other_distro = journal.begin("ubuntu", resume=True)
+            other_done = journal.is_done("Updating DNF packages")
+        journal.finish()
+
+    if not changed.startswith("Packages changed") or changed_done:
+        print(f"   ❌ FAILED: Expected a full run after package changes, got '{changed}'")
+        return False
+    if not other_distro.startswith("The interrupted run was for another") or other_done:
+        print(f"   ❌ FAILED: Expected a full run for another distribution, got '{other_distro}'")
+        return False
+
+    print("   ✅ PASSED: Runs start over when the journal no longer matches")
+    return True
+
+
+def test_fedora_resume_skips_completed_steps():
+    """Test: A resumed Fedora run continues at the step that failed."""
+    print("Testing: Fedora Resume Skips Completed Steps...")
+
+    calls = []
+
+    def fake_dnf_run(cmd, show_live_output=False, check=True):
+        calls.append(" ".join(cmd[:3]))
+        return subprocess.CompletedProcess(cmd, 0, stdout="", stderr="")
+
+    def failing_nvidia(show_live_output=False):
+        calls.append("nvidia")
+        raise RuntimeError("akmods failed")
+
+    def run_update(nvidia):
+        with patch('src.core.kernel.new_kernel_version', side_effect=lambda security_only=False: calls.append("kernel check") or True), \
+             patch('src.core.kernel.get_new_kernel_version', return_value="6.13.0"), \
+             patch('src.package_managers.dnf.runner.run', side_effect=fake_dnf_run), \
+             patch('src.package_managers.snap.update_snap', side_effect=lambda show_live_output=False: calls.append("snap")), \
+             patch('src.package_managers.flatpak.update_flatpak', side_effect=lambda show_live_output=False: calls.append("flatpak")), \
+             patch('src.core.pkgdb.read_installed', return_value=None), \
+             patch('src.helper.locks.holders', return_value=[]), \
+             patch('src.core.deferred.steps_to_retry', return_value=[]), \
+             patch('src.core.init.rebuild_initramfs', side_effect=lambda new_kernel: calls.append(f"initramfs {new_kernel}")), \
+             patch('src.core.nvidia.rebuild_nvidia_modules', side_effect=nvidia):
+            FedoraDistro().update(False, False, "allow")
+
+    with tempfile.TemporaryDirectory() as directory, \
+         patch.object(journal, "JOURNAL_FILE", os.path.join(directory, "journal.json")), \
+         patch('src.core.pkgdb.state_fingerprint', return_value="rpmdb:1:1"):
+        journal.begin("fedora")
+        try:
+            run_update(failing_nvidia)
+        except RuntimeError:
+            pass
+        first_run = list(calls)
+        calls.clear()
+
+        journal.begin("fedora", resume=True)
+        run_update(lambda show_live_output=False: calls.append("nvidia"))
+        journal.finish()
+
+    if "kernel check" not in first_run or "initramfs True" not in first_run:
+        print(f"   ❌ FAILED: First run did not reach the NVIDIA rebuild: {first_run}")
+        return False
+    if calls != ["nvidia", "snap", "flatpak"]:
+        print(f"   ❌ FAILED: Expected only the remaining steps, got {calls}")
+        return False
+
+    print("   ✅ PASSED: Resumed run started at the failed NVIDIA rebuild")
+    return True
+
+
+def main():
+    """Run all run journal tests."""
+    print("=" * 60)
+    print("Run Journal Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Resume After Interruption", test_resume_after_interruption()))
+    print()
+    results.append(("Start Over on Changed State", test_start_over_when_state_changed()))
+    print()
+    results.append(("Fedora Resume Skips Completed Steps", test_fedora_resume_skips_completed_steps()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
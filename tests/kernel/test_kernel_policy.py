@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Tests for the kernel update policy.
+
+Tests the non-aborting ask_kernel_update() prompt and the Fedora update flow
+with the ask, allow and exclude kernel policies.
+"""
+
+import sys
+import os
+import subprocess
+import threading
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.core import kernel
+from src.distros.fedora_distro import FedoraDistro
+
+
+def run_fedora_update(kernel_policy, answer="n"):
+    """Run FedoraDistro.update() with all external effects mocked.
+
+    Returns:
+        Tuple of (dnf commands run, extra update calls, events in order).
+    """
+    dnf_commands = []
+    extra_calls = []
+    events = []
+    prompt_answered = threading.Event()
+
+    def fake_input(prompt):
+        events.append("prompt")
+        prompt_answered.set()
+        return answer
+
+    def fake_dnf_run(cmd, show_live_output=False, check=True):
+        dnf_commands.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout="", stderr="")
+
+    def fake_extra(name):
+        def update(show_live_output=False):
+            extra_calls.append(name)
+            events.append(name)
+            return None
+        return update
+
+    with patch('src.core.kernel.new_kernel_version', return_value=True), \
+         patch('src.core.kernel.get_new_kernel_version', return_value="6.13.0"), \
+         patch('src.package_managers.dnf.runner.run', side_effect=fake_dnf_run), \
+         patch('src.package_managers.snap.update_snap', side_effect=fake_extra("snap")), \
+         patch('src.package_managers.flatpak.update_flatpak', side_effect=fake_extra("flatpak")), \
+         patch('src.core.pkgdb.read_installed', return_value=None), \
+         patch('src.helper.locks.holders', return_value=[]), \
+         patch('src.core.init.rebuild_initramfs', return_value="skipped"), \
+         patch('src.core.nvidia.rebuild_nvidia_modules', return_value="skipped"), \
+         patch('builtins.input', side_effect=fake_input):
+        FedoraDistro().update(True, False, kernel_policy)
+
+    return dnf_commands, extra_calls, events
+
+
+def test_ask_kernel_update_answers():
+    """Test: ask_kernel_update() returns instead of exiting."""
+    print("Testing: Non-aborting Kernel Prompt...")
+
+    cases = [('y', True), ('Y', True), ('n', False), ('', False)]
+    for answer, expected in cases:
+        with patch('builtins.input', return_value=answer):
+            result = kernel.ask_kernel_update("6.13.0")
+        if result != expected:
+            print(f"   ❌ FAILED: Answer '{answer}' expected {expected} but got {result}")
+            return False
+
+    with patch('builtins.input', side_effect=EOFError):
+        if kernel.ask_kernel_update("6.13.0"):
+            print("   ❌ FAILED: Closed stdin should count as declining")
+            return False
+
+    print("   ✅ PASSED: Prompt answers handled without SystemExit")
+    return True
+
+
+def test_policy_exclude():
+    """Test: --kernel=exclude updates DNF with kernel packages excluded and no prompt."""
+    print("Testing: Kernel Policy 'exclude'...")
+
+    dnf_commands, extra_calls, events = run_fedora_update("exclude")
+    update_cmds = [cmd for cmd in dnf_commands if "update" in cmd and "-y" in cmd]
+
+    if "prompt" in events:
+        print("   ❌ FAILED: No prompt expected with --kernel=exclude")
+        return False
+    if update_cmds != [["sudo", "dnf", "update", "-y", "--exclude=kernel*"]]:
+        print(f"   ❌ FAILED: Unexpected DNF update commands {update_cmds}")
+        return False
+    if extra_calls != ["snap", "flatpak"]:
+        print(f"   ❌ FAILED: Unexpected extra updates {extra_calls}")
+        return False
+
+    print("   ✅ PASSED: Kernel excluded without prompting")
+    return True
+
+
+def test_policy_allow():
+    """Test: --kernel=allow updates everything without asking."""
+    print("Testing: Kernel Policy 'allow'...")
+
+    dnf_commands, _extra_calls, events = run_fedora_update("allow")
+    update_cmds = [cmd for cmd in dnf_commands if "update" in cmd and "-y" in cmd]
+
+    if "prompt" in events or update_cmds != [["sudo", "dnf", "update", "-y"]]:
+        print(f"   ❌ FAILED: Unexpected events {events} or commands {update_cmds}")
+        return False
+
+    print("   ✅ PASSED: Kernel allowed without prompting")
+    return True
+
+
+def test_policy_ask_declined():
+    """Test: Declining in ask mode still updates DNF and runs extras exactly once."""
+    print("Testing: Kernel Policy 'ask' Declined...")
+
+    dnf_commands, extra_calls, _events = run_fedora_update("ask", answer="n")
+    update_cmds = [cmd for cmd in dnf_commands if "update" in cmd and "-y" in cmd]
+
+    if update_cmds != [["sudo", "dnf", "update", "-y", "--exclude=kernel*"]]:
+        print(f"   ❌ FAILED: Unexpected DNF update commands {update_cmds}")
+        return False
+    if sorted(extra_calls) != ["flatpak", "snap"]:
+        print(f"   ❌ FAILED: Extras should run exactly once, got {extra_calls}")
+        return False
+
+    print("   ✅ PASSED: Declined kernel excluded, rest of the system updated")
+    return True
+
+
+def main():
+    """Run all kernel policy tests."""
+    print("=" * 60)
+    print("Kernel Policy Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Non-aborting Kernel Prompt", test_ask_kernel_update_answers()))
+    print()
+    results.append(("Kernel Policy 'exclude'", test_policy_exclude()))
+    print()
+    results.append(("Kernel Policy 'allow'", test_policy_allow()))
+    print()
+    results.append(("Kernel Policy 'ask' Declined", test_policy_ask_declined()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""Package lock tests.
+
+Tests for package manager lock detection and waiting.
+"""
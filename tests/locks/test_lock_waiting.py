@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Tests for package manager lock detection and waiting.
+
+Tests which commands need a package lock, detecting a lock held by another
+process through /proc/locks (matching device and inode, also on btrfs
+subvolumes), and waiting for it with a timeout.
+"""
+
+import sys
+import os
+import subprocess
+import tempfile
+import time
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.helper import locks
+
+HOLD_LOCK_SCRIPT = (
+    "import fcntl, sys, time\n"
+    "f = open(sys.argv[1], 'w')\n"
+    "fcntl.lockf(f, fcntl.LOCK_EX)\n"
+    "print('locked', flush=True)\n"
+    "time.sleep(float(sys.argv[2]))\n"
+)
+
+
+def hold_lock(path, seconds):
+    """Start a child process that holds an fcntl lock on path."""
+    process = subprocess.Popen([sys.executable, "-c", HOLD_LOCK_SCRIPT, path, str(seconds)],
+                               stdout=subprocess.PIPE, text=True)
+    process.stdout.readline()
+    return process
+
+
+def test_lock_for_commands():
+    """Test: Only state-changing package manager commands need a lock."""
+    print("Testing: Lock Requirement Detection...")
+
+    test_cases = [
+        (["sudo", "dnf", "update", "-y"], "dnf"),
+        (["sudo", "dnf", "clean", "packages"], "dnf"),
+        (["dnf", "check-upgrade", "-q", "kernel*"], None),
+        (["dnf", "--version"], None),
+        (["sudo", "apt", "upgrade", "-y"], "apt"),
+        (["apt", "--version"], None),
+        (["sudo", "snap", "refresh"], "snap"),
+        (["flatpak", "update", "-y"], None),
+    ]
+
+    all_passed = True
+    for cmd, expected in test_cases:
+        result = locks.lock_for(cmd)
+        if result != expected:
+            print(f"   ❌ FAILED: For {cmd} expected {expected} but got {result}")
+            all_passed = False
+
+    if all_passed:
+        print("   ✅ PASSED: Lock requirements detected correctly")
+    return all_passed
+
+
+def test_detect_lock_holder():
+    """Test: A lock held by another process is found with its pid."""
+    print("Testing: Lock Holder Detection...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lock_path = os.path.join(tmp, "lock")
+        with patch.dict(locks.LOCK_FILES, {"apt": [lock_path]}):
+            if locks.is_locked("apt"):
+                print("   ❌ FAILED: Lock should be free before the holder starts")
+                return False
+
+            process = hold_lock(lock_path, 5)
+            try:
+                lock_holders = locks.holders("apt")
+            finally:
+                process.kill()
+                process.wait()
+
+    if len(lock_holders) == 1 and lock_holders[0].pid == process.pid:
+        print(f"   ✅ PASSED: Found holder {locks.describe(lock_holders)}")
+        return True
+    else:
+        print(f"   ❌ FAILED: Expected holder pid {process.pid} but got {lock_holders}")
+        return False
+
+
+def test_wait_until_released():
+    """Test: Waiting returns once the holder releases the lock."""
+    print("Testing: Waiting for Lock Release...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lock_path = os.path.join(tmp, "lock")
+        with patch.dict(locks.LOCK_FILES, {"apt": [lock_path]}):
+            process = hold_lock(lock_path, 0.5)
+            try:
+                start = time.monotonic()
+                waited = locks.wait_until_free("apt", wait_timeout=10)
+                elapsed = time.monotonic() - start
+            finally:
+                process.kill()
+                process.wait()
+
+    if 0.2 < waited <= elapsed < 5:
+        print(f"   ✅ PASSED: Lock acquired after waiting {waited:.1f}s")
+        return True
+    else:
+        print(f"   ❌ FAILED: Unexpected wait time {waited:.2f}s (elapsed {elapsed:.2f}s)")
+        return False
+
+
+def test_wait_timeout():
+    """Test: LockTimeoutError is raised when the lock is held too long."""
+    print("Testing: Lock Wait Timeout...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lock_path = os.path.join(tmp, "lock")
+        with patch.dict(locks.LOCK_FILES, {"dnf": [lock_path]}):
+            process = hold_lock(lock_path, 10)
+            try:
+                locks.wait_until_free("dnf", wait_timeout=0.5)
+                print("   ❌ FAILED: Expected LockTimeoutError")
+                return False
+            except locks.LockTimeoutError:
+                print("   ✅ PASSED: LockTimeoutError raised after the timeout")
+                return True
+            finally:
+                process.kill()
+                process.wait()
+
+
+def test_lock_on_other_device():
+    """Test: A lock on another file system's file with the same inode is not a holder."""
+    print("Testing: Device Matching...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lock_path = os.path.join(tmp, "lock")
+        open(lock_path, "w").close()
+        stat = os.stat(lock_path)
+        other_major = os.major(stat.st_dev) + 1
+        proc_locks = os.path.join(tmp, "locks")
+        mountinfo = os.path.join(tmp, "mountinfo")
+        with open(mountinfo, "w") as f:
+            f.write(f"1 0 0:999 / {tmp} rw - btrfs /dev/sda2 rw\n")
+
+        def holders_with(device):
+            with open(proc_locks, "w") as f:
+                f.write(f"1: POSIX  ADVISORY  WRITE 4242 {device}:{stat.st_ino} 0 EOF\n")
+            with patch.dict(locks.LOCK_FILES, {"dpkg": [lock_path]}), \
+                 patch.multiple(locks, PROC_LOCKS=proc_locks, PROC_MOUNTINFO=mountinfo):
+                return locks.holders("dpkg")
+
+        other_device = holders_with(f"{other_major:02x}:{os.minor(stat.st_dev):02x}")
+        # btrfs: /proc/locks reports the superblock device listed in mountinfo
+        subvolume = holders_with("00:3e7")
+
+    if other_device:
+        print(f"   ❌ FAILED: Lock on another device reported: {other_device}")
+        return False
+    if [holder.pid for holder in subvolume] != [4242]:
+        print(f"   ❌ FAILED: Lock on the mount's superblock device not found: {subvolume}")
+        return False
+
+    print("   ✅ PASSED: Same inode on another device ignored, btrfs superblock device matched")
+    return True
+
+
+def main():
+    """Run all lock waiting tests."""
+    print("=" * 60)
+    print("Package Lock Waiting Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Lock Requirement Detection", test_lock_for_commands()))
+    print()
+    results.append(("Lock Holder Detection", test_detect_lock_holder()))
+    print()
+    results.append(("Waiting for Lock Release", test_wait_until_released()))
+    print()
+    results.append(("Lock Wait Timeout", test_wait_timeout()))
+    print()
+    results.append(("Device Matching", test_lock_on_other_device()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""Logging tests.
+
+Tests for the per-step log files and journal output.
+"""
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Tests for the logging subsystem.
+
+Tests routing records to per-step log files, writing them without blocking
+the logging step, rotating and compressing full log files, and the
+structured fields sent to the journal.
+"""
+
+import sys
+import os
+import gzip
+import io
+import logging
+import socket
+import struct
+import subprocess
+import tempfile
+import time
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.helper import log, runner
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_step_files():
+    """Test: Records go to their step's log file, only warnings to the terminal."""
+    print("Testing: Per-Step Log Files...")
+
+    stderr = io.StringIO()
+    with tempfile.TemporaryDirectory() as tmpdir, patch('sys.stderr', stderr):
+        log.setup(log_dir=tmpdir)
+        try:
+            with log.step("Updating DNF packages"):
+                logging.debug("Executing: sudo dnf update -y")
+                logging.warning("Mirror slow")
+            logging.debug("Run finished")
+        finally:
+            log.shutdown()
+
+        files = sorted(os.listdir(tmpdir))
+        if files != ["tuxgrade.log", "updating-dnf-packages.log"]:
+            print(f"   ❌ FAILED: Unexpected log files {files}")
+            return False
+        step_log = read(os.path.join(tmpdir, "updating-dnf-packages.log"))
+        if "DEBUG Executing: sudo dnf update -y" not in step_log or "WARNING Mirror slow" not in step_log:
+            print(f"   ❌ FAILED: Step log incomplete: {step_log!r}")
+            return False
+        if "Run finished" not in read(os.path.join(tmpdir, "tuxgrade.log")):
+            print("   ❌ FAILED: Record outside of a step not in tuxgrade.log")
+            return False
+
+    if stderr.getvalue() != "WARNING:root:Mirror slow\n":
+        print(f"   ❌ FAILED: Unexpected terminal output {stderr.getvalue()!r}")
+        return False
+    if logging.getLogger().handlers:
+        print("   ❌ FAILED: Handlers left after shutdown")
+        return False
+
+    print("   ✅ PASSED: Step and general log files, warnings on the terminal")
+    return True
+
+
+def test_command_output():
+    """Test: The captured output of commands is logged with the command."""
+    print("Testing: Command Output...")
+
+    def fake_popen_run(full_cmd, show_live_output, timeout, on_line=None, terminal=False):
+        return subprocess.CompletedProcess(full_cmd, 0, "Upgraded:\n  bash-5.2.37-1.fc42\n", "")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log.setup(log_dir=tmpdir)
+        try:
+            with log.step("Updating DNF packages"), \
+                 patch('src.helper.runner._execute', side_effect=fake_popen_run):
+                runner.run(["echo", "update"])
+        finally:
+            log.shutdown()
+        step_log = read(os.path.join(tmpdir, "updating-dnf-packages.log"))
+
+    if "Exit status 0: echo update\nUpgraded:\n  bash-5.2.37-1.fc42" not in step_log:
+        print(f"   ❌ FAILED: Output not logged: {step_log!r}")
+        return False
+
+    print("   ✅ PASSED: Command, exit status and output in the step log")
+    return True
+
+
+def test_non_blocking():
+    """Test: A slow log file does not slow down the logging step."""
+    print("Testing: Non-Blocking Writes...")
+
+    original_emit = log.StepFileHandler.emit
+
+    def slow_emit(self, record):
+        time.sleep(0.005)
+        original_emit(self, record)
+
+    with tempfile.TemporaryDirectory() as tmpdir, patch.object(log.StepFileHandler, 'emit', slow_emit):
+        log.setup(log_dir=tmpdir)
+        try:
+            start = time.perf_counter()
+            with log.step("Updating Flatpak packages"):
+                for i in range(200):
+                    logging.debug("Output line %d", i)
+            elapsed = time.perf_counter() - start
+        finally:
+            log.shutdown()
+        lines = read(os.path.join(tmpdir, "updating-flatpak-packages.log")).splitlines()
+
+    if elapsed > 0.5:
+        print(f"   ❌ FAILED: Logging took {elapsed:.2f}s")
+        return False
+    if len(lines) != 200:
+        print(f"   ❌ FAILED: {len(lines)} of 200 records written at shutdown")
+        return False
+
+    print(f"   ✅ PASSED: 200 records queued in {elapsed * 1000:.1f} ms and written at shutdown")
+    return True
+
+
+def test_rotation():
+    """Test: Full log files are rotated and compressed."""
+    print("Testing: Rotation and Compression...")
+
+    with tempfile.TemporaryDirectory() as tmpdir, patch.object(log, 'MAX_BYTES', 4096):
+        log.setup(log_dir=tmpdir)
+        try:
+            with log.step("Cleaning DNF Cache"):
+                for i in range(1000):
+                    logging.debug("Removing cached package %05d", i)
+        finally:
+            log.shutdown()
+
+        files = sorted(os.listdir(tmpdir))
+        expected = ["cleaning-dnf-cache.log"] + [f"cleaning-dnf-cache.log.{n}.gz" for n in range(1, log.BACKUP_COUNT + 1)]
+        if files != expected:
+            print(f"   ❌ FAILED: Unexpected files {files}")
+            return False
+        with gzip.open(os.path.join(tmpdir, "cleaning-dnf-cache.log.1.gz"), "rt") as f:
+            rotated = f.read()
+        if "Removing cached package" not in rotated or os.path.getsize(os.path.join(tmpdir, files[0])) > 4096:
+            print("   ❌ FAILED: Rotated file not readable or current file too large")
+            return False
+
+    print(f"   ✅ PASSED: {log.BACKUP_COUNT} compressed files kept")
+    return True
+
+
+def parse_journal(payload):
+    """Decode a journal native protocol datagram into a dict."""
+    fields = {}
+    while payload:
+        line, _, rest = payload.partition(b"\n")
+        if b"=" in line:
+            name, _, value = line.partition(b"=")
+            payload = rest
+        else:
+            name = line
+            size = struct.unpack("<Q", rest[:8])[0]
+            value, payload = rest[8:8 + size], rest[9 + size:]
+        fields[name.decode()] = value.decode()
+    return fields
+
+
+def test_journald_fields():
+    """Test: Info and higher records are sent to the journal with structured fields."""
+    print("Testing: Journal Fields...")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "journal.socket")
+        journal = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        journal.bind(path)
+        journal.settimeout(2)
+        with patch.object(log, 'JOURNAL_SOCKET', path), patch('sys.stderr', io.StringIO()):
+            log.setup(journald=True, log_dir=tmpdir)
+            try:
+                with log.step("Updating Snap packages"):
+                    logging.debug("Not sent")
+                    logging.error("Command failed:\nsnap refresh", extra={"command": ["sudo", "snap", "refresh"],
+                                                                          "exit_status": 1})
+            finally:
+                log.shutdown()
+        fields = parse_journal(journal.recv(65536))
+        journal.settimeout(0)
+        try:
+            journal.recv(65536)
+            print("   ❌ FAILED: Debug record sent to the journal")
+            return False
+        except BlockingIOError:
+            pass
+        journal.close()
+
+    expected = {"MESSAGE": "Command failed:\nsnap refresh", "PRIORITY": "3", "SYSLOG_IDENTIFIER": "tuxgrade",
+                "TUXGRADE_STEP": "Updating Snap packages", "TUXGRADE_COMMAND": "sudo snap refresh",
+                "TUXGRADE_EXIT_STATUS": "1"}
+    if any(fields.get(name) != value for name, value in expected.items()):
+        print(f"   ❌ FAILED: Unexpected fields {fields}")
+        return False
+
+    print("   ✅ PASSED: Step, command and exit status sent as journal fields")
+    return True
+
+
+def main():
+    """Run all logging tests."""
+    print("=" * 60)
+    print("Logging Subsystem Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Per-Step Log Files", test_step_files()))
+    print()
+    results.append(("Command Output", test_command_output()))
+    print()
+    results.append(("Non-Blocking Writes", test_non_blocking()))
+    print()
+    results.append(("Rotation and Compression", test_rotation()))
+    print()
+    results.append(("Journal Fields", test_journald_fields()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""Shared package cache tests.
+
+Tests for the content-addressed package download cache.
+"""
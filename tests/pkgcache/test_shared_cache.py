@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Tests for the shared package download cache.
+
+Tests the DNF/APT cache options per transport, collecting downloads into the
+content-addressed store, seeding other targets with hard links, and running
+both as root through sudo.
+"""
+
+import sys
+import os
+import subprocess
+import tempfile
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.core import pkgcache
+from src.helper import transport
+from src.package_managers import dnf
+
+ROOT = "/var/cache/tuxgrade/packages"
+PACKAGE = os.path.join("fedora-1a2b3c", "packages", "bash-5.2.37-1.fc41.x86_64.rpm")
+
+
+def fake_dnf_version(cmd, show_live_output=False, check=True):
+    """Pretend dnf4 is installed."""
+    return subprocess.CompletedProcess(cmd, 0, stdout="4.22.0\n", stderr="")
+
+
+def write_package(directory, relative, content=b"rpm payload"):
+    """Create a downloaded package file below directory."""
+    path = os.path.join(directory, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+def test_cache_options():
+    """Test: Containers download below the cache root, the host keeps its cache dir, SSH hosts are skipped."""
+    print("Testing: Cache Options per Transport...")
+
+    toolbox = transport.ContainerTransport("fedora-toolbox-41", host_root="/run/host")
+    with patch.object(pkgcache, "root", ROOT), \
+         patch('src.core.pkgcache.runner.run', side_effect=fake_dnf_version):
+        local_options = pkgcache.options("dnf")
+        local_apt_options = pkgcache.options("apt")
+        with transport.use(toolbox):
+            toolbox_options = pkgcache.options("apt")
+            toolbox_dnf_options = pkgcache.options("dnf")
+        with transport.use(transport.SSHTransport("web1")):
+            ssh_options = pkgcache.options("dnf")
+    with patch.object(pkgcache, "root", None):
+        disabled_options = pkgcache.options("dnf")
+
+    checks = [
+        (local_options, ["--setopt=keepcache=True"]),
+        (local_apt_options, ["-o", "APT::Keep-Downloaded-Packages=true"]),
+        (toolbox_options, ["-o", f"Dir::Cache::Archives=/run/host{ROOT}/targets/fedora-toolbox-41/apt/",
+                           "-o", "APT::Keep-Downloaded-Packages=true"]),
+        (toolbox_dnf_options, [f"--setopt=cachedir=/run/host{ROOT}/targets/fedora-toolbox-41/dnf",
+                               "--setopt=keepcache=True"]),
+        (ssh_options, []),
+        (disabled_options, []),
+    ]
+    for result, expected in checks:
+        if result != expected:
+            print(f"   ❌ FAILED: Expected {expected} but got {result}")
+            return False
+
+    print("   ✅ PASSED: Options match each transport")
+    return True
+
+
+def test_collect_and_seed():
+    """Test: A package downloaded by one target is hard-linked into the next."""
+    print("Testing: Collect and Seed...")
+
+    with tempfile.TemporaryDirectory() as tmp, patch.object(pkgcache, "root", tmp), \
+         patch('os.geteuid', return_value=0):
+        with transport.use(transport.ContainerTransport("host", host_root="/")):
+            downloaded = write_package(os.path.join(tmp, "targets", "host", "dnf"), PACKAGE)
+            added = pkgcache.collect("dnf")
+            added_again = pkgcache.collect("dnf")
+
+        with transport.use(transport.ContainerTransport("box", host_root="/")):
+            linked = pkgcache.seed("dnf")
+            seeded = os.path.join(tmp, "targets", "box", "dnf", PACKAGE)
+            # The same payload under another repo directory is stored only once
+            write_package(os.path.join(tmp, "targets", "box", "dnf"),
+                          PACKAGE.replace("fedora-1a2b3c", "updates-4d5e6f"))
+            added_duplicate = pkgcache.collect("dnf")
+
+        objects = [name for _, _, names in os.walk(os.path.join(tmp, "objects")) for name in names]
+        same_inode = os.path.samefile(downloaded, seeded)
+
+    if (added, added_again, linked, added_duplicate) != (1, 0, 1, 0):
+        print(f"   ❌ FAILED: Unexpected counts added={added} again={added_again} "
+              f"linked={linked} duplicate={added_duplicate}")
+        return False
+    if len(objects) != 1 or not same_inode:
+        print(f"   ❌ FAILED: Expected one shared object, got {objects} (same inode: {same_inode})")
+        return False
+
+    print("   ✅ PASSED: One stored copy shared by both targets")
+    return True
+
+
+def test_update_dnf_uses_cache():
+    """Test: update_dnf() keeps DNF's downloads in its own cache and collects them into the store."""
+    print("Testing: DNF Update Through the Cache...")
+
+    commands = []
+
+    with tempfile.TemporaryDirectory() as tmp, patch.object(pkgcache, "root", os.path.join(tmp, "store")), \
+         patch.dict(pkgcache.SYSTEM_DOWNLOAD_DIRS, {"dnf": os.path.join(tmp, "var-cache-dnf")}), \
+         patch('os.geteuid', return_value=0):
+        target_dir = pkgcache.SYSTEM_DOWNLOAD_DIRS["dnf"]
+
+        def fake_run(cmd, show_live_output=False, check=True):
+            commands.append(cmd)
+            if "update" in cmd:
+                write_package(target_dir, PACKAGE)
+            return subprocess.CompletedProcess(cmd, 0, stdout="4.22.0\n", stderr="")
+
+        with patch('src.package_managers.dnf.runner.run', side_effect=fake_run), \
+             patch('src.core.pkgcache.runner.run', side_effect=fake_run):
+            dnf.update_dnf()
+        stored = os.listdir(os.path.join(tmp, "store", "names", "dnf", "fedora-1a2b3c", "packages"))
+
+    update_cmd = [cmd for cmd in commands if "update" in cmd and "-y" in cmd][0]
+    if update_cmd != ["sudo", "dnf", "update", "-y", "--setopt=keepcache=True"]:
+        print(f"   ❌ FAILED: Unexpected update command {update_cmd}")
+        return False
+    if stored != [os.path.basename(PACKAGE)]:
+        print(f"   ❌ FAILED: Download not collected, store has {stored}")
+        return False
+
+    print("   ✅ PASSED: Download stored in the shared cache")
+    return True
+
+
+def test_root_helper():
+    """Test: Without root, seeding and collecting run through sudo on the local machine."""
+    print("Testing: Root Helper...")
+
+    commands = []
+
+    def fake_run(cmd, show_live_output=False, check=True):
+        commands.append((cmd, transport.current().is_local))
+        return subprocess.CompletedProcess(cmd, 0, stdout="3\n", stderr="")
+
+    toolbox = transport.ContainerTransport("fedora-toolbox-41", host_root="/run/host")
+    with patch.object(pkgcache, "root", ROOT), patch('os.geteuid', return_value=1000), \
+         patch('src.core.pkgcache.runner.run', side_effect=fake_run), transport.use(toolbox):
+        added = pkgcache.collect("apt")
+
+    cmd, local = commands[-1]
+    expected = ["-m", "src.core.pkgcache", "collect", "apt", ROOT, f"{ROOT}/targets/fedora-toolbox-41/apt"]
+    if added != 3 or cmd[:2] != ["sudo", "env"] or cmd[-len(expected):] != expected or not local:
+        print(f"   ❌ FAILED: Unexpected helper call {commands} (added {added})")
+        return False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_package(os.path.join(tmp, "downloads"), "bash_5.2-1_amd64.deb")
+        result = subprocess.run([sys.executable, "-m", "src.core.pkgcache", "collect", "apt",
+                                 os.path.join(tmp, "store"), os.path.join(tmp, "downloads")],
+                                cwd=os.path.join(os.path.dirname(__file__), '..', '..'),
+                                capture_output=True, text=True, timeout=30)
+    if result.stdout.strip() != "1":
+        print(f"   ❌ FAILED: Helper printed {result.stdout!r} {result.stderr!r}")
+        return False
+
+    print("   ✅ PASSED: Helper run locally through sudo, 1 package collected by the module entry point")
+    return True
+
+
+def main():
+    """Run all shared package cache tests."""
+    print("=" * 60)
+    print("Shared Package Cache Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Cache Options per Transport", test_cache_options()))
+    print()
+    results.append(("Collect and Seed", test_collect_and_seed()))
+    print()
+    results.append(("DNF Update Through the Cache", test_update_dnf_uses_cache()))
+    print()
+    results.append(("Root Helper", test_root_helper()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""Package database tests.
+
+Tests for reading the rpmdb and dpkg status databases and diffing package indexes.
+"""
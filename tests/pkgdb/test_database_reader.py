@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""Tests for the installed package database reader.
+
+Tests reading synthetic rpmdb SQLite and dpkg status files (including held
+packages), building the name -> versions index and diffing two indexes.
+"""
+
+import sys
+import os
+import sqlite3
+import struct
+import tempfile
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.core import pkgdb, kernel
+
+
+def make_rpm_header(name, version, release, arch, epoch=None):
+    """Build a minimal rpmdb header blob with the given tags."""
+    entries = []
+    data = b""
+    for tag, value in ((1000, name), (1001, version), (1002, release), (1022, arch)):
+        entries.append(struct.pack(">iIiI", tag, 6, len(data), 1))
+        data += value.encode() + b"\0"
+    if epoch is not None:
+        while len(data) % 4:
+            data += b"\0"
+        entries.append(struct.pack(">iIiI", 1003, 4, len(data), 1))
+        data += struct.pack(">i", epoch)
+    return struct.pack(">II", len(entries), len(data)) + b"".join(entries) + data
+
+
+def make_rpmdb(path, headers):
+    """Create a SQLite database with an rpmdb-style Packages table."""
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE Packages (hnum INTEGER PRIMARY KEY AUTOINCREMENT, blob BLOB NOT NULL)")
+    connection.executemany("INSERT INTO Packages (blob) VALUES (?)", [(h,) for h in headers])
+    connection.commit()
+    connection.close()
+
+
+def test_rpmdb_reader():
+    """Test: Packages are read from an rpmdb SQLite database."""
+    print("Testing: rpmdb SQLite Reader...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rpmdb.sqlite")
+        make_rpmdb(path, [
+            make_rpm_header("kernel-core", "6.12.5", "300.fc41", "x86_64"),
+            make_rpm_header("kernel-core", "6.13.0", "300.fc41", "x86_64"),
+            make_rpm_header("bash", "5.2.32", "1.fc41", "x86_64", epoch=1),
+        ])
+        index = pkgdb.build_index(pkgdb.iter_rpmdb(path))
+
+    if len(index.get("kernel-core", [])) != 2:
+        print(f"   ❌ FAILED: Expected 2 kernel-core entries but got {index.get('kernel-core')}")
+        return False
+
+    if index["bash"][0].evr != "1:5.2.32-1.fc41":
+        print(f"   ❌ FAILED: Expected '1:5.2.32-1.fc41' but got '{index['bash'][0].evr}'")
+        return False
+
+    kernels = sorted(kernel.installed_kernels(index))
+    if kernels != ["6.12.5-300.fc41.x86_64", "6.13.0-300.fc41.x86_64"]:
+        print(f"   ❌ FAILED: Unexpected installed kernels {kernels}")
+        return False
+
+    print("   ✅ PASSED: rpmdb headers parsed into the package index")
+    return True
+
+
+def test_dpkg_status_reader():
+    """Test: Only installed stanzas are read from a dpkg status file."""
+    print("Testing: dpkg Status Reader...")
+
+    status = (
+        "Package: libc6\n"
+        "Status: install ok installed\n"
+        "Architecture: amd64\n"
+        "Version: 2.39-0ubuntu8.3\n"
+        "Description: GNU C Library\n"
+        " multi-line description\n"
+        "\n"
+        "Package: old-package\n"
+        "Status: deinstall ok config-files\n"
+        "Version: 1.0-1\n"
+        "\n"
+        "Package: adduser\n"
+        "Status: install ok installed\n"
+        "Architecture: all\n"
+        "Version: 1:3.137ubuntu1\n"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "status")
+        with open(path, "w") as f:
+            f.write(status)
+        index = pkgdb.build_index(pkgdb.iter_dpkg_status(path))
+
+    if sorted(index) != ["adduser", "libc6"]:
+        print(f"   ❌ FAILED: Unexpected packages {sorted(index)}")
+        return False
+
+    libc = index["libc6"][0]
+    if (libc.version, libc.release) != ("2.39", "0ubuntu8.3"):
+        print(f"   ❌ FAILED: Wrong version split {libc}")
+        return False
+
+    if index["adduser"][0].evr != "1:3.137ubuntu1":
+        print(f"   ❌ FAILED: Expected '1:3.137ubuntu1' but got '{index['adduser'][0].evr}'")
+        return False
+
+    print("   ✅ PASSED: dpkg status parsed correctly")
+    return True
+
+
+def test_dpkg_held_packages():
+    """Test: Held and deinstall-marked packages that are still installed are read."""
+    print("Testing: dpkg Held Packages...")
+
+    status = (
+        "Package: linux-image-amd64\n"
+        "Status: hold ok installed\n"
+        "Architecture: amd64\n"
+        "Version: 6.1.112-1\n"
+        "\n"
+        "Package: nano\n"
+        "Status: deinstall ok installed\n"
+        "Architecture: amd64\n"
+        "Version: 7.2-1\n"
+        "\n"
+        "Package: vim\n"
+        "Status: hold ok not-installed\n"
+        "Version: 2:9.0.1378-2\n"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "status")
+        with open(path, "w") as f:
+            f.write(status)
+        index = pkgdb.build_index(pkgdb.iter_dpkg_status(path))
+
+    if sorted(index) != ["linux-image-amd64", "nano"]:
+        print(f"   ❌ FAILED: Expected the held and deinstall-marked packages, got {sorted(index)}")
+        return False
+    if index["linux-image-amd64"][0].evr != "6.1.112-1":
+        print(f"   ❌ FAILED: Wrong version {index['linux-image-amd64'][0]}")
+        return False
+
+    print("   ✅ PASSED: Held package kept, not-installed one skipped")
+    return True
+
+
+def test_index_diff():
+    """Test: Diffing two indexes reports installed, removed and upgraded packages."""
+    print("Testing: Package Index Diff...")
+
+    before = pkgdb.build_index([
+        pkgdb.Package("bash", 0, "5.2.31", "1.fc41", "x86_64"),
+        pkgdb.Package("vim", 2, "9.1", "1.fc41", "x86_64"),
+        pkgdb.Package("zsh", 0, "5.9", "1.fc41", "x86_64"),
+    ])
+    after = pkgdb.build_index([
+        pkgdb.Package("bash", 0, "5.2.32", "1.fc41", "x86_64"),
+        pkgdb.Package("vim", 2, "9.1", "1.fc41", "x86_64"),
+        pkgdb.Package("kernel-core", 0, "6.13.0", "300.fc41", "x86_64"),
+    ])
+
+    changes = pkgdb.diff(before, after)
+    expected = {
+        "bash": (["5.2.31-1.fc41"], ["5.2.32-1.fc41"]),
+        "zsh": (["5.9-1.fc41"], []),
+        "kernel-core": ([], ["6.13.0-300.fc41"]),
+    }
+    if changes != expected:
+        print(f"   ❌ FAILED: Unexpected diff {changes}")
+        return False
+
+    summary = pkgdb.summarize(changes)
+    if summary != "3 packages changed (1 installed, 1 removed, 1 upgraded)":
+        print(f"   ❌ FAILED: Unexpected summary '{summary}'")
+        return False
+
+    print("   ✅ PASSED: Diff and summary are correct")
+    return True
+
+
+def main():
+    """Run all package database reader tests."""
+    print("=" * 60)
+    print("Package Database Reader Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("rpmdb SQLite Reader", test_rpmdb_reader()))
+    print()
+    results.append(("dpkg Status Reader", test_dpkg_status_reader()))
+    print()
+    results.append(("dpkg Held Packages", test_dpkg_held_packages()))
+    print()
+    results.append(("Package Index Diff", test_index_diff()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""Resource policy tests.
+
+Tests for per-step nice/ionice/cgroup resource policies.
+"""
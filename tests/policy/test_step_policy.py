@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Tests for per-step resource policies.
+
+Tests step type classification, wrapping commands with systemd-run/nice/ionice
+(looked up on the target for remote hosts), step timeouts, and parsing the
+policy configuration file.
+"""
+
+import sys
+import os
+import subprocess
+import tempfile
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.helper import policy, runner, transport
+
+
+def fake_which(name):
+    """Pretend every tool is installed."""
+    return f"/usr/bin/{name}"
+
+
+def test_step_type():
+    """Test: Commands are classified into system, build and apps steps."""
+    print("Testing: Step Type Classification...")
+
+    test_cases = [
+        (["sudo", "dnf", "update", "-y"], "system"),
+        (["sudo", "apt", "upgrade", "-y"], "system"),
+        (["sudo", "akmods", "--force"], "build"),
+        (["sudo", "dracut", "-f", "--regenerate-all"], "build"),
+        (["flatpak", "update", "-y"], "apps"),
+        (["bash", "-lc", "brew upgrade"], "apps"),
+        (["bash", "-lc", "HOMEBREW_NO_AUTO_UPDATE=1 brew fetch --formula git"], "apps"),
+        (["uname", "-r"], None),
+        ([], None),
+    ]
+
+    all_passed = True
+    for cmd, expected in test_cases:
+        result = policy.step_type(cmd)
+        if result != expected:
+            print(f"   ❌ FAILED: For {cmd} expected {expected} but got {result}")
+            all_passed = False
+
+    if all_passed:
+        print("   ✅ PASSED: Step types classified correctly")
+    return all_passed
+
+
+def test_wrap_command():
+    """Test: Policies prefix commands after sudo, unclassified commands are unchanged."""
+    print("Testing: Command Wrapping...")
+
+    limits = {
+        "system": policy.StepPolicy(nice=10, io_class="best-effort", io_priority=7),
+        "build": policy.StepPolicy(nice=19, io_class="idle", io_priority=7,
+                                   cpu_quota="50%", memory_max="2G"),
+    }
+    with patch.dict(policy.policies, limits, clear=True), \
+         patch('src.helper.policy.shutil.which', side_effect=fake_which):
+        system_cmd = policy.wrap(["sudo", "dnf", "update", "-y"])
+        build_cmd = policy.wrap(["sudo", "akmods", "--force"])
+        apps_cmd = policy.wrap(["flatpak", "update", "-y"])
+
+    expected_system = ["sudo", "nice", "-n", "10", "ionice", "-c", "2", "-n", "7",
+                       "dnf", "update", "-y"]
+    expected_build = ["sudo", "systemd-run", "--scope", "--quiet", "--collect",
+                      "--property=CPUQuota=50%", "--property=MemoryMax=2G", "--",
+                      "nice", "-n", "19", "ionice", "-c", "3", "akmods", "--force"]
+
+    if system_cmd != expected_system:
+        print(f"   ❌ FAILED: Unexpected system command {system_cmd}")
+        return False
+    if build_cmd != expected_build:
+        print(f"   ❌ FAILED: Unexpected build command {build_cmd}")
+        return False
+    if apps_cmd != ["flatpak", "update", "-y"]:
+        print(f"   ❌ FAILED: Command without policy was changed: {apps_cmd}")
+        return False
+
+    print("   ✅ PASSED: Commands wrapped according to their policy")
+    return True
+
+
+def test_runner_applies_policy():
+    """Test: runner.run() executes the wrapped command."""
+    print("Testing: Runner Integration...")
+
+    limits = {"apps": policy.StepPolicy(nice=5)}
+    with patch.dict(policy.policies, limits, clear=True), \
+         patch('src.helper.policy.shutil.which', side_effect=fake_which), \
+         patch('src.helper.runner._execute', return_value=subprocess.CompletedProcess([], 0, "", "")) as mock_run:
+        runner.run(["flatpak", "update", "-y"])
+
+    executed = mock_run.call_args[0][0]
+    if executed == ["nice", "-n", "5", "flatpak", "update", "-y"]:
+        print("   ✅ PASSED: Runner executed the wrapped command")
+        return True
+    else:
+        print(f"   ❌ FAILED: Runner executed {executed}")
+        return False
+
+
+def test_remote_tools():
+    """Test: On a remote target, the tools are looked up there, once per tool."""
+    print("Testing: Remote Tools...")
+
+    executed = []
+
+    def fake_execute(full_cmd, show_live_output, timeout, on_line=None, terminal=False):
+        executed.append(full_cmd[-1])
+        missing = full_cmd[-1].endswith("ionice'")
+        return subprocess.CompletedProcess(full_cmd, 1 if missing else 0, "", "")
+
+    limits = {"system": policy.StepPolicy(nice=10, io_class="idle")}
+    with patch.dict(policy.policies, limits, clear=True), \
+         patch.dict(policy._remote_tools, clear=True), \
+         patch('src.helper.policy.shutil.which', side_effect=AssertionError("local lookup")), \
+         patch('src.helper.runner._execute', side_effect=fake_execute), \
+         transport.use(transport.SSHTransport("db1")):
+        runner.run(["sudo", "dnf", "update", "-y"])
+        runner.run(["sudo", "dnf", "update", "-y"])
+
+    expected = ["sh -c 'command -v nice'", "sh -c 'command -v ionice'",
+                "sudo nice -n 10 dnf update -y", "sudo nice -n 10 dnf update -y"]
+    if executed != expected:
+        print(f"   ❌ FAILED: Unexpected remote commands {executed}")
+        return False
+
+    print("   ✅ PASSED: nice used, ionice missing on the host left out")
+    return True
+
+
+def test_step_timeouts():
+    """Test: Step timeouts use the defaults unless configured, 0 disables them."""
+    print("Testing: Step Timeouts...")
+
+    with patch.dict(policy.policies, {}, clear=True):
+        defaults = (policy.timeout(["flatpak", "update", "-y"]), policy.timeout(["sudo", "dnf", "update", "-y"]))
+    configured = policy.parse("[apps]\ntimeout = 0\n[system]\ntimeout = 7200\n")
+    with patch.dict(policy.policies, configured, clear=True):
+        custom = (policy.timeout(["snap", "refresh"]), policy.timeout(["sudo", "apt", "upgrade", "-y"]),
+                  policy.timeout(["sudo", "akmods", "--force"]))
+
+    if defaults != (3600, None):
+        print(f"   ❌ FAILED: Expected default timeouts (3600, None) but got {defaults}")
+        return False
+    if custom != (None, 7200, 3600):
+        print(f"   ❌ FAILED: Expected configured timeouts (None, 7200, 3600) but got {custom}")
+        return False
+    try:
+        policy.parse("[apps]\ntimeout = -5\n")
+    except ValueError:
+        pass
+    else:
+        print("   ❌ FAILED: Negative timeout was accepted")
+        return False
+
+    print("   ✅ PASSED: Timeouts resolved per step type")
+    return True
+
+
+def test_load_config():
+    """Test: Config file sections override the --low-priority preset."""
+    print("Testing: Policy Configuration Loading...")
+
+    config = "[build]\nnice = 15\ncpu_quota = 25%\n"
+    saved = dict(policy.policies)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "policy.conf")
+            with open(path, "w") as f:
+                f.write(config)
+            policy.load(path, low_priority=True)
+        loaded = dict(policy.policies)
+    finally:
+        policy.policies.clear()
+        policy.policies.update(saved)
+
+    if loaded["build"] != policy.StepPolicy(nice=15, cpu_quota="25%"):
+        print(f"   ❌ FAILED: Unexpected build policy {loaded['build']}")
+        return False
+    if loaded["system"] != policy.LOW_PRIORITY["system"]:
+        print(f"   ❌ FAILED: Preset system policy lost: {loaded['system']}")
+        return False
+
+    print("   ✅ PASSED: Config merged over the preset")
+    return True
+
+
+def test_invalid_config():
+    """Test: Unknown sections and io classes raise ValueError."""
+    print("Testing: Invalid Policy Configuration...")
+
+    for text in ["[compile]\nnice = 5\n", "[system]\nio_class = lowest\n", "[apps]\nnice = high\n"]:
+        try:
+            policy.parse(text)
+            print(f"   ❌ FAILED: Expected ValueError for {text!r}")
+            return False
+        except ValueError:
+            pass
+
+    print("   ✅ PASSED: Invalid configuration rejected")
+    return True
+
+
+def main():
+    """Run all resource policy tests."""
+    print("=" * 60)
+    print("Resource Policy Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Step Type Classification", test_step_type()))
+    print()
+    results.append(("Command Wrapping", test_wrap_command()))
+    print()
+    results.append(("Runner Integration", test_runner_applies_policy()))
+    print()
+    results.append(("Remote Tools", test_remote_tools()))
+    print()
+    results.append(("Step Timeouts", test_step_timeouts()))
+    print()
+    results.append(("Policy Configuration Loading", test_load_config()))
+    print()
+    results.append(("Invalid Policy Configuration", test_invalid_config()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
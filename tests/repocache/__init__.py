@@ -0,0 +1,4 @@
+"""Repository metadata check tests.
+
+Tests for finding pending updates from the downloaded repository metadata.
+"""
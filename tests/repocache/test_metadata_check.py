@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""Tests for the repository metadata update check.
+
+Tests reading APT Packages files and DNF primary metadata into cached
+indexes, comparing them with the installed packages, the package manager
+fallback, and the time of a warm check.
+"""
+
+import sys
+import os
+import gzip
+import subprocess
+import tempfile
+import time
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.core import pkgdb, repocache
+
+DEB_INSTALLED = pkgdb.build_index([
+    pkgdb.Package("openssl", 0, "3.0.14", "1~deb12u2", "amd64"),
+    pkgdb.Package("linux-image-amd64", 0, "6.1.128", "1", "amd64"),
+    pkgdb.Package("tzdata", 0, "2024b", "0+deb12u1", "all"),
+    pkgdb.Package("curl", 0, "7.88.1", "10+deb12u8", "amd64"),
+])
+
+MAIN_PACKAGES = """Package: openssl
+Version: 3.0.14-1~deb12u2
+Architecture: amd64
+Description: Secure Sockets Layer toolkit
+ multi-line description
+ Package: not-a-field
+
+Package: tzdata
+Version: 2024b-0+deb12u1
+Architecture: all
+
+Package: curl
+Version: 7.88.1-10+deb12u8
+Architecture: amd64
+"""
+
+# Ubuntu orders Architecture before Version
+SECURITY_PACKAGES = """Package: openssl
+Architecture: amd64
+Version: 3.0.15-1~deb12u1
+
+Package: linux-image-amd64
+Architecture: amd64
+Version: 6.1.129-1
+"""
+
+BACKPORTS_PACKAGES = """Package: curl
+Version: 8.11.1-1~bpo12+1
+Architecture: amd64
+"""
+
+RPM_INSTALLED = pkgdb.build_index([
+    pkgdb.Package("kernel-core", 0, "6.17.9", "300.fc43", "x86_64"),
+    pkgdb.Package("kernel-core", 0, "6.17.10", "300.fc43", "x86_64"),
+    pkgdb.Package("bash", 0, "5.2.37", "1.fc43", "x86_64"),
+    pkgdb.Package("tzdata", 0, "2025a", "1.fc43", "noarch"),
+])
+
+PRIMARY = """<?xml version="1.0" encoding="UTF-8"?>
+<metadata xmlns="http://linux.duke.edu/metadata/common" xmlns:rpm="http://linux.duke.edu/metadata/rpm" packages="4">
+<package type="rpm"><name>kernel-core</name><arch>x86_64</arch><version epoch="0" ver="6.17.12" rel="300.fc43"/></package>
+<package type="rpm"><name>kernel-core</name><arch>x86_64</arch><version epoch="0" ver="6.17.11" rel="300.fc43"/></package>
+<package type="rpm"><name>bash</name><arch>x86_64</arch><version epoch="0" ver="5.2.37" rel="1.fc43"/></package>
+<package type="rpm"><name>bash</name><arch>src</arch><version epoch="0" ver="5.3.0" rel="1.fc43"/></package>
+<package type="rpm"><name>tzdata</name><arch>noarch</arch><version epoch="0" ver="2025b" rel="1.fc43"/></package>
+</metadata>
+"""
+
+REPOMD = """<?xml version="1.0" encoding="UTF-8"?>
+<repomd xmlns="http://linux.duke.edu/metadata/repo">
+  <data type="filelists"><location href="repodata/abc-filelists.xml.gz"/></data>
+  <data type="primary">
+    <checksum type="sha256">def</checksum>
+    <location href="repodata/def-primary.xml.gz"/>
+  </data>
+</repomd>
+"""
+
+
+def write(path, content, mode="w"):
+    """Write a file, creating its directory."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, mode) as f:
+        f.write(content)
+
+
+def write_apt_lists(lists):
+    """Create main, security and backports Packages files with their Release files."""
+    prefix = os.path.join(lists, "deb.debian.org_debian_dists_")
+    write(prefix + "bookworm_main_binary-amd64_Packages", MAIN_PACKAGES)
+    write(prefix + "bookworm_InRelease", "Origin: Debian\nSuite: stable\n")
+    write(prefix + "bookworm-security_main_binary-amd64_Packages", SECURITY_PACKAGES)
+    write(prefix + "bookworm-backports_main_binary-amd64_Packages", BACKPORTS_PACKAGES)
+    write(prefix + "bookworm-backports_InRelease", "Origin: Debian Backports\nNotAutomatic: yes\n"
+                                                   "ButAutomaticUpgrades: no\n")
+
+
+def test_apt_lists():
+    """Test: APT Packages files are indexed once and compared with the installed packages."""
+    print("Testing: APT Packages Files...")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        lists = os.path.join(tmpdir, "lists")
+        write_apt_lists(lists)
+
+        builds = []
+        original = repocache._read_deb_packages
+
+        def counting_reader(path):
+            builds.append(path)
+            return original(path)
+
+        with patch.object(repocache, 'INDEX_DIR', os.path.join(tmpdir, "index")), \
+             patch('src.core.repocache._read_deb_packages', side_effect=counting_reader):
+            indexes = repocache._apt_indexes(lists)
+            repocache._apt_indexes(lists)
+
+    if len(indexes) != 2 or len(builds) != 2:
+        print(f"   ❌ FAILED: Expected 2 indexes built once (backports skipped), got {len(indexes)}/{builds}")
+        return False
+
+    packages, kernel = repocache.compare(DEB_INSTALLED, [index for _path, index in indexes], "apt")
+    if packages != ["linux-image-amd64", "openssl"] or kernel != "6.1.129-1":
+        print(f"   ❌ FAILED: Unexpected pending updates {packages}, kernel {kernel}")
+        return False
+
+    print("   ✅ PASSED: openssl and the kernel pending, backports ignored")
+    return True
+
+
+def test_dnf_cache():
+    """Test: Primary metadata of the enabled repositories is found through repomd.xml."""
+    print("Testing: DNF Primary Metadata...")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache, repos = os.path.join(tmpdir, "cache"), os.path.join(tmpdir, "repos")
+        write(os.path.join(repos, "fedora.repo"), "[updates]\nname=Updates\nenabled=1\n\n"
+                                                   "[updates-testing]\nname=Testing\nenabled=0\n")
+        for repo_dir in ("updates-4f1a9b2c3d4e5f60", "updates-testing-0a1b2c3d4e5f6071"):
+            write(os.path.join(cache, repo_dir, "repodata", "repomd.xml"), REPOMD)
+            write(os.path.join(cache, repo_dir, "repodata", "def-primary.xml.gz"),
+                  gzip.compress(PRIMARY.encode()), "wb")
+
+        with patch.object(repocache, 'INDEX_DIR', os.path.join(tmpdir, "index")):
+            indexes = repocache._dnf_indexes([cache], [repos])
+            write(os.path.join(repos, "extra.repo"), "[copr-tool]\nname=Copr\n")
+            incomplete = repocache._dnf_indexes([cache], [repos])
+
+    if indexes is None or len(indexes) != 1 or "updates-testing" in indexes[0][0]:
+        print(f"   ❌ FAILED: Expected only the enabled repository, got {indexes}")
+        return False
+    if incomplete is not None:
+        print("   ❌ FAILED: An enabled repository without cached metadata should give no answer")
+        return False
+
+    packages, kernel = repocache.compare(RPM_INSTALLED, [indexes[0][1]], "dnf")
+    if packages != ["kernel-core", "tzdata"] or kernel != "6.17.12-300.fc43":
+        print(f"   ❌ FAILED: Unexpected pending updates {packages}, kernel {kernel}")
+        return False
+
+    print("   ✅ PASSED: kernel-core and tzdata pending, disabled repository and sources ignored")
+    return True
+
+
+def test_package_manager_fallback():
+    """Test: dnf check-upgrade output is parsed when the metadata cannot be read."""
+    print("Testing: Package Manager Fallback...")
+
+    output = ("\nkernel-core.x86_64          6.17.12-300.fc43        updates\n"
+              "tzdata.noarch               2025b-1.fc43            updates\n"
+              "Obsoleting Packages\n"
+              "    grub2-tools.x86_64        1:2.12-10.fc43          updates\n")
+
+    def fake_run(cmd, show_live_output=False, check=True):
+        return subprocess.CompletedProcess(cmd, 100, stdout=output, stderr="")
+
+    with patch('src.core.repocache._manager', return_value="dnf"), \
+         patch('src.helper.runner.run', side_effect=fake_run):
+        pending = repocache.query_package_manager()
+
+    expected = repocache.Pending("dnf", ["kernel-core", "tzdata"], "6.17.12-300.fc43", None)
+    if pending != expected:
+        print(f"   ❌ FAILED: Expected {expected} but got {pending}")
+        return False
+
+    summary = repocache.summarize(pending)
+    if summary != "2 DNF updates pending, including kernel 6.17.12-300.fc43":
+        print(f"   ❌ FAILED: Unexpected summary {summary}")
+        return False
+
+    print("   ✅ PASSED: 2 updates parsed, obsoletes section skipped")
+    return True
+
+
+def test_warm_check_time():
+    """Test: A check with warm indexes of 60000 packages takes milliseconds."""
+    print("Testing: Warm Check Time...")
+
+    stanzas = "".join(f"Package: pkg{i}\nVersion: 1.{i % 7}-1\nArchitecture: amd64\n"
+                      f"Description: filler package {i}\n\n" for i in range(60000))
+    installed = pkgdb.build_index(pkgdb.Package(f"pkg{i}", 0, f"1.{i % 7}", "1", "amd64") for i in range(3000))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        lists = os.path.join(tmpdir, "lists")
+        write(os.path.join(lists, "archive.ubuntu.com_ubuntu_dists_noble_main_binary-amd64_Packages"), stanzas)
+        with patch.object(repocache, 'INDEX_DIR', os.path.join(tmpdir, "index")):
+            start = time.perf_counter()
+            repocache._apt_indexes(lists)
+            cold = time.perf_counter() - start
+
+            start = time.perf_counter()
+            indexes = repocache._apt_indexes(lists)
+            packages, _kernel = repocache.compare(installed, [index for _path, index in indexes], "apt")
+            warm = time.perf_counter() - start
+
+    if packages:
+        print(f"   ❌ FAILED: Unexpected pending updates {packages[:5]}")
+        return False
+    if warm > 0.25:
+        print(f"   ❌ FAILED: Warm check took {warm * 1000:.0f} ms")
+        return False
+
+    print(f"   ✅ PASSED: Cold {cold * 1000:.0f} ms, warm {warm * 1000:.0f} ms")
+    return True
+
+
+def main():
+    """Run all repository metadata check tests."""
+    print("=" * 60)
+    print("Repository Metadata Check Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("APT Packages Files", test_apt_lists()))
+    print()
+    results.append(("DNF Primary Metadata", test_dnf_cache()))
+    print()
+    results.append(("Package Manager Fallback", test_package_manager_fallback()))
+    print()
+    results.append(("Warm Check Time", test_warm_check_time()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""Restart detection tests.
+
+Tests for finding the services and reboot needed after an update.
+"""
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Tests for restart and reboot detection.
+
+Tests scanning memory maps for deleted libraries, mapping processes to
+systemd units, the minimal restart plan, and the scan time with thousands
+of processes.
+"""
+
+import sys
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.core import restarts
+
+CURRENT_MAPS = """\
+55d0c0a00000-55d0c0a21000 r--p 00000000 fd:01 1311                       /usr/sbin/sshd
+7f1c2a000000-7f1c2a1a0000 r-xp 00028000 fd:01 2456                       /usr/lib64/libc.so.6
+7f1c2a400000-7f1c2a600000 rw-s 00000000 00:01 7                          /dev/shm/cache (deleted)
+7f1c2a600000-7f1c2a800000 r--p 00000000 fd:01 3001                       /usr/lib/locale/locale-archive (deleted)
+7ffd2c000000-7ffd2c021000 rw-p 00000000 00:00 0                          [stack]
+"""
+OLD_LIBRARY_MAPS = CURRENT_MAPS + \
+    "7f1c2b000000-7f1c2b100000 r-xp 00010000 fd:01 2461                       /usr/lib64/libssl.so.3.2.2 (deleted)\n"
+
+PROCESSES = {
+    1: ("systemd", "0::/init.scope\n", OLD_LIBRARY_MAPS),
+    812: ("sshd", "0::/system.slice/sshd.service\n", OLD_LIBRARY_MAPS),
+    813: ("sshd", "0::/system.slice/sshd.service\n", OLD_LIBRARY_MAPS),
+    900: ("chronyd", "0::/system.slice/chronyd.service\n", CURRENT_MAPS),
+    1500: ("pipewire", "0::/user.slice/user-1000.slice/user@1000.service/session.slice/pipewire.service\n",
+           OLD_LIBRARY_MAPS),
+    2100: ("firefox", "0::/user.slice/user-1000.slice/user@1000.service/app.slice/app-firefox-2100.scope\n",
+           CURRENT_MAPS),
+    2200: ("vim", "0::/user.slice/user-1000.slice/session-3.scope\n", OLD_LIBRARY_MAPS),
+    2300: ("legacy", "9:name=systemd:/system.slice/legacy.service\n4:memory:/\n", OLD_LIBRARY_MAPS),
+}
+
+
+def write_proc(root, processes):
+    """Create a fake procfs tree with comm, cgroup and maps files."""
+    for pid, (comm, cgroup, maps) in processes.items():
+        directory = os.path.join(root, str(pid))
+        os.makedirs(directory)
+        for name, content in (("comm", comm + "\n"), ("cgroup", cgroup), ("maps", maps)):
+            with open(os.path.join(directory, name), "w") as f:
+                f.write(content)
+    os.makedirs(os.path.join(root, "self"), exist_ok=True)
+
+
+def test_scan():
+    """Test: Only processes mapping deleted system libraries or executables are found."""
+    print("Testing: Memory Map Scan...")
+
+    with tempfile.TemporaryDirectory() as proc:
+        write_proc(proc, PROCESSES)
+        pids = restarts.scan(proc)
+
+    if pids != [1, 812, 813, 1500, 2200, 2300]:
+        print(f"   ❌ FAILED: Unexpected processes {pids}")
+        return False
+
+    print("   ✅ PASSED: Deleted shared memory and locale archive ignored")
+    return True
+
+
+def test_plan():
+    """Test: Processes are reduced to the minimal set of units to restart."""
+    print("Testing: Minimal Restart Plan...")
+
+    with tempfile.TemporaryDirectory() as proc:
+        write_proc(proc, PROCESSES)
+        with patch('src.core.restarts._pending_kernel', return_value=None):
+            restart_plan = restarts.plan(proc)
+        with patch('src.core.restarts._pending_kernel', return_value="6.13.0-300.fc41.x86_64"):
+            reboot_plan = restarts.plan(proc)
+
+    expected = restarts.RestartPlan(
+        reboot=None,
+        reexec=True,
+        services=["legacy.service", "sshd.service"],
+        user_services=["pipewire.service (user 1000)"],
+        processes=["vim[2200]"],
+    )
+    if restart_plan != expected:
+        print(f"   ❌ FAILED: Expected {expected} but got {restart_plan}")
+        return False
+    if reboot_plan != restarts.RestartPlan(reboot="6.13.0-300.fc41.x86_64"):
+        print(f"   ❌ FAILED: A pending kernel should only report the reboot, got {reboot_plan}")
+        return False
+
+    summary = restarts.summarize(restart_plan)
+    if "sudo systemctl restart legacy.service sshd.service" not in summary or "daemon-reexec" not in summary:
+        print(f"   ❌ FAILED: Unexpected summary:\n{summary}")
+        return False
+
+    print("   ✅ PASSED: 2 services, 1 user service and 1 program instead of a reboot")
+    return True
+
+
+def test_scan_time():
+    """Test: Scanning thousands of processes takes well under a second."""
+    print("Testing: Scan Time with 3000 Processes...")
+
+    # A typical process maps a few hundred files
+    large_maps = CURRENT_MAPS * 60
+    processes = {pid: ("worker", "0::/system.slice/worker.service\n", large_maps) for pid in range(1000, 4000)}
+    processes[4000] = ("sshd", "0::/system.slice/sshd.service\n", OLD_LIBRARY_MAPS)
+
+    with tempfile.TemporaryDirectory() as proc:
+        write_proc(proc, processes)
+        start = time.perf_counter()
+        with patch('src.core.restarts._pending_kernel', return_value=None):
+            restart_plan = restarts.plan(proc)
+        elapsed = time.perf_counter() - start
+
+    if restart_plan.services != ["sshd.service"]:
+        print(f"   ❌ FAILED: Unexpected plan {restart_plan}")
+        return False
+    if elapsed > 1.0:
+        print(f"   ❌ FAILED: Scan took {elapsed:.2f}s")
+        return False
+
+    print(f"   ✅ PASSED: Scanned 3001 processes in {elapsed * 1000:.0f} ms")
+    return True
+
+
+def main():
+    """Run all restart detection tests."""
+    print("=" * 60)
+    print("Restart Detection Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Memory Map Scan", test_scan()))
+    print()
+    results.append(("Minimal Restart Plan", test_plan()))
+    print()
+    results.append(("Scan Time with 3000 Processes", test_scan_time()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
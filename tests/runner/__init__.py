@@ -0,0 +1,4 @@
+"""Command runner tests.
+
+Tests for process-group cancellation and step timeouts.
+"""
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Tests for command cancellation.
+
+Tests that timed out and interrupted commands are cancelled together with
+everything they started, escalating from SIGTERM to SIGKILL, and which
+commands get the terminal on stdin.
+"""
+
+import sys
+import os
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.helper import runner
+
+
+def process_alive(pid):
+    """Check if a process exists (and is not a zombie)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except OSError:
+        return False
+
+
+def wait_for_exit(pid, seconds=2.0):
+    """Wait until a process has exited, returning False if it is still alive."""
+    deadline = time.monotonic() + seconds
+    while process_alive(pid):
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def test_timeout_cancels_group():
+    """Test: A timed out command is cancelled together with its children."""
+    print("Testing: Timeout Cancels Process Group...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pid_file = os.path.join(tmp, "child.pid")
+        cmd = ["sh", "-c", f"sleep 30 & echo $! > {pid_file}; wait"]
+        start = time.monotonic()
+        try:
+            with patch('src.helper.policy.timeout', return_value=0.5):
+                runner.run(cmd)
+        except runner.CommandTimeoutError:
+            pass
+        else:
+            print("   ❌ FAILED: No CommandTimeoutError raised")
+            return False
+        elapsed = time.monotonic() - start
+        with open(pid_file) as f:
+            child = int(f.read())
+
+    if elapsed > 5:
+        print(f"   ❌ FAILED: Cancelling took {elapsed:.1f}s")
+        return False
+    if not wait_for_exit(child):
+        os.kill(child, signal.SIGKILL)
+        print("   ❌ FAILED: Child process survived the timeout")
+        return False
+
+    print(f"   ✅ PASSED: Command and child cancelled after {elapsed:.1f}s")
+    return True
+
+
+def test_escalates_to_sigkill():
+    """Test: Commands ignoring SIGTERM are killed after the grace period."""
+    print("Testing: SIGTERM to SIGKILL Escalation...")
+
+    start = time.monotonic()
+    try:
+        with patch('src.helper.policy.timeout', return_value=0.3), \
+             patch.object(runner, "TERMINATE_GRACE", 0.5):
+            runner.run(["sh", "-c", "trap '' TERM; sleep 30"])
+    except runner.CommandTimeoutError:
+        pass
+    else:
+        print("   ❌ FAILED: No CommandTimeoutError raised")
+        return False
+    elapsed = time.monotonic() - start
+
+    if elapsed > 5:
+        print(f"   ❌ FAILED: Escalation took {elapsed:.1f}s")
+        return False
+
+    print(f"   ✅ PASSED: Command killed after {elapsed:.1f}s")
+    return True
+
+
+def test_terminate_all():
+    """Test: terminate_all() cancels commands running in other threads."""
+    print("Testing: Cancel All Running Commands...")
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(runner.run(["sleep", "30"], check=False)))
+    thread.start()
+
+    deadline = time.monotonic() + 2
+    while not runner._processes and time.monotonic() < deadline:
+        time.sleep(0.02)
+    runner.terminate_all()
+    thread.join(timeout=5)
+
+    if thread.is_alive() or not results:
+        print("   ❌ FAILED: Command still running after terminate_all()")
+        return False
+    if results[0].returncode != -signal.SIGTERM:
+        print(f"   ❌ FAILED: Expected exit by SIGTERM but got {results[0].returncode}")
+        return False
+    if runner._processes:
+        print("   ❌ FAILED: Cancelled command still tracked")
+        return False
+
+    print("   ✅ PASSED: Running command cancelled")
+    return True
+
+
+def test_terminate_all_without_lock():
+    """Test: terminate_all() does not wait for the lock held by the interrupted thread."""
+    print("Testing: Cancel From Signal Handler...")
+
+    thread = threading.Thread(target=runner.terminate_all, daemon=True)
+    with runner._processes_lock:
+        thread.start()
+        thread.join(timeout=2)
+
+    if thread.is_alive():
+        print("   ❌ FAILED: terminate_all() blocked on the lock")
+        return False
+
+    print("   ✅ PASSED: terminate_all() returned while the lock was held")
+    return True
+
+
+def test_terminal_on_stdin():
+    """Test: Only live system steps on a terminal read from it; other sudo commands use -n."""
+    print("Testing: Terminal On Stdin...")
+
+    executed = []
+
+    def fake_execute(full_cmd, show_live_output, timeout, on_line=None, terminal=False):
+        executed.append((full_cmd, terminal))
+        return subprocess.CompletedProcess(full_cmd, 0, "", "")
+
+    tty = type("Terminal", (), {"isatty": lambda self: True, "fileno": lambda self: 0})()
+    with patch('src.helper.runner._execute', side_effect=fake_execute):
+        runner.run(["sudo", "apt", "upgrade", "-y"], show_live_output=True)
+        with patch('src.helper.runner.sys.stdin', tty):
+            runner.run(["sudo", "apt", "upgrade", "-y"], show_live_output=True)
+            runner.run(["sudo", "apt", "upgrade", "-y"])
+            runner.run(["sudo", "snap", "refresh"], show_live_output=True)
+
+    expected = [
+        (["sudo", "-n", "apt", "upgrade", "-y"], False),
+        (["sudo", "apt", "upgrade", "-y"], True),
+        (["sudo", "-n", "apt", "upgrade", "-y"], False),
+        (["sudo", "-n", "snap", "refresh"], False),
+    ]
+    if executed != expected:
+        print(f"   ❌ FAILED: Expected {expected} but got {executed}")
+        return False
+
+    print("   ✅ PASSED: Live system step in the foreground, everything else non-interactive")
+    return True
+
+
+def main():
+    """Run all command cancellation tests."""
+    print("=" * 60)
+    print("Command Cancellation Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Timeout Cancels Process Group", test_timeout_cancels_group()))
+    print()
+    results.append(("SIGTERM to SIGKILL Escalation", test_escalates_to_sigkill()))
+    print()
+    results.append(("Cancel All Running Commands", test_terminate_all()))
+    print()
+    results.append(("Cancel From Signal Handler", test_terminate_all_without_lock()))
+    print()
+    results.append(("Terminal On Stdin", test_terminal_on_stdin()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
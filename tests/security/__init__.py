@@ -0,0 +1,4 @@
+"""Security-only update tests.
+
+Tests for the --security-only fast path.
+"""
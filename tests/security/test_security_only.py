@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Tests for security-only updates.
+
+Tests the DNF advisory filter, selecting packages from the APT security
+pocket without the kept-back ones, and the Fedora flow skipping apps and
+rebuilds without a new kernel.
+"""
+
+import sys
+import os
+import subprocess
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.distros.fedora_distro import FedoraDistro
+from src.package_managers import apt
+
+APT_UPGRADABLE = """Listing... Done
+libssl3/bookworm-security 3.0.15-1~deb12u1 amd64 [upgradable from: 3.0.14-1~deb12u2]
+openssl/bookworm-updates,bookworm-security 3.0.15-1~deb12u1 amd64 [upgradable from: 3.0.14-1~deb12u2]
+tzdata/bookworm-updates 2024b-0+deb12u1 all [upgradable from: 2024a-0+deb12u1]
+linux-image-amd64/bookworm-security 6.1.115-1 amd64 [upgradable from: 6.1.112-1]
+"""
+
+# linux-image-amd64 needs a new kernel package, so a plain upgrade keeps it back
+APT_SIMULATED = """Reading package lists...
+The following packages have been kept back:
+  linux-image-amd64
+Inst libssl3 [3.0.14-1~deb12u2] (3.0.15-1~deb12u1 Debian-Security:12/stable-security [amd64])
+Inst openssl [3.0.14-1~deb12u2] (3.0.15-1~deb12u1 Debian-Security:12/stable-security [amd64])
+Inst tzdata [2024a-0+deb12u1] (2024b-0+deb12u1 Debian:12.8/stable-updates [all])
+Conf libssl3 (3.0.15-1~deb12u1 Debian-Security:12/stable-security [amd64])
+"""
+
+
+def test_apt_security_pocket():
+    """Test: Only packages from a security suite that are not kept back are upgraded."""
+    print("Testing: APT Security Pocket...")
+
+    executed = []
+
+    def fake_run(cmd, show_live_output=False, check=True):
+        executed.append(cmd)
+        stdout = {"list": APT_UPGRADABLE, "-s": APT_SIMULATED}.get(cmd[1], "")
+        return subprocess.CompletedProcess(cmd, 0, stdout=stdout, stderr="")
+
+    with patch('src.package_managers.apt.runner.run', side_effect=fake_run):
+        apt.update_apt(security_only=True)
+
+    expected = ["sudo", "apt", "install", "--only-upgrade", "-y", *apt.NONINTERACTIVE_OPTIONS, "libssl3", "openssl"]
+    if executed[-1] != expected:
+        print(f"   ❌ FAILED: Expected {expected} but got {executed[-1]}")
+        return False
+
+    executed.clear()
+    with patch('src.package_managers.apt.runner.run',
+               side_effect=lambda cmd, show_live_output=False, check=True:
+               subprocess.CompletedProcess(cmd, 0, stdout="Listing... Done\n", stderr="")) as mock_run:
+        message = apt.update_apt(security_only=True)
+    if message != "No security updates available." or mock_run.call_count != 3:
+        print(f"   ❌ FAILED: Expected no upgrade without security updates, got '{message}'")
+        return False
+
+    print("   ✅ PASSED: libssl3 and openssl upgraded, tzdata and the kept-back kernel left alone")
+    return True
+
+
+def run_fedora_security_update(brew=False, apps=False, kernel_available=False, kernel_installed=False):
+    """Run a security-only FedoraDistro.update() with all external effects mocked.
+
+    Returns:
+        List of the DNF commands and other steps that ran.
+    """
+    calls = []
+
+    def fake_dnf_run(cmd, show_live_output=False, check=True):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout="", stderr="")
+
+    def record(name):
+        def step(*args, **kwargs):
+            calls.append(name)
+        return step
+
+    with patch('src.core.kernel.new_kernel_version', return_value=kernel_available) as check, \
+         patch('src.core.kernel.get_new_kernel_version', return_value="6.13.0"), \
+         patch('src.core.kernel.kernel_installed', return_value=kernel_installed), \
+         patch('src.package_managers.dnf.runner.run', side_effect=fake_dnf_run), \
+         patch('src.package_managers.snap.update_snap', side_effect=record("snap")), \
+         patch('src.package_managers.flatpak.update_flatpak', side_effect=record("flatpak")), \
+         patch('src.package_managers.brew.update_brew', side_effect=record("brew")), \
+         patch('src.core.pkgdb.read_installed', return_value={}), \
+         patch('src.core.pkgdb.diff', return_value={}), \
+         patch('src.helper.locks.holders', return_value=[]), \
+         patch('src.core.deferred.steps_to_retry', return_value=[]), \
+         patch('src.core.init.rebuild_initramfs', side_effect=record("initramfs")), \
+         patch('src.core.nvidia.rebuild_nvidia_modules', side_effect=record("nvidia")):
+        FedoraDistro().update(False, brew, "allow", security_only=True, apps=apps)
+        calls.insert(0, check.call_args)
+    return calls
+
+
+def test_fedora_security_only():
+    """Test: A security-only Fedora run filters advisories and skips apps and rebuilds."""
+    print("Testing: Fedora Security-Only Flow...")
+
+    calls = run_fedora_security_update()
+    kernel_check, steps = calls[0], calls[1:]
+    if kernel_check.args != (True,):
+        print(f"   ❌ FAILED: Kernel check did not filter advisories: {kernel_check}")
+        return False
+    if ["sudo", "dnf", "update", "-y", "--security"] not in steps:
+        print(f"   ❌ FAILED: DNF update without --security: {steps}")
+        return False
+    if any(step in steps for step in ("snap", "flatpak", "brew", "initramfs", "nvidia")):
+        print(f"   ❌ FAILED: Unexpected steps in a security-only run: {steps}")
+        return False
+
+    steps = run_fedora_security_update(brew=True, apps=True, kernel_available=True, kernel_installed=True)[1:]
+    for step in ("snap", "flatpak", "brew", "initramfs", "nvidia"):
+        if step not in steps:
+            print(f"   ❌ FAILED: Expected {step} with --brew, --with-apps and a new kernel: {steps}")
+            return False
+
+    print("   ✅ PASSED: Only security advisories applied, extras only when asked")
+    return True
+
+
+def main():
+    """Run all security-only update tests."""
+    print("=" * 60)
+    print("Security-Only Update Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("APT Security Pocket", test_apt_security_pocket()))
+    print()
+    results.append(("Fedora Security-Only Flow", test_fedora_security_only()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""Snap update tests.
+
+Tests for gating snap refreshes on snapd's state.
+"""
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Tests for the Snap refresh gate.
+
+Tests asking a fake snapd on a Unix socket for pending refreshes, skipping
+`snap refresh` when nothing is pending, and waiting for a running
+auto-refresh instead of queueing a second refresh.
+"""
+
+import sys
+import os
+import json
+import socketserver
+import subprocess
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.helper import snapd_api
+from src.package_managers import snap
+
+
+class FakeSnapd(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """snapd stand-in answering changes and find requests from a state dict."""
+
+    daemon_threads = True
+
+    def __init__(self, path, state):
+        self.state = state
+        self.requests = []
+        super().__init__(path, SnapdHandler)
+
+
+class SnapdHandler(BaseHTTPRequestHandler):
+    """Serve the snapd REST endpoints used by tuxgrade."""
+
+    def address_string(self):
+        return "snapd"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        state = self.server.state
+        self.server.requests.append(self.path)
+        status, result = 200, None
+        if self.path == "/v2/changes?select=in-progress":
+            result = [change for change in state["changes"] if not change["ready"]]
+        elif self.path.startswith("/v2/changes/"):
+            change = next(change for change in state["changes"] if change["id"] == self.path.split("/")[-1])
+            change["polls"] += 1
+            if change["polls"] >= state["polls_until_ready"]:
+                change.update(ready=True, status="Done")
+                state["pending"] = []
+            result = change
+        elif self.path == "/v2/find?select=refresh":
+            status, result = (404, {"message": "snap not found"}) if state["pending"] is None else (200, [
+                {"name": name} for name in state["pending"]])
+        body = json.dumps({"type": "sync", "status-code": status, "result": result}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def run_update(state):
+    """Run update_snap against a fake snapd and return (message, commands, requests)."""
+    calls = []
+
+    def fake_run(cmd, show_live_output=False, check=True):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout="snap 2.66\n", stderr="")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "snapd.socket")
+        server = FakeSnapd(path, state)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with patch.object(snapd_api, 'SNAPD_SOCKET', path), \
+                 patch('src.helper.runner.run', side_effect=fake_run):
+                message = snap.update_snap()
+        finally:
+            server.shutdown()
+            server.server_close()
+    return message, calls, server.requests
+
+
+def test_nothing_pending():
+    """Test: `snap refresh` is skipped when snapd reports no pending refresh."""
+    print("Testing: Nothing Pending...")
+
+    for pending in ([], None):
+        state = {"changes": [], "pending": pending, "polls_until_ready": 1}
+        message, calls, _requests = run_update(state)
+        if ["sudo", "snap", "refresh"] in calls or message != "All snaps up to date.":
+            print(f"   ❌ FAILED: Refresh not skipped ({pending}): {message!r}, {calls}")
+            return False
+
+    print("   ✅ PASSED: No refresh with an empty list or a 404 from older snapd")
+    return True
+
+
+def test_pending_refresh():
+    """Test: Pending refreshes still run `snap refresh`."""
+    print("Testing: Pending Refresh...")
+
+    state = {"changes": [], "pending": ["firefox", "core22"], "polls_until_ready": 1}
+    message, calls, _requests = run_update(state)
+    if ["sudo", "snap", "refresh"] not in calls or message is not None:
+        print(f"   ❌ FAILED: Refresh not run: {message!r}, {calls}")
+        return False
+
+    print("   ✅ PASSED: snap refresh run for 2 pending snaps")
+    return True
+
+
+def test_wait_for_auto_refresh():
+    """Test: A running auto-refresh is waited for instead of queueing another refresh."""
+    print("Testing: Waiting for Auto-Refresh...")
+
+    state = {
+        "changes": [
+            {"id": "42", "kind": "auto-refresh", "summary": "Auto-refresh 2 snaps", "ready": False, "status": "Doing",
+             "polls": 0},
+            {"id": "43", "kind": "connect-snap", "summary": "Connect", "ready": False, "status": "Doing", "polls": 0},
+        ],
+        "pending": ["firefox"],
+        "polls_until_ready": 3,
+    }
+    message, calls, requests = run_update(state)
+
+    if ["sudo", "snap", "refresh"] in calls:
+        print(f"   ❌ FAILED: A second refresh was queued: {calls}")
+        return False
+    if requests.count("/v2/changes/42") != 3 or "/v2/changes/43" in requests:
+        print(f"   ❌ FAILED: Unexpected polling {requests}")
+        return False
+    if message != "Waited for snapd auto-refresh (change 42): Done\nAll snaps up to date.":
+        print(f"   ❌ FAILED: Unexpected message {message!r}")
+        return False
+
+    print("   ✅ PASSED: Waited for change 42, which refreshed everything")
+    return True
+
+
+def main():
+    """Run all Snap refresh gate tests."""
+    print("=" * 60)
+    print("Snap Refresh Gate Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Nothing Pending", test_nothing_pending()))
+    print()
+    results.append(("Pending Refresh", test_pending_refresh()))
+    print()
+    results.append(("Waiting for Auto-Refresh", test_wait_for_auto_refresh()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
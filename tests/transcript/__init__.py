@@ -0,0 +1,4 @@
+"""Transcript tests.
+
+Tests for recording and replaying command transcripts.
+"""
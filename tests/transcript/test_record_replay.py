@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Tests for command transcript recording and replay.
+
+Tests that runner.run() records real commands with their results, and that
+replay returns the same results without starting any process.
+"""
+
+import sys
+import os
+import json
+import tempfile
+import time
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.helper import runner, transcript, transport
+
+COMMANDS = [
+    (["sh", "-c", "echo hello; echo oops >&2"], False),
+    (["sh", "-c", "sleep 0.2; exit 3"], False),
+]
+MISSING_COMMAND = ["tuxgrade-no-such-command"]
+
+
+def run_commands():
+    """Run the test commands and return their results."""
+    results = []
+    for cmd, check in COMMANDS:
+        result = runner.run(cmd, check=check)
+        results.append((result.returncode, result.stdout, result.stderr))
+    try:
+        runner.run(MISSING_COMMAND)
+    except FileNotFoundError:
+        results.append("FileNotFoundError")
+    try:
+        runner.run(["sh", "-c", "exit 1"])
+    except runner.CommandError:
+        results.append("CommandError")
+    return results
+
+
+def record_run(path):
+    """Record the test commands and return their real results."""
+    transcript.start_recording(path)
+    try:
+        return run_commands()
+    finally:
+        transcript.stop()
+
+
+def test_record():
+    """Test: Commands are recorded with host, timing, exit code and output."""
+    print("Testing: Transcript Recording...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "run.jsonl")
+        record_run(path)
+        with open(path) as f:
+            entries = [json.loads(line) for line in f]
+
+    if len(entries) != 4:
+        print(f"   ❌ FAILED: Expected 4 entries but got {len(entries)}")
+        return False
+    first, slow, missing, failed = entries
+    if (first["host"], first["cmd"], first["stdout"], first["stderr"]) != \
+            ("localhost", COMMANDS[0][0], "hello\n", "oops\n"):
+        print(f"   ❌ FAILED: Unexpected first entry {first}")
+        return False
+    if slow["returncode"] != 3 or slow["duration"] < 0.2 or slow["start"] < first["start"]:
+        print(f"   ❌ FAILED: Unexpected timing entry {slow}")
+        return False
+    if missing["error"] != "FileNotFoundError" or failed["returncode"] != 1:
+        print(f"   ❌ FAILED: Unexpected error entries {missing}, {failed}")
+        return False
+
+    print("   ✅ PASSED: 4 commands recorded")
+    return True
+
+
+def test_replay():
+    """Test: Replay reproduces results and timing without running anything."""
+    print("Testing: Transcript Replay...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "run.jsonl")
+        recorded = record_run(path)
+
+        transcript.start_replay(path)
+        try:
+            with patch('src.helper.runner.subprocess.Popen', side_effect=AssertionError("process started")):
+                start = time.monotonic()
+                replayed = run_commands()
+                elapsed = time.monotonic() - start
+        finally:
+            transcript.stop()
+
+    if replayed != recorded:
+        print(f"   ❌ FAILED: Replayed {replayed} but recorded {recorded}")
+        return False
+    if elapsed < 0.2:
+        print(f"   ❌ FAILED: Recorded duration not replayed ({elapsed:.2f}s)")
+        return False
+
+    print(f"   ✅ PASSED: Results replayed in {elapsed:.2f}s without starting processes")
+    return True
+
+
+def test_replay_mismatch():
+    """Test: Commands missing from the transcript or another host's commands raise TranscriptError."""
+    print("Testing: Replay of Unknown Commands...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "run.jsonl")
+        record_run(path)
+        transcript.start_replay(path, replay_speed=0)
+        try:
+            errors = 0
+            for cmd, target in ((["sh", "-c", "echo other"], transport.LOCAL),
+                                (COMMANDS[0][0], transport.SSHTransport("web1"))):
+                with transport.use(target):
+                    try:
+                        runner.run(cmd)
+                    except transcript.TranscriptError:
+                        errors += 1
+        finally:
+            transcript.stop()
+
+    if errors != 2:
+        print(f"   ❌ FAILED: Expected 2 TranscriptErrors but got {errors}")
+        return False
+
+    print("   ✅ PASSED: Unknown commands rejected")
+    return True
+
+
+def main():
+    """Run all transcript tests."""
+    print("=" * 60)
+    print("Transcript Record/Replay Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("Transcript Recording", test_record()))
+    print()
+    results.append(("Transcript Replay", test_replay()))
+    print()
+    results.append(("Replay of Unknown Commands", test_replay_mismatch()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""Version comparison tests.
+
+Tests for RPM and Debian version ordering used by kernel decisions.
+"""
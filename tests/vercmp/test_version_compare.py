@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Tests for RPM and Debian version comparison.
+
+Tests rpmvercmp() and dpkg_compare() against cases from the rpm and dpkg
+test suites, and kernel decisions built on top of them.
+"""
+
+import sys
+import os
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from src.core import vercmp, kernel
+
+
+RPM_CASES = [
+    ("1.0", "1.0", 0), ("1.0", "2.0", -1), ("2.0.1", "2.0.1", 0), ("2.0", "2.0.1", -1),
+    ("2.0.1a", "2.0.1", 1), ("5.5p1", "5.5p2", -1), ("5.5p10", "5.5p1", 1),
+    ("10xyz", "10.1xyz", -1), ("xyz10", "xyz10.1", -1), ("xyz.4", "8", -1),
+    ("6.0.rc1", "6.0", 1), ("10b2", "10a1", 1), ("1.0a", "1.0aa", -1),
+    ("10.0001", "10.1", 0), ("10.0001", "10.0039", -1), ("4.999.9", "5.0", -1),
+    ("2.0", "2_0", 0), ("+", "_", 0),
+    ("1.0~rc1", "1.0", -1), ("1.0~rc1", "1.0~rc2", -1), ("1.0~rc1~git123", "1.0~rc1", -1),
+    ("1.0^", "1.0", 1), ("1.0^git1", "1.01", -1), ("1.0^20160101", "1.0.1", -1),
+    ("1.0^20160101^git1", "1.0^20160101", 1), ("1.0~rc1^git1", "1.0~rc1", 1),
+    ("1.0^git1~pre", "1.0^git1", -1), ("1.0^git1", "1.0~rc1", 1),
+]
+
+DPKG_CASES = [
+    ("1.0", "1.0", 0), ("1.0~rc1", "1.0", -1), ("1.0", "1.0-1", -1), ("1.0-0", "1.0", 0),
+    ("1:1.0", "2.0", 1), ("1.0~~", "1.0~~a", -1), ("1.0~~a", "1.0~", -1), ("1.0~", "1.0", -1),
+    ("1.0", "1.0a", -1), ("1.0a", "1.0+", -1), ("1.0.0", "1.0", 1), ("1.0", "1.00", 0),
+    ("2.39-0ubuntu8.3", "2.39-0ubuntu8.10", -1), ("1.0-1~bpo1", "1.0-1", -1),
+    ("1.2-0", "1.2-0~bpo11+1", 1), ("0", "0~rc1", 1), ("1:0", "1:0~1", 1),
+    ("1.0-0", "1.0-0~", 1), ("0a", "0", 1), ("0.0", "0", 1), ("00~", "0", -1),
+    ("1", "1a0~", -1),
+]
+
+
+def test_rpmvercmp():
+    """Test: rpmvercmp() matches the rpm test suite."""
+    print("Testing: rpmvercmp Ordering...")
+
+    failures = [(a, b, expected, vercmp.rpmvercmp(a, b)) for a, b, expected in RPM_CASES
+                if vercmp.rpmvercmp(a, b) != expected or vercmp.rpmvercmp(b, a) != -expected]
+    if failures:
+        for a, b, expected, got in failures:
+            print(f"   ❌ FAILED: rpmvercmp('{a}', '{b}') expected {expected} but got {got}")
+        return False
+
+    print(f"   ✅ PASSED: All {len(RPM_CASES)} rpmvercmp cases correct")
+    return True
+
+
+def test_dpkg_compare():
+    """Test: dpkg_compare() matches dpkg --compare-versions."""
+    print("Testing: dpkg Version Ordering...")
+
+    failures = [(a, b, expected, vercmp.dpkg_compare(a, b)) for a, b, expected in DPKG_CASES
+                if vercmp.dpkg_compare(a, b) != expected or vercmp.dpkg_compare(b, a) != -expected]
+    if failures:
+        for a, b, expected, got in failures:
+            print(f"   ❌ FAILED: dpkg_compare('{a}', '{b}') expected {expected} but got {got}")
+        return False
+
+    print(f"   ✅ PASSED: All {len(DPKG_CASES)} dpkg cases correct")
+    return True
+
+
+def test_evr_sorting():
+    """Test: EVR strings sort with epoch, version and release precedence."""
+    print("Testing: EVR Sorting...")
+
+    evrs = ["6.13.0-300.fc41", "1:5.0-1", "6.12.10-200.fc41", "6.12.9-200.fc41", "6.13.0-100.fc41"]
+    expected = ["6.12.9-200.fc41", "6.12.10-200.fc41", "6.13.0-100.fc41", "6.13.0-300.fc41", "1:5.0-1"]
+    result = sorted(evrs, key=vercmp.rpm_evr_key)
+
+    if result == expected:
+        print("   ✅ PASSED: EVRs sorted correctly")
+        return True
+    else:
+        print(f"   ❌ FAILED: Expected {expected} but got {result}")
+        return False
+
+
+def test_kernel_decisions():
+    """Test: Kernel decisions compare against the running kernel."""
+    print("Testing: Kernel Decisions Against Running Kernel...")
+
+    uname = os.uname_result(("Linux", "host", "6.12.10-200.fc41.x86_64", "#1", "x86_64"))
+    with patch('src.core.kernel.os.uname', return_value=uname):
+        newest = kernel.newest_kernel(["6.12.9-200.fc41.x86_64", "6.13.0-300.fc41.x86_64", "6.12.10-200.fc41.x86_64"])
+        if newest != "6.13.0-300.fc41.x86_64":
+            print(f"   ❌ FAILED: Expected newest '6.13.0-300.fc41.x86_64' but got '{newest}'")
+            return False
+
+        if kernel.is_newer_than_running("6.12.9-200.fc41") or not kernel.is_newer_than_running("6.13.0-300.fc41"):
+            print("   ❌ FAILED: Wrong comparison against the running kernel")
+            return False
+
+        changes = {"kernel-core": (["6.12.9-200.fc41"], ["6.13.0-300.fc41"])}
+        if not kernel.kernel_installed(changes) or kernel.kernel_installed({"bash": ([], ["5.2-1"])}):
+            print("   ❌ FAILED: kernel_installed() gave the wrong answer")
+            return False
+
+    print("   ✅ PASSED: Kernel decisions are correct")
+    return True
+
+
+def main():
+    """Run all version comparison tests."""
+    print("=" * 60)
+    print("Version Comparison Tests")
+    print("=" * 60)
+    print()
+
+    results = []
+    results.append(("rpmvercmp Ordering", test_rpmvercmp()))
+    print()
+    results.append(("dpkg Version Ordering", test_dpkg_compare()))
+    print()
+    results.append(("EVR Sorting", test_evr_sorting()))
+    print()
+    results.append(("Kernel Decisions", test_kernel_decisions()))
+    print()
+
+    # Print summary
+    print("=" * 60)
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    print(f"Results: {passed}/{total} passed")
+    print("=" * 60)
+
+    return 0 if all(result for _, result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())